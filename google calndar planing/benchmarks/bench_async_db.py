@@ -0,0 +1,146 @@
+"""
+Benchmark: task page reads on the sync session vs. the aiosqlite AsyncSession
+
+Runs the GET /tasks page query concurrently on one event loop:
+
+    sync-inline  sync Session inside the coroutine (blocks the loop, old path)
+    sync-pool    sync Session in a thread pool via run_in_executor
+    async        AsyncSession on the aiosqlite engine (new path)
+
+and reports throughput plus the worst delay of a 5 ms ticker running on the
+same loop, i.e. how long other requests would have waited.
+
+Usage:
+    python benchmarks/bench_async_db.py [--tasks 20000] [--requests 400] [--concurrency 20] [--limit 100]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from models.database import Employee, Task, EmployeeType, TaskType
+from models.engine import create_db_engine, create_async_db_engine, POOL_SIZE, MAX_OVERFLOW
+from models.migrate import upgrade_database
+from services.pagination import keyset_page, keyset_page_async
+
+
+def seed(SessionLocal, tasks: int, employees: int = 50):
+    db = SessionLocal()
+    db.add_all([
+        Employee(name=f"Employee {i}", email=f"employee{i}@firma.sk",
+                 employee_type=EmployeeType.INSTALLER, max_hours_per_week=40.0)
+        for i in range(employees)
+    ])
+    db.flush()
+    start = datetime(2025, 10, 13, 8, 0)
+    db.bulk_insert_mappings(Task, [
+        {
+            'title': f"Úloha {i}", 'task_type': TaskType.INSTALLATION, 'employee_id': i % employees + 1,
+            'start_time': start + timedelta(hours=i), 'end_time': start + timedelta(hours=i + 2),
+            'estimated_hours': 2
+        }
+        for i in range(tasks)
+    ])
+    db.commit()
+    db.close()
+
+
+async def run(read, requests: int, concurrency: int):
+    """(requests per second, worst ticker delay in ms)"""
+    worst_lag = 0.0
+    done = asyncio.Event()
+    
+    async def ticker():
+        nonlocal worst_lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst_lag = max(worst_lag, time.perf_counter() - started - 0.005)
+    
+    remaining = iter(range(requests))
+    
+    async def worker():
+        for i in remaining:
+            await read(i)
+    
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick
+    return requests / elapsed, worst_lag * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100, help="tasks per page")
+    args = parser.parse_args()
+    
+    directory = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{directory.name}/bench.db"
+    engine = create_db_engine(url)
+    upgrade_database(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(SessionLocal, args.tasks)
+    
+    async_engine = create_async_db_engine(url)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    executor = ThreadPoolExecutor(max_workers=POOL_SIZE + MAX_OVERFLOW)
+    key = (Task.start_time, Task.id)
+    
+    def offset(i):
+        # Spread the pages over the table, like users paging different ranges
+        return datetime(2025, 10, 13) + timedelta(hours=(i * 997) % args.tasks)
+    
+    def sync_page(i):
+        db = SessionLocal()
+        try:
+            query = db.query(Task).options(joinedload(Task.employee)).filter(Task.start_time >= offset(i))
+            return keyset_page(query, key, args.limit)
+        finally:
+            db.close()
+    
+    async def sync_inline(i):
+        sync_page(i)
+    
+    async def sync_pool(i):
+        await asyncio.get_running_loop().run_in_executor(executor, sync_page, i)
+    
+    async def async_page(i):
+        async with AsyncSessionLocal() as db:
+            statement = select(Task).options(joinedload(Task.employee)).where(Task.start_time >= offset(i))
+            await keyset_page_async(db, statement, key, args.limit)
+    
+    print(f"{args.tasks} tasks, {args.requests} page reads of {args.limit}, concurrency {args.concurrency}, "
+          f"pool {POOL_SIZE}+{MAX_OVERFLOW}\n")
+    print(f"{'path':<12} {'req/s':>8} {'worst loop lag':>16}")
+    
+    async def scenarios():
+        for name, read in (("sync-inline", sync_inline), ("sync-pool", sync_pool), ("async", async_page)):
+            await run(read, min(args.requests, 20), args.concurrency)  # warm up pools
+            throughput, lag = await run(read, args.requests, args.concurrency)
+            print(f"{name:<12} {throughput:>8.0f} {lag:>13.1f} ms")
+        await async_engine.dispose()
+    
+    asyncio.run(scenarios())
+    executor.shutdown()
+    engine.dispose()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: backing up a database that is being written to
+
+A writer thread keeps committing small task inserts through the read-write
+engine while the database is backed up by:
+- copy2: the old shutil.copy2 of the database file
+- one step: Connection.backup(pages=-1), one read lock for the whole copy
+- SQLiteBackup: stepped in rollback-journal mode, one step in WAL mode
+Reports the backup duration, the slowest and p99 writer commit while it ran,
+and whether the copy passed PRAGMA integrity_check and holds every task
+committed before the backup started.
+
+Usage:
+    python benchmarks/bench_backup.py [--tasks 200000] [--pages-per-step 256] [--step-sleep 0.01] [--write-interval-ms 20]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Task, TaskType
+from models.engine import create_db_engine, SQLITE_PROFILES
+from models.migrate import upgrade_database
+from services.backup import SQLiteBackup, verify_backup
+
+START = datetime(2025, 10, 13, 8, 0)
+
+
+def seed(SessionLocal, tasks: int):
+    db = SessionLocal()
+    for offset in range(0, tasks, 10000):
+        db.bulk_insert_mappings(Task, [
+            {
+                'title': f"Úloha {i}", 'task_type': TaskType.INSTALLATION, 'description': "x" * 200,
+                'start_time': START + timedelta(hours=i), 'end_time': START + timedelta(hours=i + 2),
+                'estimated_hours': 2
+            }
+            for i in range(offset, min(offset + 10000, tasks))
+        ])
+        db.commit()
+    db.close()
+
+
+def copy_file(database: str, target: str, args) -> dict:
+    shutil.copy2(database, target)
+    return {}
+
+
+def copy_one_step(database: str, target: str, args) -> dict:
+    source, destination = sqlite3.connect(database), sqlite3.connect(target)
+    source.backup(destination, pages=-1)
+    destination.close()
+    source.close()
+    return {}
+
+
+def copy_stepped(database: str, target: str, args) -> dict:
+    backup = SQLiteBackup(
+        database, os.path.dirname(target), keep=0, compress=False,
+        pages_per_step=args.pages_per_step, step_sleep=args.step_sleep
+    )
+    report = backup.backup(verify=False)
+    os.replace(report['file'], target)
+    return {'restarts': report['restarts'], 'max_step_ms': report['max_step_ms']}
+
+
+METHODS = [('copy2', copy_file), ('one step', copy_one_step), ('SQLiteBackup', copy_stepped)]
+
+
+def run(profile: str, method, args) -> dict:
+    directory = tempfile.TemporaryDirectory()
+    database = os.path.join(directory.name, "bench.db")
+    engine = create_db_engine(f"sqlite:///{database}", profile=profile)
+    upgrade_database(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(SessionLocal, args.tasks)
+    
+    stop = threading.Event()
+    latency = []
+    
+    def write_loop():
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = SessionLocal()
+            db.add(Task(title="Nová úloha", task_type=TaskType.PRODUCTION, start_time=START,
+                        end_time=START + timedelta(hours=2), estimated_hours=2))
+            db.commit()
+            db.close()
+            latency.append((started, time.perf_counter() - started))
+            time.sleep(args.write_interval_ms / 1000)
+    
+    thread = threading.Thread(target=write_loop)
+    thread.start()
+    time.sleep(0.2)
+    before = len(latency)
+    target = os.path.join(directory.name, "copy.db")
+    started = time.perf_counter()
+    extra = method(database, target, args)
+    finished = time.perf_counter()
+    stop.set()
+    thread.join()
+    # Commits started while the backup ran, including ones it held up
+    during = sorted(elapsed for begin, elapsed in latency if begin <= finished and begin + elapsed >= started) or [0.0]
+    
+    verification = verify_backup(target)
+    tasks = 0
+    if verification['ok']:
+        connection = sqlite3.connect(target)
+        tasks = connection.execute("SELECT count(*) FROM tasks").fetchone()[0]
+        connection.close()
+    engine.dispose()
+    directory.cleanup()
+    return {
+        'seconds': finished - started,
+        'writes': len(during),
+        'write_max_ms': during[-1] * 1000,
+        'write_p99_ms': during[int(len(during) * 0.99) - 1 if len(during) > 1 else 0] * 1000,
+        'ok': verification['ok'] and tasks >= args.tasks + before,
+        **extra
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--pages-per-step", type=int, default=256)
+    parser.add_argument("--step-sleep", type=float, default=0.01)
+    parser.add_argument("--write-interval-ms", type=float, default=20, help="pause between the writer's commits")
+    args = parser.parse_args()
+    
+    print(f"{args.tasks} tasks, a commit every {args.write_interval_ms:g} ms, "
+          f"stepped backup: {args.pages_per_step} pages per step, {args.step_sleep:g} s pause\n")
+    print(f"{'profile':<11} {'method':<12} {'backup':>8} {'writes':>7} {'write p99':>10} {'write max':>10} {'copy ok':>8} {'restarts':>8}")
+    for profile in reversed(SQLITE_PROFILES):
+        for name, method in METHODS:
+            result = run(profile, method, args)
+            print(f"{profile:<11} {name:<12} {result['seconds']:>6.2f} s {result['writes']:>7} "
+                  f"{result['write_p99_ms']:>7.1f} ms {result['write_max_ms']:>7.1f} ms {str(result['ok']):>8} {result.get('restarts', ''):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: syncing a client replica through GET /changes vs reloading all tasks
+
+Seeds --tasks tasks, then edits --edits random tasks one commit each (the
+dispatcher day between two client polls). Compares the JSON a client
+downloads and the time to build it: every task (what the frontend reloads
+today) against the change feed since the previous cursor. Also reports the
+cost the change log adds to a single-task commit and how long compaction
+takes on a log of --log-entries updates.
+
+Usage:
+    python benchmarks/bench_change_feed.py [--tasks 50000] [--edits 200] [--log-entries 200000]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from models.database import ChangeLog, Task, TaskType
+from models.engine import create_db_engine
+from models.migrate import upgrade_database
+from models.schemas import ChangeFeed, TaskResponse
+from services import change_feed
+from services.change_feed import compact_change_log, get_changes
+
+START = datetime(2025, 10, 13, 8, 0)
+
+
+def seed(SessionLocal, tasks: int):
+    db = SessionLocal()
+    for offset in range(0, tasks, 10000):
+        db.bulk_insert_mappings(Task, [
+            {
+                'title': f"Montáž {i}", 'task_type': TaskType.INSTALLATION, 'description': "Zákazník, 3 okná",
+                'location': "Košice, Hlavná 5", 'start_time': START + timedelta(hours=i),
+                'end_time': START + timedelta(hours=i + 2), 'estimated_hours': 2
+            }
+            for i in range(offset, min(offset + 10000, tasks))
+        ])
+        db.commit()
+    db.close()
+
+
+def edit(SessionLocal, tasks: int, count: int, rng: random.Random) -> float:
+    """Median milliseconds of changing one task and committing"""
+    db = SessionLocal()
+    times = []
+    for n in range(count):
+        started = time.perf_counter()
+        db.get(Task, rng.randint(1, tasks)).title = f"Zmenená {n}"
+        db.commit()
+        times.append(time.perf_counter() - started)
+    db.close()
+    return statistics.median(times) * 1000
+
+
+def full_reload(SessionLocal) -> bytes:
+    db = SessionLocal()
+    tasks = db.execute(select(Task).order_by(Task.id)).scalars().all()
+    payload = b"[" + b",".join(TaskResponse.model_validate(task).model_dump_json().encode() for task in tasks) + b"]"
+    db.close()
+    return payload
+
+
+def delta(SessionLocal, since: int) -> bytes:
+    db = SessionLocal()
+    payload, has_more = b"", True
+    while has_more:
+        feed = get_changes(db, since)
+        payload += ChangeFeed.model_validate(feed).model_dump_json().encode()
+        since, has_more = feed['cursor'], feed['has_more']
+    db.close()
+    return payload
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--log-entries", type=int, default=200000)
+    args = parser.parse_args()
+    
+    directory = tempfile.TemporaryDirectory()
+    engine = create_db_engine(f"sqlite:///{directory.name}/changes.db", profile="production")
+    upgrade_database(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    seed(SessionLocal, args.tasks)
+    rng = random.Random(7)
+    
+    db = SessionLocal()
+    cursor = get_changes(db, None)['cursor']
+    db.close()
+    logged_ms = edit(SessionLocal, args.tasks, args.edits, rng)
+    event.remove(Session, "after_flush", change_feed._log_flushed_changes)
+    unlogged_ms = edit(SessionLocal, args.tasks, args.edits, rng)
+    event.listen(Session, "after_flush", change_feed._log_flushed_changes)
+    print(f"Commit of one task edit: {logged_ms:.2f} ms with the change log, {unlogged_ms:.2f} ms without\n")
+    
+    full, full_ms = timed(full_reload, SessionLocal)
+    changes, changes_ms = timed(delta, SessionLocal, cursor)
+    print(f"{'sync':<22} {'bytes':>12} {'time':>10}")
+    print(f"{'reload all tasks':<22} {len(full):>12} {full_ms:>7.1f} ms")
+    print(f"{'changes since cursor':<22} {len(changes):>12} {changes_ms:>7.1f} ms\n")
+    
+    # Log of many edits of few tasks, as after weeks of replanning
+    db = SessionLocal()
+    db.execute(ChangeLog.__table__.insert(), [
+        {'entity': 'task', 'entity_id': rng.randint(1, 2000), 'operation': 'upsert', 'changed_at': datetime.utcnow()}
+        for _ in range(args.log_entries)
+    ])
+    db.commit()
+    db.close()
+    report, compact_ms = timed(compact_change_log, SessionLocal)
+    print(f"Compaction of {args.log_entries} entries: {compact_ms / 1000:.1f} s in {report['chunks']} chunks, "
+          f"{report['superseded']} superseded removed")
+    
+    engine.dispose()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: sweep-line free-interval engine vs. the old 30-minute slot walk
+
+Usage:
+    python benchmarks/bench_free_intervals.py [--calendars 20] [--events 250] [--days 31]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from services.free_intervals import FreeIntervalEngine, parse_intervals
+from services.google_calendar import localize
+
+
+def generate_events(rng, start, days, count):
+    """Random Google-style events within working hours"""
+    events = []
+    for _ in range(count):
+        day = start + timedelta(days=rng.randrange(days))
+        event_start = day.replace(hour=rng.randrange(7, 17), minute=rng.choice([0, 15, 30, 45]))
+        event_end = event_start + timedelta(minutes=rng.choice([30, 60, 90, 120, 240]))
+        events.append({
+            'start': {'dateTime': localize(event_start).isoformat()},
+            'end': {'dateTime': localize(event_end).isoformat()}
+        })
+    return events
+
+
+def legacy_free_slots(events, day):
+    """Original get_free_slots algorithm for one calendar and one day"""
+    day_start = localize(day.replace(hour=8))
+    day_end = localize(day.replace(hour=17))
+    free_slots = []
+    current_time = day_start
+    slot_delta = timedelta(hours=1)
+    while current_time + slot_delta <= day_end:
+        slot_end = current_time + slot_delta
+        is_free = True
+        for event in events:
+            event_start = datetime.fromisoformat(event['start']['dateTime'])
+            event_end = datetime.fromisoformat(event['end']['dateTime'])
+            if current_time < event_end and slot_end > event_start:
+                is_free = False
+                break
+        if is_free:
+            free_slots.append({'start': current_time, 'end': slot_end})
+        current_time += timedelta(hours=0.5)
+    return free_slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calendars", type=int, default=20)
+    parser.add_argument("--events", type=int, default=250, help="events per calendar")
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    start = datetime(2025, 10, 1)
+    end = start + timedelta(days=args.days)
+    calendars = {
+        f"cal-{i}": generate_events(rng, start, args.days, args.events)
+        for i in range(args.calendars)
+    }
+    total_events = args.calendars * args.events
+    print(f"📊 {args.calendars} calendars × {args.events} events over {args.days} days ({total_events} events)")
+    
+    # Engine: parse once, one sweep for all calendars + one crew of 5
+    started = time.perf_counter()
+    busy = {calendar_id: parse_intervals(events) for calendar_id, events in calendars.items()}
+    parsed = time.perf_counter()
+    engine = FreeIntervalEngine(8, 17)
+    result = engine.compute(busy, start, end, crews={'crew': list(calendars)[:5]})
+    swept = time.perf_counter()
+    slots = sum(len(engine.slots(windows)) for windows in result['calendars'].values())
+    finished = time.perf_counter()
+    engine_total = finished - started
+    
+    print("\n⚡ Engine")
+    print(f"   Parse:  {(parsed - started) * 1000:8.1f} ms")
+    print(f"   Sweep:  {(swept - parsed) * 1000:8.1f} ms (all calendars + crew)")
+    print(f"   Slots:  {(finished - swept) * 1000:8.1f} ms ({slots} one-hour slots)")
+    print(f"   Total:  {engine_total * 1000:8.1f} ms")
+    
+    # Legacy: one calendar, per-day walk (events pre-filtered per day, which
+    # the old code got from events.list); extrapolated to all calendars
+    sample_id = next(iter(calendars))
+    by_day = {}
+    for event in calendars[sample_id]:
+        by_day.setdefault(event['start']['dateTime'][:10], []).append(event)
+    started = time.perf_counter()
+    for offset in range(args.days):
+        day = start + timedelta(days=offset)
+        legacy_free_slots(by_day.get(day.strftime('%Y-%m-%d'), []), day)
+    legacy = time.perf_counter() - started
+    
+    print("\n🐢 Legacy slot walk")
+    print(f"   One calendar:  {legacy * 1000:8.1f} ms")
+    print(f"   All calendars: {legacy * args.calendars * 1000:8.1f} ms (extrapolated)")
+    print(f"\n🚀 Speedup: {legacy * args.calendars / engine_total:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
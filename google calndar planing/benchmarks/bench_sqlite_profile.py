@@ -0,0 +1,159 @@
+"""
+Benchmark: concurrent reads and writes per SQLITE_PROFILE
+
+Writer threads commit small transactions like the API and optimize_schedule
+do (insert a task, reassign another one, keep the transaction open for
+--hold-ms of scheduling work) through the read-write pool while
+reader threads page through tasks on the reader pool. Each profile gets a
+fresh database file. Reports committed writes and reads per second, read
+latency and "database is locked" failures.
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [--seconds 5] [--writers 4] [--readers 8] [--tasks 20000] [--hold-ms 20]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Employee, Task, EmployeeType, TaskType
+from models.engine import create_db_engine, SQLITE_PROFILES
+from models.migrate import upgrade_database
+from services.pagination import keyset_page
+
+START = datetime(2025, 10, 13, 8, 0)
+
+
+def seed(SessionLocal, tasks: int, employees: int = 50):
+    db = SessionLocal()
+    db.add_all([
+        Employee(name=f"Employee {i}", email=f"employee{i}@firma.sk",
+                 employee_type=EmployeeType.INSTALLER, max_hours_per_week=40.0)
+        for i in range(employees)
+    ])
+    db.flush()
+    db.bulk_insert_mappings(Task, [
+        {
+            'title': f"Úloha {i}", 'task_type': TaskType.INSTALLATION, 'employee_id': i % employees + 1,
+            'start_time': START + timedelta(hours=i), 'end_time': START + timedelta(hours=i + 2),
+            'estimated_hours': 2
+        }
+        for i in range(tasks)
+    ])
+    db.commit()
+    db.close()
+
+
+def run_profile(profile: str, args) -> dict:
+    directory = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{directory.name}/bench.db"
+    writer = create_db_engine(url, profile=profile)
+    upgrade_database(writer)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=writer)
+    seed(WriteSession, args.tasks)
+    reader = create_db_engine(url, profile=profile, reader=True)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=reader)
+    
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'writes': 0, 'reads': 0, 'locked': 0, 'read_latency': []}
+    
+    def write_loop(seed_value):
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            db = WriteSession()
+            try:
+                start = START + timedelta(hours=rng.randrange(args.tasks))
+                db.add(Task(
+                    title="Nová úloha", task_type=TaskType.PRODUCTION, start_time=start,
+                    end_time=start + timedelta(hours=2), estimated_hours=2
+                ))
+                task = db.get(Task, rng.randrange(1, args.tasks))
+                task.employee_id = rng.randrange(1, 51)
+                db.flush()
+                time.sleep(args.hold_ms / 1000)
+                db.commit()
+                with lock:
+                    stats['writes'] += 1
+            except OperationalError as e:
+                db.rollback()
+                if "locked" not in str(e):
+                    raise
+                with lock:
+                    stats['locked'] += 1
+            finally:
+                db.close()
+    
+    def read_loop(seed_value):
+        rng = random.Random(seed_value)
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = ReadSession()
+            try:
+                query = db.query(Task).filter(Task.start_time >= START + timedelta(hours=rng.randrange(args.tasks)))
+                keyset_page(query, (Task.start_time, Task.id), 100)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    stats['reads'] += 1
+                    stats['read_latency'].append(elapsed)
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                with lock:
+                    stats['locked'] += 1
+            finally:
+                db.close()
+    
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=read_loop, args=(100 + i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    
+    reader.dispose()
+    writer.dispose()
+    directory.cleanup()
+    
+    latency = sorted(stats['read_latency']) or [0.0]
+    return {
+        'writes_per_second': stats['writes'] / args.seconds,
+        'reads_per_second': stats['reads'] / args.seconds,
+        'read_p50_ms': statistics.median(latency) * 1000,
+        'read_p99_ms': latency[int(len(latency) * 0.99) - 1 if len(latency) > 1 else 0] * 1000,
+        'locked': stats['locked']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--hold-ms", type=float, default=20, help="work inside each write transaction")
+    args = parser.parse_args()
+    
+    print(f"{args.writers} writer and {args.readers} reader threads, {args.seconds:g} s, {args.tasks} tasks, "
+          f"{args.hold_ms:g} ms per write transaction\n")
+    print(f"{'profile':<11} {'writes/s':>9} {'reads/s':>9} {'read p50':>10} {'read p99':>10} {'locked':>7}")
+    for profile in reversed(SQLITE_PROFILES):
+        result = run_profile(profile, args)
+        print(f"{profile:<11} {result['writes_per_second']:>9.0f} {result['reads_per_second']:>9.0f} "
+              f"{result['read_p50_ms']:>7.1f} ms {result['read_p99_ms']:>7.1f} ms {result['locked']:>7}")
+
+
+if __name__ == "__main__":
+    main()
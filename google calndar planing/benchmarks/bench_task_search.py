@@ -0,0 +1,169 @@
+"""
+Benchmark: task search at 1M rows, FTS5 index vs ILIKE scan
+
+Seeds --tasks tasks with generated customer names, addresses and product
+words at revision 0004, then times migration 0005 building the index over
+the existing rows and the index triggers on single-task inserts. After
+that it times search_tasks() for typical dispatcher queries: a phone
+number (one match), a common city, a short prefix, a phrase and a filtered
+search. The same queries run
+through the ILIKE fallback for comparison. "bm25() sort" is the first
+page of tasks_fts ranked in full by bm25(), which scores every match: the
+cost search_tasks avoids by listing the newest matches of queries above
+RANK_MAX_MATCHES. The ILIKE scan is the other way round, it stops after
+the newest 20 matches and only a rare word makes it read the whole table.
+
+Usage:
+    python benchmarks/bench_task_search.py [--tasks 1000000] [--repeat 20] [--keep FILE]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Task, TaskType, TaskStatus
+from models.engine import create_db_engine
+from models.migrate import upgrade_database
+from services import task_search
+from services.task_search import search_tasks
+
+START = datetime(2019, 1, 1, 8, 0)
+FIRST_NAMES = ["Ján", "Peter", "Mária", "Zuzana", "Jozef", "Eva", "Ľubomír", "Katarína", "Martin", "Anna"]
+LAST_NAMES = ["Novák", "Kováč", "Horváth", "Varga", "Tóth", "Nagy", "Baláž", "Szabó", "Molnár", "Lukáč",
+              "Šimko", "Hudák", "Ďurica", "Čierny", "Mráz", "Šťastný", "Ondrejka", "Žiak", "Polák", "Krajčír"]
+CITIES = ["Bratislava", "Košice", "Prešov", "Žilina", "Nitra", "Banská Bystrica", "Trnava", "Martin",
+          "Trenčín", "Poprad", "Prievidza", "Zvolen", "Považská Bystrica", "Michalovce", "Spišská Nová Ves"]
+STREETS = ["Hlavná", "Štúrova", "Mierová", "Kpt. Nálepku", "Hviezdoslavova", "Záhradná", "Školská",
+           "Námestie SNP", "Poľná", "Jarná", "Lipová", "Dlhá", "Kollárova", "Bernolákova", "Sládkovičova"]
+PRODUCTS = ["okná", "dvere", "brána", "plot", "zábradlie", "schody", "kuchyňa", "skriňa", "pergola", "garáž"]
+ACTIONS = ["Montáž", "Výroba", "Oprava", "Servis", "Zameranie", "Demontáž"]
+
+QUERIES = [
+    ("phone number", None, {}),
+    ("common city", "bratislava", {}),
+    ("short prefix", "ko", {}),
+    ("phrase", '"banská bystrica" pergola', {}),
+    ("word + filter", "novák", {'status': TaskStatus.PLANNED, 'start_date': datetime(2024, 1, 1)}),
+]
+
+
+def task_rows(offset: int, count: int, rng: random.Random):
+    for i in range(offset, offset + count):
+        customer = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        product = rng.choice(PRODUCTS)
+        start = START + timedelta(hours=i % 60000, minutes=i % 7)
+        yield {
+            'title': f"{rng.choice(ACTIONS)} {product} {customer.split()[1]}",
+            'description': f"Zákazník {customer}, {rng.randint(1, 12)} ks {product}, tel. 09{rng.randint(10000000, 99999999)}",
+            'location': f"{rng.choice(CITIES)}, {rng.choice(STREETS)} {rng.randint(1, 120)}",
+            'task_type': TaskType.INSTALLATION if i % 3 else TaskType.PRODUCTION,
+            'status': TaskStatus.COMPLETED if start < datetime(2024, 1, 1) else TaskStatus.PLANNED,
+            'start_time': start, 'end_time': start + timedelta(hours=4), 'estimated_hours': 4
+        }
+
+
+def seed(SessionLocal, tasks: int, batch: int = 20000) -> float:
+    rng = random.Random(7)
+    started = time.perf_counter()
+    db = SessionLocal()
+    for offset in range(0, tasks, batch):
+        db.bulk_insert_mappings(Task, list(task_rows(offset, min(batch, tasks - offset), rng)))
+        db.commit()
+    db.close()
+    return time.perf_counter() - started
+
+
+def time_inserts(SessionLocal, count: int) -> float:
+    """Median milliseconds of adding one task and committing"""
+    rng = random.Random(11)
+    db = SessionLocal()
+    times = []
+    for row in task_rows(0, count, rng):
+        started = time.perf_counter()
+        db.add(Task(**row))
+        db.commit()
+        times.append(time.perf_counter() - started)
+    db.close()
+    return statistics.median(times) * 1000
+
+
+def timed(function, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return statistics.median(times) * 1000, times[int(len(times) * 0.95) - 1 if len(times) > 1 else 0] * 1000, result
+
+
+def bm25_sorted(db, query: str):
+    """ORDER BY bm25(): sorted by SQLite, highlight and snippet built for every match"""
+    return db.execute(text(
+        "SELECT tasks.*, highlight(tasks_fts, 0, '<mark>', '</mark>'), "
+        "snippet(tasks_fts, -1, '<mark>', '</mark>', '…', 12) "
+        "FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+        "WHERE tasks_fts MATCH :query ORDER BY bm25(tasks_fts, 10.0, 1.0, 5.0) LIMIT 20"
+    ), {'query': task_search.fts_query(query)}).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", help="reuse / keep the seeded database in this file")
+    args = parser.parse_args()
+    
+    directory = tempfile.TemporaryDirectory()
+    path = args.keep or os.path.join(directory.name, "search.db")
+    engine = create_db_engine(f"sqlite:///{path}", profile="production")
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    if "tasks" not in inspect(engine).get_table_names():
+        # Seed before the index exists, like a database that predates it;
+        # per-row triggers on a bulk load are much slower than one rebuild
+        upgrade_database(engine, "0004")
+        seconds = seed(SessionLocal, args.tasks)
+        print(f"Seeded {args.tasks} tasks in {seconds:.0f} s")
+        started = time.perf_counter()
+        upgrade_database(engine)
+        print(f"Migration 0005 indexed them in {time.perf_counter() - started:.1f} s")
+        print(f"Insert + commit of one task with index triggers: {time_inserts(SessionLocal, 200):.2f} ms (p50)")
+    upgrade_database(engine)
+    
+    db = SessionLocal()
+    tasks = db.scalar(text("SELECT count(*) FROM tasks"))
+    print(f"{tasks} tasks, database {os.path.getsize(path) / 1024 / 1024:.0f} MB\n")
+    phone = db.scalar(text("SELECT description FROM tasks ORDER BY id LIMIT 1")).rsplit(" ", 1)[-1]
+    
+    print(f"{'query':<15} {'matches':>8} {'FTS p50':>9} {'FTS p95':>9} {'bm25() sort':>13} {'ILIKE p50':>10}")
+    for name, query, filters in QUERIES:
+        query = query or phone
+        matches = db.scalar(text("SELECT count(*) FROM tasks_fts WHERE tasks_fts MATCH :query"),
+                            {'query': task_search.fts_query(query)})
+        fts_p50, fts_p95, result = timed(lambda: search_tasks(db, query, **filters), args.repeat)
+        snippets_p50 = timed(lambda: bm25_sorted(db, query), max(args.repeat // 4, 1))[0] if not filters else None
+        original = task_search.has_search_index
+        task_search.has_search_index = lambda session: False
+        try:
+            like_p50 = timed(lambda: search_tasks(db, query, **filters), max(args.repeat // 10, 1))[0]
+        finally:
+            task_search.has_search_index = original
+        snippets = f"{snippets_p50:>10.1f} ms" if snippets_p50 is not None else f"{'-':>13}"
+        print(f"{name:<15} {matches:>8} {fts_p50:>6.1f} ms {fts_p95:>6.1f} ms {snippets} {like_p50:>7.1f} ms")
+    
+    db.close()
+    engine.dispose()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
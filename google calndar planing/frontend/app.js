@@ -1,11 +1,14 @@
 // Production Planner Frontend JavaScript
 
 const API_URL = 'http://localhost:8000';
+const SYNC_INTERVAL_MS = 30000;
 
 // State
 let employees = [];
 let tasks = [];
 let currentWeather = null;
+let taskFilter = 'upcoming';
+let changesCursor = null;
 
 // Initialize app
 document.addEventListener('DOMContentLoaded', () => {
@@ -14,10 +17,13 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 
 async function initializeApp() {
+    // Cursor first: changes made during the full load are replayed later
+    await startChangeFeed();
     await loadEmployees();
     await loadTasks();
     await loadWeather();
     await loadStats();
+    setInterval(syncChanges, SYNC_INTERVAL_MS);
 }
 
 function setupEventListeners() {
@@ -81,15 +87,16 @@ async function apiCall(endpoint, method = 'GET', data = null) {
 // ==================== Load Data Functions ====================
 
 async function loadEmployees() {
-    const data = await apiCall('/employees');
+    const data = await apiCall('/employees?limit=1000');
     if (data) {
-        employees = data;
+        employees = data.items;
         renderEmployees();
         updateEmployeeSelect();
     }
 }
 
 async function loadTasks(filter = 'upcoming') {
+    taskFilter = filter;
     let endpoint = '/tasks';
     
     if (filter === 'upcoming') {
@@ -100,7 +107,7 @@ async function loadTasks(filter = 'upcoming') {
     
     const data = await apiCall(endpoint);
     if (data) {
-        tasks = data;
+        tasks = data.items;
         renderTasks();
     }
 }
@@ -122,6 +129,75 @@ async function loadStats() {
     }
 }
 
+// ==================== Incremental Sync ====================
+
+async function startChangeFeed() {
+    const feed = await apiCall('/changes');
+    if (feed) {
+        changesCursor = feed.cursor;
+    }
+}
+
+function withEmployee(task) {
+    return { ...task, employee: employees.find(e => e.id === task.employee_id) || null };
+}
+
+// Applies only what changed since the last poll instead of reloading the lists
+async function syncChanges() {
+    if (changesCursor === null) {
+        return startChangeFeed();
+    }
+    let reloadTasks = false;
+    let tasksChanged = false;
+    let employeesChanged = false;
+    let feed;
+    do {
+        feed = await apiCall(`/changes?since=${changesCursor}`);
+        if (!feed) {
+            return;
+        }
+        if (feed.reset) {
+            changesCursor = feed.cursor;
+            await loadEmployees();
+            await loadTasks(taskFilter);
+            return;
+        }
+        for (const change of feed.changes) {
+            if (change.entity === 'employee') {
+                employees = employees.filter(e => e.id !== change.id);
+                if (change.operation === 'upsert') {
+                    employees.push(change.employee);
+                }
+                employeesChanged = true;
+            } else {
+                const index = tasks.findIndex(t => t.id === change.id);
+                tasksChanged = true;
+                if (change.operation === 'delete') {
+                    if (index >= 0) tasks.splice(index, 1);
+                } else if (index >= 0) {
+                    tasks[index] = withEmployee(change.task);
+                } else {
+                    // Whether a new task belongs to the current tab is decided by the server
+                    reloadTasks = true;
+                }
+            }
+        }
+        changesCursor = feed.cursor;
+    } while (feed.has_more);
+
+    if (employeesChanged) {
+        employees.sort((a, b) => a.id - b.id);
+        renderEmployees();
+        updateEmployeeSelect();
+    }
+    if (reloadTasks) {
+        await loadTasks(taskFilter);
+    } else if (tasksChanged || employeesChanged) {
+        tasks = tasks.map(withEmployee);
+        renderTasks();
+    }
+}
+
 // ==================== Render Functions ====================
 
 function renderEmployees() {
@@ -1,36 +1,79 @@
 """
 Main FastAPI application for Production Planner
 """
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from fastapi.responses import RedirectResponse, StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import sessionmaker, Session, joinedload
 from contextlib import asynccontextmanager
+import asyncio
+import json
 from datetime import datetime, timedelta
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
-from models.database import Base, Employee, Task, WeatherLog
+from models.database import Employee, Task, WeatherLog, TaskStatus
+from models.engine import create_db_engine, create_async_db_engine
+from models.migrate import upgrade_database
 from models.schemas import (
     EmployeeCreate, EmployeeUpdate, EmployeeResponse,
     TaskCreate, TaskUpdate, TaskResponse, TaskWithEmployee,
+    EmployeePage, TaskPage, TaskSearchResults, ChangeFeed,
     WeatherResponse, ChatMessage, ChatResponse,
     PlanningRequest, PlanningResponse,
     AvailabilityRequest, AvailabilityResponse
 )
-from services import get_calendar_service, get_weather_service, get_ai_agent, Scheduler
+from services import get_calendar_service, get_weather_service, get_ai_agent, Scheduler, CalendarMirror
+from services.executor import run_in_pool, get_executor_stats, shutdown_executors
+from services.calendar_outbox import CalendarOutboxWorker, is_outbox_enabled
+from services.weather_store import WeatherStore
+from services.scheduler import (
+    week_start, weekly_hours_statement, collect_weekly_hours,
+    workload_tasks_statement, workload_summary, availability_day, build_availability
+)
+from services.task_index import get_task_index, BLOCKING_STATUSES
+from services.bulk_import import parse_rows, validate_rows
+from services.pagination import keyset_page_async
+from services.task_archive import archive_stats
+from services.task_search import search_tasks, SEARCH_MAX_LIMIT
+from services.stats import get_overview_async
+from services.backup import SQLiteBackup, BackupScheduler, BackupError, BACKUP_INTERVAL_HOURS
+from services.change_feed import (
+    get_changes, change_log_stats, ChangeLogCompactor, CHANGE_FEED_MAX_LIMIT, CHANGE_LOG_COMPACT_HOURS
+)
+from services.export import (
+    EXPORT_FORMATS, task_export_statement, employee_export_statement,
+    stream_export, content_type, export_filename
+)
 
 load_dotenv()
 
 # Database setup
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Read-heavy endpoints query through aiosqlite without blocking the event loop
+async_engine = create_async_db_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Create or upgrade tables (Alembic migrations)
+upgrade_database(engine)
+
+# Background worker applying queued Google Calendar changes
+outbox_worker = CalendarOutboxWorker(SessionLocal)
+
+# Scheduled online backups (SQLite file databases, BACKUP_INTERVAL_HOURS > 0)
+try:
+    backup_scheduler = BackupScheduler(SQLiteBackup.from_url(DATABASE_URL))
+except BackupError:
+    backup_scheduler = None
+
+# Keeps change_log bounded (CHANGE_LOG_COMPACT_HOURS = 0: cron runs utils/compact_changes.py)
+change_log_compactor = ChangeLogCompactor(SessionLocal)
 
 
 # Lifespan context manager
@@ -38,9 +81,29 @@ Base.metadata.create_all(bind=engine)
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Starting Production Planner API...")
+    worker_task = None
+    if is_outbox_enabled():
+        worker_task = asyncio.create_task(outbox_worker.run())
+    backup_task = None
+    if backup_scheduler and BACKUP_INTERVAL_HOURS > 0:
+        backup_task = asyncio.create_task(backup_scheduler.run())
+    compactor_task = None
+    if CHANGE_LOG_COMPACT_HOURS > 0:
+        compactor_task = asyncio.create_task(change_log_compactor.run())
     yield
     # Shutdown
     print("👋 Shutting down...")
+    if worker_task:
+        outbox_worker.stop()
+        worker_task.cancel()
+    if backup_task:
+        backup_scheduler.stop()
+        backup_task.cancel()
+    if compactor_task:
+        change_log_compactor.stop()
+        compactor_task.cancel()
+    shutdown_executors(wait=False)
+    await async_engine.dispose()
 
 
 # Create FastAPI app
@@ -70,6 +133,12 @@ def get_db():
         db.close()
 
 
+# Dependency to get an async DB session (read endpoints)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -88,7 +157,7 @@ async def root():
 async def google_auth_login():
     """Initiate Google Calendar OAuth flow"""
     try:
-        calendar_service = get_calendar_service()
+        calendar_service = await run_in_pool("calendar", get_calendar_service)
         return {
             "message": "Please check your browser for Google authentication",
             "status": "authenticated" if calendar_service.service else "pending"
@@ -99,19 +168,24 @@ async def google_auth_login():
 
 # ==================== EMPLOYEE ENDPOINTS ====================
 
-@app.get("/employees", response_model=List[EmployeeResponse])
+@app.get("/employees", response_model=EmployeePage)
 async def get_employees(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     is_active: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all employees"""
-    query = db.query(Employee)
+    """Get employees ordered by id, one page at a time (pass next_cursor as cursor)"""
+    query = select(Employee)
     if is_active is not None:
-        query = query.filter(Employee.is_active == is_active)
-    employees = query.offset(skip).limit(limit).all()
-    return employees
+        query = query.where(Employee.is_active == is_active)
+    
+    try:
+        employees, next_cursor = await keyset_page_async(db, query, (Employee.id,), limit, cursor, offset=skip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": employees, "next_cursor": next_cursor}
 
 
 @app.post("/employees", response_model=EmployeeResponse, status_code=status.HTTP_201_CREATED)
@@ -126,11 +200,13 @@ async def create_employee(
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create Google Calendar if not provided
-    calendar_service = get_calendar_service()
     calendar_id = employee.google_calendar_id
     
     if not calendar_id:
-        calendar_id = calendar_service.get_calendar_id(f"Kalendár - {employee.name}")
+        calendar_service = await run_in_pool("calendar", get_calendar_service)
+        calendar_id = await run_in_pool(
+            "calendar", calendar_service.get_calendar_id, f"Kalendár - {employee.name}"
+        )
     
     db_employee = Employee(
         name=employee.name,
@@ -190,33 +266,40 @@ async def delete_employee(employee_id: int, db: Session = Depends(get_db)):
 
 # ==================== TASK ENDPOINTS ====================
 
-@app.get("/tasks", response_model=List[TaskWithEmployee])
+@app.get("/tasks", response_model=TaskPage)
 async def get_tasks(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
     employee_id: Optional[int] = None,
     task_type: Optional[str] = None,
     status: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0, deprecated=True),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get all tasks with filters"""
-    query = db.query(Task)
+    """Get tasks with filters ordered by (start_time, id), one page at a time"""
+    # Employees come in the same SELECT instead of one lazy load per row
+    query = select(Task).options(joinedload(Task.employee))
     
     if employee_id:
-        query = query.filter(Task.employee_id == employee_id)
+        query = query.where(Task.employee_id == employee_id)
     if task_type:
-        query = query.filter(Task.task_type == task_type)
+        query = query.where(Task.task_type == task_type)
     if status:
-        query = query.filter(Task.status == status)
+        query = query.where(Task.status == status)
     if start_date:
-        query = query.filter(Task.start_time >= start_date)
+        query = query.where(Task.start_time >= start_date)
     if end_date:
-        query = query.filter(Task.start_time <= end_date)
+        query = query.where(Task.start_time <= end_date)
     
-    tasks = query.offset(skip).limit(limit).all()
-    return tasks
+    try:
+        tasks, next_cursor = await keyset_page_async(
+            db, query, (Task.start_time, Task.id), limit, cursor, offset=skip
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": tasks, "next_cursor": next_cursor}
 
 
 @app.post("/tasks", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
@@ -225,9 +308,11 @@ async def create_task(
     db: Session = Depends(get_db)
 ):
     """Create a new task"""
-    scheduler = Scheduler(db)
+    scheduler = await run_in_pool("planning", Scheduler, db)
     
-    db_task, message = scheduler.create_and_schedule_task(
+    db_task, message = await run_in_pool(
+        "planning",
+        scheduler.create_and_schedule_task,
         title=task.title,
         task_type=task.task_type,
         start_time=task.start_time,
@@ -245,10 +330,113 @@ async def create_task(
     return db_task
 
 
+@app.post("/tasks/bulk")
+async def bulk_create_tasks(
+    request: Request,
+    stream: bool = False,
+    atomic: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Import many tasks from a JSON array or CSV (Content-Type: text/csv)
+    
+    All rows are validated before anything is written; atomic=true rejects
+    the whole import if any row is invalid. stream=true returns NDJSON
+    progress lines followed by the result.
+    """
+    try:
+        raw_rows = parse_rows(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    rows, errors = validate_rows(raw_rows)
+    if errors and atomic:
+        raise HTTPException(status_code=422, detail=errors)
+    
+    def summary(results):
+        results = sorted(results + errors, key=lambda r: r['row'])
+        return {
+            'total': len(raw_rows),
+            'created': sum(1 for r in results if r['status'] == 'created'),
+            'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+            'invalid': len(errors),
+            'results': results
+        }
+    
+    scheduler = await run_in_pool("planning", Scheduler, db)
+    if not stream:
+        results = await run_in_pool("planning", scheduler.bulk_create_tasks, rows)
+        return summary(results)
+    
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    
+    def progress(processed, total):
+        loop.call_soon_threadsafe(queue.put_nowait, {'event': 'progress', 'processed': processed, 'total': total})
+    
+    async def run():
+        try:
+            results = await run_in_pool("planning", scheduler.bulk_create_tasks, rows, progress)
+            await queue.put({'event': 'result', **summary(results)})
+        except Exception as e:
+            await queue.put({'event': 'error', 'detail': str(e)})
+    
+    async def lines():
+        job = asyncio.create_task(run())
+        while True:
+            message = await queue.get()
+            yield json.dumps(message, default=str, ensure_ascii=False) + "\n"
+            if message['event'] != 'progress':
+                break
+        await job
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/tasks/conflicts")
+async def get_task_conflicts(
+    employee_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """List overlapping planned/running tasks of the same employee"""
+    index = await run_in_pool("planning", get_task_index, db)
+    conflicts = index.overlaps(employee_id)
+    return {
+        'conflicts': conflicts,
+        'count': len(conflicts)
+    }
+
+
+@app.get("/tasks/search", response_model=TaskSearchResults)
+async def search_tasks_endpoint(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=1000),
+    include_archived: bool = True,
+    status: Optional[str] = None,
+    employee_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search in task titles, descriptions and locations, best matches first"""
+    try:
+        task_status = TaskStatus(status) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Neznámy stav úlohy '{status}'")
+    
+    try:
+        return await db.run_sync(
+            search_tasks, q, limit, offset, include_archived, task_status, employee_id, start_date, end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/tasks/{task_id}", response_model=TaskWithEmployee)
 async def get_task(task_id: int, db: Session = Depends(get_db)):
     """Get task by ID"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = db.query(Task).options(joinedload(Task.employee)).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -261,59 +449,109 @@ async def update_task(
     db: Session = Depends(get_db)
 ):
     """Update task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = db.query(Task).options(joinedload(Task.employee)).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
     update_data = task_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(task, field, value)
-    
-    # Update Google Calendar event if needed
-    if task.google_event_id and task.employee:
-        calendar_service = get_calendar_service()
-        calendar_service.update_event(
-            calendar_id=task.employee.google_calendar_id,
-            event_id=task.google_event_id,
-            summary=task.title,
-            description=task.description,
-            start_time=task.start_time,
-            end_time=task.end_time,
-            location=task.location
-        )
     
-    db.commit()
-    db.refresh(task)
+    # Google Calendar change is queued (or applied inline) by the scheduler
+    scheduler = await run_in_pool("planning", Scheduler, db)
+    
+    employee_id = update_data.get('employee_id', task.employee_id)
+    if employee_id and update_data.get('status', task.status) in BLOCKING_STATUSES:
+        conflicts = await run_in_pool(
+            "planning",
+            scheduler.find_local_conflicts,
+            employee_id,
+            update_data.get('start_time', task.start_time),
+            update_data.get('end_time', task.end_time),
+            exclude_task_id=task.id
+        )
+        if conflicts:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Zamestnanec má v tomto čase inú úlohu (ID: {', '.join(map(str, conflicts))})"
+            )
+    task = await run_in_pool("planning", scheduler.update_task, task, update_data)
     return task
 
 
 @app.delete("/tasks/{task_id}")
 async def delete_task(task_id: int, db: Session = Depends(get_db)):
     """Delete task"""
-    task = db.query(Task).filter(Task.id == task_id).first()
+    task = db.query(Task).options(joinedload(Task.employee)).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    # Delete from Google Calendar
-    if task.google_event_id and task.employee:
-        calendar_service = get_calendar_service()
-        calendar_service.delete_event(
-            calendar_id=task.employee.google_calendar_id,
-            event_id=task.google_event_id
-        )
-    
-    db.delete(task)
-    db.commit()
+    # Delete from Google Calendar (queued or inline) and from DB
+    scheduler = await run_in_pool("planning", Scheduler, db)
+    await run_in_pool("planning", scheduler.delete_task, task)
     return {"message": "Task deleted"}
 
 
+# ==================== CHANGE FEED ====================
+
+@app.get("/changes", response_model=ChangeFeed)
+async def get_changes_endpoint(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(500, ge=1, le=CHANGE_FEED_MAX_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Tasks and employees changed after cursor since (upserts and delete tombstones), oldest first"""
+    return await db.run_sync(get_changes, since, limit)
+
+
+# ==================== EXPORT ENDPOINTS ====================
+
+def export_response(db: AsyncSession, statement, name: str, fmt: str, compress: bool) -> StreamingResponse:
+    """Streamed download of statement's rows"""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Nepodporovaný formát '{fmt}', použite {', '.join(EXPORT_FORMATS)}")
+    return StreamingResponse(
+        stream_export(db, statement, fmt, compress),
+        media_type=content_type(fmt, compress),
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(name, fmt, compress)}"'}
+    )
+
+
+@app.get("/export/tasks")
+async def export_tasks(
+    fmt: str = Query("csv", alias="format"),
+    gzip: bool = False,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export tasks as CSV or NDJSON (optionally gzipped), streamed in chunks"""
+    try:
+        task_status = TaskStatus(status) if status else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Neznámy stav úlohy '{status}'")
+    
+    statement = task_export_statement(start_date, end_date, task_status)
+    return export_response(db, statement, "tasks", fmt, gzip)
+
+
+@app.get("/export/employees")
+async def export_employees(
+    fmt: str = Query("csv", alias="format"),
+    gzip: bool = False,
+    active: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Export employees as CSV or NDJSON (optionally gzipped), streamed in chunks"""
+    return export_response(db, employee_export_statement(active), "employees", fmt, gzip)
+
+
 # ==================== WEATHER ENDPOINTS ====================
 
 @app.get("/weather")
 async def get_current_weather():
     """Get current weather"""
     weather_service = get_weather_service()
-    current = weather_service.get_current_weather()
+    current = await run_in_pool("weather", weather_service.get_current_weather)
     return current
 
 
@@ -321,15 +559,19 @@ async def get_current_weather():
 async def get_weather_forecast(days: int = 7):
     """Get weather forecast"""
     weather_service = get_weather_service()
-    forecast = weather_service.get_forecast(days=days)
+    forecast = await run_in_pool("weather", weather_service.get_forecast, days=days)
     return {"forecast": forecast}
 
 
 @app.get("/weather/recommendation")
-async def get_weather_recommendation(date: Optional[datetime] = None):
+async def get_weather_recommendation(
+    date: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
     """Get work recommendation based on weather"""
-    weather_service = get_weather_service()
-    recommendation = weather_service.get_recommendation(date)
+    weather_store = WeatherStore(db)
+    recommendation = await run_in_pool("weather", weather_store.get_recommendation, date)
+    db.commit()  # Forecast grid the lookup may have stored
     return {
         "date": date or datetime.now(),
         "recommendation": recommendation,
@@ -337,6 +579,40 @@ async def get_weather_recommendation(date: Optional[datetime] = None):
     }
 
 
+@app.get("/weather/history")
+async def get_weather_history(
+    start_date: datetime,
+    end_date: datetime,
+    location: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get stored 3-hour forecast samples for a period"""
+    weather_store = WeatherStore(db)
+    samples = weather_store.get_samples(start_date, end_date, location)
+    return {
+        "location": location or weather_store.location,
+        "samples": [
+            {
+                "date": s.date,
+                "condition": s.condition,
+                "temperature": s.temperature,
+                "description": s.description,
+                "suitable_for_installation": s.suitable_for_installation,
+                "rain_mm": s.rain_mm,
+                "fetched_at": s.fetched_at
+            }
+            for s in samples
+        ]
+    }
+
+
+@app.get("/weather/cache/stats")
+async def get_weather_cache_stats():
+    """Weather cache hit/miss statistics"""
+    weather_service = get_weather_service()
+    return weather_service.get_cache_stats()
+
+
 # ==================== AI CHAT ENDPOINTS ====================
 
 @app.post("/chat", response_model=ChatResponse)
@@ -345,7 +621,7 @@ async def chat(
     db: Session = Depends(get_db)
 ):
     """Chat with AI agent"""
-    ai_agent = get_ai_agent()
+    ai_agent = await run_in_pool("openai", get_ai_agent)
     
     # Prepare context
     context = message.context or {}
@@ -359,7 +635,7 @@ async def chat(
     
     if 'weather' not in context:
         weather_service = get_weather_service()
-        context['weather'] = weather_service.get_current_weather()
+        context['weather'] = await run_in_pool("weather", weather_service.get_current_weather)
     
     if 'tasks' not in context:
         today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
@@ -371,13 +647,13 @@ async def chat(
         context['tasks'] = [{"id": t.id, "title": t.title} for t in tasks]
     
     # Get AI response
-    response = ai_agent.chat(message.message, context)
+    response = await run_in_pool("openai", ai_agent.chat, message.message, context)
     
     # Execute action if requested
     action_result = None
     if response.get('action_type') == 'create_task':
         params = response['parameters']
-        scheduler = Scheduler(db)
+        scheduler = await run_in_pool("planning", Scheduler, db)
         
         # Find employee by name if provided
         employee_id = None
@@ -392,7 +668,9 @@ async def chat(
         start_time = datetime.fromisoformat(params.get('start_date', datetime.now().isoformat()))
         hours = params.get('hours', 8.0)
         
-        task, msg = scheduler.create_and_schedule_task(
+        task, msg = await run_in_pool(
+            "planning",
+            scheduler.create_and_schedule_task,
             title=params['title'],
             task_type=params['task_type'],
             start_time=start_time,
@@ -418,20 +696,23 @@ async def suggest_planning(
     db: Session = Depends(get_db)
 ):
     """Get intelligent planning suggestions"""
-    scheduler = Scheduler(db)
-    weather_service = get_weather_service()
-    
-    # Get weather forecast
-    forecast = weather_service.get_forecast(days=14)
+    scheduler = await run_in_pool("planning", Scheduler, db)
     
     # Find suitable dates
     suggested_dates = []
+    suggested_windows = None
     if request.task_type.value == "installation":
-        suitable_days = scheduler.suggest_installation_dates(
+        suitable_windows = await run_in_pool(
+            "planning",
+            scheduler.suggest_installation_dates,
             duration_hours=request.estimated_hours,
             preferred_date=request.preferred_date or datetime.now()
         )
-        suggested_dates = [day[0] for day in suitable_days[:5]]
+        suggested_dates = [window[0] for window in suitable_windows[:5]]
+        suggested_windows = [
+            {"start": w["start"], "end": w["end"], "hours": w["hours"]}
+            for _, w in suitable_windows[:5]
+        ]
     else:
         # For production, any day works
         start = request.preferred_date or datetime.now()
@@ -440,7 +721,9 @@ async def suggest_planning(
     # Find best employee
     if suggested_dates:
         best_date = suggested_dates[0]
-        employee = scheduler.find_best_employee(
+        employee = await run_in_pool(
+            "planning",
+            scheduler.find_best_employee,
             task_type=request.task_type,
             start_time=best_date,
             duration_hours=request.estimated_hours
@@ -453,6 +736,7 @@ async def suggest_planning(
         success=len(suggested_dates) > 0,
         message=f"Našiel som {len(suggested_dates)} vhodných termínov" if suggested_dates else "Nenašiel som vhodné termíny",
         suggested_dates=suggested_dates,
+        suggested_windows=suggested_windows,
         assigned_employee=employee,
         task=None
     )
@@ -462,24 +746,29 @@ async def suggest_planning(
 async def get_availability(
     date: datetime,
     employee_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ):
     """Get employee availability for a specific date"""
-    scheduler = Scheduler(db)
+    # Tasks and employees are read on the async session; the sync one only
+    # backs the calendar mirror, queried in the calendar pool
+    scheduler = await run_in_pool("planning", Scheduler, db)
     
     if employee_id:
-        employee = db.query(Employee).filter(Employee.id == employee_id).first()
+        employee = await async_db.get(Employee, employee_id)
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
         
-        week_start = date - timedelta(days=date.weekday())
-        week_end = week_start + timedelta(days=7)
-        workload = scheduler.get_employee_workload(employee_id, week_start, week_end)
+        week_monday = datetime.combine(week_start(date), datetime.min.time())
+        week_end = week_monday + timedelta(days=7)
+        tasks = (await async_db.scalars(workload_tasks_statement(employee_id, week_monday, week_end))).all()
+        workload = workload_summary(employee, tasks, week_monday, week_end)
         
-        calendar_service = get_calendar_service()
         free_slots = []
         if employee.google_calendar_id:
-            free_slots = calendar_service.get_free_slots(
+            free_slots = await run_in_pool(
+                "calendar",
+                scheduler.availability_source.get_free_slots,
                 calendar_id=employee.google_calendar_id,
                 date=date
             )
@@ -490,23 +779,89 @@ async def get_availability(
             "free_slots": free_slots,
             "workload": workload
         }
-    else:
-        availability = scheduler.get_all_employees_availability(date)
-        return {"date": date, "employees": availability}
+    
+    employees = (await async_db.scalars(select(Employee).where(Employee.is_active == True))).all()
+    calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+    busy_by_calendar = {}
+    if calendar_ids:
+        day_start, day_end = availability_day(date)
+        busy_by_calendar = await run_in_pool(
+            "calendar",
+            scheduler.availability_source.get_busy_intervals,
+            calendar_ids,
+            day_start,
+            day_end
+        )
+    
+    statement = weekly_hours_statement(async_db.get_bind().dialect.name, date, date)
+    weekly_hours = collect_weekly_hours((await async_db.execute(statement)).all())
+    
+    availability = await run_in_pool(
+        "planning", build_availability, employees, busy_by_calendar, weekly_hours, date
+    )
+    return {"date": date, "employees": availability}
+
+
+@app.get("/planning/free-windows")
+async def get_free_windows(
+    start_date: datetime,
+    end_date: datetime,
+    employee_ids: Optional[str] = None,
+    crew: Optional[str] = None,
+    min_hours: float = 0,
+    db: Session = Depends(get_db)
+):
+    """
+    Get maximal free windows for employees over a date range
+    
+    employee_ids and crew are comma-separated employee IDs; crew windows are
+    the times when all crew members are free together.
+    """
+    def parse_ids(value: Optional[str]) -> Optional[List[int]]:
+        if not value:
+            return None
+        try:
+            return [int(part) for part in value.split(",") if part.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="IDs must be comma-separated integers")
+    
+    scheduler = await run_in_pool("planning", Scheduler, db)
+    return await run_in_pool(
+        "planning",
+        scheduler.get_free_windows,
+        start_date,
+        end_date,
+        employee_ids=parse_ids(employee_ids),
+        min_duration_hours=min_hours,
+        crew_employee_ids=parse_ids(crew)
+    )
 
 
 @app.post("/planning/optimize")
 async def optimize_schedule(
     start_date: datetime,
     end_date: Optional[datetime] = None,
+    mode: str = "global",
+    time_budget: float = Query(5.0, gt=0, le=60),
+    seed: int = 0,
     db: Session = Depends(get_db)
 ):
-    """Optimize schedule for a date range"""
+    """Optimize schedule for a date range (mode: global, anneal or greedy, time_budget in seconds)"""
     if not end_date:
         end_date = start_date + timedelta(days=7)
+    if mode not in ("global", "anneal", "greedy"):
+        raise HTTPException(status_code=400, detail="mode must be 'global', 'anneal' or 'greedy'")
     
-    scheduler = Scheduler(db)
-    result = scheduler.optimize_schedule(start_date, end_date)
+    scheduler = await run_in_pool("planning", Scheduler, db)
+    result = await run_in_pool(
+        "planning",
+        scheduler.optimize_schedule,
+        start_date,
+        end_date,
+        mode=mode,
+        time_budget_seconds=time_budget,
+        seed=seed
+    )
     
     return result
 
@@ -517,7 +872,7 @@ async def optimize_schedule(
 async def list_calendars():
     """List all available Google Calendars"""
     try:
-        calendar_service = get_calendar_service()
+        calendar_service = await run_in_pool("calendar", get_calendar_service)
         
         if not calendar_service.service:
             raise HTTPException(
@@ -525,7 +880,9 @@ async def list_calendars():
                 detail="Calendar service not authenticated. Please authenticate first at /auth/login"
             )
         
-        calendar_list = calendar_service.service.calendarList().list().execute()
+        calendar_list = await run_in_pool(
+            "calendar", calendar_service.service.calendarList().list().execute
+        )
         calendars = calendar_list.get('items', [])
         
         # Format calendar data
@@ -573,26 +930,93 @@ async def link_employee_calendar(
     }
 
 
-# ==================== STATISTICS ENDPOINTS ====================
+@app.get("/calendars/mirror/status")
+async def get_calendar_mirror_status(db: Session = Depends(get_db)):
+    """Get event mirror lag and sync counters"""
+    mirror = await run_in_pool("calendar", CalendarMirror, db)
+    return mirror.get_stats()
 
-@app.get("/stats/overview")
-async def get_stats_overview(db: Session = Depends(get_db)):
-    """Get overview statistics"""
-    total_employees = db.query(Employee).filter(Employee.is_active == True).count()
-    total_tasks = db.query(Task).count()
+
+@app.post("/calendars/mirror/sync")
+async def sync_calendar_mirror(
+    calendar_id: Optional[str] = None,
+    full: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Sync the event mirror for one calendar or all employee calendars"""
+    mirror = await run_in_pool("calendar", CalendarMirror, db)
     
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    week_later = today + timedelta(days=7)
+    if calendar_id:
+        calendar_ids = [calendar_id]
+    else:
+        calendar_ids = [
+            e.google_calendar_id
+            for e in db.query(Employee).filter(Employee.is_active == True).all()
+            if e.google_calendar_id
+        ]
     
-    upcoming_tasks = db.query(Task).filter(
-        Task.start_time >= today,
-        Task.start_time <= week_later
-    ).count()
+    results = [
+        await run_in_pool("calendar", mirror.sync, cid, force_full=full)
+        for cid in calendar_ids
+    ]
+    return {"synced": len(results), "results": results}
+
+
+@app.get("/calendars/outbox/status")
+async def get_calendar_outbox_status():
+    """Get pending/failed calendar writes and worker counters"""
+    return outbox_worker.get_status()
+
+
+@app.post("/calendars/outbox/retry")
+async def retry_calendar_outbox():
+    """Requeue calendar writes that exhausted their retries"""
+    count = outbox_worker.retry_failed()
+    return {"requeued": count}
+
+
+# ==================== STATISTICS ENDPOINTS ====================
+
+@app.get("/stats/executors")
+async def get_executors_stats():
+    """Get thread pool sizes and call counters per external dependency"""
+    return get_executor_stats()
+
+
+@app.get("/stats/archive")
+async def get_archive_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get task archive size and the number of tasks due for archiving"""
+    return await db.run_sync(archive_stats)
+
+
+@app.get("/stats/changes")
+async def get_change_log_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get change log size, cursor and compaction horizon"""
+    stats = await db.run_sync(change_log_stats)
+    stats['last_compaction'] = change_log_compactor.last_report
+    return stats
+
+
+@app.get("/stats/backup")
+async def get_backup_stats():
+    """Get backup schedule, newest backup and the report of the last scheduled run"""
+    if backup_scheduler is None:
+        return {"enabled": False, "detail": "Zálohy sú dostupné len pre SQLite databázu"}
+    return await run_in_pool("backup", backup_scheduler.get_status)
+
+
+@app.get("/stats/overview")
+async def get_stats_overview(db: AsyncSession = Depends(get_async_db)):
+    """Get overview statistics (one query, cached until tasks or employees change)"""
+    overview = await get_overview_async(db)
     
     return {
-        "total_employees": total_employees,
-        "total_tasks": total_tasks,
-        "upcoming_tasks": upcoming_tasks,
+        "total_employees": overview["active_employees"],
+        "total_tasks": overview["tasks"],
+        "upcoming_tasks": overview["upcoming_tasks"],
+        "unassigned_tasks": overview["unassigned_tasks"],
+        "tasks_by_status": overview["tasks_by_status"],
+        "tasks_by_type": overview["tasks_by_type"],
         "system_status": "operational"
     }
 
@@ -0,0 +1,67 @@
+"""
+Alembic environment for Production Planner
+
+Run from the command line it connects to DATABASE_URL; models/migrate.py
+passes its own connection in config.attributes instead.
+"""
+import os
+import sys
+from logging.config import fileConfig
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+
+from models.database import Base
+from models.migrate import include_name
+
+load_dotenv()
+
+config = context.config
+target_metadata = Base.metadata
+
+
+def _configure(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite can't ALTER constraints, batch mode recreates the table
+        render_as_batch=connection.dialect.name == "sqlite",
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    context.configure(
+        url=os.getenv("DATABASE_URL", "sqlite:///./production_planner.db"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+        include_name=include_name,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection)
+        return
+    
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    engine = create_engine(os.getenv("DATABASE_URL", "sqlite:///./production_planner.db"))
+    with engine.connect() as connection:
+        _configure(connection)
+    engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
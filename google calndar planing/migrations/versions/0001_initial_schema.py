@@ -0,0 +1,81 @@
+"""
+Initial schema: employees, tasks, weather_logs
+
+Tables as the first release created them with Base.metadata.create_all.
+Databases created before migrations are stamped at this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'employees',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('employee_type', sa.Enum('INSTALLER', 'PRODUCER', 'BOTH', name='employeetype'), nullable=False),
+        sa.Column('google_calendar_id', sa.String(), nullable=True),
+        sa.Column('max_hours_per_week', sa.Float(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('google_calendar_id'),
+    )
+    op.create_index('ix_employees_id', 'employees', ['id'])
+    
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('task_type', sa.Enum('INSTALLATION', 'PRODUCTION', name='tasktype'), nullable=False),
+        sa.Column('status', sa.Enum('PLANNED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='taskstatus'), nullable=True),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('estimated_hours', sa.Float(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=True),
+        sa.Column('google_event_id', sa.String(), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('weather_dependent', sa.Boolean(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['employee_id'], ['employees.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tasks_id', 'tasks', ['id'])
+    
+    op.create_table(
+        'weather_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.DateTime(), nullable=False),
+        sa.Column('condition', sa.String(), nullable=False),
+        sa.Column('temperature', sa.Float(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('suitable_for_installation', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_weather_logs_id', 'weather_logs', ['id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weather_logs_id', table_name='weather_logs')
+    op.drop_table('weather_logs')
+    op.drop_index('ix_tasks_id', table_name='tasks')
+    op.drop_table('tasks')
+    op.drop_index('ix_employees_id', table_name='employees')
+    op.drop_table('employees')
@@ -0,0 +1,147 @@
+"""
+Schema changes made before migrations existed
+
+Older databases were kept current with Base.metadata.create_all, which adds
+missing tables but never alters existing ones. Depending on its age a
+database may lack the calendar tables, the 3-hour forecast columns and
+unique key of weather_logs, or the pagination indexes. Every step checks
+what is already there, so this revision brings any of those states to the
+same schema.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_employees_active_id', 'employees', ['is_active', 'id']),
+    ('ix_tasks_start_id', 'tasks', ['start_time', 'id']),
+    ('ix_tasks_employee_start_id', 'tasks', ['employee_id', 'start_time', 'id']),
+    ('ix_tasks_status_start_id', 'tasks', ['status', 'start_time', 'id']),
+    ('ix_tasks_type_start_id', 'tasks', ['task_type', 'start_time', 'id']),
+]
+
+
+def _upgrade_weather_logs(inspector) -> None:
+    columns = {column['name'] for column in inspector.get_columns('weather_logs')}
+    new_columns = [
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('rain_mm', sa.Float(), nullable=True),
+        sa.Column('humidity', sa.Float(), nullable=True),
+        sa.Column('wind_speed', sa.Float(), nullable=True),
+        sa.Column('fetched_at', sa.DateTime(), nullable=True),
+    ]
+    missing = [column for column in new_columns if column.name not in columns]
+    if missing:
+        with op.batch_alter_table('weather_logs') as batch:
+            for column in missing:
+                batch.add_column(column)
+    
+    constraints = {c['name'] for c in inspector.get_unique_constraints('weather_logs')}
+    if 'uq_weather_logs_location_date' in constraints:
+        return
+    
+    # Old logs had no location; keep the newest row of each sample time
+    op.execute("UPDATE weather_logs SET location = '' WHERE location IS NULL")
+    op.execute(
+        "DELETE FROM weather_logs WHERE id NOT IN "
+        "(SELECT MAX(id) FROM weather_logs GROUP BY location, date)"
+    )
+    with op.batch_alter_table('weather_logs') as batch:
+        batch.alter_column('location', existing_type=sa.String(), nullable=False)
+        batch.create_unique_constraint('uq_weather_logs_location_date', ['location', 'date'])
+
+
+def _create_calendar_tables(tables) -> None:
+    if 'calendar_events' not in tables:
+        op.create_table(
+            'calendar_events',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('calendar_id', sa.String(), nullable=False),
+            sa.Column('event_id', sa.String(), nullable=False),
+            sa.Column('summary', sa.String(), nullable=True),
+            sa.Column('start_time', sa.DateTime(), nullable=False),
+            sa.Column('end_time', sa.DateTime(), nullable=False),
+            sa.Column('is_busy', sa.Boolean(), nullable=True),
+            sa.Column('updated', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('calendar_id', 'event_id', name='uq_calendar_events_calendar_event'),
+        )
+        op.create_index('ix_calendar_events_id', 'calendar_events', ['id'])
+        op.create_index('ix_calendar_events_calendar_range', 'calendar_events', ['calendar_id', 'start_time', 'end_time'])
+    
+    if 'calendar_sync_states' not in tables:
+        op.create_table(
+            'calendar_sync_states',
+            sa.Column('calendar_id', sa.String(), nullable=False),
+            sa.Column('sync_token', sa.String(), nullable=True),
+            sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+            sa.Column('last_full_sync_at', sa.DateTime(), nullable=True),
+            sa.Column('full_syncs', sa.Integer(), nullable=True),
+            sa.Column('incremental_syncs', sa.Integer(), nullable=True),
+            sa.Column('token_expirations', sa.Integer(), nullable=True),
+            sa.Column('events_applied', sa.Integer(), nullable=True),
+            sa.Column('last_error', sa.String(), nullable=True),
+            sa.PrimaryKeyConstraint('calendar_id'),
+        )
+    
+    if 'calendar_outbox' not in tables:
+        op.create_table(
+            'calendar_outbox',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('task_id', sa.Integer(), nullable=True),
+            sa.Column('operation', sa.String(), nullable=False),
+            sa.Column('calendar_id', sa.String(), nullable=False),
+            sa.Column('event_id', sa.String(), nullable=True),
+            sa.Column('payload', sa.String(), nullable=True),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=True),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+            sa.Column('last_error', sa.String(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index('ix_calendar_outbox_id', 'calendar_outbox', ['id'])
+        op.create_index('ix_calendar_outbox_status_next', 'calendar_outbox', ['status', 'next_attempt_at'])
+        op.create_index('ix_calendar_outbox_task', 'calendar_outbox', ['task_id', 'status'])
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    
+    _upgrade_weather_logs(inspector)
+    _create_calendar_tables(tables)
+    
+    existing = {
+        index['name']
+        for table in ('employees', 'tasks')
+        for index in inspector.get_indexes(table)
+    }
+    for name, table, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    
+    op.drop_table('calendar_outbox')
+    op.drop_table('calendar_sync_states')
+    op.drop_table('calendar_events')
+    
+    with op.batch_alter_table('weather_logs') as batch:
+        batch.drop_constraint('uq_weather_logs_location_date', type_='unique')
+        for column in ('fetched_at', 'wind_speed', 'humidity', 'rain_mm', 'location'):
+            batch.drop_column(column)
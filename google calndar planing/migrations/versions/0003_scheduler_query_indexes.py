@@ -0,0 +1,45 @@
+"""
+Partial indexes for the scheduler's hot queries
+
+- ix_tasks_unassigned_status_start: optimize_schedule's "unassigned
+  planned tasks in range" seeks status + start_time among unassigned rows
+- ix_tasks_assigned_employee_status_start: weekly hours, workload and the
+  task index build filter assigned tasks on employee_id + status +
+  start_time; end_time and estimated_hours are in the index so those
+  queries never read the table
+
+Predicates use only IS [NOT] NULL. SQLite matches a partial index to a
+query with bound parameters for those, but not for status IN (...), so the
+status goes into the key instead.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-10-20
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_tasks_unassigned_status_start', 'tasks', ['status', 'start_time'],
+        sqlite_where=sa.text("employee_id IS NULL"),
+        postgresql_where=sa.text("employee_id IS NULL"),
+    )
+    op.create_index(
+        'ix_tasks_assigned_employee_status_start', 'tasks',
+        ['employee_id', 'status', 'start_time', 'end_time', 'estimated_hours'],
+        sqlite_where=sa.text("employee_id IS NOT NULL"),
+        postgresql_where=sa.text("employee_id IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_assigned_employee_status_start', table_name='tasks')
+    op.drop_index('ix_tasks_unassigned_status_start', table_name='tasks')
@@ -0,0 +1,52 @@
+"""
+task_archive: old completed tasks moved out of tasks
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+# The enum types already exist on PostgreSQL (tasks table)
+TASK_TYPE = postgresql.ENUM('INSTALLATION', 'PRODUCTION', name='tasktype', create_type=False)
+TASK_STATUS = postgresql.ENUM('PLANNED', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED', name='taskstatus', create_type=False)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'task_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('task_type', TASK_TYPE, nullable=False),
+        sa.Column('status', TASK_STATUS, nullable=False),
+        sa.Column('start_time', sa.DateTime(), nullable=False),
+        sa.Column('end_time', sa.DateTime(), nullable=False),
+        sa.Column('estimated_hours', sa.Float(), nullable=False),
+        sa.Column('employee_id', sa.Integer(), nullable=True),
+        sa.Column('location', sa.String(), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_task_archive_task', 'task_archive', ['task_id'])
+    op.create_index('ix_task_archive_employee_start', 'task_archive', ['employee_id', 'start_time'])
+    op.create_index('ix_task_archive_start', 'task_archive', ['start_time'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_archive_start', table_name='task_archive')
+    op.drop_index('ix_task_archive_employee_start', table_name='task_archive')
+    op.drop_index('ix_task_archive_task', table_name='task_archive')
+    op.drop_table('task_archive')
@@ -0,0 +1,69 @@
+"""
+FTS5 search index over task titles, descriptions and locations (SQLite)
+
+tasks_fts and task_archive_fts are external-content FTS5 tables: they keep
+only the index and read the text from tasks / task_archive by rowid.
+Triggers update them on every insert, delete and text change. The
+unicode61 tokenizer with remove_diacritics 2 folds case and Slovak
+diacritics ("kosice" matches "Košice"); prefix indexes make "nov*"
+queries cheap. On other databases nothing is created and search falls
+back to ILIKE.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-10-24
+"""
+from alembic import op
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+# (content table, index table)
+SEARCH_INDEXES = [('tasks', 'tasks_fts'), ('task_archive', 'task_archive_fts')]
+COLUMNS = ['title', 'description', 'location']
+# bm25 weights of title, description, location for ORDER BY rank
+RANK = 'bm25(10.0, 1.0, 5.0)'
+
+
+def _values(prefix: str) -> str:
+    return ', '.join(f'{prefix}.{name}' for name in COLUMNS)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    columns = ', '.join(COLUMNS)
+    for table, index in SEARCH_INDEXES:
+        op.execute(
+            f"CREATE VIRTUAL TABLE {index} USING fts5({columns}, content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(f"INSERT INTO {index}({index}, rank) VALUES ('rank', '{RANK}')")
+        op.execute(
+            f"CREATE TRIGGER {index}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {_values('new')}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER {index}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, {columns}) VALUES ('delete', old.id, {_values('old')}); END"
+        )
+        # Status changes and reassignments don't touch the index
+        op.execute(
+            f"CREATE TRIGGER {index}_update AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, {columns}) VALUES ('delete', old.id, {_values('old')}); "
+            f"INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {_values('new')}); END"
+        )
+        op.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, index in SEARCH_INDEXES:
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {index}_{trigger}")
+        op.execute(f"DROP TABLE IF EXISTS {index}")
@@ -0,0 +1,45 @@
+"""
+change_log: task and employee changes for GET /changes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2025-10-27
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'change_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('operation', sa.String(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True,
+    )
+    op.create_index('ix_change_log_entity', 'change_log', ['entity', 'entity_id', 'id'])
+    op.create_index('ix_change_log_changed_at', 'change_log', ['changed_at'])
+    op.create_table(
+        'change_feed_state',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('horizon', sa.Integer(), nullable=False),
+        sa.Column('compacted_at', sa.DateTime(), nullable=True),
+        sa.Column('removed', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('change_feed_state')
+    op.drop_index('ix_change_log_changed_at', table_name='change_log')
+    op.drop_index('ix_change_log_entity', table_name='change_log')
+    op.drop_table('change_log')
@@ -1,10 +1,14 @@
 """
 Models package
 """
-from .database import Base, Employee, Task, WeatherLog, EmployeeType, TaskType, TaskStatus
+from .database import (
+    Base, Employee, Task, TaskArchive, WeatherLog, CalendarEvent, CalendarSyncState, CalendarOutbox,
+    EmployeeType, TaskType, TaskStatus
+)
 from .schemas import (
     EmployeeCreate, EmployeeUpdate, EmployeeResponse,
     TaskCreate, TaskUpdate, TaskResponse, TaskWithEmployee,
+    EmployeePage, TaskPage,
     WeatherResponse, WeatherCondition, WeatherForecast,
     ChatMessage, ChatResponse,
     PlanningRequest, PlanningResponse,
@@ -12,10 +16,12 @@ from .schemas import (
 )
 
 __all__ = [
-    "Base", "Employee", "Task", "WeatherLog",
+    "Base", "Employee", "Task", "TaskArchive", "WeatherLog", "CalendarEvent", "CalendarSyncState",
+    "CalendarOutbox",
     "EmployeeType", "TaskType", "TaskStatus",
     "EmployeeCreate", "EmployeeUpdate", "EmployeeResponse",
     "TaskCreate", "TaskUpdate", "TaskResponse", "TaskWithEmployee",
+    "EmployeePage", "TaskPage",
     "WeatherResponse", "WeatherCondition", "WeatherForecast",
     "ChatMessage", "ChatResponse",
     "PlanningRequest", "PlanningResponse",
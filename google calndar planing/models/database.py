@@ -1,7 +1,7 @@
 """
 Database models for production planner
 """
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, ForeignKey, Enum, Index, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -34,6 +34,9 @@ class TaskStatus(str, enum.Enum):
 class Employee(Base):
     """Model zamestnanca"""
     __tablename__ = "employees"
+    __table_args__ = (
+        Index("ix_employees_active_id", "is_active", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -55,6 +58,27 @@ class Employee(Base):
 class Task(Base):
     """Model úlohy"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Kľúč stránkovania (start_time, id), aj s filtrami z GET /tasks
+        Index("ix_tasks_start_id", "start_time", "id"),
+        Index("ix_tasks_employee_start_id", "employee_id", "start_time", "id"),
+        Index("ix_tasks_status_start_id", "status", "start_time", "id"),
+        Index("ix_tasks_type_start_id", "task_type", "start_time", "id"),
+        # Nepriradené úlohy podľa stavu v rozsahu (optimalizácia plánu)
+        Index(
+            "ix_tasks_unassigned_status_start", "status", "start_time",
+            sqlite_where=text("employee_id IS NULL"),
+            postgresql_where=text("employee_id IS NULL"),
+        ),
+        # Priradené úlohy: týždenné hodiny, vyťaženosť, index konfliktov;
+        # časy a hodiny sú v indexe, takže sa tabuľka nečíta
+        Index(
+            "ix_tasks_assigned_employee_status_start",
+            "employee_id", "status", "start_time", "end_time", "estimated_hours",
+            sqlite_where=text("employee_id IS NOT NULL"),
+            postgresql_where=text("employee_id IS NOT NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -88,19 +112,158 @@ class Task(Base):
         return f"<Task {self.title} ({self.task_type})>"
 
 
+class TaskArchive(Base):
+    """Archív starých dokončených úloh, presunutých z tabuľky tasks"""
+    __tablename__ = "task_archive"
+    __table_args__ = (
+        Index("ix_task_archive_task", "task_id"),
+        Index("ix_task_archive_employee_start", "employee_id", "start_time"),
+        Index("ix_task_archive_start", "start_time"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    task_id = Column(Integer, nullable=False)  # pôvodné tasks.id (SQLite ho môže neskôr použiť znova)
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    task_type = Column(Enum(TaskType), nullable=False)
+    status = Column(Enum(TaskStatus), nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    estimated_hours = Column(Float, nullable=False)
+    employee_id = Column(Integer, nullable=True)  # bez FK, zamestnanec môže byť zmazaný
+    location = Column(String, nullable=True)
+    priority = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TaskArchive {self.id} {self.title}>"
+
+
 class WeatherLog(Base):
-    """Log počasia pre historické účely"""
+    """Log počasia - 3-hodinová predpoveď pre lokalitu, aj pre historické účely"""
     __tablename__ = "weather_logs"
+    __table_args__ = (
+        UniqueConstraint("location", "date", name="uq_weather_logs_location_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(DateTime, nullable=False)
+    location = Column(String, nullable=False, default="")
+    date = Column(DateTime, nullable=False)  # čas vzorky predpovede (lokálny)
     condition = Column(String, nullable=False)  # sunny, rainy, cloudy, etc.
     temperature = Column(Float, nullable=True)
     description = Column(String, nullable=True)
     suitable_for_installation = Column(Boolean, nullable=False)
+    rain_mm = Column(Float, nullable=True)  # zrážky za 3 hodiny
+    humidity = Column(Float, nullable=True)
+    wind_speed = Column(Float, nullable=True)
+    fetched_at = Column(DateTime, nullable=True)  # kedy bola predpoveď stiahnutá
     created_at = Column(DateTime, default=datetime.utcnow)
 
     def __repr__(self):
         return f"<WeatherLog {self.date} - {self.condition}>"
 
 
+class CalendarEvent(Base):
+    """Lokálna kópia udalosti z Google Calendar (event mirror)"""
+    __tablename__ = "calendar_events"
+    __table_args__ = (
+        UniqueConstraint("calendar_id", "event_id", name="uq_calendar_events_calendar_event"),
+        Index("ix_calendar_events_calendar_range", "calendar_id", "start_time", "end_time"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    calendar_id = Column(String, nullable=False)
+    event_id = Column(String, nullable=False)
+    summary = Column(String, nullable=True)
+    
+    # Časy sú uložené v UTC bez časovej zóny
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    is_busy = Column(Boolean, default=True)  # transparent udalosti neblokujú čas
+    updated = Column(String, nullable=True)  # RFC3339 'updated' z Google
+
+    def __repr__(self):
+        return f"<CalendarEvent {self.calendar_id}/{self.event_id}>"
+
+
+class CalendarSyncState(Base):
+    """Stav inkrementálnej synchronizácie kalendára (syncToken)"""
+    __tablename__ = "calendar_sync_states"
+
+    calendar_id = Column(String, primary_key=True)
+    sync_token = Column(String, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    last_full_sync_at = Column(DateTime, nullable=True)
+    
+    # Počítadlá
+    full_syncs = Column(Integer, default=0)
+    incremental_syncs = Column(Integer, default=0)
+    token_expirations = Column(Integer, default=0)  # 410 Gone
+    events_applied = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<CalendarSyncState {self.calendar_id}>"
+
+
+class CalendarOutbox(Base):
+    """Fronta zmien pre Google Calendar (write-behind outbox)"""
+    __tablename__ = "calendar_outbox"
+    __table_args__ = (
+        Index("ix_calendar_outbox_status_next", "status", "next_attempt_at"),
+        Index("ix_calendar_outbox_task", "task_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(Integer, nullable=True)  # bez FK, úloha môže byť medzitým zmazaná
+    operation = Column(String, nullable=False)  # create, update, delete
+    calendar_id = Column(String, nullable=False)
+    event_id = Column(String, nullable=True)
+    payload = Column(String, nullable=True)  # JSON s údajmi udalosti
+    
+    # Spracovanie
+    status = Column(String, nullable=False, default="pending")  # pending, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<CalendarOutbox {self.operation} task={self.task_id} ({self.status})>"
+
+
+class ChangeLog(Base):
+    """Denník zmien úloh a zamestnancov pre GET /changes (id je kurzor)"""
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_entity", "entity", "entity_id", "id"),
+        Index("ix_change_log_changed_at", "changed_at"),
+        # AUTOINCREMENT: id sa nepoužije znova ani po zmazaní najnovších riadkov
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # task, employee
+    entity_id = Column(Integer, nullable=False)  # bez FK, tombstone prežije zmazanie
+    operation = Column(String, nullable=False)  # upsert, delete
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChangeLog {self.id} {self.operation} {self.entity}={self.entity_id}>"
+
+
+class ChangeFeedState(Base):
+    """Stav kompakcie denníka zmien (jeden riadok)"""
+    __tablename__ = "change_feed_state"
+
+    id = Column(Integer, primary_key=True)
+    # Kurzory menšie ako horizon mohli prísť o zmazané tombstony
+    horizon = Column(Integer, nullable=False, default=0)
+    compacted_at = Column(DateTime, nullable=True)
+    removed = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ChangeFeedState horizon={self.horizon}>"
@@ -0,0 +1,135 @@
+"""
+Database engines: synchronous writer for the scheduler and workers, async reader for API reads
+
+Both engines point at the same database. The async one swaps the driver
+(sqlite -> aiosqlite, postgresql -> asyncpg) unless ASYNC_DATABASE_URL is
+set, and its queries don't block the event loop.
+
+Pool sizing (per engine, ignored for in-memory SQLite):
+    DB_POOL_SIZE      connections kept open (default 5)
+    DB_MAX_OVERFLOW   extra connections under load (default 10)
+    DB_POOL_TIMEOUT   seconds to wait for a free connection (default 30)
+
+SQLite file databases get pragmas on every new connection, chosen by
+SQLITE_PROFILE:
+    production  WAL journal (readers never wait for the writer and vice
+                versa), synchronous=NORMAL (durable at checkpoints, no fsync
+                per commit), page cache, mmap, busy_timeout, and write
+                transactions opened with BEGIN IMMEDIATE (default)
+    default     SQLite defaults, only busy_timeout
+The reader pool additionally runs with query_only, so a write slipping into
+a read endpoint fails instead of competing for the write lock.
+"""
+import os
+from typing import List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production").lower()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+SQLITE_PROFILES = ("production", "default")
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(database_url: str) -> str:
+    """Async driver URL for the same database"""
+    if os.getenv("ASYNC_DATABASE_URL"):
+        return os.getenv("ASYNC_DATABASE_URL")
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and url.drivername == backend:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+def _is_memory(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _pool_options(database_url: str, pool_class) -> dict:
+    if _is_memory(database_url):
+        return {}
+    # aiosqlite defaults to NullPool: a new connection and thread per checkout
+    return {
+        "poolclass": pool_class,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+    }
+
+
+def sqlite_pragmas(profile: str = None, reader: bool = False) -> List[Tuple[str, object]]:
+    """PRAGMA (name, value) pairs run on each new connection"""
+    profile = (profile or SQLITE_PROFILE).lower()
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{profile}', expected one of {SQLITE_PROFILES}")
+    
+    pragmas = [("busy_timeout", SQLITE_BUSY_TIMEOUT_MS)]
+    if profile == "production":
+        pragmas += [
+            ("journal_mode", "WAL"),
+            ("synchronous", "NORMAL"),
+            ("cache_size", -SQLITE_CACHE_SIZE_KB),  # negative = KiB
+            ("mmap_size", SQLITE_MMAP_SIZE),
+            ("temp_store", "MEMORY"),
+        ]
+    if reader:
+        pragmas.append(("query_only", "ON"))
+    return pragmas
+
+
+def apply_sqlite_profile(engine: Engine, profile: str = None, reader: bool = False) -> None:
+    """Run the profile's pragmas on every connection the engine opens"""
+    if engine.dialect.name != "sqlite" or _is_memory(str(engine.url)):
+        return
+    pragmas = sqlite_pragmas(profile, reader)
+    
+    # sqlite3 still begins lazily at the first INSERT/UPDATE/DELETE, but
+    # takes the write lock up front. A deferred BEGIN starts as a reader and
+    # fails at once with "database is locked" if another writer commits
+    # before it upgrades; busy_timeout doesn't cover that case in WAL mode.
+    immediate = not reader and (profile or SQLITE_PROFILE).lower() == "production"
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+        if immediate:
+            dbapi_connection.isolation_level = "IMMEDIATE"
+
+
+def create_db_engine(database_url: str, profile: str = None, reader: bool = False) -> Engine:
+    """Engine with its own pool: read-write by default (ORM sessions, workers, migrations)"""
+    connect_args = {"check_same_thread": False} if "sqlite" in database_url else {}
+    engine = create_engine(
+        database_url,
+        connect_args=connect_args,
+        **_pool_options(database_url, QueuePool)
+    )
+    apply_sqlite_profile(engine, profile, reader)
+    return engine
+
+
+def create_async_db_engine(database_url: str, profile: str = None) -> AsyncEngine:
+    """Read-only async engine for database_url (a sync URL, the driver is swapped)"""
+    url = async_database_url(database_url)
+    engine = create_async_engine(url, **_pool_options(url, AsyncAdaptedQueuePool))
+    apply_sqlite_profile(engine.sync_engine, profile, reader=True)
+    return engine
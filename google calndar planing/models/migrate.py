@@ -0,0 +1,74 @@
+"""
+Database schema upgrades with Alembic
+
+The API upgrades its database to the latest revision on startup. A
+database created before migrations existed (tables but no alembic_version)
+is stamped at the initial revision first; the next revision then adds
+whatever create_all never did on it.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Revision matching the schema of the first create_all release
+BASELINE_REVISION = "0001"
+
+# Rows sampled per index by ANALYZE after an upgrade
+ANALYSIS_LIMIT = 1000
+
+# FTS5 search tables (revision 0005) and their shadow tables, not in the models
+SEARCH_INDEX_TABLES = ("tasks_fts", "task_archive_fts")
+
+
+def alembic_config(connection=None) -> Config:
+    """Alembic config of the project, optionally bound to an open connection"""
+    config = Config(os.path.join(PROJECT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_DIR, "migrations"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Autogenerate filter: the search index tables are managed by hand"""
+    return not (type_ == "table" and name.startswith(SEARCH_INDEX_TABLES))
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(engine: Engine):
+    """Revision the database is at, None if unversioned"""
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade_database(engine: Engine, revision: str = "head") -> None:
+    """Bring the database schema to the given revision"""
+    tables = set(inspect(engine).get_table_names())
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        if "alembic_version" not in tables and "tasks" in tables:
+            print("🗂️  Databáza bez verzie schémy, označujem ako počiatočnú revíziu")
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, revision)
+        
+        if connection.dialect.name == "sqlite":
+            # Row counts of the partial indexes let the planner prefer them;
+            # analysis_limit samples big tables so startup stays fast
+            connection.exec_driver_sql(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+            connection.exec_driver_sql("ANALYZE")
+
+
+def downgrade_database(engine: Engine, revision: str = "base") -> None:
+    """Revert the schema to the given revision, "base" drops all tables"""
+    with engine.begin() as connection:
+        command.downgrade(alembic_config(connection), revision)
@@ -3,7 +3,7 @@ Pydantic schemas for API validation
 """
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Dict
 from enum import Enum
 
 
@@ -51,7 +51,7 @@ class EmployeeResponse(EmployeeBase):
     is_active: bool
     created_at: datetime
     updated_at: datetime
-
+    
     class Config:
         from_attributes = True
 
@@ -92,7 +92,7 @@ class TaskResponse(TaskBase):
     google_event_id: Optional[str]
     created_at: datetime
     updated_at: datetime
-
+    
     class Config:
         from_attributes = True
 
@@ -101,6 +101,57 @@ class TaskWithEmployee(TaskResponse):
     employee: Optional[EmployeeResponse] = None
 
 
+# Pagination Schemas
+class EmployeePage(BaseModel):
+    items: List[EmployeeResponse]
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+class TaskPage(BaseModel):
+    items: List[TaskWithEmployee]
+    next_cursor: Optional[str] = None
+
+
+# Search Schemas
+class TaskSearchHit(BaseModel):
+    id: int  # task id, also for archived tasks
+    archived: bool
+    title: str
+    location: Optional[str]
+    start_time: datetime
+    end_time: datetime
+    status: TaskStatus
+    task_type: TaskType
+    employee_id: Optional[int]
+    rank: Optional[float] = None  # bm25, lower is better; None without the index
+    title_highlight: Optional[str] = None
+    snippet: Optional[str] = None
+
+
+class TaskSearchResults(BaseModel):
+    query: str
+    indexed: bool  # False: ILIKE fallback, unranked
+    items: List[TaskSearchHit]
+
+
+# Change Feed Schemas
+class ChangeEntry(BaseModel):
+    cursor: int
+    entity: str  # task, employee
+    id: int
+    operation: str  # upsert, delete (tombstone)
+    changed_at: datetime
+    task: Optional[TaskResponse] = None  # current data of an upserted task
+    employee: Optional[EmployeeResponse] = None
+
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangeEntry]
+    cursor: int  # pass as since in the next request
+    has_more: bool
+    reset: bool  # True: reload /tasks and /employees, then continue from cursor
+
+
 # Weather Schemas
 class WeatherCondition(BaseModel):
     condition: str
@@ -149,6 +200,7 @@ class PlanningResponse(BaseModel):
     success: bool
     message: str
     suggested_dates: List[datetime]
+    suggested_windows: Optional[List[Dict]] = None  # {'start', 'end', 'hours', ...}
     assigned_employee: Optional[EmployeeResponse] = None
     task: Optional[TaskResponse] = None
 
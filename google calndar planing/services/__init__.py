@@ -3,17 +3,24 @@ Services package
 """
 from .google_calendar import get_calendar_service, GoogleCalendarService
 from .weather import get_weather_service, WeatherService
+from .weather_store import WeatherStore
 from .ai_agent import get_ai_agent, AIAgent
+from .calendar_mirror import CalendarMirror
 from .scheduler import Scheduler
+from .change_feed import get_changes, ChangeLogCompactor
 
 __all__ = [
     "get_calendar_service",
     "GoogleCalendarService",
     "get_weather_service",
     "WeatherService",
+    "WeatherStore",
     "get_ai_agent",
     "AIAgent",
-    "Scheduler"
+    "CalendarMirror",
+    "Scheduler",
+    "get_changes",
+    "ChangeLogCompactor"
 ]
 
 
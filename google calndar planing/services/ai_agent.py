@@ -13,6 +13,8 @@ from typing import Dict, Optional, List
 from datetime import datetime, timedelta
 from openai import OpenAI
 
+from services.executor import bounded
+
 
 class AIAgent:
     """
@@ -56,6 +58,7 @@ Vždy odpovedaj po slovensky, stručne a prakticky.
 Ak potrebuješ vykonať akciu (napr. vytvoriť úlohu), vráť action v JSON formáte.
 """
     
+    @bounded('openai')
     def chat(
         self,
         message: str,
@@ -0,0 +1,434 @@
+"""
+Simulated annealing over (task, employee, start hour) for multi-week plans
+
+Assignment alone keeps every task at its requested time. This engine also
+moves tasks in time within the planning range: weather-dependent work goes
+to hours the stored forecast marks suitable, production fills the rest.
+The objective combines unassigned priority, distance from the requested
+start, weather, weekly load balance and travel (location changes within
+an employee's day). Every move touches one or two tasks, so its cost is
+evaluated incrementally from per-task terms, the employee-week load and
+the affected employee-days only. Hard constraints (employee type, calendar
+conflicts, overlaps, weekly hour caps) are never violated.
+
+Runs are reproducible for a given seed when max_iterations is set; with
+only a wall-clock budget the number of iterations depends on the machine.
+"""
+import math
+import random
+import time
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from models.database import EmployeeType, TaskType
+from services.google_calendar import wall_clock
+
+# Objective weights (lower total cost is better)
+UNASSIGNED_WEIGHT = 100.0        # per priority point of an unassigned task
+SHIFT_WEIGHT = 1.0               # per priority point and day moved from the requested start
+WEATHER_WEIGHT = 20.0            # per unsuitable hour of weather-dependent work
+PRODUCTION_GOOD_WEATHER_WEIGHT = 1.0  # per suitable hour spent on production
+BALANCE_WEIGHT = 0.05            # times the squared hours of each employee-week
+TRAVEL_WEIGHT = 5.0              # per location change within an employee's day
+
+START_TEMPERATURE = 20.0
+END_TEMPERATURE = 0.05
+
+_HOUR = timedelta(hours=1)
+
+
+def _required_types(task_type: TaskType) -> Tuple[EmployeeType, ...]:
+    if task_type == TaskType.INSTALLATION:
+        return (EmployeeType.INSTALLER, EmployeeType.BOTH)
+    return (EmployeeType.PRODUCER, EmployeeType.BOTH)
+
+
+class ScheduleAnnealer:
+    """
+    Local search for task times and employees within [start, end)
+    
+    Args:
+        tasks: objects with id, task_type, start_time, end_time,
+            estimated_hours, priority, location and weather_dependent
+        employees: objects with id, employee_type and max_hours_per_week
+        start, end: planning range; moved tasks start on working days
+            inside it, at full hours within working hours
+        busy: employee_id -> [(start, end)] datetimes already blocked,
+            naive planner time or aware
+        weekly_hours: employee_id -> {week_monday: hours} already planned
+        weather: location -> hourly suitability from start's midnight
+            (services.weather_windows.hourly_suitability)
+        default_location: weather used for tasks without a known location
+        initial: task_id -> employee_id starting assignment at requested times
+        seed: random seed
+        time_budget_seconds: wall-clock limit
+        max_iterations: optional iteration limit (deterministic runs)
+    """
+    
+    def __init__(
+        self,
+        tasks: List,
+        employees: List,
+        start: datetime,
+        end: datetime,
+        busy: Optional[Dict[int, List[Tuple[datetime, datetime]]]] = None,
+        weekly_hours: Optional[Dict[int, Dict[date, float]]] = None,
+        weather: Optional[Dict[str, np.ndarray]] = None,
+        default_location: Optional[str] = None,
+        initial: Optional[Dict[int, int]] = None,
+        seed: int = 0,
+        time_budget_seconds: float = 5.0,
+        max_iterations: Optional[int] = None,
+        working_hours_start: int = 8,
+        working_hours_end: int = 17
+    ):
+        self.tasks = list(tasks)
+        self.employees = list(employees)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.time_budget_seconds = time_budget_seconds
+        self.max_iterations = max_iterations
+        
+        self.origin = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        horizon = max([end] + [t.end_time for t in self.tasks])
+        self.n_hours = math.ceil((horizon - self.origin) / _HOUR) + 1
+        self.n_days = self.n_hours // 24 + 1
+        
+        monday = self.origin.toordinal() - self.origin.weekday()
+        self.n_weeks = (self.origin.toordinal() + self.n_days - monday) // 7 + 1
+        self.week_of_day = (self.origin.toordinal() + np.arange(self.n_days) - monday) // 7
+        
+        # Task data
+        n_tasks = len(self.tasks)
+        self.duration = np.array([
+            max(1, math.ceil((t.end_time - t.start_time) / _HOUR)) for t in self.tasks
+        ], dtype=np.int64)
+        self.requested = np.array([
+            math.floor((t.start_time - self.origin) / _HOUR) for t in self.tasks
+        ], dtype=np.int64)
+        self.hours = np.array([t.estimated_hours or 0 for t in self.tasks], dtype=np.float64)
+        self.priority = np.array([t.priority or 3 for t in self.tasks], dtype=np.float64)
+        self.location = [getattr(t, 'location', None) or None for t in self.tasks]
+        self.candidates = [
+            self._candidate_starts(i, start, end, working_hours_start, working_hours_end)
+            for i in range(n_tasks)
+        ]
+        self.capable = [
+            [j for j, e in enumerate(self.employees) if e.employee_type in _required_types(t.task_type)]
+            for t in self.tasks
+        ]
+        
+        # Weather prefix sums of unsuitable / suitable hours per task's location
+        weather = weather or {}
+        bad_sums, good_sums = {}, {}
+        for location, suitability in weather.items():
+            values = np.full(self.n_hours, np.nan)
+            values[:min(len(suitability), self.n_hours)] = suitability[:self.n_hours]
+            bad_sums[location] = np.concatenate(([0.0], np.cumsum(values == 0)))
+            good_sums[location] = np.concatenate(([0.0], np.cumsum(values == 1)))
+        zero = np.zeros(self.n_hours + 1)
+        self.weather_kind = np.zeros(n_tasks, dtype=np.int8)  # 1 weather-dependent, 2 production
+        self.bad_sum, self.good_sum = [], []
+        for i, task in enumerate(self.tasks):
+            key = task_location = self.location[i]
+            if task_location not in bad_sums:
+                key = default_location
+            self.bad_sum.append(bad_sums.get(key, zero))
+            self.good_sum.append(good_sums.get(key, zero))
+            if getattr(task, 'weather_dependent', False):
+                self.weather_kind[i] = 1
+            elif task.task_type == TaskType.PRODUCTION:
+                self.weather_kind[i] = 2
+        
+        # Employee state
+        self.cap = np.array([e.max_hours_per_week or 0 for e in self.employees], dtype=np.float64)
+        self.occupied = np.zeros((len(self.employees), self.n_hours), dtype=bool)
+        self.used = np.zeros((len(self.employees), self.n_weeks), dtype=np.float64)
+        for j, employee in enumerate(self.employees):
+            for busy_start, busy_end in (busy or {}).get(employee.id, []):
+                # Calendar busy times are aware (freeBusy, mirror), tasks naive
+                busy_start, busy_end = wall_clock(busy_start), wall_clock(busy_end)
+                first = max(0, math.floor((busy_start - self.origin) / _HOUR))
+                last = min(self.n_hours, math.ceil((busy_end - self.origin) / _HOUR))
+                if first < last:
+                    self.occupied[j, first:last] = True
+            for week, hours in (weekly_hours or {}).get(employee.id, {}).items():
+                w = (week.toordinal() - monday) // 7
+                if 0 <= w < self.n_weeks:
+                    self.used[j, w] = hours
+        self.day_tasks: Dict[Tuple[int, int], List[int]] = {}
+        
+        # Task state
+        self.employee_of = np.full(n_tasks, -1, dtype=np.int64)
+        self.slot_of = self.requested.copy()
+        self.cost = float(UNASSIGNED_WEIGHT * self.priority.sum())
+        for i, task in enumerate(self.tasks):
+            self._place_initial(i, (initial or {}).get(task.id))
+        self.initial_cost = self.cost
+    
+    def _candidate_starts(self, i: int, start: datetime, end: datetime, day_start: int, day_end: int) -> np.ndarray:
+        """Requested start plus every working-day full hour where the task fits"""
+        duration = self.duration[i]
+        slots = [int(self.requested[i])]
+        if duration <= day_end - day_start:
+            first = max(0, math.ceil((start - self.origin) / _HOUR))
+            for day in range(self.n_days):
+                if (self.origin + timedelta(days=day)).weekday() >= 5:
+                    continue
+                for hour in range(day_start, day_end - duration + 1):
+                    slot = day * 24 + hour
+                    if slot >= first and self.origin + slot * _HOUR < end and slot != slots[0]:
+                        slots.append(slot)
+        return np.array(slots, dtype=np.int64)
+    
+    def _place_initial(self, i: int, employee_id: Optional[int]) -> None:
+        order = [j for j in self.capable[i] if self.employees[j].id == employee_id] + self.capable[i]
+        slot = int(self.requested[i])
+        for j in order:
+            if self._fits(i, j, slot):
+                self._remove(i)
+                self._insert(i, j, slot)
+                return
+    
+    def _task_cost(self, i: int, j: int, slot: int) -> float:
+        """Terms depending on one task only"""
+        if j < 0:
+            return UNASSIGNED_WEIGHT * self.priority[i]
+        cost = SHIFT_WEIGHT * self.priority[i] * abs(slot - self.requested[i]) / 24
+        if self.weather_kind[i]:
+            first, last = max(0, slot), max(0, min(slot + self.duration[i], self.n_hours))
+            if self.weather_kind[i] == 1:
+                cost += WEATHER_WEIGHT * (self.bad_sum[i][last] - self.bad_sum[i][first])
+            else:
+                cost += PRODUCTION_GOOD_WEATHER_WEIGHT * (self.good_sum[i][last] - self.good_sum[i][first])
+        return cost
+    
+    def _week(self, slot: int) -> int:
+        return int(self.week_of_day[min(max(slot, 0) // 24, self.n_days - 1)])
+    
+    def _travel(self, key: Tuple[int, int]) -> int:
+        """Location changes between consecutive tasks of one employee-day"""
+        tasks = self.day_tasks.get(key)
+        if not tasks or len(tasks) < 2:
+            return 0
+        locations = [self.location[i] for i in sorted(tasks, key=lambda i: self.slot_of[i])]
+        return sum(
+            1 for a, b in zip(locations, locations[1:])
+            if a is not None and b is not None and a != b
+        )
+    
+    def _fits(self, i: int, j: int, slot: int) -> bool:
+        first, last = max(0, slot), min(slot + self.duration[i], self.n_hours)
+        if self.occupied[j, first:last].any():
+            return False
+        return self.used[j, self._week(slot)] + self.hours[i] <= self.cap[j]
+    
+    def _remove(self, i: int) -> None:
+        """Unassign task i, updating the total cost"""
+        j, slot = int(self.employee_of[i]), int(self.slot_of[i])
+        if j < 0:
+            return
+        self.cost -= self._task_cost(i, j, slot)
+        first, last = max(0, slot), min(slot + self.duration[i], self.n_hours)
+        self.occupied[j, first:last] = False
+        w = self._week(slot)
+        used = self.used[j, w]
+        self.cost += BALANCE_WEIGHT * ((used - self.hours[i]) ** 2 - used ** 2)
+        self.used[j, w] = used - self.hours[i]
+        key = (j, max(slot, 0) // 24)
+        before = self._travel(key)
+        self.day_tasks[key].remove(i)
+        self.cost += TRAVEL_WEIGHT * (self._travel(key) - before)
+        self.employee_of[i] = -1
+        self.cost += self._task_cost(i, -1, slot)
+    
+    def _insert(self, i: int, j: int, slot: int) -> None:
+        """Assign unassigned task i to employee j at slot (caller checked _fits)"""
+        self.cost -= self._task_cost(i, -1, int(self.slot_of[i]))
+        self.employee_of[i] = j
+        self.slot_of[i] = slot
+        first, last = max(0, slot), min(slot + self.duration[i], self.n_hours)
+        self.occupied[j, first:last] = True
+        w = self._week(slot)
+        used = self.used[j, w]
+        self.cost += BALANCE_WEIGHT * ((used + self.hours[i]) ** 2 - used ** 2)
+        self.used[j, w] = used + self.hours[i]
+        key = (j, max(slot, 0) // 24)
+        before = self._travel(key)
+        self.day_tasks.setdefault(key, []).append(i)
+        self.cost += TRAVEL_WEIGHT * (self._travel(key) - before)
+        self.cost += self._task_cost(i, j, slot)
+    
+    def _propose(self) -> List[Tuple[int, int, int]]:
+        """Random move as [(task, employee or -1, slot)]"""
+        i = self.rng.randrange(len(self.tasks))
+        j, slot = int(self.employee_of[i]), int(self.slot_of[i])
+        capable = self.capable[i]
+        if not capable:
+            return []
+        kind = self.rng.random()
+        
+        if kind < 0.15 and j >= 0:
+            # Swap employees with another task of the same type
+            k = self.rng.randrange(len(self.tasks))
+            jk = int(self.employee_of[k])
+            if k == i or jk < 0 or jk == j or jk not in capable or j not in self.capable[k]:
+                return []
+            return [(i, jk, slot), (k, j, int(self.slot_of[k]))]
+        if kind < 0.45 or j < 0:
+            new_j = self.rng.choice(capable)
+            new_slot = slot if j >= 0 and kind < 0.45 else int(self.rng.choice(self.candidates[i]))
+            return [(i, new_j, new_slot)]
+        if kind < 0.55:
+            # Shift by an hour or a day
+            step = self.rng.choice((-24, -1, 1, 24))
+            new_slot = slot + step
+            if new_slot not in self.candidates[i]:
+                return []
+            return [(i, j, new_slot)]
+        if kind < 0.98:
+            return [(i, j, int(self.rng.choice(self.candidates[i])))]
+        return [(i, -1, slot)]
+    
+    def _apply(self, move: List[Tuple[int, int, int]]) -> Optional[List[Tuple[int, int, int]]]:
+        """Apply a move if feasible; returns the undo move or None"""
+        undo = [(i, int(self.employee_of[i]), int(self.slot_of[i])) for i, _, _ in move]
+        for i, _, _ in move:
+            self._remove(i)
+        for n, (i, j, slot) in enumerate(move):
+            if j < 0:
+                self.slot_of[i] = slot
+                continue
+            if not self._fits(i, j, slot):
+                for done, _, _ in move[:n]:
+                    self._remove(done)
+                self._restore(undo)
+                return None
+            self._insert(i, j, slot)
+        return undo
+    
+    def _restore(self, undo: List[Tuple[int, int, int]]) -> None:
+        for i, _, _ in undo:
+            self._remove(i)
+        for i, j, slot in undo:
+            self.slot_of[i] = slot
+            if j >= 0:
+                self._insert(i, j, slot)
+    
+    def solve(self) -> Dict:
+        """
+        Anneal until the time budget (or max_iterations) is used up
+        
+        Returns:
+            {'schedule': {task_id: {'employee_id', 'start_time', 'end_time'}},
+             'metrics': {...}}
+        """
+        started = time.perf_counter()
+        best_cost = self.cost
+        best = (self.employee_of.copy(), self.slot_of.copy())
+        iterations = accepted = improvements = 0
+        budget_exhausted = False
+        temperature = START_TEMPERATURE
+        
+        while self.tasks:
+            if self.max_iterations is not None:
+                if iterations >= self.max_iterations:
+                    break
+                progress = iterations / self.max_iterations
+            elif iterations % 128 == 0:
+                progress = (time.perf_counter() - started) / self.time_budget_seconds if self.time_budget_seconds > 0 else 1.0
+                if progress >= 1:
+                    budget_exhausted = True
+                    break
+            if iterations % 128 == 0:
+                temperature = START_TEMPERATURE * (END_TEMPERATURE / START_TEMPERATURE) ** progress
+                if self.max_iterations is not None and time.perf_counter() - started > self.time_budget_seconds:
+                    budget_exhausted = True
+                    break
+            iterations += 1
+            
+            move = self._propose()
+            if not move:
+                continue
+            before = self.cost
+            undo = self._apply(move)
+            if undo is None:
+                continue
+            delta = self.cost - before
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                accepted += 1
+                if self.cost < best_cost - 1e-9:
+                    best_cost = self.cost
+                    best = (self.employee_of.copy(), self.slot_of.copy())
+                    improvements += 1
+            else:
+                self._restore(undo)
+                self.cost = before  # drop float drift of apply + undo
+        
+        self._load(*best)
+        self.cost = best_cost
+        return {
+            'schedule': self._schedule(),
+            'metrics': self._metrics(iterations, accepted, improvements, started, budget_exhausted)
+        }
+    
+    def _load(self, employee_of: np.ndarray, slot_of: np.ndarray) -> None:
+        """Replace the current state with a stored solution"""
+        for i in range(len(self.tasks)):
+            self._remove(i)
+        for i in range(len(self.tasks)):
+            self.slot_of[i] = slot_of[i]
+            if employee_of[i] >= 0:
+                self._insert(i, int(employee_of[i]), int(slot_of[i]))
+    
+    def _schedule(self) -> Dict[int, Dict]:
+        schedule = {}
+        for i, task in enumerate(self.tasks):
+            j, slot = int(self.employee_of[i]), int(self.slot_of[i])
+            if j < 0:
+                continue
+            if slot == self.requested[i]:
+                start_time, end_time = task.start_time, task.end_time
+            else:
+                start_time = self.origin + slot * _HOUR
+                end_time = start_time + (task.end_time - task.start_time)
+            schedule[task.id] = {
+                'employee_id': self.employees[j].id,
+                'start_time': start_time,
+                'end_time': end_time
+            }
+        return schedule
+    
+    def _metrics(self, iterations: int, accepted: int, improvements: int, started: float, budget_exhausted: bool) -> Dict:
+        assigned = self.employee_of >= 0
+        moved = assigned & (self.slot_of != self.requested)
+        bad_hours = sum(
+            self.bad_sum[i][min(self.slot_of[i] + self.duration[i], self.n_hours)] - self.bad_sum[i][max(self.slot_of[i], 0)]
+            for i in np.flatnonzero(assigned & (self.weather_kind == 1))
+        )
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = self.used / self.cap[:, None]
+        utilization = utilization[np.isfinite(utilization) & (self.used > 0)]
+        priority_total = float(self.priority.sum())
+        
+        return {
+            'tasks': len(self.tasks),
+            'assigned': int(assigned.sum()),
+            'unassigned': int((~assigned).sum()),
+            'moved': int(moved.sum()),
+            'priority_coverage': round(float(self.priority[assigned].sum()) / priority_total, 3) if priority_total else None,
+            'weather_unsuitable_hours': int(bad_hours),
+            'travel_changes': sum(self._travel(key) for key in self.day_tasks),
+            'mean_utilization_percent': round(float(utilization.mean()) * 100, 1) if utilization.size else 0.0,
+            'max_utilization_percent': round(float(utilization.max()) * 100, 1) if utilization.size else 0.0,
+            'initial_cost': round(float(self.initial_cost), 2),
+            'cost': round(float(self.cost), 2),
+            'iterations': iterations,
+            'accepted_moves': accepted,
+            'improvements': improvements,
+            'seed': self.seed,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+            'budget_exhausted': budget_exhausted
+        }
@@ -0,0 +1,324 @@
+"""
+Global task -> employee assignment for schedule optimization
+
+The greedy planner assigned tasks one at a time in query order, so an
+early task could take the only employee a later task could use. Here the
+task x employee cost matrix is built once (type match, calendar conflicts,
+weekly hour caps, load balance, priority) and solved as a min-cost
+assignment (scipy linear_sum_assignment). An employee can take several
+tasks, so the assignment is solved in rounds - at most one new task per
+employee per round - and after each round only the affected columns of
+the matrix are updated: hours left in that week and overlaps with the
+task just assigned. Hour caps make rounds myopic, so the rest of the time
+budget goes to a repair pass that relocates one assigned task to make
+room for an unassigned one.
+"""
+import time
+from datetime import datetime, date
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from models.database import EmployeeType, TaskType
+from services.google_calendar import localize
+
+INFEASIBLE = 1e9
+
+# Cost weights (lower is better), mirroring find_best_employee's scoring
+PRIORITY_WEIGHT = 10.0
+AVAILABILITY_WEIGHT = 5.0
+EXACT_TYPE_BONUS = 2.0
+
+
+def _required_types(task_type: TaskType) -> Tuple[EmployeeType, ...]:
+    if task_type == TaskType.INSTALLATION:
+        return (EmployeeType.INSTALLER, EmployeeType.BOTH)
+    return (EmployeeType.PRODUCER, EmployeeType.BOTH)
+
+
+def _week(value: datetime) -> date:
+    return date.fromordinal(value.toordinal() - value.weekday())
+
+
+class AssignmentOptimizer:
+    """
+    Min-cost assignment of tasks (fixed in time) to employees
+    
+    Args:
+        tasks: objects with id, task_type, start_time, end_time,
+            estimated_hours and priority
+        employees: objects with id, employee_type and max_hours_per_week
+        busy: employee_id -> [(start, end)] datetimes already blocked
+            (calendar events and previously assigned tasks)
+        weekly_hours: employee_id -> {week_monday: hours} already planned
+        time_budget_seconds: wall-clock limit for solver rounds and repair
+    """
+    
+    def __init__(
+        self,
+        tasks: List,
+        employees: List,
+        busy: Optional[Dict[int, List[Tuple[datetime, datetime]]]] = None,
+        weekly_hours: Optional[Dict[int, Dict[date, float]]] = None,
+        time_budget_seconds: float = 5.0
+    ):
+        self.tasks = list(tasks)
+        self.employees = list(employees)
+        self.busy = busy or {}
+        self.weekly_hours = weekly_hours or {}
+        self.time_budget_seconds = time_budget_seconds
+        
+        # Naive task times are planner wall-clock time, not the host's
+        self.start = np.array([localize(t.start_time).timestamp() for t in self.tasks], dtype=np.float64)
+        self.end = np.array([localize(t.end_time).timestamp() for t in self.tasks], dtype=np.float64)
+        self.hours = np.array([t.estimated_hours or 0 for t in self.tasks], dtype=np.float64)
+        self.priority = np.array([t.priority or 3 for t in self.tasks], dtype=np.float64)
+        
+        weeks = sorted({_week(t.start_time) for t in self.tasks})
+        self.week_index = {w: i for i, w in enumerate(weeks)}
+        self.task_week = np.array([self.week_index[_week(t.start_time)] for t in self.tasks], dtype=np.int64)
+        
+        self.cap = np.array([e.max_hours_per_week or 0 for e in self.employees], dtype=np.float64)
+        self.initial_used = np.zeros((len(self.employees), len(weeks)), dtype=np.float64)
+        for j, employee in enumerate(self.employees):
+            for week, hours in self.weekly_hours.get(employee.id, {}).items():
+                if week in self.week_index:
+                    self.initial_used[j, self.week_index[week]] = hours
+        
+        self.exact_type = np.array(
+            [e.employee_type != EmployeeType.BOTH for e in self.employees], dtype=np.float64
+        )
+        self.base_feasible = self._base_feasibility()
+        self._reset()
+    
+    def _base_feasibility(self) -> np.ndarray:
+        """Type match and calendar conflicts, T x E"""
+        n_tasks, n_employees = len(self.tasks), len(self.employees)
+        feasible = np.zeros((n_tasks, n_employees), dtype=bool)
+        if not n_tasks or not n_employees:
+            return feasible
+        
+        task_types = [_required_types(t.task_type) for t in self.tasks]
+        for j, employee in enumerate(self.employees):
+            feasible[:, j] = [employee.employee_type in types for types in task_types]
+            
+            intervals = sorted(
+                (localize(s).timestamp(), localize(e).timestamp()) for s, e in self.busy.get(employee.id, [])
+            )
+            if not intervals:
+                continue
+            busy_start = np.array([s for s, _ in intervals])
+            # Running max of ends makes the overlap test valid for unmerged intervals
+            busy_end = np.maximum.accumulate(np.array([e for _, e in intervals]))
+            last = np.searchsorted(busy_start, self.end, side='left') - 1
+            conflict = (last >= 0) & (busy_end[np.clip(last, 0, None)] > self.start)
+            feasible[:, j] &= ~conflict
+        
+        return feasible
+    
+    def _overlaps(self, i: int) -> np.ndarray:
+        return (self.start < self.end[i]) & (self.end > self.start[i])
+    
+    def _reset(self) -> None:
+        """Start from an empty assignment"""
+        self.used = self.initial_used.copy()
+        self.feasible = self.base_feasible.copy()
+        self.unassigned = np.ones(len(self.tasks), dtype=bool)
+        self.tasks_of = [[] for _ in self.employees]
+        self.assignment = {}
+        self.cost = np.full(self.feasible.shape, INFEASIBLE)
+        for j in range(len(self.employees)):
+            self._refresh_column(j)
+    
+    def _refresh_column(self, j: int) -> None:
+        """Recompute costs of one employee from hours left in each week"""
+        if not len(self.tasks):
+            return
+        cap = self.cap[j]
+        used_after = self.used[j, self.task_week] + self.hours
+        ok = self.feasible[:, j] & self.unassigned & (used_after <= cap)
+        available_ratio = (cap - used_after) / cap if cap > 0 else np.zeros(len(self.tasks))
+        
+        cost = (
+            -PRIORITY_WEIGHT * self.priority
+            - AVAILABILITY_WEIGHT * available_ratio
+            - EXACT_TYPE_BONUS * self.exact_type[j]
+        )
+        self.cost[:, j] = np.where(ok, cost, INFEASIBLE)
+    
+    def _assign(self, i: int, j: int) -> None:
+        """Record task i -> employee j and update that employee's column"""
+        self.assignment[i] = j
+        self.tasks_of[j].append(i)
+        self.unassigned[i] = False
+        self.used[j, self.task_week[i]] += self.hours[i]
+        # Tasks overlapping the assigned one can no longer go to this employee
+        self.feasible[self._overlaps(i), j] = False
+        self.cost[i, :] = INFEASIBLE
+        self._refresh_column(j)
+    
+    def _unassign(self, i: int) -> None:
+        """Undo _assign, rebuilding the employee's column from the tasks left"""
+        j = self.assignment.pop(i)
+        self.tasks_of[j].remove(i)
+        self.unassigned[i] = True
+        self.used[j, self.task_week[i]] -= self.hours[i]
+        self.feasible[:, j] = self.base_feasible[:, j]
+        for k in self.tasks_of[j]:
+            self.feasible[self._overlaps(k), j] = False
+        for other in range(len(self.employees)):
+            self._refresh_column(other)
+    
+    def _fits(self, i: int, j: int, without: Optional[int] = None) -> bool:
+        """Could task i go to employee j, optionally after removing task `without`?"""
+        if not self.base_feasible[i, j]:
+            return False
+        others = [k for k in self.tasks_of[j] if k != without]
+        if others and self._overlaps(i)[others].any():
+            return False
+        used = self.used[j, self.task_week[i]]
+        if without is not None and self.task_week[without] == self.task_week[i]:
+            used -= self.hours[without]
+        return used + self.hours[i] <= self.cap[j]
+    
+    def _solve_rounds(self, deadline: float) -> Tuple[int, bool]:
+        """Min-cost assignment rounds, returns (rounds, budget_exhausted)"""
+        rounds = 0
+        while True:
+            open_rows = np.flatnonzero((self.cost < INFEASIBLE).any(axis=1))
+            if not open_rows.size:
+                return rounds, False
+            if time.perf_counter() > deadline:
+                return rounds, True
+            
+            rows, cols = linear_sum_assignment(self.cost[open_rows])
+            rounds += 1
+            progressed = False
+            for r, j in zip(rows, cols):
+                i = open_rows[r]
+                # Earlier assignments of this round may have closed the pair
+                if self.cost[i, j] < INFEASIBLE:
+                    self._assign(i, j)
+                    progressed = True
+            if not progressed:
+                return rounds, False
+    
+    def _repair(self, deadline: float) -> Tuple[int, bool]:
+        """
+        Place unassigned tasks (highest priority first) by moving one
+        blocking task to another employee, or dropping it for a task of
+        higher priority; returns (moves, budget_exhausted)
+        """
+        moves = 0
+        improved = True
+        while improved:
+            improved = False
+            for i in sorted(np.flatnonzero(self.unassigned), key=lambda i: -self.priority[i]):
+                if time.perf_counter() > deadline:
+                    return moves, True
+                if self._repair_task(i):
+                    moves += 1
+                    improved = True
+        return moves, False
+    
+    def _repair_task(self, i: int) -> bool:
+        overlaps = self._overlaps(i)
+        for j in np.flatnonzero(self.base_feasible[i]):
+            if self._fits(i, j):
+                self._assign(i, j)
+                return True
+            blockers = [
+                k for k in self.tasks_of[j]
+                if overlaps[k] or self.task_week[k] == self.task_week[i]
+            ]
+            for k in blockers:
+                if not self._fits(i, j, without=k):
+                    continue
+                target = next(
+                    (j2 for j2 in np.flatnonzero(self.base_feasible[k]) if j2 != j and self._fits(k, j2)),
+                    None
+                )
+                if target is not None:
+                    self._unassign(k)
+                    self._assign(i, j)
+                    self._assign(k, target)
+                    return True
+                if self.priority[i] > self.priority[k]:
+                    self._unassign(k)
+                    self._assign(i, j)
+                    return True
+        return False
+    
+    def _greedy(self) -> Dict[int, int]:
+        """One task at a time in input order, like the greedy planner (baseline)"""
+        self._reset()
+        for i in range(len(self.tasks)):
+            row = self.cost[i]
+            if row.size and row.min() < INFEASIBLE:
+                # Greedy picks the most available employee, like find_best_employee
+                self._assign(i, int(np.argmin(row)))
+        return dict(self.assignment)
+    
+    def _score(self, assignment: Dict[int, int]) -> Tuple[float, int]:
+        """(assigned priority, assigned tasks), compared lexicographically"""
+        rows = list(assignment.keys())
+        return float(self.priority[rows].sum()), len(rows)
+    
+    def solve(self) -> Dict:
+        """
+        Assign tasks in min-cost rounds, then repair until nothing improves
+        or the time budget runs out
+        
+        Returns:
+            {'assignment': {task_id: employee_id}, 'metrics': {...}}
+        """
+        started = time.perf_counter()
+        deadline = started + self.time_budget_seconds
+        greedy = self._greedy()
+        
+        self._reset()
+        rounds, budget_exhausted = self._solve_rounds(deadline)
+        moves = 0
+        if not budget_exhausted:
+            moves, budget_exhausted = self._repair(deadline)
+        
+        strategy = 'assignment'
+        if self._score(greedy) > self._score(self.assignment):
+            # Never return less than the greedy baseline
+            strategy = 'greedy'
+            self._reset()
+            for i, j in greedy.items():
+                self._assign(i, j)
+        
+        metrics = self._metrics(len(greedy))
+        metrics.update({
+            'strategy': strategy,
+            'rounds': rounds,
+            'repair_moves': moves,
+            'elapsed_seconds': round(time.perf_counter() - started, 3),
+            'budget_exhausted': budget_exhausted
+        })
+        return {
+            'assignment': {self.tasks[i].id: self.employees[j].id for i, j in self.assignment.items()},
+            'metrics': metrics
+        }
+    
+    def _metrics(self, greedy_assigned: int) -> Dict:
+        total = len(self.tasks)
+        priority_total = float(self.priority.sum())
+        priority_assigned, assigned = self._score(self.assignment)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = self.used / self.cap[:, None]
+        utilization = utilization[np.isfinite(utilization)]
+        
+        return {
+            'tasks': total,
+            'assigned': assigned,
+            'unassigned': total - assigned,
+            'assigned_ratio': round(assigned / total, 3) if total else None,
+            'priority_coverage': round(priority_assigned / priority_total, 3) if priority_total else None,
+            'greedy_assigned': greedy_assigned,
+            'mean_utilization_percent': round(float(utilization.mean()) * 100, 1) if utilization.size else 0.0,
+            'max_utilization_percent': round(float(utilization.max()) * 100, 1) if utilization.size else 0.0
+        }
@@ -0,0 +1,299 @@
+"""
+Online SQLite backups through the sqlite3 backup API
+
+The live database is copied with Connection.backup, which always yields
+a consistent snapshot, unlike a file copy of a database that is being
+written. How it is copied depends on the journal mode:
+- WAL (SQLITE_PROFILE=production): in one step. Readers don't block
+  writers in WAL mode, so the copy never holds up a commit.
+- rollback journal: in steps of BACKUP_PAGES_PER_STEP pages with a pause
+  of BACKUP_STEP_SLEEP between them. The read lock is held for one step
+  only, so a writer waits at most one step instead of the whole copy.
+  Every commit of another connection restarts the copy from the first
+  page; after BACKUP_MAX_RESTARTS restarts the copy is done in one step so
+  a busy database still gets backed up.
+
+Every backup is optionally gzipped and checked with PRAGMA integrity_check
+before it is put in place, then the oldest backups beyond BACKUP_KEEP are
+removed. BackupScheduler runs it every BACKUP_INTERVAL_HOURS inside
+the API; utils/backup_database.py does the same from cron.
+"""
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from services.executor import run_in_pool
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "./backups")
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "14"))
+BACKUP_COMPRESS = os.getenv("BACKUP_COMPRESS", "true").lower() == "true"
+BACKUP_PAGES_PER_STEP = int(os.getenv("BACKUP_PAGES_PER_STEP", "256"))
+BACKUP_STEP_SLEEP = float(os.getenv("BACKUP_STEP_SLEEP", "0.01"))
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "3"))
+# 0 = no scheduled backups inside the API
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "0"))
+
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+class BackupError(Exception):
+    """Backup could not be created or failed verification"""
+
+
+class _Restarted(Exception):
+    pass
+
+
+def sqlite_path(database_url: str) -> str:
+    """Database file of a SQLite URL"""
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise BackupError("Zálohovať sa dá len SQLite databáza v súbore")
+    return url.database
+
+
+def verify_backup(path: str, compressed: bool = None) -> Dict:
+    """Run PRAGMA integrity_check on a backup file (gzipped ones are unpacked to a temp file)"""
+    checked = path
+    if path.endswith('.gz') if compressed is None else compressed:
+        handle, checked = tempfile.mkstemp(suffix='.db', dir=os.path.dirname(path) or '.')
+        with os.fdopen(handle, 'wb') as target, gzip.open(path, 'rb') as source:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+    try:
+        connection = sqlite3.connect(f"file:{checked}?mode=ro", uri=True)
+        try:
+            result = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+            pages = connection.execute("PRAGMA page_count").fetchone()[0]
+            tables = connection.execute("SELECT count(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0]
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError as e:
+        result, pages, tables = [str(e)], 0, 0
+    finally:
+        if checked != path:
+            os.remove(checked)
+    return {'ok': result == ['ok'], 'result': result[:10], 'pages': pages, 'tables': tables}
+
+
+class SQLiteBackup:
+    """Consistent, throttled copies of one SQLite database with verification and retention"""
+    
+    def __init__(
+        self,
+        database_path: str,
+        backup_dir: str = None,
+        keep: int = None,
+        compress: bool = None,
+        pages_per_step: int = None,
+        step_sleep: float = None,
+        max_restarts: int = None
+    ):
+        self.database_path = database_path
+        self.backup_dir = backup_dir or BACKUP_DIR
+        self.keep = BACKUP_KEEP if keep is None else keep
+        self.compress = BACKUP_COMPRESS if compress is None else compress
+        self.pages_per_step = pages_per_step or BACKUP_PAGES_PER_STEP
+        self.step_sleep = BACKUP_STEP_SLEEP if step_sleep is None else step_sleep
+        self.max_restarts = BACKUP_MAX_RESTARTS if max_restarts is None else max_restarts
+        self.stem = os.path.splitext(os.path.basename(database_path))[0]
+    
+    @classmethod
+    def from_url(cls, database_url: str, **options) -> "SQLiteBackup":
+        return cls(sqlite_path(database_url), **options)
+    
+    def list_backups(self) -> List[Dict]:
+        """Backups of this database, newest first"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        prefix = f"{self.stem}-"
+        for name in os.listdir(self.backup_dir):
+            if not name.startswith(prefix) or not name.endswith(('.db', '.db.gz')):
+                continue
+            try:
+                created = datetime.strptime(name[len(prefix):].split('.')[0], TIMESTAMP_FORMAT)
+            except ValueError:
+                continue
+            path = os.path.join(self.backup_dir, name)
+            backups.append({'file': path, 'created': created, 'bytes': os.path.getsize(path)})
+        return sorted(backups, key=lambda backup: backup['created'], reverse=True)
+    
+    def _copy_in_steps(self, source: sqlite3.Connection, target_path: str, stats: Dict) -> None:
+        """pages_per_step pages per read lock, pausing between steps; raises _Restarted after max_restarts"""
+        target = sqlite3.connect(target_path)
+        last = {'mark': time.perf_counter(), 'remaining': None}
+        
+        def progress(status, remaining, total):
+            step_ms = (time.perf_counter() - last['mark']) * 1000
+            stats['steps'] += 1
+            stats['pages'] = total
+            stats['locked_ms'] += step_ms
+            stats['max_step_ms'] = max(stats['max_step_ms'], step_ms)
+            if last['remaining'] is not None and remaining > last['remaining']:
+                stats['restarts'] += 1
+                if stats['restarts'] > self.max_restarts:
+                    raise _Restarted()
+            last['remaining'] = remaining
+            # sqlite3 itself only sleeps after SQLITE_BUSY; pause so writers get their turn
+            if remaining and self.step_sleep:
+                time.sleep(self.step_sleep)
+            last['mark'] = time.perf_counter()
+        
+        try:
+            source.backup(target, pages=self.pages_per_step, progress=progress, sleep=self.step_sleep)
+        finally:
+            target.close()
+    
+    def _copy_at_once(self, source: sqlite3.Connection, target_path: str, stats: Dict) -> None:
+        """Whole database under one read lock"""
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        target = sqlite3.connect(target_path)
+        try:
+            started = time.perf_counter()
+            source.backup(target, pages=-1)
+            step_ms = (time.perf_counter() - started) * 1000
+            stats['steps'] += 1
+            stats['pages'] = target.execute("PRAGMA page_count").fetchone()[0]
+            stats['locked_ms'] += step_ms
+            stats['max_step_ms'] = max(stats['max_step_ms'], step_ms)
+        finally:
+            target.close()
+    
+    def _copy(self, target_path: str) -> Dict:
+        """Copy the database into target_path; returns step counters"""
+        stats = {'pages': 0, 'steps': 0, 'restarts': 0, 'locked_ms': 0.0, 'max_step_ms': 0.0, 'single_step': False}
+        source = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            stats['journal_mode'] = source.execute("PRAGMA journal_mode").fetchone()[0]
+            wal = stats['journal_mode'] == 'wal'
+            if not wal:
+                try:
+                    self._copy_in_steps(source, target_path, stats)
+                    stats['writer_wait_ms'] = stats['max_step_ms']
+                    return stats
+                except _Restarted:
+                    pass
+            # WAL readers don't block writers and a single step can't be
+            # restarted by them; in rollback mode this is the fallback
+            stats['single_step'] = True
+            self._copy_at_once(source, target_path, stats)
+            # Longest a commit could have waited for the backup's read lock
+            stats['writer_wait_ms'] = 0.0 if wal else stats['max_step_ms']
+            return stats
+        finally:
+            source.close()
+    
+    def backup(self, now: datetime = None, verify: bool = True) -> Dict:
+        """
+        Create a new backup, verify it and apply retention
+        
+        Returns:
+            report with the file, sizes, duration and how long the source was locked
+        """
+        if not os.path.exists(self.database_path):
+            raise BackupError(f"Databáza {self.database_path} neexistuje")
+        os.makedirs(self.backup_dir, exist_ok=True)
+        
+        started = time.perf_counter()
+        name = f"{self.stem}-{(now or datetime.now()).strftime(TIMESTAMP_FORMAT)}.db"
+        final_path = os.path.join(self.backup_dir, name + ('.gz' if self.compress else ''))
+        raw_path = os.path.join(self.backup_dir, name + '.part')
+        packed_path = final_path + '.part'
+        
+        try:
+            copy = self._copy(raw_path)
+            copy_seconds = time.perf_counter() - started
+            raw_bytes = os.path.getsize(raw_path)
+            
+            checked_path = raw_path
+            if self.compress:
+                with open(raw_path, 'rb') as source, gzip.open(packed_path, 'wb', compresslevel=6) as target:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                os.remove(raw_path)
+                checked_path = packed_path
+            
+            # The kept file itself is checked, after compression
+            verification = verify_backup(checked_path, self.compress) if verify else None
+            if verification is not None and not verification['ok']:
+                raise BackupError(f"Záloha neprešla kontrolou: {'; '.join(verification['result'])}")
+            os.replace(checked_path, final_path)
+        finally:
+            for leftover in (raw_path, packed_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        
+        removed = [old['file'] for old in self.list_backups()[self.keep:]] if self.keep > 0 else []
+        for path in removed:
+            os.remove(path)
+        
+        return {
+            'file': final_path,
+            'bytes': os.path.getsize(final_path),
+            'database_bytes': raw_bytes,
+            'compressed': self.compress,
+            'verified': verification is not None,
+            'seconds': time.perf_counter() - started,
+            'copy_seconds': copy_seconds,
+            'removed': removed,
+            **copy
+        }
+
+
+class BackupScheduler:
+    """Runs SQLiteBackup.backup() every interval_hours in the background"""
+    
+    def __init__(self, backup: SQLiteBackup, interval_hours: float = None, clock: Callable[[], datetime] = datetime.now):
+        self.backup = backup
+        self.interval_hours = BACKUP_INTERVAL_HOURS if interval_hours is None else interval_hours
+        self.clock = clock
+        self.last_report: Optional[Dict] = None
+        self.last_error: Optional[str] = None
+        self._stopping = False
+    
+    def seconds_until_due(self) -> float:
+        """Time to the next backup, counted from the newest existing one (so restarts don't add backups)"""
+        backups = self.backup.list_backups()
+        if not backups:
+            return 0.0
+        elapsed = (self.clock() - backups[0]['created']).total_seconds()
+        return max(self.interval_hours * 3600 - elapsed, 0.0)
+    
+    async def run(self) -> None:
+        """Back up on schedule until stop() is called"""
+        while not self._stopping:
+            wait = self.seconds_until_due()
+            if wait > 0:
+                await asyncio.sleep(min(wait, 60))
+                continue
+            try:
+                self.last_report = await run_in_pool("backup", self.backup.backup)
+                self.last_error = None
+            except Exception as e:
+                print(f"❌ Database backup error: {e}")
+                self.last_error = str(e)
+                await asyncio.sleep(min(self.interval_hours * 3600, 300))
+    
+    def stop(self) -> None:
+        self._stopping = True
+    
+    def get_status(self) -> Dict:
+        backups = self.backup.list_backups()
+        return {
+            'enabled': self.interval_hours > 0,
+            'interval_hours': self.interval_hours,
+            'backup_dir': self.backup.backup_dir,
+            'keep': self.backup.keep,
+            'backups': len(backups),
+            'latest': backups[0] if backups else None,
+            'last_report': self.last_report,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,73 @@
+"""
+Parsing and validation of bulk task imports (JSON or CSV)
+
+Every row is validated against TaskCreate before anything is written, so
+one bad row in an ERP export is reported with its row number instead of
+failing halfway through the insert.
+"""
+import csv
+import io
+import json
+import os
+from typing import List, Dict, Tuple
+
+from pydantic import ValidationError
+
+from models.schemas import TaskCreate
+
+# Rows flushed to the DB at a time
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv", "text/plain")
+
+
+def parse_rows(body: bytes, content_type: str = "") -> List[Dict]:
+    """
+    Raw rows from a JSON array, {"tasks": [...]} or CSV with a header row
+    
+    Raises:
+        ValueError: body can't be parsed
+    """
+    text = body.decode("utf-8-sig")
+    if content_type.split(";")[0].strip().lower() in CSV_CONTENT_TYPES:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ValueError("CSV neobsahuje hlavičku")
+        # Empty cells fall back to the schema defaults
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key and value not in (None, "")}
+            for row in reader
+        ]
+    
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Neplatný JSON: {e}")
+    if isinstance(data, dict):
+        data = data.get("tasks")
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError("Očakáva sa zoznam úloh alebo {\"tasks\": [...]}")
+    return data
+
+
+def validate_rows(rows: List[Dict]) -> Tuple[List[Tuple[int, TaskCreate]], List[Dict]]:
+    """
+    Validate all rows up front
+    
+    Returns:
+        ([(row_number, TaskCreate)], [per-row error results]), rows numbered from 1
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid.append((number, TaskCreate.model_validate(row)))
+        except ValidationError as e:
+            errors.append({
+                'row': number,
+                'status': 'invalid',
+                'message': "; ".join(
+                    f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                    for error in e.errors()
+                )
+            })
+    return valid, errors
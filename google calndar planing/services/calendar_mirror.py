@@ -0,0 +1,292 @@
+"""
+Local mirror of Google Calendar events kept current with syncToken sync
+"""
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+from googleapiclient.errors import HttpError
+import pytz
+
+from models.database import CalendarEvent, CalendarSyncState
+from services.google_calendar import (
+    get_calendar_service, SyncTokenExpired, localize, free_slots_from_busy, is_slot_free
+)
+
+# Process-wide counters, exposed via CalendarMirror.get_stats()
+_counters = {
+    'local_reads': 0,
+    'stale_refreshes': 0,
+    'sync_errors': 0
+}
+
+
+def is_mirror_enabled() -> bool:
+    """Check whether availability queries should be served from the mirror"""
+    return os.getenv("CALENDAR_MIRROR_ENABLED", "false").lower() in ("1", "true", "yes")
+
+
+def _to_utc_naive(value: datetime) -> datetime:
+    """Convert a datetime to naive UTC for storage"""
+    return localize(value).astimezone(pytz.utc).replace(tzinfo=None)
+
+
+def _parse_event_time(value: Dict) -> datetime:
+    """Parse Google 'start'/'end' objects (dateTime or all-day date)"""
+    if 'dateTime' in value:
+        return _to_utc_naive(datetime.fromisoformat(value['dateTime']))
+    return _to_utc_naive(datetime.fromisoformat(value['date']))
+
+
+class CalendarMirror:
+    """
+    Per-calendar event mirror stored in the planner DB
+    
+    Each calendar is synced with the Calendar API syncToken mechanism: the
+    first sync lists all events, later syncs fetch only changes. Reads are
+    served from the local calendar_events table and trigger a sync only if
+    the calendar is older than max_staleness_seconds.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        calendar_service=None,
+        max_staleness_seconds: Optional[float] = None
+    ):
+        self.db = db
+        self.calendar_service = calendar_service or get_calendar_service()
+        if max_staleness_seconds is None:
+            max_staleness_seconds = float(os.getenv("CALENDAR_MIRROR_MAX_STALENESS", "300"))
+        self.max_staleness = timedelta(seconds=max_staleness_seconds)
+    
+    def sync(self, calendar_id: str, force_full: bool = False) -> Dict:
+        """
+        Bring the mirror of one calendar up to date
+        
+        Falls back to a full resync when Google rejects the stored sync
+        token with 410 Gone.
+        
+        Returns:
+            Dict with sync mode and number of applied changes
+        """
+        state = self.db.query(CalendarSyncState).filter(
+            CalendarSyncState.calendar_id == calendar_id
+        ).first()
+        if not state:
+            state = CalendarSyncState(
+                calendar_id=calendar_id,
+                full_syncs=0,
+                incremental_syncs=0,
+                token_expirations=0,
+                events_applied=0
+            )
+            self.db.add(state)
+        
+        sync_token = None if force_full else state.sync_token
+        try:
+            try:
+                events, next_token = self.calendar_service.list_event_changes(calendar_id, sync_token)
+            except SyncTokenExpired:
+                state.token_expirations = (state.token_expirations or 0) + 1
+                sync_token = None
+                events, next_token = self.calendar_service.list_event_changes(calendar_id, None)
+        except HttpError as error:
+            _counters['sync_errors'] += 1
+            state.last_error = str(error)
+            self.db.commit()
+            print(f"Calendar mirror sync failed for {calendar_id}: {error}")
+            return {'calendar_id': calendar_id, 'mode': 'error', 'applied': 0}
+        
+        now = datetime.utcnow()
+        if sync_token is None:
+            # Full sync replaces whatever we had for this calendar
+            self.db.query(CalendarEvent).filter(
+                CalendarEvent.calendar_id == calendar_id
+            ).delete(synchronize_session=False)
+            state.full_syncs = (state.full_syncs or 0) + 1
+            state.last_full_sync_at = now
+            mode = 'full'
+        else:
+            state.incremental_syncs = (state.incremental_syncs or 0) + 1
+            mode = 'incremental'
+        
+        applied = self._apply_events(calendar_id, events)
+        
+        state.sync_token = next_token
+        state.last_synced_at = now
+        state.events_applied = (state.events_applied or 0) + applied
+        state.last_error = None
+        self.db.commit()
+        
+        return {'calendar_id': calendar_id, 'mode': mode, 'applied': applied}
+    
+    def _apply_events(self, calendar_id: str, events: List[Dict]) -> int:
+        """Upsert changed events and drop cancelled ones"""
+        if not events:
+            return 0
+        
+        event_ids = [event['id'] for event in events]
+        existing = {
+            row.event_id: row
+            for row in self.db.query(CalendarEvent).filter(
+                CalendarEvent.calendar_id == calendar_id,
+                CalendarEvent.event_id.in_(event_ids)
+            ).all()
+        }
+        
+        for event in events:
+            row = existing.get(event['id'])
+            
+            if event.get('status') == 'cancelled':
+                if row:
+                    self.db.delete(row)
+                    existing.pop(event['id'])
+                continue
+            
+            if 'start' not in event or 'end' not in event:
+                continue
+            
+            if not row:
+                row = CalendarEvent(calendar_id=calendar_id, event_id=event['id'])
+                self.db.add(row)
+                existing[event['id']] = row
+            
+            row.summary = event.get('summary')
+            row.start_time = _parse_event_time(event['start'])
+            row.end_time = _parse_event_time(event['end'])
+            row.is_busy = event.get('transparency') != 'transparent'
+            row.updated = event.get('updated')
+        
+        return len(events)
+    
+    def record_event(
+        self,
+        calendar_id: str,
+        event_id: str,
+        start_time: datetime,
+        end_time: datetime,
+        summary: Optional[str] = None
+    ) -> None:
+        """Write-through for events we created ourselves, so they block slots before the next sync"""
+        row = self.db.query(CalendarEvent).filter(
+            CalendarEvent.calendar_id == calendar_id,
+            CalendarEvent.event_id == event_id
+        ).first()
+        if not row:
+            row = CalendarEvent(calendar_id=calendar_id, event_id=event_id)
+            self.db.add(row)
+        row.summary = summary
+        row.start_time = _to_utc_naive(start_time)
+        row.end_time = _to_utc_naive(end_time)
+        row.is_busy = True
+    
+    def ensure_fresh(self, calendar_ids: List[str]) -> None:
+        """Sync calendars whose mirror is older than the staleness bound"""
+        calendar_ids = list(dict.fromkeys(cid for cid in calendar_ids if cid))
+        if not calendar_ids:
+            return
+        
+        states = {
+            state.calendar_id: state
+            for state in self.db.query(CalendarSyncState).filter(
+                CalendarSyncState.calendar_id.in_(calendar_ids)
+            ).all()
+        }
+        
+        cutoff = datetime.utcnow() - self.max_staleness
+        for calendar_id in calendar_ids:
+            state = states.get(calendar_id)
+            if not state or not state.last_synced_at or state.last_synced_at < cutoff:
+                _counters['stale_refreshes'] += 1
+                self.sync(calendar_id)
+    
+    def get_busy_intervals(
+        self,
+        calendar_ids: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, List[Dict[str, datetime]]]:
+        """Busy intervals per calendar, same shape as GoogleCalendarService.get_busy_intervals"""
+        self.ensure_fresh(calendar_ids)
+        _counters['local_reads'] += 1
+        
+        busy = {calendar_id: [] for calendar_id in calendar_ids if calendar_id}
+        if not busy:
+            return busy
+        
+        rows = self.db.query(
+            CalendarEvent.calendar_id,
+            CalendarEvent.start_time,
+            CalendarEvent.end_time
+        ).filter(
+            and_(
+                CalendarEvent.calendar_id.in_(list(busy.keys())),
+                CalendarEvent.is_busy == True,
+                CalendarEvent.start_time < _to_utc_naive(end_time),
+                CalendarEvent.end_time > _to_utc_naive(start_time)
+            )
+        ).order_by(CalendarEvent.start_time).all()
+        
+        for calendar_id, event_start, event_end in rows:
+            busy[calendar_id].append({
+                'start': pytz.utc.localize(event_start),
+                'end': pytz.utc.localize(event_end)
+            })
+        
+        return busy
+    
+    def check_availability(
+        self,
+        calendar_id: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> bool:
+        """Check if a time slot is free using the local mirror"""
+        busy = self.get_busy_intervals([calendar_id], start_time, end_time)
+        return is_slot_free(busy[calendar_id], start_time, end_time)
+    
+    def get_free_slots(
+        self,
+        calendar_id: str,
+        date: datetime,
+        working_hours_start: int = 8,
+        working_hours_end: int = 17,
+        slot_duration_hours: float = 1.0
+    ) -> List[Dict[str, datetime]]:
+        """Get available time slots for a given date from the local mirror"""
+        day_start = date.replace(hour=working_hours_start, minute=0, second=0, microsecond=0)
+        day_end = date.replace(hour=working_hours_end, minute=0, second=0, microsecond=0)
+        busy = self.get_busy_intervals([calendar_id], day_start, day_end)
+        return free_slots_from_busy(busy[calendar_id], day_start, day_end, slot_duration_hours)
+    
+    def get_stats(self) -> Dict:
+        """Mirror lag and sync counters per calendar"""
+        now = datetime.utcnow()
+        calendars = []
+        
+        for state in self.db.query(CalendarSyncState).all():
+            lag = (now - state.last_synced_at).total_seconds() if state.last_synced_at else None
+            calendars.append({
+                'calendar_id': state.calendar_id,
+                'lag_seconds': lag,
+                'stale': lag is None or lag > self.max_staleness.total_seconds(),
+                'last_synced_at': state.last_synced_at,
+                'last_full_sync_at': state.last_full_sync_at,
+                'full_syncs': state.full_syncs,
+                'incremental_syncs': state.incremental_syncs,
+                'token_expirations': state.token_expirations,
+                'events_applied': state.events_applied,
+                'event_count': self.db.query(CalendarEvent).filter(
+                    CalendarEvent.calendar_id == state.calendar_id
+                ).count(),
+                'last_error': state.last_error
+            })
+        
+        return {
+            'enabled': is_mirror_enabled(),
+            'max_staleness_seconds': self.max_staleness.total_seconds(),
+            'counters': dict(_counters),
+            'calendars': calendars
+        }
@@ -0,0 +1,360 @@
+"""
+Write-behind outbox for Google Calendar mutations
+
+Scheduler writes enqueue calendar changes into the calendar_outbox table in
+the same transaction as the task itself, so the API can answer right after
+the DB commit. CalendarOutboxWorker applies the queued changes in the
+background:
+- entries of one task are applied strictly in order (one per task per round)
+- repeated updates of the same event are coalesced into one entry
+- failures are retried with exponential backoff, then parked as 'failed'
+"""
+import os
+import json
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Callable
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+
+from models.database import CalendarOutbox, Task
+from services.executor import run_in_pool
+
+MAX_ATTEMPTS = int(os.getenv("CALENDAR_OUTBOX_MAX_ATTEMPTS", "8"))
+RETRY_BASE_SECONDS = float(os.getenv("CALENDAR_OUTBOX_RETRY_BASE", "5"))
+RETRY_MAX_SECONDS = 3600
+
+
+def is_outbox_enabled() -> bool:
+    """Calendar writes go through the outbox unless CALENDAR_SYNC_MODE=inline"""
+    return os.getenv("CALENDAR_SYNC_MODE", "outbox").lower() == "outbox"
+
+
+def _event_payload(
+    summary: str,
+    description: Optional[str],
+    start_time: datetime,
+    end_time: datetime,
+    location: Optional[str]
+) -> str:
+    return json.dumps({
+        'summary': summary,
+        'description': description,
+        'start_time': start_time.isoformat(),
+        'end_time': end_time.isoformat(),
+        'location': location
+    })
+
+
+def _load_payload(entry: CalendarOutbox) -> Dict:
+    data = json.loads(entry.payload or '{}')
+    for key in ('start_time', 'end_time'):
+        if data.get(key):
+            data[key] = datetime.fromisoformat(data[key])
+    return data
+
+
+class OutboxWriter:
+    """Enqueues calendar mutations with coalescing (does not commit)"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def _pending_for_task(self, task_id: int) -> List[CalendarOutbox]:
+        return self.db.query(CalendarOutbox).filter(
+            CalendarOutbox.task_id == task_id,
+            CalendarOutbox.status == "pending"
+        ).order_by(CalendarOutbox.id).all()
+    
+    def has_pending(self, task_id: int) -> bool:
+        """Check whether the task still has queued calendar writes"""
+        return self.db.query(CalendarOutbox.id).filter(
+            CalendarOutbox.task_id == task_id,
+            CalendarOutbox.status == "pending"
+        ).first() is not None
+    
+    def enqueue_create(
+        self,
+        task: Task,
+        calendar_id: str,
+        description: Optional[str]
+    ) -> CalendarOutbox:
+        """Queue creation of the task's calendar event"""
+        entry = CalendarOutbox(
+            task_id=task.id,
+            operation="create",
+            calendar_id=calendar_id,
+            payload=_event_payload(task.title, description, task.start_time, task.end_time, task.location),
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        self.db.add(entry)
+        return entry
+    
+    def enqueue_update(
+        self,
+        task: Task,
+        calendar_id: str,
+        description: Optional[str]
+    ) -> CalendarOutbox:
+        """Queue an event update, merging it into a pending create/update of the same event"""
+        payload = _event_payload(task.title, description, task.start_time, task.end_time, task.location)
+        
+        pending = self._pending_for_task(task.id)
+        if pending and pending[-1].operation in ("create", "update") \
+                and pending[-1].calendar_id == calendar_id:
+            # Coalesce: the last queued write already targets this event
+            pending[-1].payload = payload
+            return pending[-1]
+        
+        entry = CalendarOutbox(
+            task_id=task.id,
+            operation="update",
+            calendar_id=calendar_id,
+            event_id=task.google_event_id,
+            payload=payload,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        self.db.add(entry)
+        return entry
+    
+    def enqueue_delete(self, task: Task, calendar_id: str) -> Optional[CalendarOutbox]:
+        """Queue event deletion; drops pending writes that never reached Google"""
+        pending = [e for e in self._pending_for_task(task.id) if e.calendar_id == calendar_id]
+        for entry in pending:
+            self.db.delete(entry)
+        
+        if any(e.operation == "create" for e in pending) or not task.google_event_id:
+            # Event was never created in Google, nothing to delete
+            return None
+        
+        entry = CalendarOutbox(
+            task_id=task.id,
+            operation="delete",
+            calendar_id=calendar_id,
+            event_id=task.google_event_id,
+            status="pending",
+            attempts=0,
+            next_attempt_at=datetime.utcnow()
+        )
+        self.db.add(entry)
+        return entry
+
+
+class CalendarOutboxWorker:
+    """Background worker applying queued calendar mutations"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        calendar_service=None,
+        batch_size: int = 50,
+        poll_interval: float = None
+    ):
+        self.session_factory = session_factory
+        self._calendar_service = calendar_service
+        self.batch_size = batch_size
+        if poll_interval is None:
+            poll_interval = float(os.getenv("CALENDAR_OUTBOX_POLL_INTERVAL", "1"))
+        self.poll_interval = poll_interval
+        self._stopping = False
+        self.stats = {'applied': 0, 'retried': 0, 'dead': 0, 'rounds': 0}
+    
+    @property
+    def calendar_service(self):
+        if self._calendar_service is None:
+            from services.google_calendar import get_calendar_service
+            self._calendar_service = get_calendar_service()
+        return self._calendar_service
+    
+    def _select_ready(self, db: Session, now: datetime) -> List[CalendarOutbox]:
+        """Pick the oldest pending entry of each task, if it is due"""
+        selected = []
+        blocked_tasks = set()
+        
+        pending = db.query(CalendarOutbox).filter(
+            CalendarOutbox.status == "pending"
+        ).order_by(CalendarOutbox.id).limit(self.batch_size * 10).all()
+        
+        for entry in pending:
+            key = entry.task_id if entry.task_id is not None else f"entry-{entry.id}"
+            if key in blocked_tasks:
+                continue
+            blocked_tasks.add(key)
+            if entry.next_attempt_at and entry.next_attempt_at > now:
+                continue  # Later entries of this task must wait for this one
+            selected.append(entry)
+            if len(selected) >= self.batch_size:
+                break
+        
+        return selected
+    
+    def process_batch(self) -> int:
+        """
+        Apply one round of ready outbox entries
+        
+        Returns:
+            Number of entries taken from the queue (applied or rescheduled)
+        """
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            entries = self._select_ready(db, now)
+            if not entries:
+                return 0
+            
+            task_ids = [e.task_id for e in entries if e.task_id is not None]
+            tasks = {
+                t.id: t for t in db.query(Task).filter(Task.id.in_(task_ids)).all()
+            } if task_ids else {}
+            
+            # Payload snapshot, to detect updates coalesced while in flight
+            original_payloads = {e.id: e.payload for e in entries}
+            
+            # Entries are not modified in the session: enqueue_delete may
+            # remove a row while it is in flight, and flushing a change to it
+            # would fail the whole round (StaleDataError). Rows are written
+            # with statements that simply match nothing once the row is gone.
+            sent = {}
+            batch = self.calendar_service.batch()
+            for entry in entries:
+                task = tasks.get(entry.task_id)
+                operation, event_id = entry.operation, entry.event_id
+                if operation == "update":
+                    event_id = event_id or (task.google_event_id if task else None)
+                    if not event_id:
+                        # The create never succeeded, recreate the event from the update
+                        operation = "create"
+                if operation == "create":
+                    batch.create_event(entry.id, entry.calendar_id, **_load_payload(entry))
+                elif operation == "update":
+                    batch.update_event(entry.id, entry.calendar_id, event_id, **_load_payload(entry))
+                else:
+                    batch.delete_event(entry.id, entry.calendar_id, event_id)
+                sent[entry.id] = (operation, event_id)
+            
+            results = batch.flush()
+            
+            for entry in entries:
+                result = results.get(entry.id)
+                operation, event_id = sent[entry.id]
+                row = db.query(CalendarOutbox).filter(CalendarOutbox.id == entry.id)
+                if not result:
+                    row.update(self._retry(entry, now), synchronize_session=False)
+                    continue
+                
+                self.stats['applied'] += 1
+                if operation == "create":
+                    event_id = result
+                done = row.filter(
+                    CalendarOutbox.payload == original_payloads[entry.id]
+                ).delete(synchronize_session=False)
+                # Not done: coalesced with a newer update meanwhile, applied next round
+                if not done and not row.update(
+                    {'operation': "update", 'event_id': event_id}, synchronize_session=False
+                ):
+                    # Dropped by enqueue_delete while in flight (task deleted
+                    # or moved to another calendar): remove what was created
+                    if operation == "create":
+                        db.add(self._delete_entry(entry, result, now))
+                    continue
+                
+                if operation == "create":
+                    task = db.query(Task).filter(Task.id == entry.task_id).first()
+                    if task:
+                        task.google_event_id = result
+                    else:
+                        # Task was deleted while the event was being created
+                        db.add(self._delete_entry(entry, result, now))
+            
+            self.stats['rounds'] += 1
+            db.commit()
+            return len(entries)
+        finally:
+            db.close()
+    
+    def _delete_entry(self, entry: CalendarOutbox, event_id: str, now: datetime) -> CalendarOutbox:
+        """Compensating delete of an event created for a task that no longer wants it"""
+        return CalendarOutbox(
+            task_id=entry.task_id,
+            operation="delete",
+            calendar_id=entry.calendar_id,
+            event_id=event_id,
+            status="pending",
+            attempts=0,
+            next_attempt_at=now
+        )
+    
+    def _retry(self, entry: CalendarOutbox, now: datetime) -> Dict:
+        """Exponential backoff; entries over MAX_ATTEMPTS are parked as failed"""
+        attempts = (entry.attempts or 0) + 1
+        values = {'attempts': attempts, 'last_error': "Calendar API request failed"}
+        if attempts >= MAX_ATTEMPTS:
+            values['status'] = "failed"
+            self.stats['dead'] += 1
+        else:
+            delay = min(RETRY_BASE_SECONDS * (2 ** (attempts - 1)), RETRY_MAX_SECONDS)
+            values['next_attempt_at'] = now + timedelta(seconds=delay)
+            self.stats['retried'] += 1
+        return values
+    
+    def drain(self, max_rounds: int = 100) -> int:
+        """Process rounds until nothing is ready (used by scripts and tests)"""
+        total = 0
+        for _ in range(max_rounds):
+            processed = self.process_batch()
+            if not processed:
+                break
+            total += processed
+        return total
+    
+    async def run(self) -> None:
+        """Poll the outbox until stop() is called"""
+        while not self._stopping:
+            try:
+                processed = await run_in_pool("calendar", self.process_batch)
+            except Exception as e:
+                print(f"❌ Calendar outbox worker error: {e}")
+                processed = 0
+            if not processed:
+                await asyncio.sleep(self.poll_interval)
+    
+    def stop(self) -> None:
+        self._stopping = True
+    
+    def get_status(self) -> Dict:
+        """Queue depth, oldest pending entry and worker counters"""
+        db = self.session_factory()
+        try:
+            counts = dict(
+                db.query(CalendarOutbox.status, func.count(CalendarOutbox.id))
+                .group_by(CalendarOutbox.status).all()
+            )
+            oldest = db.query(func.min(CalendarOutbox.created_at)).filter(
+                CalendarOutbox.status == "pending"
+            ).scalar()
+            return {
+                'enabled': is_outbox_enabled(),
+                'pending': counts.get("pending", 0),
+                'failed': counts.get("failed", 0),
+                'oldest_pending_age_seconds': (datetime.utcnow() - oldest).total_seconds() if oldest else None,
+                'worker': dict(self.stats)
+            }
+        finally:
+            db.close()
+    
+    def retry_failed(self) -> int:
+        """Move parked entries back to the queue"""
+        db = self.session_factory()
+        try:
+            count = db.query(CalendarOutbox).filter(CalendarOutbox.status == "failed").update(
+                {'status': "pending", 'attempts': 0, 'next_attempt_at': datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.commit()
+            return count
+        finally:
+            db.close()
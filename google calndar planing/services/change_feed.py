@@ -0,0 +1,229 @@
+"""
+Change feed of tasks and employees for incremental client sync
+
+Every flush that inserts, changes or deletes a Task or Employee appends a
+row per object to change_log in the same transaction: (id, entity,
+entity_id, upsert|delete). The id is the cursor. GET /changes?since=<id>
+returns the entities changed after it, upserts with their current data and
+deletes as tombstones, so a client keeps a local replica by applying pages
+until has_more is false and storing the returned cursor.
+
+Set-based DML skips the flush; the task archiver logs its moves as deletes
+itself via log_deleted(). Writes of other scripts that don't import
+services (generate_sample_data) are not logged.
+
+The log is kept bounded by compact_change_log():
+- older entries of an entity are dropped when a newer one exists, the
+  newest one tells a client everything it needs
+- tombstones older than CHANGE_LOG_RETENTION_DAYS are dropped and the
+  horizon (highest dropped id) is stored; a client whose cursor is below
+  it may have missed a delete and gets reset: true, i.e. reload the full
+  lists and continue from the returned cursor
+
+On SQLite writers are serialized, so ids are assigned in commit order. On
+other databases a transaction can commit after a later id is visible;
+the feed then holds back entries younger than CHANGE_FEED_SETTLE_SECONDS.
+"""
+import os
+import time
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, insert, literal, select, delete
+from sqlalchemy.orm import Session, aliased
+
+from models.database import ChangeLog, ChangeFeedState, Employee, Task
+from services.executor import run_in_pool
+
+CHANGE_FEED_MAX_LIMIT = 1000
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+CHANGE_LOG_COMPACT_HOURS = float(os.getenv("CHANGE_LOG_COMPACT_HOURS", "6"))
+CHANGE_LOG_COMPACT_CHUNK = int(os.getenv("CHANGE_LOG_COMPACT_CHUNK", "5000"))
+CHANGE_FEED_SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "5"))
+
+# Logged models by entity name
+ENTITIES = {'task': Task, 'employee': Employee}
+_ENTITY_OF = {model: name for name, model in ENTITIES.items()}
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+
+def _change(entity: str, entity_id: int, operation: str, now: datetime) -> Dict:
+    return {'entity': entity, 'entity_id': entity_id, 'operation': operation, 'changed_at': now}
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session, flush_context):
+    now = datetime.utcnow()
+    changes = []
+    for obj in session.new:
+        if type(obj) in _ENTITY_OF:
+            changes.append(_change(_ENTITY_OF[type(obj)], obj.id, UPSERT, now))
+    for obj in session.dirty:
+        if type(obj) in _ENTITY_OF and session.is_modified(obj, include_collections=False):
+            changes.append(_change(_ENTITY_OF[type(obj)], obj.id, UPSERT, now))
+    for obj in session.deleted:
+        if type(obj) in _ENTITY_OF:
+            changes.append(_change(_ENTITY_OF[type(obj)], obj.id, DELETE, now))
+    if changes:
+        # Core insert on the flush's connection: no ORM objects, no nested flush
+        session.connection().execute(ChangeLog.__table__.insert(), changes)
+
+
+def log_deleted(db: Session, entity: str, ids: select) -> None:
+    """Tombstones for rows a set-based DELETE is about to remove (ids: SELECT of their ids)"""
+    db.execute(insert(ChangeLog).from_select(
+        ['entity', 'entity_id', 'operation', 'changed_at'],
+        select(literal(entity), ids.subquery().c[0], literal(DELETE), literal(datetime.utcnow()))
+    ))
+
+
+def _horizon(db: Session) -> int:
+    return db.scalar(select(ChangeFeedState.horizon).where(ChangeFeedState.id == 1)) or 0
+
+
+def current_cursor(db: Session) -> int:
+    """Cursor of the newest logged change"""
+    # The newest entry may be an expired tombstone that is gone now
+    return max(db.scalar(select(func.max(ChangeLog.id))) or 0, _horizon(db))
+
+
+def get_changes(db: Session, since: Optional[int] = None, limit: int = 500, now: datetime = None) -> Dict:
+    """
+    Changes after cursor since, oldest first, one entry per entity
+    
+    Returns:
+        changes (upserts with current data, deletes as tombstones), the
+        cursor to continue from, has_more, and reset when since is missing,
+        older than the compaction horizon or ahead of the log (e.g. a
+        restored backup): the client reloads /tasks and /employees instead
+    """
+    limit = min(limit, CHANGE_FEED_MAX_LIMIT)
+    head = current_cursor(db)
+    if since is None or since < _horizon(db) or since > head:
+        return {'changes': [], 'cursor': head, 'has_more': False, 'reset': True}
+    
+    query = select(ChangeLog).where(ChangeLog.id > since)
+    if db.get_bind().dialect.name != 'sqlite':
+        settled = (now or datetime.utcnow()) - timedelta(seconds=CHANGE_FEED_SETTLE_SECONDS)
+        query = query.where(ChangeLog.changed_at <= settled)
+    rows = db.execute(query.order_by(ChangeLog.id).limit(limit)).scalars().all()
+    if not rows:
+        return {'changes': [], 'cursor': since, 'has_more': False, 'reset': False}
+    
+    # Only the newest entry of an entity in the page matters
+    latest = {}
+    for row in rows:
+        latest.pop((row.entity, row.entity_id), None)
+        latest[(row.entity, row.entity_id)] = row
+    
+    current = {}
+    for entity, model in ENTITIES.items():
+        ids = [entity_id for (name, entity_id), row in latest.items() if name == entity and row.operation == UPSERT]
+        if ids:
+            current[entity] = {obj.id: obj for obj in db.execute(select(model).where(model.id.in_(ids))).scalars()}
+    
+    changes = []
+    for (entity, entity_id), row in latest.items():
+        obj = current.get(entity, {}).get(entity_id) if row.operation == UPSERT else None
+        changes.append({
+            'cursor': row.id,
+            'entity': entity,
+            'id': entity_id,
+            # Deleted after this entry was read: report it gone right away
+            'operation': UPSERT if obj is not None else DELETE,
+            'changed_at': row.changed_at,
+            entity: obj
+        })
+    return {'changes': changes, 'cursor': rows[-1].id, 'has_more': len(rows) == limit, 'reset': False}
+
+
+def compact_change_log(
+    session_factory,
+    now: datetime = None,
+    retention_days: int = None,
+    chunk_size: int = None
+) -> Dict:
+    """
+    Drop superseded entries and expired tombstones, in short transactions of chunk_size ids
+    
+    Returns:
+        removed entry counts, the new horizon and timings
+    """
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=CHANGE_LOG_RETENTION_DAYS if retention_days is None else retention_days)
+    chunk_size = chunk_size or CHANGE_LOG_COMPACT_CHUNK
+    report = {'superseded': 0, 'expired': 0, 'chunks': 0, 'horizon': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+    
+    newer = aliased(ChangeLog)
+    db = session_factory()
+    try:
+        with db.begin():
+            low, high = db.execute(select(func.min(ChangeLog.id), func.max(ChangeLog.id))).one()
+        start = (low or 1) - 1
+        while high is not None and start < high:
+            end = min(start + chunk_size, high)
+            window = [ChangeLog.id > start, ChangeLog.id <= end]
+            expired = [*window, ChangeLog.operation == DELETE, ChangeLog.changed_at < cutoff]
+            with db.begin():
+                # Superseded first: an expired tombstone may be what supersedes an upsert
+                superseded = db.execute(delete(ChangeLog).where(*window, select(newer.id).where(
+                    newer.entity == ChangeLog.entity,
+                    newer.entity_id == ChangeLog.entity_id,
+                    newer.id > ChangeLog.id
+                ).exists())).rowcount
+                horizon = db.scalar(select(func.max(ChangeLog.id)).where(*expired))
+                removed = db.execute(delete(ChangeLog).where(*expired)).rowcount if horizon else 0
+                
+                state = db.get(ChangeFeedState, 1) or ChangeFeedState(id=1, horizon=0, removed=0)
+                state.horizon = max(state.horizon, horizon or 0)
+                state.removed += superseded + removed
+                state.compacted_at = now
+                db.add(state)
+                report['horizon'] = state.horizon
+            report['superseded'] += superseded
+            report['expired'] += removed
+            report['chunks'] += 1
+            start = end
+    finally:
+        db.close()
+    report['seconds'] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def change_log_stats(db: Session) -> Dict:
+    """Size of the log and the last compaction"""
+    state = db.get(ChangeFeedState, 1)
+    return {
+        'entries': db.scalar(select(func.count(ChangeLog.id))),
+        'cursor': current_cursor(db),
+        'horizon': state.horizon if state else 0,
+        'compacted_at': state.compacted_at if state else None,
+        'removed': state.removed if state else 0,
+        'retention_days': CHANGE_LOG_RETENTION_DAYS
+    }
+
+
+class ChangeLogCompactor:
+    """Runs compact_change_log() every interval_hours in the background"""
+    
+    def __init__(self, session_factory, interval_hours: float = None):
+        self.session_factory = session_factory
+        self.interval_hours = CHANGE_LOG_COMPACT_HOURS if interval_hours is None else interval_hours
+        self.last_report: Optional[Dict] = None
+        self._stopping = False
+    
+    async def run(self) -> None:
+        """Compact on schedule until stop() is called"""
+        while not self._stopping:
+            try:
+                self.last_report = await run_in_pool("maintenance", compact_change_log, self.session_factory)
+            except Exception as e:
+                print(f"❌ Change log compaction error: {e}")
+            await asyncio.sleep(self.interval_hours * 3600)
+    
+    def stop(self) -> None:
+        self._stopping = True
@@ -0,0 +1,123 @@
+"""
+Execution layer for blocking external calls (Google Calendar, weather, OpenAI)
+
+The service clients (googleapiclient, requests, OpenAI) are synchronous.
+API handlers hand them to a dedicated bounded thread pool per dependency via
+run_in_pool(), so a slow Google call never stalls the event loop. Service
+methods that talk to an external API are additionally wrapped with
+@bounded(name), which caps concurrent calls per dependency no matter which
+pool (or script) they are called from.
+"""
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+# Max concurrent calls per dependency, overridable via env
+POOL_LIMITS = {
+    'calendar': int(os.getenv("CALENDAR_MAX_CONCURRENCY", "8")),
+    'weather': int(os.getenv("WEATHER_MAX_CONCURRENCY", "4")),
+    'openai': int(os.getenv("OPENAI_MAX_CONCURRENCY", "4")),
+    # Scheduler operations that combine DB, calendar and weather calls
+    'planning': int(os.getenv("PLANNING_MAX_CONCURRENCY", "4")),
+    # Database backups, one at a time
+    'backup': 1,
+    # Change log compaction, one at a time
+    'maintenance': 1,
+}
+
+_executors = {}
+_limiters = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+class DependencyLimiter:
+    """Reentrant per-thread semaphore limiting concurrent calls to one dependency"""
+    
+    def __init__(self, limit: int):
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._local = threading.local()
+    
+    def __enter__(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._semaphore.acquire()
+        self._local.depth = depth + 1
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            self._semaphore.release()
+        return False
+
+
+def _get_limiter(name: str) -> DependencyLimiter:
+    with _lock:
+        if name not in _limiters:
+            _limiters[name] = DependencyLimiter(POOL_LIMITS.get(name, 4))
+        return _limiters[name]
+
+
+def get_executor(name: str) -> ThreadPoolExecutor:
+    """Get or create the thread pool for a dependency"""
+    with _lock:
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(
+                max_workers=POOL_LIMITS.get(name, 4),
+                thread_name_prefix=f"{name}-pool"
+            )
+            _stats[name] = {'submitted': 0, 'active': 0, 'completed': 0, 'failed': 0}
+        return _executors[name]
+
+
+def bounded(name: str) -> Callable:
+    """Decorator limiting concurrent calls of a blocking function per dependency"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _get_limiter(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_in_pool(name: str, func: Callable, *args, **kwargs):
+    """Run a blocking callable in the dependency's thread pool and await the result"""
+    executor = get_executor(name)
+    stats = _stats[name]
+    
+    def call():
+        stats['active'] += 1
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            stats['failed'] += 1
+            raise
+        finally:
+            stats['active'] -= 1
+            stats['completed'] += 1
+    
+    stats['submitted'] += 1
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, call)
+
+
+def get_executor_stats() -> Dict:
+    """Pool sizes and call counters per dependency"""
+    return {
+        name: {'max_workers': POOL_LIMITS.get(name, 4), **_stats.get(name, {})}
+        for name in POOL_LIMITS
+    }
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down all pools (called on application shutdown)"""
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,149 @@
+"""
+Streaming CSV / NDJSON exports of tasks and employees
+
+Rows are read through a server-side cursor in chunks of EXPORT_CHUNK_SIZE
+and each chunk is encoded and sent before the next one is fetched, so
+memory stays flat whatever the size of the table. Tasks come with the
+employee name from the same SELECT (outer join), not one lazy load per row.
+Optional gzip compresses the stream as it goes.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Iterable, List, Optional
+
+from sqlalchemy import select, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import Employee, Task, TaskStatus
+
+# Rows fetched and encoded at a time
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def task_export_statement(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    status: Optional[TaskStatus] = None
+) -> Select:
+    """Task rows in (start_time, id) order, served by the pagination indexes"""
+    statement = (
+        select(
+            Task.id, Task.title, Task.task_type, Task.status,
+            Task.start_time, Task.end_time, Task.estimated_hours,
+            Task.employee_id, Employee.name.label('employee_name'),
+            Task.location, Task.weather_dependent, Task.priority, Task.description
+        )
+        .outerjoin(Employee, Task.employee_id == Employee.id)
+        .order_by(Task.start_time, Task.id)
+    )
+    if start_date:
+        statement = statement.where(Task.start_time >= start_date)
+    if end_date:
+        statement = statement.where(Task.start_time <= end_date)
+    if status:
+        statement = statement.where(Task.status == status)
+    return statement
+
+
+def employee_export_statement(is_active: Optional[bool] = None) -> Select:
+    """Employee rows in id order"""
+    statement = select(
+        Employee.id, Employee.name, Employee.email, Employee.employee_type,
+        Employee.max_hours_per_week, Employee.is_active, Employee.created_at
+    ).order_by(Employee.id)
+    if is_active is not None:
+        statement = statement.where(Employee.is_active == is_active)
+    return statement
+
+
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ExportEncoder:
+    """
+    Turns chunks of rows into bytes of CSV or NDJSON, optionally gzipped
+    
+    Usage: header() once, encode(rows) per chunk, finish() at the end.
+    """
+    
+    def __init__(self, columns: List[str], fmt: str = 'csv', compress: bool = False):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Nepodporovaný formát '{fmt}', použite {', '.join(EXPORT_FORMATS)}")
+        self.columns = columns
+        self.fmt = fmt
+        # wbits=31: gzip container instead of a raw zlib stream
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    
+    def _output(self, text: str) -> bytes:
+        data = text.encode('utf-8')
+        if self._compressor is None:
+            return data
+        # Sync flush so the client receives each chunk, not only the tail
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+    
+    def header(self) -> bytes:
+        if self.fmt != 'csv':
+            return b''
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(self.columns)
+        return self._output(buffer.getvalue())
+    
+    def encode(self, rows: Iterable) -> bytes:
+        buffer = io.StringIO()
+        if self.fmt == 'csv':
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow(['' if value is None else _plain(value) for value in row])
+        else:
+            for row in rows:
+                record = {column: _plain(value) for column, value in zip(self.columns, row)}
+                buffer.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return self._output(buffer.getvalue())
+    
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b''
+
+
+def content_type(fmt: str, compress: bool) -> str:
+    return 'application/gzip' if compress else EXPORT_FORMATS[fmt][0]
+
+
+def export_filename(name: str, fmt: str, compress: bool) -> str:
+    return f"{name}.{EXPORT_FORMATS[fmt][1]}" + ('.gz' if compress else '')
+
+
+async def stream_export(
+    db: AsyncSession,
+    statement: Select,
+    fmt: str = 'csv',
+    compress: bool = False,
+    chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """Encoded export of statement's rows, one chunk of rows per yielded block"""
+    encoder = ExportEncoder([column.key for column in statement.selected_columns], fmt, compress)
+    header = encoder.header()
+    if header:
+        yield header
+    
+    result = await db.stream(statement.execution_options(yield_per=chunk_size or EXPORT_CHUNK_SIZE))
+    async for rows in result.partitions():
+        yield encoder.encode(rows)
+    
+    tail = encoder.finish()
+    if tail:
+        yield tail
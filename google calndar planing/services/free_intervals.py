@@ -0,0 +1,282 @@
+"""
+Free-interval engine: sweep-line computation of free windows
+
+Busy events are parsed once into (start, end) epoch-second pairs, all
+calendars are swept together in one sorted pass, and the result is clipped
+to working hours. One pass yields maximal free windows for every calendar
+and for every crew (windows where all crew members are free at once).
+"""
+import math
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Tuple, Iterable
+import pytz
+
+Interval = Tuple[float, float]
+
+
+def _to_timestamp(value, timezone) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = timezone.localize(value)
+    return value.timestamp()
+
+
+def parse_intervals(events: Iterable[Dict], timezone=None) -> List[Interval]:
+    """
+    Parse busy intervals once into epoch seconds
+    
+    Accepts Google event resources ({'start': {'dateTime'|'date'}, ...}) as
+    well as busy dicts ({'start': datetime|str, 'end': datetime|str}).
+    """
+    timezone = timezone or pytz.timezone('Europe/Bratislava')
+    intervals = []
+    for event in events:
+        start, end = event['start'], event['end']
+        if isinstance(start, dict):
+            start = start.get('dateTime', start.get('date'))
+            end = end.get('dateTime', end.get('date'))
+        intervals.append((_to_timestamp(start, timezone), _to_timestamp(end, timezone)))
+    return intervals
+
+
+def merge_intervals(intervals: List[Interval]) -> List[Interval]:
+    """Merge overlapping or touching intervals"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def complement(merged: List[Interval], start_ts: float, end_ts: float) -> List[Interval]:
+    """Free gaps between merged busy intervals within [start_ts, end_ts]"""
+    free = []
+    cursor = start_ts
+    for start, end in merged:
+        if end <= cursor:
+            continue
+        if start >= end_ts:
+            break
+        if start > cursor:
+            free.append((cursor, start))
+        cursor = max(cursor, end)
+    if cursor < end_ts:
+        free.append((cursor, end_ts))
+    return free
+
+
+def grid_slots(
+    windows: List[Interval],
+    origin_ts: float,
+    slot_seconds: float,
+    step_seconds: float,
+    timezone
+) -> List[Dict[str, datetime]]:
+    """Fixed-length slots inside windows, starting on a step grid anchored at origin_ts"""
+    result = []
+    for start, end in windows:
+        slot_start = origin_ts + math.ceil(round((start - origin_ts) / step_seconds, 9)) * step_seconds
+        while slot_start + slot_seconds <= end:
+            result.append({
+                'start': datetime.fromtimestamp(slot_start, timezone),
+                'end': datetime.fromtimestamp(slot_start + slot_seconds, timezone)
+            })
+            slot_start += step_seconds
+    return result
+
+
+def _clip(free: List[Interval], allowed: List[Interval], min_seconds: float) -> List[Interval]:
+    """Intersect two sorted disjoint interval lists (two-pointer merge)"""
+    result = []
+    i = j = 0
+    while i < len(free) and j < len(allowed):
+        start = max(free[i][0], allowed[j][0])
+        end = min(free[i][1], allowed[j][1])
+        if end - start >= min_seconds and end > start:
+            result.append((start, end))
+        if free[i][1] < allowed[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+
+class FreeIntervalEngine:
+    """
+    Computes maximal free windows for many calendars and crews at once
+    
+    Working hours are applied per local calendar day; workdays is a set of
+    weekday numbers (0=Monday), None means every day.
+    """
+    
+    def __init__(
+        self,
+        working_hours_start: float = 8,
+        working_hours_end: float = 17,
+        workdays: Optional[Iterable[int]] = None,
+        timezone: str = 'Europe/Bratislava'
+    ):
+        self.working_hours_start = working_hours_start
+        self.working_hours_end = working_hours_end
+        self.workdays = set(workdays) if workdays is not None else None
+        self.timezone = pytz.timezone(timezone)
+    
+    def working_windows(self, range_start: datetime, range_end: datetime) -> List[Interval]:
+        """Working-hour windows of every day in the range, as epoch seconds"""
+        start_ts = _to_timestamp(range_start, self.timezone)
+        end_ts = _to_timestamp(range_end, self.timezone)
+        
+        local_start = datetime.fromtimestamp(start_ts, self.timezone)
+        day = local_start.date()
+        windows = []
+        while True:
+            midnight = self.timezone.localize(datetime(day.year, day.month, day.day))
+            if midnight.timestamp() >= end_ts:
+                break
+            if self.workdays is None or day.weekday() in self.workdays:
+                open_ts = self.timezone.localize(
+                    datetime(day.year, day.month, day.day) + timedelta(hours=self.working_hours_start)
+                ).timestamp()
+                close_ts = self.timezone.localize(
+                    datetime(day.year, day.month, day.day) + timedelta(hours=self.working_hours_end)
+                ).timestamp()
+                open_ts, close_ts = max(open_ts, start_ts), min(close_ts, end_ts)
+                if close_ts > open_ts:
+                    windows.append((open_ts, close_ts))
+            day += timedelta(days=1)
+        return windows
+    
+    def compute(
+        self,
+        busy_by_calendar: Dict[str, List[Interval]],
+        range_start: datetime,
+        range_end: datetime,
+        min_duration_hours: float = 0,
+        crews: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, Dict[str, List[Interval]]]:
+        """
+        Free windows per calendar and per crew in a single sweep
+        
+        Args:
+            busy_by_calendar: calendar_id -> busy intervals (from parse_intervals)
+            crews: crew name -> member calendar ids
+        
+        Returns:
+            {'calendars': {calendar_id: [(start, end), ...]},
+             'crews': {crew_name: [(start, end), ...]}} in epoch seconds
+        """
+        crews = crews or {}
+        start_ts = _to_timestamp(range_start, self.timezone)
+        end_ts = _to_timestamp(range_end, self.timezone)
+        min_seconds = min_duration_hours * 3600
+        
+        calendar_ids = list(busy_by_calendar.keys())
+        for members in crews.values():
+            for calendar_id in members:
+                if calendar_id not in busy_by_calendar:
+                    calendar_ids.append(calendar_id)
+        index = {calendar_id: i for i, calendar_id in enumerate(dict.fromkeys(calendar_ids))}
+        calendar_ids = list(index.keys())
+        
+        crew_names = list(crews.keys())
+        crews_of = [[] for _ in calendar_ids]
+        for c, name in enumerate(crew_names):
+            for calendar_id in crews[name]:
+                crews_of[index[calendar_id]].append(c)
+        
+        # Boundary points: ends sort before starts at the same instant
+        points = []
+        for calendar_id, intervals in busy_by_calendar.items():
+            i = index[calendar_id]
+            for start, end in intervals:
+                start, end = max(start, start_ts), min(end, end_ts)
+                if end > start:
+                    points.append((start, 1, i))
+                    points.append((end, -1, i))
+        points.sort()
+        
+        depth = [0] * len(calendar_ids)
+        crew_busy = [0] * len(crew_names)
+        free_since = [start_ts] * len(calendar_ids)
+        crew_free_since = [start_ts] * len(crew_names)
+        free = [[] for _ in calendar_ids]
+        crew_free = [[] for _ in crew_names]
+        
+        for ts, delta, i in points:
+            if delta == 1:
+                if depth[i] == 0:
+                    if ts > free_since[i]:
+                        free[i].append((free_since[i], ts))
+                    for c in crews_of[i]:
+                        if crew_busy[c] == 0 and ts > crew_free_since[c]:
+                            crew_free[c].append((crew_free_since[c], ts))
+                        crew_busy[c] += 1
+                depth[i] += 1
+            else:
+                depth[i] -= 1
+                if depth[i] == 0:
+                    free_since[i] = ts
+                    for c in crews_of[i]:
+                        crew_busy[c] -= 1
+                        if crew_busy[c] == 0:
+                            crew_free_since[c] = ts
+        
+        for i in range(len(calendar_ids)):
+            if depth[i] == 0 and end_ts > free_since[i]:
+                free[i].append((free_since[i], end_ts))
+        for c in range(len(crew_names)):
+            if crew_busy[c] == 0 and end_ts > crew_free_since[c]:
+                crew_free[c].append((crew_free_since[c], end_ts))
+        
+        working = self.working_windows(range_start, range_end)
+        return {
+            'calendars': {
+                calendar_id: _clip(free[i], working, min_seconds)
+                for calendar_id, i in index.items() if calendar_id in busy_by_calendar
+            },
+            'crews': {
+                name: _clip(crew_free[c], working, min_seconds)
+                for c, name in enumerate(crew_names)
+            }
+        }
+    
+    def to_datetimes(self, windows: List[Interval]) -> List[Dict[str, datetime]]:
+        """Convert epoch-second windows to {'start', 'end'} dicts in local time"""
+        return [
+            {
+                'start': datetime.fromtimestamp(start, self.timezone),
+                'end': datetime.fromtimestamp(end, self.timezone)
+            }
+            for start, end in windows
+        ]
+    
+    def slots(
+        self,
+        windows: List[Interval],
+        slot_duration_hours: float = 1.0,
+        step_hours: float = 0.5
+    ) -> List[Dict[str, datetime]]:
+        """
+        Fixed-length candidate slots inside free windows
+        
+        Slots start on a step grid anchored at the working-day start, the
+        same grid the original 30-minute walk produced.
+        """
+        slot_seconds = slot_duration_hours * 3600
+        step_seconds = step_hours * 3600
+        result = []
+        origins = {}  # local date -> working-day start, localize() is costly
+        
+        for window in windows:
+            day = datetime.fromtimestamp(window[0], self.timezone).date()
+            if day not in origins:
+                origins[day] = self.timezone.localize(
+                    datetime(day.year, day.month, day.day) + timedelta(hours=self.working_hours_start)
+                ).timestamp()
+            result.extend(grid_slots([window], origins[day], slot_seconds, step_seconds, self.timezone))
+        
+        return result
@@ -4,7 +4,7 @@ Google Calendar API integration
 import os
 import pickle
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,9 +12,25 @@ from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 import pytz
 
+from services.executor import bounded
+from services.free_intervals import (
+    parse_intervals, merge_intervals, complement, grid_slots
+)
+
 # Scopes required for calendar access
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# freeBusy accepts at most 50 calendars per query
+FREEBUSY_MAX_CALENDARS = 50
+
+
+# Calendar API accepts at most 50 calls in one HTTP batch request
+BATCH_MAX_REQUESTS = 50
+
+
+class SyncTokenExpired(Exception):
+    """Google invalidated the sync token (HTTP 410 Gone), a full resync is needed"""
+
 
 class GoogleCalendarService:
     """Service for managing Google Calendar operations"""
@@ -51,6 +67,7 @@ class GoogleCalendarService:
         
         self.service = build('calendar', 'v3', credentials=self.creds)
     
+    @bounded('calendar')
     def get_calendar_id(self, calendar_name: str) -> Optional[str]:
         """Get calendar ID by name, create if doesn't exist"""
         try:
@@ -73,6 +90,7 @@ class GoogleCalendarService:
             print(f"An error occurred: {error}")
             return None
     
+    @bounded('calendar')
     def create_event(
         self,
         calendar_id: str,
@@ -85,31 +103,9 @@ class GoogleCalendarService:
     ) -> Optional[str]:
         """Create a new calendar event"""
         try:
-            # Ensure datetime objects are timezone-aware
-            timezone = pytz.timezone('Europe/Bratislava')
-            if start_time.tzinfo is None:
-                start_time = timezone.localize(start_time)
-            if end_time.tzinfo is None:
-                end_time = timezone.localize(end_time)
-            
-            event = {
-                'summary': summary,
-                'description': description,
-                'start': {
-                    'dateTime': start_time.isoformat(),
-                    'timeZone': 'Europe/Bratislava',
-                },
-                'end': {
-                    'dateTime': end_time.isoformat(),
-                    'timeZone': 'Europe/Bratislava',
-                },
-            }
-            
-            if location:
-                event['location'] = location
-            
-            if attendees:
-                event['attendees'] = [{'email': email} for email in attendees]
+            event = build_event_body(
+                summary, description, start_time, end_time, location, attendees
+            )
             
             created_event = self.service.events().insert(
                 calendarId=calendar_id,
@@ -122,6 +118,7 @@ class GoogleCalendarService:
             print(f"An error occurred: {error}")
             return None
     
+    @bounded('calendar')
     def update_event(
         self,
         calendar_id: str,
@@ -178,6 +175,7 @@ class GoogleCalendarService:
             print(f"An error occurred: {error}")
             return False
     
+    @bounded('calendar')
     def delete_event(self, calendar_id: str, event_id: str) -> bool:
         """Delete a calendar event"""
         try:
@@ -190,6 +188,11 @@ class GoogleCalendarService:
             print(f"An error occurred: {error}")
             return False
     
+    def batch(self, max_batch_size: int = None) -> 'CalendarBatch':
+        """Start collecting writes for HTTP batch requests"""
+        return CalendarBatch(self, max_batch_size or BATCH_MAX_REQUESTS)
+    
+    @bounded('calendar')
     def get_events(
         self,
         calendar_id: str,
@@ -226,6 +229,51 @@ class GoogleCalendarService:
             print(f"An error occurred: {error}")
             return []
     
+    @bounded('calendar')
+    def list_event_changes(
+        self,
+        calendar_id: str,
+        sync_token: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List events changed since sync_token (or all events for a full sync)
+        
+        Follows pagination until Google returns nextSyncToken. Cancelled
+        events are included so that deletions can be applied locally.
+        
+        Returns:
+            (events, next_sync_token) tuple
+        
+        Raises:
+            SyncTokenExpired: if Google answers 410 Gone for the sync token
+        """
+        events = []
+        page_token = None
+        
+        while True:
+            params = {
+                'calendarId': calendar_id,
+                'singleEvents': True,
+                'showDeleted': True,
+                'maxResults': 2500
+            }
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
+            
+            try:
+                result = self.service.events().list(**params).execute()
+            except HttpError as error:
+                if error.resp.status == 410:
+                    raise SyncTokenExpired(calendar_id) from error
+                raise
+            
+            events.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return events, result.get('nextSyncToken')
+    
     def check_availability(
         self,
         calendar_id: str,
@@ -236,6 +284,68 @@ class GoogleCalendarService:
         events = self.get_events(calendar_id, start_time, end_time)
         return len(events) == 0
     
+    @bounded('calendar')
+    def get_busy_intervals(
+        self,
+        calendar_ids: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, List[Dict[str, datetime]]]:
+        """
+        Get busy intervals for many calendars using the freeBusy endpoint
+        
+        Calendars are queried in chunks of FREEBUSY_MAX_CALENDARS, so a whole
+        candidate pool costs one round trip per 50 calendars instead of one
+        events.list call per calendar.
+        
+        Returns:
+            Dict mapping calendar_id to a list of {'start', 'end'} intervals
+        """
+        start_time = localize(start_time)
+        end_time = localize(end_time)
+        
+        unique_ids = list(dict.fromkeys(cid for cid in calendar_ids if cid))
+        busy = {calendar_id: [] for calendar_id in unique_ids}
+        
+        for i in range(0, len(unique_ids), FREEBUSY_MAX_CALENDARS):
+            chunk = unique_ids[i:i + FREEBUSY_MAX_CALENDARS]
+            try:
+                result = self.service.freebusy().query(body={
+                    'timeMin': start_time.isoformat(),
+                    'timeMax': end_time.isoformat(),
+                    'timeZone': 'Europe/Bratislava',
+                    'items': [{'id': calendar_id} for calendar_id in chunk]
+                }).execute()
+            except HttpError as error:
+                print(f"An error occurred: {error}")
+                continue
+            
+            for calendar_id, data in result.get('calendars', {}).items():
+                if data.get('errors'):
+                    print(f"freeBusy error for {calendar_id}: {data['errors']}")
+                busy[calendar_id] = [
+                    {
+                        'start': datetime.fromisoformat(interval['start']),
+                        'end': datetime.fromisoformat(interval['end'])
+                    }
+                    for interval in data.get('busy', [])
+                ]
+        
+        return busy
+    
+    def check_availability_many(
+        self,
+        calendar_ids: List[str],
+        start_time: datetime,
+        end_time: datetime
+    ) -> Dict[str, bool]:
+        """Check if a time slot is free in each of the given calendars"""
+        busy = self.get_busy_intervals(calendar_ids, start_time, end_time)
+        return {
+            calendar_id: is_slot_free(intervals, start_time, end_time)
+            for calendar_id, intervals in busy.items()
+        }
+    
     def get_free_slots(
         self,
         calendar_id: str,
@@ -259,34 +369,284 @@ class GoogleCalendarService:
         # Get existing events
         events = self.get_events(calendar_id, day_start, day_end)
         
-        # Generate potential slots
-        free_slots = []
-        current_time = day_start
-        slot_delta = timedelta(hours=slot_duration_hours)
+        return free_slots_from_busy(events, day_start, day_end, slot_duration_hours)
+
+
+def build_event_body(
+    summary: str,
+    description: str,
+    start_time: datetime,
+    end_time: datetime,
+    location: Optional[str] = None,
+    attendees: Optional[List[str]] = None
+) -> Dict:
+    """Build an events.insert body with timezone-aware start and end"""
+    # Ensure datetime objects are timezone-aware
+    start_time = localize(start_time)
+    end_time = localize(end_time)
+    
+    event = {
+        'summary': summary,
+        'description': description,
+        'start': {
+            'dateTime': start_time.isoformat(),
+            'timeZone': 'Europe/Bratislava',
+        },
+        'end': {
+            'dateTime': end_time.isoformat(),
+            'timeZone': 'Europe/Bratislava',
+        },
+    }
+    
+    if location:
+        event['location'] = location
+    
+    if attendees:
+        event['attendees'] = [{'email': email} for email in attendees]
+    
+    return event
+
+
+def build_patch_body(
+    summary: Optional[str] = None,
+    description: Optional[str] = None,
+    start_time: Optional[datetime] = None,
+    end_time: Optional[datetime] = None,
+    location: Optional[str] = None
+) -> Dict:
+    """Build an events.patch body with only the provided fields (same rules as update_event)"""
+    patch = {}
+    if summary:
+        patch['summary'] = summary
+    if description:
+        patch['description'] = description
+    if location:
+        patch['location'] = location
+    if start_time:
+        patch['start'] = {
+            'dateTime': localize(start_time).isoformat(),
+            'timeZone': 'Europe/Bratislava',
+        }
+    if end_time:
+        patch['end'] = {
+            'dateTime': localize(end_time).isoformat(),
+            'timeZone': 'Europe/Bratislava',
+        }
+    return patch
+
+
+class CalendarBatch:
+    """
+    Collects event writes and sends them as Google HTTP batch requests
+    
+    Every write is registered under a caller-chosen key (typically the
+    Task id), and flush() returns the result per key:
+    - create: new event id (or None)
+    - update/delete: True/False
+    
+    Writes are flushed in chunks of max_batch_size. Entries that fail inside
+    a batch are retried once individually through the regular
+    GoogleCalendarService methods.
+    """
+    
+    def __init__(self, calendar_service: 'GoogleCalendarService', max_batch_size: int = BATCH_MAX_REQUESTS):
+        self.calendar_service = calendar_service
+        self.max_batch_size = min(max_batch_size, BATCH_MAX_REQUESTS)
+        self.pending = []
+        self.stats = {'batches': 0, 'requests': 0, 'retried': 0, 'failed': 0}
+    
+    def __len__(self):
+        return len(self.pending)
+    
+    def create_event(
+        self,
+        key,
+        calendar_id: str,
+        summary: str,
+        description: str,
+        start_time: datetime,
+        end_time: datetime,
+        location: Optional[str] = None,
+        attendees: Optional[List[str]] = None
+    ):
+        """Queue an event insert"""
+        self.pending.append({
+            'key': key,
+            'operation': 'create',
+            'calendar_id': calendar_id,
+            'kwargs': {
+                'summary': summary,
+                'description': description,
+                'start_time': start_time,
+                'end_time': end_time,
+                'location': location,
+                'attendees': attendees
+            }
+        })
+    
+    def update_event(
+        self,
+        key,
+        calendar_id: str,
+        event_id: str,
+        summary: Optional[str] = None,
+        description: Optional[str] = None,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        location: Optional[str] = None
+    ):
+        """Queue an event update (sent as events.patch, no prior GET needed)"""
+        self.pending.append({
+            'key': key,
+            'operation': 'update',
+            'calendar_id': calendar_id,
+            'event_id': event_id,
+            'kwargs': {
+                'summary': summary,
+                'description': description,
+                'start_time': start_time,
+                'end_time': end_time,
+                'location': location
+            }
+        })
+    
+    def delete_event(self, key, calendar_id: str, event_id: str):
+        """Queue an event delete"""
+        self.pending.append({
+            'key': key,
+            'operation': 'delete',
+            'calendar_id': calendar_id,
+            'event_id': event_id,
+            'kwargs': {}
+        })
+    
+    def _build_request(self, entry: Dict):
+        """Build the googleapiclient request object for a queued write"""
+        events = self.calendar_service.service.events()
+        if entry['operation'] == 'create':
+            return events.insert(
+                calendarId=entry['calendar_id'],
+                body=build_event_body(**entry['kwargs'])
+            )
+        if entry['operation'] == 'update':
+            return events.patch(
+                calendarId=entry['calendar_id'],
+                eventId=entry['event_id'],
+                body=build_patch_body(**entry['kwargs'])
+            )
+        return events.delete(
+            calendarId=entry['calendar_id'],
+            eventId=entry['event_id']
+        )
+    
+    def _retry_individually(self, entry: Dict):
+        """Retry a failed batch entry with a regular single request"""
+        self.stats['retried'] += 1
+        if entry['operation'] == 'create':
+            return self.calendar_service.create_event(entry['calendar_id'], **entry['kwargs'])
+        if entry['operation'] == 'update':
+            return self.calendar_service.update_event(
+                entry['calendar_id'], entry['event_id'], **entry['kwargs']
+            )
+        return self.calendar_service.delete_event(entry['calendar_id'], entry['event_id'])
+    
+    @bounded('calendar')
+    def flush(self) -> Dict:
+        """
+        Send all queued writes
+        
+        Returns:
+            Dict mapping each key to its result
+        """
+        results = {}
+        entries, self.pending = self.pending, []
         
-        while current_time + slot_delta <= day_end:
-            slot_end = current_time + slot_delta
+        for i in range(0, len(entries), self.max_batch_size):
+            chunk = entries[i:i + self.max_batch_size]
+            failed = []
+            
+            def callback(request_id, response, exception, chunk=chunk, failed=failed):
+                entry = chunk[int(request_id)]
+                if exception is not None:
+                    failed.append(entry)
+                elif entry['operation'] == 'create':
+                    results[entry['key']] = response.get('id')
+                else:
+                    results[entry['key']] = True
+            
+            batch = self.calendar_service.service.new_batch_http_request(callback=callback)
+            for index, entry in enumerate(chunk):
+                batch.add(self._build_request(entry), request_id=str(index))
             
-            # Check if slot conflicts with any event
-            is_free = True
-            for event in events:
-                event_start = datetime.fromisoformat(event['start'].get('dateTime', event['start'].get('date')))
-                event_end = datetime.fromisoformat(event['end'].get('dateTime', event['end'].get('date')))
-                
-                # Check for overlap
-                if (current_time < event_end and slot_end > event_start):
-                    is_free = False
-                    break
+            try:
+                batch.execute()
+            except HttpError as error:
+                # Whole batch rejected, fall back to single requests
+                print(f"Batch request failed: {error}")
+                failed = [entry for entry in chunk if entry['key'] not in results]
             
-            if is_free:
-                free_slots.append({
-                    'start': current_time,
-                    'end': slot_end
-                })
+            self.stats['batches'] += 1
+            self.stats['requests'] += len(chunk)
             
-            current_time += timedelta(hours=0.5)  # Check every 30 minutes
+            for entry in failed:
+                result = self._retry_individually(entry)
+                if not result:
+                    self.stats['failed'] += 1
+                results[entry['key']] = result
         
-        return free_slots
+        return results
+
+
+def localize(value: datetime) -> datetime:
+    """Attach the planner timezone to naive datetimes"""
+    if value.tzinfo is None:
+        return pytz.timezone('Europe/Bratislava').localize(value)
+    return value
+
+
+def wall_clock(value: datetime) -> datetime:
+    """Naive planner-timezone time, the convention of task datetimes"""
+    if value.tzinfo is not None:
+        return value.astimezone(pytz.timezone('Europe/Bratislava')).replace(tzinfo=None)
+    return value
+
+
+def is_slot_free(
+    busy: List[Dict[str, datetime]],
+    start_time: datetime,
+    end_time: datetime
+) -> bool:
+    """Check that no busy interval overlaps the given slot"""
+    start_time = localize(start_time)
+    end_time = localize(end_time)
+    
+    for interval in busy:
+        if start_time < localize(interval['end']) and end_time > localize(interval['start']):
+            return False
+    return True
+
+
+def free_slots_from_busy(
+    busy: List[Dict],
+    day_start: datetime,
+    day_end: datetime,
+    slot_duration_hours: float = 1.0
+) -> List[Dict[str, datetime]]:
+    """
+    Generate free slots between day_start and day_end around busy intervals
+    
+    busy may hold Google event resources or {'start', 'end'} dicts; they are
+    parsed once and merged, then slots are laid on a 30-minute grid.
+    """
+    timezone = pytz.timezone('Europe/Bratislava')
+    start_ts = localize(day_start).timestamp()
+    end_ts = localize(day_end).timestamp()
+    
+    merged = merge_intervals(parse_intervals(busy, timezone))
+    windows = complement(merged, start_ts, end_ts)
+    
+    # Check every 30 minutes
+    return grid_slots(windows, start_ts, slot_duration_hours * 3600, 1800, timezone)
 
 
 # Singleton instance
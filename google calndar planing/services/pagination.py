@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for list endpoints
+
+Pages are ordered by a unique key, e.g. (start_time, id), and the next page
+starts strictly after the last row of the previous one. The database seeks
+straight to that key through the matching composite index instead of
+reading and discarding `offset` rows, so deep pages cost the same as the
+first one. The cursor is an opaque URL-safe token with the key values.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Tuple, Optional, Any
+
+from sqlalchemy import tuple_, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque token for the key of the last row of a page"""
+    payload = [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, size: int) -> List[Any]:
+    """
+    Key values from a cursor token
+    
+    Raises:
+        ValueError: token is malformed or has the wrong number of values
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in payload
+        ]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(payload, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_statement(query, key_columns: Tuple, limit: int, cursor: Optional[str] = None, offset: int = 0):
+    """
+    Query or select() limited to the page after cursor, plus one lookahead row
+    
+    Raises:
+        ValueError: invalid cursor
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(key_columns))
+        if len(key_columns) == 1:
+            query = query.filter(key_columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*key_columns) > tuple_(*values))
+    
+    query = query.order_by(*key_columns)
+    if offset:
+        query = query.offset(offset)
+    
+    # One extra row tells whether another page exists
+    return query.limit(limit + 1)
+
+
+def split_page(rows: List, key_columns: Tuple, limit: int) -> Tuple[List, Optional[str]]:
+    """(rows, next_cursor) from the rows of keyset_statement"""
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in key_columns])
+
+
+def keyset_page(
+    query: Query,
+    key_columns: Tuple,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List, Optional[str]]:
+    """
+    One page of query results ordered by key_columns
+    
+    Args:
+        key_columns: ORM attributes forming a unique ascending key
+        cursor: next_cursor of the previous page
+        offset: deprecated offset fallback, applied after the cursor
+    
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    rows = keyset_statement(query, key_columns, limit, cursor, offset).all()
+    return split_page(rows, key_columns, limit)
+
+
+async def keyset_page_async(
+    db: AsyncSession,
+    statement: Select,
+    key_columns: Tuple,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List, Optional[str]]:
+    """keyset_page for a select() of ORM entities on an AsyncSession"""
+    result = await db.execute(keyset_statement(statement, key_columns, limit, cursor, offset))
+    # unique() is required when the statement joined-eager-loads a relationship
+    rows = result.unique().scalars().all()
+    return split_page(list(rows), key_columns, limit)
@@ -1,14 +1,167 @@
 """
 Intelligent scheduler for task planning
 """
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Tuple
+from datetime import datetime, date as date_type, timedelta
+from typing import List, Optional, Dict, Tuple, Callable
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select, Select
 
 from models.database import Employee, Task, EmployeeType, TaskType, TaskStatus
-from services.google_calendar import get_calendar_service
+from models.schemas import TaskCreate
+from services.google_calendar import get_calendar_service, is_slot_free
+from services.free_intervals import FreeIntervalEngine, parse_intervals
 from services.weather import get_weather_service
+from services.weather_store import WeatherStore
+from services.calendar_mirror import CalendarMirror, is_mirror_enabled
+from services.calendar_outbox import OutboxWriter, is_outbox_enabled
+from services.assignment import AssignmentOptimizer
+from services.annealing import ScheduleAnnealer
+from services.task_index import get_task_index
+from services.bulk_import import BULK_BATCH_SIZE
+
+# Tasks counting towards an employee's weekly hours
+ACTIVE_STATUSES = [TaskStatus.PLANNED, TaskStatus.IN_PROGRESS]
+
+
+def week_start(value: datetime) -> date_type:
+    """Monday of the ISO week containing value"""
+    return (value - timedelta(days=value.weekday())).date()
+
+
+def _week_start_column(dialect_name: str):
+    """SQL expression for the Monday of Task.start_time's ISO week"""
+    if dialect_name == "sqlite":
+        return func.date(Task.start_time, '-6 days', 'weekday 1')
+    if dialect_name == "postgresql":
+        return func.date(func.date_trunc('week', Task.start_time))
+    return None
+
+
+def weekly_hours_statement(
+    dialect_name: str,
+    start_date: datetime,
+    end_date: datetime,
+    employee_ids: Optional[List[int]] = None
+) -> Select:
+    """
+    Active hours per (employee, week) of the weeks from start_date to end_date
+    
+    Rows are (employee_id, week, hours); on dialects without a week function
+    they are (employee_id, start_time, hours) per task, see collect_weekly_hours.
+    """
+    range_start = datetime.combine(week_start(start_date), datetime.min.time())
+    range_end = datetime.combine(week_start(end_date), datetime.min.time()) + timedelta(days=7)
+    
+    filters = [
+        Task.employee_id != None,
+        Task.start_time >= range_start,
+        Task.start_time < range_end,
+        Task.status.in_(ACTIVE_STATUSES)
+    ]
+    if employee_ids is not None:
+        filters.append(Task.employee_id.in_(employee_ids))
+    
+    week_column = _week_start_column(dialect_name)
+    if week_column is None:
+        # No week function for this dialect: still one round trip, grouped in Python
+        return select(Task.employee_id, Task.start_time, Task.estimated_hours).where(*filters)
+    return select(
+        Task.employee_id,
+        week_column,
+        func.sum(Task.estimated_hours)
+    ).where(*filters).group_by(Task.employee_id, week_column)
+
+
+def collect_weekly_hours(rows) -> Dict[int, Dict[date_type, float]]:
+    """{employee_id: {week_monday: hours}} from weekly_hours_statement rows"""
+    result = {}
+    for employee_id, week, hours in rows:
+        if isinstance(week, datetime):
+            week = week_start(week)
+        elif isinstance(week, str):
+            week = date_type.fromisoformat(week)
+        weeks = result.setdefault(employee_id, {})
+        weeks[week] = weeks.get(week, 0.0) + float(hours or 0)
+    return result
+
+
+def workload_tasks_statement(employee_id: int, start_date: datetime, end_date: datetime) -> Select:
+    """Active tasks of one employee starting in [start_date, end_date)"""
+    return select(Task).where(
+        Task.employee_id == employee_id,
+        Task.start_time >= start_date,
+        Task.start_time < end_date,
+        Task.status.in_(ACTIVE_STATUSES)
+    )
+
+
+def workload_summary(employee: Employee, tasks: List[Task], start_date: datetime, end_date: datetime) -> Dict:
+    """Hours scheduled vs. available for the employee over the period"""
+    total_hours = sum(task.estimated_hours for task in tasks)
+    
+    # Calculate weeks in period
+    days = (end_date - start_date).days
+    weeks = days / 7
+    max_hours = employee.max_hours_per_week * weeks
+    
+    return {
+        'employee': employee,
+        'total_hours_scheduled': total_hours,
+        'max_hours': max_hours,
+        'available_hours': max_hours - total_hours,
+        'tasks': tasks,
+        'utilization_percent': (total_hours / max_hours * 100) if max_hours > 0 else 0
+    }
+
+
+def availability_day(date: datetime) -> Tuple[datetime, datetime]:
+    """Working hours of the day availability is computed for"""
+    return (
+        date.replace(hour=8, minute=0, second=0, microsecond=0),
+        date.replace(hour=17, minute=0, second=0, microsecond=0)
+    )
+
+
+def build_availability(
+    employees: List[Employee],
+    busy_by_calendar: Dict[str, List[Dict]],
+    weekly_hours: Dict[int, Dict[date_type, float]],
+    date: datetime
+) -> List[Dict]:
+    """Free slots and this week's utilization per employee"""
+    day_start, day_end = availability_day(date)
+    
+    # Free windows of all calendars in one sweep
+    engine = FreeIntervalEngine()
+    free_windows = engine.compute(
+        {cid: parse_intervals(intervals) for cid, intervals in busy_by_calendar.items()},
+        day_start,
+        day_end
+    )['calendars']
+    
+    this_week = week_start(date)
+    availability = []
+    for employee in employees:
+        if employee.google_calendar_id:
+            free_slots = engine.slots(free_windows.get(employee.google_calendar_id, []))
+        else:
+            # Default 8-hour workday if no calendar
+            free_slots = [{
+                'start': date.replace(hour=8, minute=0),
+                'end': date.replace(hour=17, minute=0)
+            }]
+        
+        total_hours = weekly_hours.get(employee.id, {}).get(this_week, 0.0)
+        max_hours = employee.max_hours_per_week
+        
+        availability.append({
+            'employee': employee,
+            'free_slots': free_slots,
+            'available_hours': max_hours - total_hours,
+            'utilization_percent': (total_hours / max_hours * 100) if max_hours > 0 else 0
+        })
+    
+    return availability
 
 
 class Scheduler:
@@ -18,13 +171,39 @@ class Scheduler:
         self.db = db
         self.calendar_service = get_calendar_service()
         self.weather_service = get_weather_service()
+        
+        # Weather decisions read the forecast grid stored in weather_logs
+        self.weather_store = WeatherStore(db, self.weather_service)
+        
+        # Availability queries go to the local event mirror when enabled
+        self.mirror = CalendarMirror(db, self.calendar_service) if is_mirror_enabled() else None
+        self.availability_source = self.mirror or self.calendar_service
+        
+        # Calendar writes are queued and applied by the outbox worker
+        self.outbox = OutboxWriter(db) if is_outbox_enabled() else None
+    
+    @property
+    def task_index(self):
+        """Interval index of assigned tasks in the local DB (services.task_index)"""
+        return get_task_index(self.db)
+    
+    def find_local_conflicts(
+        self,
+        employee_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        exclude_task_id: Optional[int] = None
+    ) -> List[int]:
+        """Ids of the employee's planned or running tasks overlapping the slot"""
+        return self.task_index.conflicts(employee_id, start_time, end_time, exclude_task_id)
     
     def find_best_employee(
         self,
         task_type: TaskType,
         start_time: datetime,
         duration_hours: float,
-        required_skills: Optional[List[str]] = None
+        required_skills: Optional[List[str]] = None,
+        busy_by_calendar: Optional[Dict[str, List[Dict]]] = None
     ) -> Optional[Employee]:
         """
         Find the best available employee for a task
@@ -34,6 +213,12 @@ class Scheduler:
         2. Available in calendar
         3. Not overloaded (weekly hours)
         4. Has required skills (future feature)
+        
+        Tasks already booked in the local DB are checked in the task index,
+        calendar availability for the whole candidate pool is resolved with a
+        single freeBusy query. Callers that already hold busy intervals for a
+        wider range (e.g. optimize_schedule) can pass them as busy_by_calendar
+        to skip the query entirely.
         """
         # Determine required employee type
         if task_type == TaskType.INSTALLATION:
@@ -56,45 +241,33 @@ class Scheduler:
         scored_employees = []
         end_time = start_time + timedelta(hours=duration_hours)
         
+        calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+        if busy_by_calendar is None and calendar_ids:
+            busy_by_calendar = self.availability_source.get_busy_intervals(
+                calendar_ids,
+                start_time,
+                end_time
+            )
+        
+        # Hours already planned in this week, for all candidates at once
+        task_week = week_start(start_time)
+        weekly_hours = self.get_weekly_hours(
+            start_time,
+            start_time,
+            employee_ids=[e.id for e in employees]
+        )
+        
         for employee in employees:
-            score = 0
-            
-            # Check calendar availability
-            if employee.google_calendar_id:
-                is_available = self.calendar_service.check_availability(
-                    employee.google_calendar_id,
-                    start_time,
-                    end_time
-                )
-                if not is_available:
-                    continue  # Skip if not available
-                score += 10
-            
-            # Check weekly hours
-            week_start = start_time - timedelta(days=start_time.weekday())
-            week_end = week_start + timedelta(days=7)
-            
-            weekly_tasks = self.db.query(Task).filter(
-                and_(
-                    Task.employee_id == employee.id,
-                    Task.start_time >= week_start,
-                    Task.start_time < week_end,
-                    Task.status.in_([TaskStatus.PLANNED, TaskStatus.IN_PROGRESS])
-                )
-            ).all()
-            
-            total_hours = sum(task.estimated_hours for task in weekly_tasks)
-            available_hours = employee.max_hours_per_week - total_hours
-            
-            if available_hours < duration_hours:
-                continue  # Skip if overloaded
-            
-            # Prefer employees with more availability
-            score += (available_hours / employee.max_hours_per_week) * 5
-            
-            # Prefer exact type match
-            if employee.employee_type != EmployeeType.BOTH:
-                score += 2
+            score = self._score_employee(
+                employee,
+                start_time,
+                end_time,
+                duration_hours,
+                busy_by_calendar or {},
+                weekly_hours.get(employee.id, {}).get(task_week, 0.0)
+            )
+            if score is None:
+                continue
             
             scored_employees.append((employee, score))
         
@@ -105,26 +278,82 @@ class Scheduler:
         scored_employees.sort(key=lambda x: x[1], reverse=True)
         return scored_employees[0][0]
     
+    def _score_employee(
+        self,
+        employee: Employee,
+        start_time: datetime,
+        end_time: datetime,
+        duration_hours: float,
+        busy_by_calendar: Dict[str, List[Dict]],
+        planned_hours: float
+    ) -> Optional[float]:
+        """Score of one candidate for a slot, None if the employee can't take it"""
+        score = 0
+        
+        # Check tasks booked locally (also for employees without a calendar)
+        if not self.task_index.is_free(employee.id, start_time, end_time):
+            return None
+        
+        # Check calendar availability
+        if employee.google_calendar_id:
+            is_available = is_slot_free(
+                busy_by_calendar.get(employee.google_calendar_id, []),
+                start_time,
+                end_time
+            )
+            if not is_available:
+                return None  # Skip if not available
+            score += 10
+        
+        # Check weekly hours
+        available_hours = employee.max_hours_per_week - planned_hours
+        
+        if available_hours < duration_hours:
+            return None  # Skip if overloaded
+        
+        # Prefer employees with more availability
+        score += (available_hours / employee.max_hours_per_week) * 5
+        
+        # Prefer exact type match
+        if employee.employee_type != EmployeeType.BOTH:
+            score += 2
+        
+        return score
+    
     def suggest_installation_dates(
         self,
         duration_hours: float,
         preferred_date: Optional[datetime] = None,
-        days_to_check: int = 14
+        days_to_check: int = 14,
+        working_hours_start: int = 8,
+        working_hours_end: int = 17
     ) -> List[Tuple[datetime, Dict]]:
         """
-        Suggest dates suitable for installation based on weather
+        Suggest installation windows based on the hourly weather grid
+        
+        Windows are contiguous working hours with suitable weather, long
+        enough for the task (or a full working day for multi-day tasks).
         
         Returns:
-            List of (datetime, weather_info) tuples
+            List of (window_start, window_info) tuples, window_info has
+            'start', 'end', 'hours', 'min_temperature' and 'max_rain_mm'
         """
         start_date = preferred_date or datetime.now()
+        min_hours = min(duration_hours, working_hours_end - working_hours_start)
         
-        suitable_days = self.weather_service.find_suitable_installation_days(
+        windows = self.weather_store.find_installation_windows(
             start_date=start_date,
-            days_needed=days_to_check
+            min_hours=min_hours,
+            days_to_search=days_to_check,
+            working_hours_start=working_hours_start,
+            working_hours_end=working_hours_end
         )
         
-        return suitable_days
+        return [
+            (window['start'], window)
+            for location_windows in windows.values()
+            for window in location_windows
+        ]
     
     def create_and_schedule_task(
         self,
@@ -146,11 +375,12 @@ class Scheduler:
         """
         # Check weather suitability for installations
         if task_type == TaskType.INSTALLATION and weather_dependent:
-            recommendation = self.weather_service.get_recommendation(start_time)
+            recommendation = self.weather_store.get_recommendation(start_time)
             if recommendation != 'installation':
                 return None, f"Počasie dňa {start_time.strftime('%Y-%m-%d')} nie je vhodné na inštaláciu."
         
         # Find employee if not specified
+        end_time = start_time + timedelta(hours=duration_hours)
         if employee_id:
             employee = self.db.query(Employee).filter(Employee.id == employee_id).first()
             if not employee:
@@ -164,8 +394,17 @@ class Scheduler:
             if not employee:
                 return None, "Nie je dostupný žiadny vhodný zamestnanec."
         
+        # Check and book the slot in one step, a concurrent request may be creating a task too
+        index = self.task_index
+        reservation = index.reserve(employee.id, start_time, end_time)
+        if reservation is None:
+            message = f"{employee.name} má v tomto čase inú úlohu."
+            next_start = index.next_free_gap(employee.id, start_time, duration_hours)
+            if next_start:
+                message += f" Najbližší voľný termín: {next_start.strftime('%Y-%m-%d %H:%M')}."
+            return None, message
+        
         # Create task
-        end_time = start_time + timedelta(hours=duration_hours)
         task = Task(
             title=title,
             description=description,
@@ -181,13 +420,20 @@ class Scheduler:
         )
         
         self.db.add(task)
-        self.db.flush()  # Get task ID
+        try:
+            self.db.flush()  # Get task ID, the flushed task now holds the slot in the index
+        finally:
+            index.release(reservation)
         
         # Create calendar event
-        if employee.google_calendar_id:
-            event_description = description or ""
-            event_description += f"\n\nTyp: {task_type.value}"
-            event_description += f"\nPriradené: {employee.name}"
+        if employee.google_calendar_id and self.outbox:
+            self.outbox.enqueue_create(
+                task,
+                employee.google_calendar_id,
+                self._event_description(description, task_type, employee)
+            )
+        elif employee.google_calendar_id:
+            event_description = self._event_description(description, task_type, employee)
             
             event_id = self.calendar_service.create_event(
                 calendar_id=employee.google_calendar_id,
@@ -200,11 +446,380 @@ class Scheduler:
             
             if event_id:
                 task.google_event_id = event_id
+                if self.mirror:
+                    self.mirror.record_event(
+                        employee.google_calendar_id,
+                        event_id,
+                        start_time,
+                        end_time,
+                        summary=title
+                    )
         
         self.db.commit()
         
         return task, f"Úloha '{title}' bola naplánovaná pre {employee.name} na {start_time.strftime('%Y-%m-%d %H:%M')}."
     
+    def bulk_create_tasks(
+        self,
+        rows: List[Tuple[int, TaskCreate]],
+        progress: Optional[Callable[[int, int], None]] = None,
+        batch_size: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Create and schedule many validated tasks in one transaction
+        
+        Same rules as create_and_schedule_task, but the expensive inputs are
+        fetched once for the whole import: eligible employees, one freeBusy
+        query over the covered range, weekly hours and a weather verdict per
+        day. Rows are flushed in batches, calendar events go out in batch
+        requests (or the outbox) and everything is committed at the end.
+        
+        Args:
+            rows: (row_number, TaskCreate) pairs from services.bulk_import
+            progress: called with (processed, total) after every batch
+        
+        Returns:
+            Per-row results: row, status (created/rejected), task_id,
+            employee_id, message
+        """
+        total = len(rows)
+        if not rows:
+            return []
+        batch_size = batch_size or BULK_BATCH_SIZE
+        
+        employees = self.db.query(Employee).filter(Employee.is_active == True).all()
+        employees_by_id = {e.id: e for e in employees}
+        # Rows may name an inactive employee, like in create_and_schedule_task
+        named = {row.employee_id for _, row in rows if row.employee_id} - employees_by_id.keys()
+        if named:
+            employees_by_id.update(
+                (e.id, e) for e in self.db.query(Employee).filter(Employee.id.in_(named))
+            )
+        range_start = min(row.start_time for _, row in rows)
+        range_end = max(row.start_time + timedelta(hours=row.estimated_hours) for _, row in rows)
+        
+        calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+        busy_by_calendar = self.availability_source.get_busy_intervals(
+            calendar_ids, range_start, range_end
+        ) if calendar_ids else {}
+        weekly_hours = self.get_weekly_hours(range_start, range_end, [e.id for e in employees])
+        
+        # Accepted rows hold their slot in the task index until their batch is flushed
+        index = self.task_index
+        reservations = []
+        weather_by_day = {}
+        results, created = [], []
+        pending = []
+        
+        try:
+            for processed, (number, row) in enumerate(rows, start=1):
+                start_time = row.start_time
+                end_time = start_time + timedelta(hours=row.estimated_hours)
+                result = {'row': number, 'status': 'rejected', 'task_id': None, 'employee_id': None}
+                results.append(result)
+                
+                if row.task_type == TaskType.INSTALLATION and row.weather_dependent:
+                    day = start_time.date()
+                    if day not in weather_by_day:
+                        weather_by_day[day] = self.weather_store.get_recommendation(start_time)
+                    if weather_by_day[day] != 'installation':
+                        result['message'] = f"Počasie dňa {start_time.strftime('%Y-%m-%d')} nie je vhodné na inštaláciu."
+                        continue
+                
+                week = week_start(start_time)
+                if row.employee_id:
+                    employee = employees_by_id.get(row.employee_id)
+                    if not employee:
+                        result['message'] = "Zamestnanec nebol nájdený."
+                        continue
+                else:
+                    required_types = (
+                        [EmployeeType.INSTALLER, EmployeeType.BOTH] if row.task_type == TaskType.INSTALLATION
+                        else [EmployeeType.PRODUCER, EmployeeType.BOTH]
+                    )
+                    best, best_score = None, None
+                    for candidate in employees:
+                        if candidate.employee_type not in required_types:
+                            continue
+                        score = self._score_employee(
+                            candidate,
+                            start_time,
+                            end_time,
+                            row.estimated_hours,
+                            busy_by_calendar,
+                            weekly_hours.get(candidate.id, {}).get(week, 0.0)
+                        )
+                        if score is not None and (best_score is None or score > best_score):
+                            best, best_score = candidate, score
+                    if not best:
+                        result['message'] = "Nie je dostupný žiadny vhodný zamestnanec."
+                        continue
+                    employee = best
+                
+                reservation = index.reserve(employee.id, start_time, end_time)
+                if reservation is None:
+                    result['message'] = f"{employee.name} má v tomto čase inú úlohu."
+                    continue
+                reservations.append(reservation)
+                
+                task = Task(
+                    title=row.title,
+                    description=row.description,
+                    task_type=row.task_type,
+                    status=TaskStatus.PLANNED,
+                    start_time=start_time,
+                    end_time=end_time,
+                    estimated_hours=row.estimated_hours,
+                    employee_id=employee.id,
+                    location=row.location,
+                    weather_dependent=row.weather_dependent,
+                    priority=row.priority
+                )
+                hours = weekly_hours.setdefault(employee.id, {})
+                hours[week] = hours.get(week, 0.0) + row.estimated_hours
+                result.update({'status': 'created', 'employee_id': employee.id, 'task': task})
+                pending.append(task)
+                
+                if len(pending) >= batch_size:
+                    self._flush_bulk_batch(pending, index, reservations)
+                    created.extend(pending)
+                    pending = []
+                if progress and processed % batch_size == 0 and processed < total:
+                    progress(processed, total)
+            
+            if pending:
+                self._flush_bulk_batch(pending, index, reservations)
+                created.extend(pending)
+        finally:
+            for reservation in reservations:
+                index.release(reservation)
+        
+        # Calendar events for all created tasks (queued or in batch requests)
+        if self.outbox:
+            self.queue_task_events(created)
+        else:
+            self.sync_task_events(created)
+        
+        # Ids are read before the commit expires the instances
+        for result in results:
+            task = result.pop('task', None)
+            if task is not None:
+                result['task_id'] = task.id
+                result['message'] = f"Naplánované pre {employees_by_id[task.employee_id].name}."
+        
+        self.db.commit()
+        if progress:
+            progress(total, total)
+        return results
+    
+    def _flush_bulk_batch(self, tasks: List[Task], index, reservations: List[int]) -> None:
+        """Flush a batch of the import, its tasks then hold their slots in the index"""
+        self.db.add_all(tasks)
+        self.db.flush()
+        for reservation in reservations:
+            index.release(reservation)
+        reservations.clear()
+    
+    def _event_description(
+        self,
+        description: Optional[str],
+        task_type: TaskType,
+        employee: Employee
+    ) -> str:
+        """Build calendar event description for a task"""
+        event_description = description or ""
+        event_description += f"\n\nTyp: {task_type.value}"
+        event_description += f"\nPriradené: {employee.name}"
+        return event_description
+    
+    def sync_task_events(self, tasks: List[Task]) -> Dict:
+        """
+        Create calendar events for assigned tasks that don't have one yet
+        
+        All inserts go out as Google HTTP batch requests; each sub-response
+        is mapped back to its Task.google_event_id. Changes are not
+        committed here.
+        
+        Returns:
+            Dict with created/failed counts and batch statistics
+        """
+        employee_ids = {task.employee_id for task in tasks if task.employee_id}
+        if not employee_ids:
+            return {'created': 0, 'failed': 0}
+        
+        employees = {
+            e.id: e
+            for e in self.db.query(Employee).filter(Employee.id.in_(employee_ids)).all()
+        }
+        
+        batch = self.calendar_service.batch()
+        by_id = {}
+        for task in tasks:
+            employee = employees.get(task.employee_id)
+            if task.google_event_id or not employee or not employee.google_calendar_id:
+                continue
+            by_id[task.id] = (task, employee)
+            batch.create_event(
+                key=task.id,
+                calendar_id=employee.google_calendar_id,
+                summary=task.title,
+                description=self._event_description(task.description, task.task_type, employee),
+                start_time=task.start_time,
+                end_time=task.end_time,
+                location=task.location
+            )
+        
+        if not by_id:
+            return {'created': 0, 'failed': 0}
+        
+        results = batch.flush()
+        created = 0
+        for task_id, event_id in results.items():
+            if not event_id:
+                continue
+            task, employee = by_id[task_id]
+            task.google_event_id = event_id
+            created += 1
+            if self.mirror:
+                self.mirror.record_event(
+                    employee.google_calendar_id,
+                    event_id,
+                    task.start_time,
+                    task.end_time,
+                    summary=task.title
+                )
+        
+        return {'created': created, 'failed': len(by_id) - created, **batch.stats}
+    
+    def queue_task_events(self, tasks: List[Task]) -> int:
+        """Enqueue calendar event creation for assigned tasks (outbox mode)"""
+        employee_ids = {task.employee_id for task in tasks if task.employee_id}
+        if not employee_ids:
+            return 0
+        
+        employees = {
+            e.id: e
+            for e in self.db.query(Employee).filter(Employee.id.in_(employee_ids)).all()
+        }
+        
+        queued = 0
+        for task in tasks:
+            employee = employees.get(task.employee_id)
+            if task.google_event_id or not employee or not employee.google_calendar_id:
+                continue
+            self.outbox.enqueue_create(
+                task,
+                employee.google_calendar_id,
+                self._event_description(task.description, task.task_type, employee)
+            )
+            queued += 1
+        
+        return queued
+    
+    def update_task(self, task: Task, update_data: Dict) -> Task:
+        """
+        Update a task and propagate the change to Google Calendar
+        
+        In outbox mode the calendar change is queued in the same transaction;
+        otherwise the event is updated inline before the commit.
+        """
+        old_employee = task.employee
+        
+        for field, value in update_data.items():
+            setattr(task, field, value)
+        self.db.flush()
+        
+        employee = None
+        if old_employee is not None and task.employee_id == old_employee.id:
+            employee = old_employee
+        elif task.employee_id:
+            employee = self.db.query(Employee).filter(Employee.id == task.employee_id).first()
+        
+        reassigned = old_employee is not None and (employee is None or employee.id != old_employee.id)
+        if reassigned and old_employee.google_calendar_id:
+            # Event lives in the previous employee's calendar
+            if self.outbox:
+                self.outbox.enqueue_delete(task, old_employee.google_calendar_id)
+            elif task.google_event_id:
+                self.calendar_service.delete_event(old_employee.google_calendar_id, task.google_event_id)
+            task.google_event_id = None
+            if employee and employee.google_calendar_id:
+                if self.outbox:
+                    self.queue_task_events([task])
+                else:
+                    self.sync_task_events([task])
+        elif employee and employee.google_calendar_id:
+            if self.outbox:
+                if task.google_event_id or self.outbox.has_pending(task.id):
+                    self.outbox.enqueue_update(
+                        task,
+                        employee.google_calendar_id,
+                        self._event_description(task.description, task.task_type, employee)
+                    )
+            elif task.google_event_id:
+                self.calendar_service.update_event(
+                    calendar_id=employee.google_calendar_id,
+                    event_id=task.google_event_id,
+                    summary=task.title,
+                    description=task.description,
+                    start_time=task.start_time,
+                    end_time=task.end_time,
+                    location=task.location
+                )
+        
+        self.db.commit()
+        self.db.refresh(task)
+        return task
+    
+    def delete_task(self, task: Task) -> None:
+        """Delete a task and its Google Calendar event"""
+        employee = task.employee
+        
+        if employee and employee.google_calendar_id:
+            if self.outbox:
+                self.outbox.enqueue_delete(task, employee.google_calendar_id)
+            elif task.google_event_id:
+                self.calendar_service.delete_event(
+                    calendar_id=employee.google_calendar_id,
+                    event_id=task.google_event_id
+                )
+        
+        self.db.delete(task)
+        self.db.commit()
+    
+    def get_weekly_hours(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        employee_ids: Optional[List[int]] = None
+    ) -> Dict[int, Dict[date_type, float]]:
+        """
+        Planned hours per (employee, ISO week) in one GROUP BY query
+        
+        Covers every week from the one containing start_date through the
+        one containing end_date.
+        
+        Returns:
+            {employee_id: {week_monday: hours}}
+        """
+        if employee_ids is not None and not employee_ids:
+            return {}
+        statement = weekly_hours_statement(
+            self.db.get_bind().dialect.name, start_date, end_date, employee_ids
+        )
+        return collect_weekly_hours(self.db.execute(statement).all())
+    
+    def get_unassigned_tasks(self, start_date: datetime, end_date: datetime) -> List[Task]:
+        """Planned tasks without an employee starting in [start_date, end_date)"""
+        return self.db.query(Task).filter(
+            and_(
+                Task.employee_id == None,
+                Task.start_time >= start_date,
+                Task.start_time < end_date,
+                Task.status == TaskStatus.PLANNED
+            )
+        ).all()
+    
     def get_employee_workload(
         self,
         employee_id: int,
@@ -221,30 +836,8 @@ class Scheduler:
         if not employee:
             return None
         
-        tasks = self.db.query(Task).filter(
-            and_(
-                Task.employee_id == employee_id,
-                Task.start_time >= start_date,
-                Task.start_time < end_date,
-                Task.status.in_([TaskStatus.PLANNED, TaskStatus.IN_PROGRESS])
-            )
-        ).all()
-        
-        total_hours = sum(task.estimated_hours for task in tasks)
-        
-        # Calculate weeks in period
-        days = (end_date - start_date).days
-        weeks = days / 7
-        max_hours = employee.max_hours_per_week * weeks
-        
-        return {
-            'employee': employee,
-            'total_hours_scheduled': total_hours,
-            'max_hours': max_hours,
-            'available_hours': max_hours - total_hours,
-            'tasks': tasks,
-            'utilization_percent': (total_hours / max_hours * 100) if max_hours > 0 else 0
-        }
+        tasks = self.db.execute(workload_tasks_statement(employee_id, start_date, end_date)).scalars().all()
+        return workload_summary(employee, tasks, start_date, end_date)
     
     def get_all_employees_availability(
         self,
@@ -257,80 +850,232 @@ class Scheduler:
             List of dicts with employee and their free slots
         """
         employees = self.db.query(Employee).filter(Employee.is_active == True).all()
-        availability = []
         
-        for employee in employees:
-            if employee.google_calendar_id:
-                free_slots = self.calendar_service.get_free_slots(
-                    calendar_id=employee.google_calendar_id,
-                    date=date
-                )
-            else:
-                # Default 8-hour workday if no calendar
-                free_slots = [{
-                    'start': date.replace(hour=8, minute=0),
-                    'end': date.replace(hour=17, minute=0)
-                }]
-            
-            # Get weekly hours
-            week_start = date - timedelta(days=date.weekday())
-            week_end = week_start + timedelta(days=7)
-            workload = self.get_employee_workload(employee.id, week_start, week_end)
-            
-            availability.append({
-                'employee': employee,
-                'free_slots': free_slots,
-                'available_hours': workload['available_hours'],
-                'utilization_percent': workload['utilization_percent']
-            })
-        
-        return availability
+        day_start, day_end = availability_day(date)
+        calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+        busy_by_calendar = {}
+        if calendar_ids:
+            busy_by_calendar = self.availability_source.get_busy_intervals(
+                calendar_ids,
+                day_start,
+                day_end
+            )
+        
+        # Weekly hours of the whole staff in one query
+        weekly_hours = self.get_weekly_hours(date, date)
+        
+        return build_availability(employees, busy_by_calendar, weekly_hours, date)
     
-    def optimize_schedule(
+    def get_free_windows(
         self,
         start_date: datetime,
-        end_date: datetime
+        end_date: datetime,
+        employee_ids: Optional[List[int]] = None,
+        min_duration_hours: float = 0,
+        crew_employee_ids: Optional[List[int]] = None,
+        working_hours_start: float = 8,
+        working_hours_end: float = 17
     ) -> Dict:
         """
-        Optimize schedule based on weather and employee availability
+        Maximal free windows per employee (and for a crew) over a date range
+        
+        Busy intervals of all calendars are fetched in one query and swept
+        in a single pass; crew windows are those where every member is free.
+        Employees without a calendar are free for all working hours.
         
-        This is a placeholder for more advanced optimization logic
+        Returns:
+            Dict with 'employees' list and optional 'crew' windows
         """
-        # Get weather forecast
-        forecast = self.weather_service.get_forecast(days=14)
+        query = self.db.query(Employee).filter(Employee.is_active == True)
+        if employee_ids:
+            query = query.filter(Employee.id.in_(employee_ids))
+        employees = query.all()
         
-        # Get unassigned tasks
-        unassigned_tasks = self.db.query(Task).filter(
-            and_(
-                Task.employee_id == None,
-                Task.start_time >= start_date,
-                Task.start_time < end_date,
-                Task.status == TaskStatus.PLANNED
+        crew_ids = set(crew_employee_ids or [])
+        if crew_ids - {e.id for e in employees}:
+            employees += self.db.query(Employee).filter(
+                Employee.id.in_(crew_ids - {e.id for e in employees})
+            ).all()
+        
+        calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+        busy_by_calendar = {}
+        if calendar_ids:
+            busy_by_calendar = self.availability_source.get_busy_intervals(
+                calendar_ids,
+                start_date,
+                end_date
             )
-        ).all()
+        
+        # Employees without a calendar get an empty busy list under a synthetic key
+        keys = {e.id: e.google_calendar_id or f"employee-{e.id}" for e in employees}
+        busy = {keys[e.id]: parse_intervals(busy_by_calendar.get(e.google_calendar_id, [])) for e in employees}
+        crews = {'crew': [keys[eid] for eid in crew_ids if eid in keys]} if crew_ids else None
+        
+        engine = FreeIntervalEngine(working_hours_start, working_hours_end)
+        result = engine.compute(busy, start_date, end_date, min_duration_hours, crews)
+        
+        response = {
+            'employees': [
+                {
+                    'employee_id': e.id,
+                    'name': e.name,
+                    'windows': engine.to_datetimes(result['calendars'][keys[e.id]])
+                }
+                for e in employees
+                if not employee_ids or e.id in employee_ids
+            ]
+        }
+        if crews:
+            response['crew'] = {
+                'employee_ids': sorted(crew_ids),
+                'windows': engine.to_datetimes(result['crews']['crew'])
+            }
+        return response
+    
+    def optimize_schedule(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        mode: str = "global",
+        time_budget_seconds: float = 5.0,
+        seed: int = 0
+    ) -> Dict:
+        """
+        Assign unassigned planned tasks in a date range to employees
+        
+        Modes:
+            global - min-cost assignment over the whole task x employee
+                     cost matrix (services.assignment)
+            anneal - starts from the global assignment and also moves tasks
+                     in time within the range (services.annealing)
+            greedy - one task at a time in query order via find_best_employee
+        """
+        unassigned_tasks = self.get_unassigned_tasks(start_date, end_date)
         
         assigned = 0
         failed = 0
+        metrics = None
         
-        for task in unassigned_tasks:
-            employee = self.find_best_employee(
-                task_type=task.task_type,
-                start_time=task.start_time,
-                duration_hours=task.estimated_hours
-            )
+        # Fetch busy intervals for the whole range once instead of per task
+        busy_by_calendar = {}
+        employees = self.db.query(Employee).filter(Employee.is_active == True).all()
+        range_end = max([task.end_time for task in unassigned_tasks] + [end_date])
+        if unassigned_tasks:
+            calendar_ids = [e.google_calendar_id for e in employees if e.google_calendar_id]
+            if calendar_ids:
+                busy_by_calendar = self.availability_source.get_busy_intervals(
+                    calendar_ids,
+                    start_date,
+                    range_end
+                )
+        
+        if mode in ("global", "anneal") and unassigned_tasks:
+            busy = {
+                e.id: [(b['start'], b['end']) for b in busy_by_calendar.get(e.google_calendar_id, [])]
+                for e in employees
+            }
+            # Tasks already assigned in the range block their employee too
+            for task in self.db.query(Task).filter(
+                Task.employee_id != None,
+                Task.start_time < range_end,
+                Task.end_time > start_date,
+                Task.status.in_(ACTIVE_STATUSES)
+            ).all():
+                busy.setdefault(task.employee_id, []).append((task.start_time, task.end_time))
+            
+            weekly_hours = self.get_weekly_hours(start_date, range_end, [e.id for e in employees])
             
-            if employee:
-                task.employee_id = employee.id
-                assigned += 1
+            if mode == "anneal":
+                # A fifth of the budget for the starting assignment
+                initial = AssignmentOptimizer(
+                    unassigned_tasks,
+                    employees,
+                    busy=busy,
+                    weekly_hours=weekly_hours,
+                    time_budget_seconds=time_budget_seconds / 5
+                ).solve()['assignment']
+                origin = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+                annealer = ScheduleAnnealer(
+                    unassigned_tasks,
+                    employees,
+                    start_date,
+                    end_date,
+                    busy=busy,
+                    weekly_hours=weekly_hours,
+                    weather=self.weather_store.get_hourly_suitability(
+                        origin,
+                        int((range_end - origin) / timedelta(hours=1)) + 1,
+                        locations=[t.location for t in unassigned_tasks if t.location]
+                    ),
+                    default_location=self.weather_store.location,
+                    initial=initial,
+                    seed=seed,
+                    time_budget_seconds=time_budget_seconds * 4 / 5
+                )
+                solution = annealer.solve()
+                schedule = solution['schedule']
+                for task in unassigned_tasks:
+                    if task.id in schedule:
+                        task.employee_id = schedule[task.id]['employee_id']
+                        task.start_time = schedule[task.id]['start_time']
+                        task.end_time = schedule[task.id]['end_time']
             else:
-                failed += 1
+                solution = AssignmentOptimizer(
+                    unassigned_tasks,
+                    employees,
+                    busy=busy,
+                    weekly_hours=weekly_hours,
+                    time_budget_seconds=time_budget_seconds
+                ).solve()
+                for task in unassigned_tasks:
+                    employee_id = solution['assignment'].get(task.id)
+                    if employee_id:
+                        task.employee_id = employee_id
+            
+            metrics = solution['metrics']
+            assigned = sum(1 for task in unassigned_tasks if task.employee_id)
+            failed = len(unassigned_tasks) - assigned
+        else:
+            for task in unassigned_tasks:
+                employee = self.find_best_employee(
+                    task_type=task.task_type,
+                    start_time=task.start_time,
+                    duration_hours=task.estimated_hours,
+                    busy_by_calendar=busy_by_calendar
+                )
+                
+                if employee:
+                    task.employee_id = employee.id
+                    assigned += 1
+                    # Block the slot for the remaining tasks in this run
+                    if employee.google_calendar_id:
+                        busy_by_calendar.setdefault(employee.google_calendar_id, []).append({
+                            'start': task.start_time,
+                            'end': task.end_time
+                        })
+                    self.db.flush()  # weekly hours of the next task include this one
+                else:
+                    failed += 1
+        
+        # Create calendar events for all new assignments (queued or in batch requests)
+        self.db.flush()
+        new_assignments = [t for t in unassigned_tasks if t.employee_id]
+        if self.outbox:
+            calendar_result = {'calendar_events_queued': self.queue_task_events(new_assignments)}
+        else:
+            calendar_result = {'calendar_events_created': self.sync_task_events(new_assignments)['created']}
         
         self.db.commit()
         
-        return {
+        result = {
+            'mode': mode,
             'assigned': assigned,
             'failed': failed,
+            **calendar_result,
             'message': f"Priradených: {assigned}, Nepodarilo sa: {failed}"
         }
+        if metrics is not None:
+            result['metrics'] = metrics
+        return result
 
 
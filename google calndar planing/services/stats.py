@@ -0,0 +1,173 @@
+"""
+Overview counters in one query, cached until tasks or employees change
+
+Every counter (tasks by status and type, upcoming and unassigned tasks,
+all and active employees) comes back as one row of a single SELECT. Each
+column is a COUNT subquery answered from an index (status, type and start
+indexes, the unassigned partial index); one CASE-per-row pass over tasks
+was 2-3x slower on SQLite.
+
+The result is kept in memory per database and day; any committed session
+that wrote Task or Employee rows, through the ORM or DML like the
+archiver's, drops it. STATS_CACHE_TTL bounds how long changes made by
+other processes (cron jobs, other workers) can go unnoticed.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional
+
+from sqlalchemy import Select, event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.database import Employee, Task, TaskStatus, TaskType
+
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", "30"))
+
+UPCOMING_DAYS = 7
+
+
+def _count(column, *conditions):
+    return select(func.count(column)).where(*conditions).scalar_subquery()
+
+
+def overview_statement(today: datetime) -> Select:
+    """All counters as one row"""
+    week_later = today + timedelta(days=UPCOMING_DAYS)
+    columns = [_count(Task.id).label('tasks')]
+    columns += [_count(Task.id, Task.status == status).label(f'status_{status.value}') for status in TaskStatus]
+    columns += [_count(Task.id, Task.task_type == task_type).label(f'type_{task_type.value}') for task_type in TaskType]
+    columns += [
+        _count(Task.id, Task.start_time >= today, Task.start_time <= week_later).label('upcoming'),
+        _count(Task.id, Task.employee_id == None).label('unassigned'),
+        _count(Employee.id).label('employees'),
+        _count(Employee.id, Employee.is_active == True).label('active_employees'),
+    ]
+    return select(*columns)
+
+
+def _overview(row) -> Dict:
+    values = row._mapping
+    return {
+        'employees': values['employees'],
+        'active_employees': values['active_employees'],
+        'tasks': values['tasks'],
+        'tasks_by_status': {status.value: values[f'status_{status.value}'] for status in TaskStatus},
+        'tasks_by_type': {task_type.value: values[f'type_{task_type.value}'] for task_type in TaskType},
+        'upcoming_tasks': values['upcoming'],
+        'unassigned_tasks': values['unassigned']
+    }
+
+
+class StatsCache:
+    """
+    Overview per key, dropped on invalidate() or after ttl seconds
+    
+    A load that started before an invalidation is not stored, so a query
+    racing with a commit can't bring back the old counts.
+    """
+    
+    def __init__(self, ttl: float = STATS_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, tuple] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    @property
+    def generation(self) -> int:
+        return self._generation
+    
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+            return None
+    
+    def put(self, key: Hashable, generation: int, value: Dict) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic(), value)
+    
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.stats['invalidations'] += 1
+
+
+stats_cache = StatsCache()
+
+
+def _cache_key(engine: Engine, today: datetime) -> tuple:
+    url = engine.url
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return id(engine), today.date()
+    # Sync and async engines of one database file/server share entries
+    return url.set(drivername=url.get_backend_name()).render_as_string(), today.date()
+
+
+def _today(now: datetime = None) -> datetime:
+    return (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def get_overview(db: Session, now: datetime = None) -> Dict:
+    """Counters for the day of now (upcoming = the next UPCOMING_DAYS days)"""
+    today = _today(now)
+    key = _cache_key(db.get_bind(), today)
+    overview = stats_cache.get(key)
+    if overview is None:
+        generation = stats_cache.generation
+        overview = _overview(db.execute(overview_statement(today)).one())
+        stats_cache.put(key, generation, overview)
+    return overview
+
+
+async def get_overview_async(db: AsyncSession, now: datetime = None) -> Dict:
+    """get_overview on an AsyncSession"""
+    today = _today(now)
+    key = _cache_key(db.bind.sync_engine, today)
+    overview = stats_cache.get(key)
+    if overview is None:
+        generation = stats_cache.generation
+        overview = _overview((await db.execute(overview_statement(today))).one())
+        stats_cache.put(key, generation, overview)
+    return overview
+
+
+_COUNTED = (Task, Employee)
+_COUNTED_TABLES = {model.__tablename__ for model in _COUNTED}
+
+
+@event.listens_for(Session, "after_flush")
+def _flushed_counted_rows(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _COUNTED):
+            session.info['stats_dirty'] = True
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _counted_dml(orm_execute_state):
+    # Set-based INSERT/UPDATE/DELETE skip the flush (e.g. the task archiver)
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) in _COUNTED_TABLES:
+            orm_execute_state.session.info['stats_dirty'] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_counted_rows(session):
+    if session.info.pop('stats_dirty', None):
+        stats_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _rollback_counted_rows(session):
+    session.info.pop('stats_dirty', None)
@@ -0,0 +1,177 @@
+"""
+Archival of old completed tasks into task_archive
+
+Old tasks are moved in chunks of ARCHIVE_CHUNK_SIZE. Each chunk is one
+short transaction: INSERT ... SELECT into task_archive and DELETE of the
+same rows, both set-based, so other writers get the write lock between
+chunks instead of waiting for the whole history to be processed.
+
+The job keeps no progress state of its own. A chunk moves completely or
+not at all and the rows left behind still match the filter, so an
+interrupted run is resumed by simply starting it again.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, func, insert, literal, select, tuple_
+from sqlalchemy.orm import Session
+
+from models.database import Task, TaskArchive, TaskStatus
+from services.task_index import BLOCKING_STATUSES
+from services.change_feed import log_deleted
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "500"))
+# Upper bound on archived rows per second, 0 = no throttling
+ARCHIVE_ROWS_PER_SECOND = float(os.getenv("ARCHIVE_ROWS_PER_SECOND", "0"))
+
+ARCHIVED_STATUSES = (TaskStatus.COMPLETED,)
+
+# Columns copied from tasks (task_archive.task_id <- tasks.id)
+ARCHIVE_COLUMNS = [
+    'title', 'description', 'task_type', 'status', 'start_time', 'end_time',
+    'estimated_hours', 'employee_id', 'location', 'priority', 'created_at'
+]
+
+
+def archive_cutoff(days: int = None, now: datetime = None) -> datetime:
+    """Tasks that ended before this moment are archived"""
+    return (now or datetime.now()) - timedelta(days=ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def archivable(cutoff: datetime, statuses: Sequence[TaskStatus] = ARCHIVED_STATUSES) -> List:
+    """WHERE clauses of tasks due for the archive"""
+    # start_time < cutoff is implied by end_time < cutoff, it lets the
+    # lookup range-scan ix_tasks_status_start_id
+    return [
+        Task.status.in_(statuses),
+        Task.start_time < cutoff,
+        Task.end_time < cutoff
+    ]
+
+
+class TaskArchiver:
+    """Moves old tasks to task_archive in bounded, rate-limited chunks"""
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        chunk_size: int = None,
+        rows_per_second: float = None,
+        statuses: Sequence[TaskStatus] = ARCHIVED_STATUSES
+    ):
+        # Archived tasks must not be in the conflict index, otherwise every
+        # chunk would have to invalidate it (bulk SQL bypasses flush events)
+        if set(statuses) & set(BLOCKING_STATUSES):
+            raise ValueError("Plánované a prebiehajúce úlohy sa nearchivujú")
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size or ARCHIVE_CHUNK_SIZE
+        self.rows_per_second = ARCHIVE_ROWS_PER_SECOND if rows_per_second is None else rows_per_second
+        self.statuses = list(statuses)
+    
+    def count(self, cutoff: datetime) -> int:
+        """Number of tasks waiting to be archived"""
+        db = self.session_factory()
+        try:
+            return db.scalar(select(func.count(Task.id)).where(*archivable(cutoff, self.statuses)))
+        finally:
+            db.close()
+    
+    def _move_chunk(self, db: Session, cutoff: datetime, after) -> Optional[tuple]:
+        """Move the next chunk after key (start_time, id); returns (moved, last key) or None when done"""
+        query = select(Task.id, Task.start_time).where(*archivable(cutoff, self.statuses))
+        if after is not None:
+            query = query.where(tuple_(Task.start_time, Task.id) > tuple_(*after))
+        
+        with db.begin():
+            keys = db.execute(query.order_by(Task.start_time, Task.id).limit(self.chunk_size)).all()
+            if not keys:
+                return None
+            
+            # The filter is repeated: on SQLite the write lock is only taken
+            # at the INSERT, a task changed after the lookup stays put
+            chunk = [Task.id.in_([task_id for task_id, _ in keys]), *archivable(cutoff, self.statuses)]
+            copied = db.execute(insert(TaskArchive).from_select(
+                ['task_id', *ARCHIVE_COLUMNS, 'archived_at'],
+                select(Task.id, *[getattr(Task, name) for name in ARCHIVE_COLUMNS], literal(datetime.utcnow()))
+                .where(*chunk)
+            )).rowcount
+            # Clients syncing GET /changes drop archived tasks like deleted ones
+            log_deleted(db, 'task', select(Task.id).where(*chunk))
+            deleted = db.execute(delete(Task).where(*chunk)).rowcount
+            if copied != deleted:
+                raise RuntimeError(f"Archív: skopírovaných {copied}, zmazaných {deleted} úloh")
+        return deleted, tuple(keys[-1])
+    
+    def archive(
+        self,
+        cutoff: datetime = None,
+        max_chunks: int = None,
+        progress: Callable[[Dict], None] = None
+    ) -> Dict:
+        """
+        Archive tasks that ended before cutoff (default ARCHIVE_AFTER_DAYS ago)
+        
+        Returns:
+            counts and timings of the run; progress(report) is called after every chunk
+        """
+        cutoff = cutoff or archive_cutoff()
+        report = {
+            'cutoff': cutoff.isoformat(),
+            'archived': 0,
+            'chunks': 0,
+            'seconds': 0.0,
+            'throttled_seconds': 0.0,
+            'max_chunk_ms': 0.0,
+            'avg_chunk_ms': 0.0
+        }
+        started = time.perf_counter()
+        chunk_seconds = 0.0
+        after = None
+        
+        db = self.session_factory()
+        try:
+            while max_chunks is None or report['chunks'] < max_chunks:
+                chunk_started = time.perf_counter()
+                moved = self._move_chunk(db, cutoff, after)
+                if moved is None:
+                    break
+                elapsed = time.perf_counter() - chunk_started
+                count, after = moved
+                
+                chunk_seconds += elapsed
+                report['archived'] += count
+                report['chunks'] += 1
+                report['max_chunk_ms'] = max(report['max_chunk_ms'], elapsed * 1000)
+                report['avg_chunk_ms'] = chunk_seconds * 1000 / report['chunks']
+                report['seconds'] = time.perf_counter() - started
+                if progress:
+                    progress(dict(report))
+                
+                if self.rows_per_second > 0:
+                    wait = report['archived'] / self.rows_per_second - (time.perf_counter() - started)
+                    if wait > 0:
+                        time.sleep(wait)
+                        report['throttled_seconds'] += wait
+        finally:
+            db.close()
+        
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+
+def archive_stats(db: Session, cutoff: datetime = None) -> Dict:
+    """Size of the archive and how many tasks are waiting for it"""
+    cutoff = cutoff or archive_cutoff()
+    archived, last_archived_at = db.execute(
+        select(func.count(TaskArchive.id), func.max(TaskArchive.archived_at))
+    ).one()
+    pending = db.scalar(select(func.count(Task.id)).where(*archivable(cutoff)))
+    return {
+        'archived_tasks': archived,
+        'last_archived_at': last_archived_at,
+        'pending': pending,
+        'cutoff': cutoff
+    }
@@ -0,0 +1,362 @@
+"""
+In-memory interval index of assigned tasks for local conflict detection
+
+Google Calendar only knows about employees with a linked calendar, so two
+tasks could be booked for the same employee without anyone noticing. Each
+employee gets an interval tree (AVL tree ordered by start, every node
+augmented with the max end of its subtree) built once from the tasks table
+and kept current from session flush events. Overlap checks and next-gap
+lookups are O(log n) plus the number of reported intervals.
+
+Changes are applied on flush, before commit. A check followed by a flush
+is not atomic on its own: two requests can both find a slot free before
+either flushes. Creating a task therefore reserve()s its interval, which
+checks and inserts under the index lock, and releases the reservation once
+the flushed task holds the interval (or the flush failed). Reservations
+have negative ids. A rolled-back transaction drops the index, which is
+rebuilt on next use. Bulk SQL that bypasses the ORM unit of work must call
+invalidate_task_index.
+"""
+import itertools
+import threading
+import weakref
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.database import Task, TaskStatus
+
+# Tasks that occupy their employee (same as the scheduler's weekly hours)
+BLOCKING_STATUSES = (TaskStatus.PLANNED, TaskStatus.IN_PROGRESS)
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'task_id', 'left', 'right', 'height', 'max_end')
+    
+    def __init__(self, start: datetime, end: datetime, task_id: int):
+        self.start = start
+        self.end = end
+        self.task_id = task_id
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.max_end = end
+    
+    @property
+    def key(self) -> Tuple[datetime, int]:
+        return (self.start, self.task_id)
+
+
+def _height(node: Optional[_Node]) -> int:
+    return node.height if node else 0
+
+
+def _update(node: _Node) -> None:
+    node.height = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = node.end
+    if node.left and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+
+
+def _rotate_right(node: _Node) -> _Node:
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _rotate_left(node: _Node) -> _Node:
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _update(node)
+    _update(pivot)
+    return pivot
+
+
+def _balance(node: _Node) -> _Node:
+    _update(node)
+    skew = _height(node.left) - _height(node.right)
+    if skew > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if skew < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    """Half-open [start, end) intervals keyed by task id"""
+    
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.size = 0
+    
+    def insert(self, start: datetime, end: datetime, task_id: int) -> None:
+        self.root = self._insert(self.root, _Node(start, end, task_id))
+        self.size += 1
+    
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        return _balance(node)
+    
+    def remove(self, start: datetime, task_id: int) -> None:
+        self.root = self._remove(self.root, (start, task_id))
+        self.size -= 1
+    
+    def _remove(self, node: Optional[_Node], key: Tuple[datetime, int]) -> Optional[_Node]:
+        if node is None:
+            raise KeyError(key)
+        if key < node.key:
+            node.left = self._remove(node.left, key)
+        elif key > node.key:
+            node.right = self._remove(node.right, key)
+        else:
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            successor = node.right
+            while successor.left:
+                successor = successor.left
+            node.right = self._remove(node.right, successor.key)
+            node.start, node.end, node.task_id = successor.start, successor.end, successor.task_id
+        return _balance(node)
+    
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, int]]:
+        """Intervals overlapping [start, end), ordered by start"""
+        result = []
+        self._collect(self.root, start, end, result, limit=None)
+        return result
+    
+    def first_overlap(self, start: datetime, end: datetime) -> Optional[Tuple[datetime, datetime, int]]:
+        """Earliest-starting interval overlapping [start, end), if any"""
+        result = []
+        self._collect(self.root, start, end, result, limit=1)
+        return result[0] if result else None
+    
+    def _collect(self, node: Optional[_Node], start: datetime, end: datetime, result: List, limit: Optional[int]) -> None:
+        # Subtrees ending before start, or starting after end, are skipped
+        if node is None or node.max_end <= start or (limit and len(result) >= limit):
+            return
+        self._collect(node.left, start, end, result, limit)
+        if limit and len(result) >= limit:
+            return
+        if node.start < end:
+            if node.end > start:
+                result.append((node.start, node.end, node.task_id))
+            self._collect(node.right, start, end, result, limit)
+    
+    def next_free_gap(self, after: datetime, duration: timedelta, until: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        Earliest start >= after where [start, start + duration) is free
+        
+        Each step jumps past the latest end among the blocking intervals,
+        so the number of steps is bounded by the busy clusters crossed.
+        """
+        candidate = after
+        while until is None or candidate + duration <= until:
+            blocking = self.overlapping(candidate, candidate + duration)
+            if not blocking:
+                return candidate
+            candidate = max(end for _, end, _ in blocking)
+        return None
+    
+    def __iter__(self) -> Iterator[Tuple[datetime, datetime, int]]:
+        stack, node = [], self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.start, node.end, node.task_id)
+            node = node.right
+    
+    def __len__(self) -> int:
+        return self.size
+
+
+class TaskIndex:
+    """Interval trees of blocking tasks, one per employee"""
+    
+    def __init__(self):
+        self._trees: Dict[int, IntervalTree] = {}
+        self._entries: Dict[int, Tuple[int, datetime, datetime]] = {}  # task_id -> (employee_id, start, end)
+        self._lock = threading.RLock()
+        self._reservation_ids = itertools.count(-1, -1)
+    
+    @classmethod
+    def build(cls, db: Session) -> "TaskIndex":
+        index = cls()
+        rows = db.query(Task.id, Task.employee_id, Task.start_time, Task.end_time).filter(
+            Task.employee_id != None,
+            Task.status.in_(BLOCKING_STATUSES)
+        ).all()
+        for task_id, employee_id, start, end in rows:
+            index._add(task_id, employee_id, start, end)
+        return index
+    
+    def _add(self, task_id: int, employee_id: int, start: datetime, end: datetime) -> None:
+        self._trees.setdefault(employee_id, IntervalTree()).insert(start, end, task_id)
+        self._entries[task_id] = (employee_id, start, end)
+    
+    def discard(self, task_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            if entry is not None:
+                employee_id, start, _ = entry
+                self._trees[employee_id].remove(start, task_id)
+    
+    def apply(self, task_id: int, employee_id: Optional[int], start: datetime, end: datetime, status) -> None:
+        """Reflect the current state of one task"""
+        with self._lock:
+            self.discard(task_id)
+            if employee_id is not None and start and end and (status is None or status in BLOCKING_STATUSES):
+                self._add(task_id, employee_id, start, end)
+    
+    def reserve(self, employee_id: int, start: datetime, end: datetime) -> Optional[int]:
+        """Hold [start, end) for a task about to be flushed; None if it is taken"""
+        with self._lock:
+            if not self.is_free(employee_id, start, end):
+                return None
+            reservation_id = next(self._reservation_ids)
+            self._add(reservation_id, employee_id, start, end)
+            return reservation_id
+    
+    def release(self, reservation_id: int) -> None:
+        self.discard(reservation_id)
+    
+    def conflicts(
+        self,
+        employee_id: int,
+        start: datetime,
+        end: datetime,
+        exclude_task_id: Optional[int] = None
+    ) -> List[int]:
+        """Ids of the employee's tasks overlapping [start, end)"""
+        with self._lock:
+            tree = self._trees.get(employee_id)
+            if tree is None:
+                return []
+            return [task_id for _, _, task_id in tree.overlapping(start, end) if task_id != exclude_task_id]
+    
+    def is_free(self, employee_id: int, start: datetime, end: datetime) -> bool:
+        with self._lock:
+            tree = self._trees.get(employee_id)
+            return tree is None or tree.first_overlap(start, end) is None
+    
+    def next_free_gap(
+        self,
+        employee_id: int,
+        after: datetime,
+        duration_hours: float,
+        until: Optional[datetime] = None
+    ) -> Optional[datetime]:
+        """Earliest start >= after with duration_hours free for the employee"""
+        with self._lock:
+            tree = self._trees.get(employee_id)
+            if tree is None:
+                return after
+            return tree.next_free_gap(after, timedelta(hours=duration_hours), until)
+    
+    def overlaps(self, employee_id: Optional[int] = None) -> List[Dict]:
+        """All pairs of overlapping tasks, per employee in start order"""
+        with self._lock:
+            result = []
+            for tree_employee_id, tree in sorted(self._trees.items()):
+                if employee_id is not None and tree_employee_id != employee_id:
+                    continue
+                active = []  # (end, task_id) of intervals still open
+                for start, end, task_id in tree:
+                    if task_id < 0:
+                        continue  # reservation, its task is flushed or about to be
+                    active = [(other_end, other_id) for other_end, other_id in active if other_end > start]
+                    for other_end, other_id in active:
+                        result.append({
+                            'employee_id': tree_employee_id,
+                            'task_id': other_id,
+                            'conflicting_task_id': task_id,
+                            'overlap_start': start,
+                            'overlap_end': min(end, other_end)
+                        })
+                    active.append((end, task_id))
+            return result
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Indexes per engine, built on first use
+_indexes = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_task_index(db: Session) -> TaskIndex:
+    """Task index for the session's database"""
+    bind = db.get_bind()
+    with _indexes_lock:
+        index = _indexes.get(bind)
+    if index is None:
+        index = TaskIndex.build(db)
+        with _indexes_lock:
+            index = _indexes.setdefault(bind, index)
+    return index
+
+
+def invalidate_task_index(bind=None) -> None:
+    """Drop the index of one engine (or all), e.g. after bulk SQL changes"""
+    with _indexes_lock:
+        if bind is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(bind, None)
+
+
+def _session_bind(session: Session):
+    try:
+        return session.get_bind()
+    except Exception:
+        return None
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_flushed_tasks(session, flush_context):
+    index = _indexes.get(_session_bind(session))
+    if index is None:
+        return
+    changed = False
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Task) and obj.id is not None:
+            index.apply(obj.id, obj.employee_id, obj.start_time, obj.end_time, obj.status)
+            changed = True
+    for obj in session.deleted:
+        if isinstance(obj, Task) and obj.id is not None:
+            index.discard(obj.id)
+            changed = True
+    if changed:
+        session.info['task_index_dirty'] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_tasks(session):
+    session.info.pop('task_index_dirty', None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _rollback_tasks(session):
+    if session.info.pop('task_index_dirty', None):
+        invalidate_task_index(_session_bind(session))
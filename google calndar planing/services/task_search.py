@@ -0,0 +1,183 @@
+"""
+Full-text search over task titles, descriptions and locations
+
+On SQLite the FTS5 tables tasks_fts and task_archive_fts (revision 0005)
+index tasks and archived tasks and are kept current by triggers, also for
+the archiver's set-based moves. Case and diacritics are folded, so
+"kosice" finds "Košice", and every word of the query is a prefix ("nov"
+finds "Novák"); "quoted words" are matched as a phrase.
+
+Hits are ordered by bm25 (title above location above description, weights
+set in the migration) inside FTS5, which builds the highlighted title and
+snippet only for the rows returned. Scoring still visits every match, so a
+query matching more than RANK_MAX_MATCHES rows of an index ("bratislava",
+"ko") returns its newest matches instead, read backwards by rowid.
+
+Other databases, or a SQLite file without the index, fall back to ILIKE:
+same filters, no ranking, no highlighting.
+"""
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+
+from models.database import Task, TaskArchive, TaskStatus
+
+SEARCH_MAX_LIMIT = 100
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+SNIPPET_TOKENS = 12
+# Above this many matches bm25 of every match costs more than the order is
+# worth; such broad queries list the newest matches instead
+RANK_MAX_MATCHES = 5000
+
+# Searchable model and its FTS5 index
+SOURCES = [(Task, 'tasks_fts', False), (TaskArchive, 'task_archive_fts', True)]
+
+_TERM = re.compile(r'"([^"]*)"|(\w+)')
+
+
+def search_words(text: str) -> List[str]:
+    return re.findall(r'\w+', text)
+
+
+def fts_query(text: str) -> str:
+    """FTS5 MATCH expression of free text: all words required, each as a prefix"""
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        if word:
+            # One letter as a prefix would walk the whole vocabulary
+            terms.append(f'"{word}"*' if len(word) > 1 else f'"{word}"')
+        elif search_words(phrase):
+            terms.append('"' + ' '.join(search_words(phrase)) + '"')
+    if not terms:
+        raise ValueError("Zadajte aspoň jedno slovo na vyhľadanie")
+    return ' '.join(terms)
+
+
+def has_search_index(db: Session) -> bool:
+    if db.get_bind().dialect.name != 'sqlite':
+        return False
+    return db.execute(
+        select(literal_column('name')).select_from(table('sqlite_master'))
+        .where(literal_column('type') == 'table', literal_column('name') == 'tasks_fts')
+    ).first() is not None
+
+
+def _filters(
+    model,
+    status: Optional[TaskStatus],
+    employee_id: Optional[int],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> List:
+    filters = []
+    if status:
+        filters.append(model.status == status)
+    if employee_id:
+        filters.append(model.employee_id == employee_id)
+    if start_date:
+        filters.append(model.start_time >= start_date)
+    if end_date:
+        filters.append(model.start_time <= end_date)
+    return filters
+
+
+def _hit(row, archived: bool, rank=None, title_highlight=None, snippet=None) -> Dict:
+    return {
+        'id': row.task_id if archived else row.id,
+        'archived': archived,
+        'title': row.title,
+        'location': row.location,
+        'start_time': row.start_time,
+        'end_time': row.end_time,
+        'status': row.status,
+        'task_type': row.task_type,
+        'employee_id': row.employee_id,
+        'rank': rank,
+        'title_highlight': title_highlight,
+        'snippet': snippet
+    }
+
+
+def _ranked(db: Session, model, index: str, archived: bool, match: str, filters: Dict, count: int):
+    """Best count hits of one index with highlighted title and snippet, and whether they are ranked"""
+    fts = table(index, column('rowid'), column('rank'))
+    index_ref = literal_column(index)
+    matches = db.scalar(select(func.count()).select_from(fts).where(index_ref.op('MATCH')(match)))
+    # ORDER BY rank LIMIT is done inside FTS5: highlight() and snippet()
+    # only run for the rows returned, not for every match
+    ranked = matches <= RANK_MAX_MATCHES
+    order = fts.c.rank if ranked else fts.c.rowid.desc()
+    statement = (
+        select(
+            model,
+            fts.c.rank,
+            func.highlight(index_ref, 0, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE),
+            func.snippet(index_ref, -1, HIGHLIGHT_OPEN, HIGHLIGHT_CLOSE, '…', SNIPPET_TOKENS)
+        )
+        .join_from(fts, model, model.id == fts.c.rowid)
+        .where(index_ref.op('MATCH')(match), *_filters(model, **filters))
+        .order_by(order)
+        .limit(count)
+    )
+    return [_hit(row, archived, rank, title, snippet) for row, rank, title, snippet in db.execute(statement)], ranked
+
+
+def _search_like(db: Session, text: str, filters: Dict, sources, limit: int, offset: int) -> List[Dict]:
+    hits = []
+    for model, _, archived in sources:
+        words = [
+            or_(*[getattr(model, name).ilike(f"%{word}%") for name in ('title', 'description', 'location')])
+            for word in search_words(text)
+        ]
+        rows = db.execute(
+            select(model).where(and_(*words), *_filters(model, **filters))
+            .order_by(model.start_time.desc(), model.id.desc()).limit(limit + offset)
+        ).scalars().all()
+        hits += [_hit(row, archived) for row in rows]
+    hits.sort(key=lambda hit: hit['start_time'], reverse=True)
+    return hits[offset:offset + limit]
+
+
+def search_tasks(
+    db: Session,
+    text: str,
+    limit: int = 20,
+    offset: int = 0,
+    include_archived: bool = True,
+    status: Optional[TaskStatus] = None,
+    employee_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> Dict:
+    """
+    Tasks (and archived tasks) matching text, best first
+    
+    Returns:
+        query, whether the FTS index was used, and the hits with rank,
+        highlighted title and a snippet of the best matching column
+    """
+    match = fts_query(text)
+    limit = min(limit, SEARCH_MAX_LIMIT)
+    filters = {'status': status, 'employee_id': employee_id, 'start_date': start_date, 'end_date': end_date}
+    sources = SOURCES if include_archived else SOURCES[:1]
+    
+    if not has_search_index(db):
+        return {'query': text, 'indexed': False, 'items': _search_like(db, text, filters, sources, limit, offset)}
+    
+    # Each index returns its best hits in rank order, merged here; bm25 of
+    # the two indexes is comparable enough for one list
+    items, all_ranked = [], True
+    for model, index, archived in sources:
+        hits, ranked = _ranked(db, model, index, archived, match, filters, offset + limit)
+        items += hits
+        all_ranked = all_ranked and ranked
+    if all_ranked:
+        items.sort(key=lambda hit: hit['rank'])
+    else:
+        items.sort(key=lambda hit: hit['id'], reverse=True)
+    items = items[offset:offset + limit]
+    return {'query': text, 'indexed': True, 'items': items}
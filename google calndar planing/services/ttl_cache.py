@@ -0,0 +1,158 @@
+"""
+In-process TTL cache with stale-while-revalidate and single-flight loading
+
+An entry is fresh for `ttl` seconds. After that it may still be served for
+`stale_ttl` more seconds while one background refresh reloads it. Concurrent
+misses for the same key wait on a single in-flight load instead of each
+calling the upstream API.
+"""
+import time
+import threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Entry:
+    __slots__ = ('value', 'loaded_at', 'refreshing')
+    
+    def __init__(self, value: Any, loaded_at: float):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.refreshing = False
+
+
+class _InFlight:
+    __slots__ = ('done', 'value', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Thread-safe cache of loader results keyed by any hashable key
+    
+    refresh_executor is a callable returning the executor used for
+    background refreshes (e.g. lambda: get_executor('weather')).
+    """
+    
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float = 0,
+        refresh_executor: Optional[Callable[[], Executor]] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_executor = refresh_executor
+        self.clock = clock
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0,
+            'loads': 0, 'refreshes': 0, 'errors': 0
+        }
+    
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, loading it with loader() if needed
+        
+        Loader exceptions propagate to callers waiting on that load; failed
+        loads are not cached and a failed background refresh keeps serving
+        the stale value until it expires.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = self.clock() - entry.loaded_at
+                if age < self.ttl:
+                    self.stats['hits'] += 1
+                    return entry.value
+                if age < self.ttl + self.stale_ttl:
+                    self.stats['stale_hits'] += 1
+                    if not entry.refreshing:
+                        entry.refreshing = True
+                        self._schedule_refresh(key, loader)
+                    return entry.value
+            
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.stats['coalesced'] += 1
+                owner = False
+            else:
+                self.stats['misses'] += 1
+                flight = self._in_flight[key] = _InFlight()
+                owner = True
+        
+        if not owner:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = self._load(key, loader)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
+    
+    def _load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        with self._lock:
+            self.stats['loads'] += 1
+            self._entries[key] = _Entry(value, self.clock())
+        return value
+    
+    def _schedule_refresh(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """Reload a stale entry in the background (called with the lock held)"""
+        def refresh():
+            try:
+                self._load(key, loader)
+                with self._lock:
+                    self.stats['refreshes'] += 1
+            except Exception:
+                pass  # Keep serving the stale value
+            finally:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.refreshing = False
+        
+        if self.refresh_executor is not None:
+            try:
+                self.refresh_executor().submit(refresh)
+                return
+            except RuntimeError:
+                pass  # Pool already shut down
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def get_stats(self) -> Dict:
+        """Counters plus hit ratio and current size"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+        served = stats['hits'] + stats['stale_hits'] + stats['misses'] + stats['coalesced']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / served, 3) if served else None
+        return stats
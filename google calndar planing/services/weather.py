@@ -4,9 +4,12 @@ Weather API integration for planning decisions
 import os
 import requests
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+from services.executor import bounded, get_executor
+from services.ttl_cache import TTLCache
+
 load_dotenv()
 
 
@@ -20,48 +23,89 @@ class WeatherService:
         
         if not self.api_key:
             raise ValueError("WEATHER_API_KEY not found in environment variables")
+        
+        self.timeout = float(os.getenv("WEATHER_TIMEOUT", "10"))
+        stale_ttl = float(os.getenv("WEATHER_CACHE_STALE_TTL", "3600"))
+        self.current_cache = TTLCache(
+            ttl=float(os.getenv("WEATHER_CACHE_TTL", "600")),
+            stale_ttl=stale_ttl,
+            refresh_executor=lambda: get_executor('weather')
+        )
+        self.forecast_cache = TTLCache(
+            ttl=float(os.getenv("WEATHER_FORECAST_CACHE_TTL", "1800")),
+            stale_ttl=stale_ttl,
+            refresh_executor=lambda: get_executor('weather')
+        )
     
-    def get_current_weather(self) -> Dict:
-        """Get current weather conditions"""
+    def get_current_weather(self, location: str = None) -> Dict:
+        """Get current weather conditions (cached per location)"""
+        location = location or self.location
         try:
-            url = f"{self.base_url}/weather"
-            params = {
-                'q': self.location,
-                'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'sk'
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            return self._parse_current_weather(data)
-            
+            current = self.current_cache.get(location, lambda: self._fetch_current_weather(location))
+            return dict(current)
         except requests.RequestException as e:
             print(f"Error fetching current weather: {e}")
             return self._get_default_weather()
     
-    def get_forecast(self, days: int = 7) -> List[Dict]:
-        """Get weather forecast for upcoming days"""
+    def get_forecast(self, days: int = 7, location: str = None) -> List[Dict]:
+        """Get weather forecast for upcoming days (one noon sample per day)"""
+        grid = self.get_forecast_grid(location)
+        if not grid:
+            return []
+        return self._pick_daily(grid['samples'], days)
+    
+    def get_forecast_grid(self, location: str = None) -> Optional[Dict]:
+        """
+        Get the full 3-hour forecast grid (cached per location)
+        
+        Returns:
+            {'location', 'fetched_at', 'samples': [...]} or None if the API failed
+        """
+        location = location or self.location
         try:
-            url = f"{self.base_url}/forecast"
-            params = {
-                'q': self.location,
-                'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'sk'
-            }
-            
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
-            return self._parse_forecast(data, days)
-            
+            return self.forecast_cache.get(location, lambda: self._fetch_forecast(location))
         except requests.RequestException as e:
             print(f"Error fetching forecast: {e}")
-            return []
+            return None
+    
+    def get_cache_stats(self) -> Dict:
+        """Hit/miss counters of the weather caches"""
+        return {
+            'current': self.current_cache.get_stats(),
+            'forecast': self.forecast_cache.get_stats()
+        }
+    
+    @bounded('weather')
+    def _fetch_current_weather(self, location: str) -> Dict:
+        url = f"{self.base_url}/weather"
+        params = {
+            'q': location,
+            'appid': self.api_key,
+            'units': 'metric',
+            'lang': 'sk'
+        }
+        
+        response = requests.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return self._parse_current_weather(response.json())
+    
+    @bounded('weather')
+    def _fetch_forecast(self, location: str) -> Dict:
+        url = f"{self.base_url}/forecast"
+        params = {
+            'q': location,
+            'appid': self.api_key,
+            'units': 'metric',
+            'lang': 'sk'
+        }
+        
+        response = requests.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return {
+            'location': location,
+            'fetched_at': datetime.utcnow(),
+            'samples': self._parse_forecast_grid(response.json())
+        }
     
     def _parse_current_weather(self, data: Dict) -> Dict:
         """Parse current weather data"""
@@ -87,39 +131,44 @@ class WeatherService:
             'wind_speed': data.get('wind', {}).get('speed', 0)
         }
     
-    def _parse_forecast(self, data: Dict, days: int) -> List[Dict]:
-        """Parse forecast data"""
+    def _parse_forecast_grid(self, data: Dict) -> List[Dict]:
+        """Parse every 3-hour forecast sample"""
+        samples = []
+        
+        for item in data['list']:
+            weather = item['weather'][0]
+            main = item['main']
+            
+            condition = weather['main'].lower()
+            temperature = main['temp']
+            rain = item.get('rain', {}).get('3h', 0)
+            
+            samples.append({
+                'date': datetime.fromtimestamp(item['dt']),
+                'condition': condition,
+                'temperature': temperature,
+                'description': weather['description'],
+                'suitable_for_installation': self._is_suitable_for_installation(condition, temperature, rain),
+                'rain_mm': rain,
+                'humidity': main.get('humidity', 0),
+                'wind_speed': item.get('wind', {}).get('speed', 0)
+            })
+        
+        return samples
+    
+    def _pick_daily(self, samples: List[Dict], days: int) -> List[Dict]:
+        """One forecast per day (around noon)"""
         forecasts = []
         processed_dates = set()
         
-        for item in data['list']:
-            dt = datetime.fromtimestamp(item['dt'])
+        for sample in samples:
+            dt = sample['date']
             date_key = dt.date()
             
-            # Get one forecast per day (around noon)
             if date_key not in processed_dates and dt.hour >= 11 and dt.hour <= 14:
-                weather = item['weather'][0]
-                main = item['main']
-                
-                condition = weather['main'].lower()
-                temperature = main['temp']
-                description = weather['description']
-                
-                suitable_for_installation = self._is_suitable_for_installation(
-                    condition,
-                    temperature,
-                    item.get('rain', {}).get('3h', 0)
-                )
-                
-                forecasts.append({
-                    'date': dt,
-                    'condition': condition,
-                    'temperature': temperature,
-                    'description': description,
-                    'suitable_for_installation': suitable_for_installation,
-                    'humidity': main.get('humidity', 0),
-                    'wind_speed': item.get('wind', {}).get('speed', 0)
-                })
+                forecast = dict(sample)
+                forecast.pop('rain_mm', None)
+                forecasts.append(forecast)
                 
                 processed_dates.add(date_key)
                 
@@ -169,61 +218,6 @@ class WeatherService:
             'humidity': 50,
             'wind_speed': 0
         }
-    
-    def find_suitable_installation_days(
-        self,
-        start_date: datetime,
-        days_needed: int,
-        min_temp: float = 5.0
-    ) -> List[Tuple[datetime, Dict]]:
-        """
-        Find days suitable for installation within forecast period
-        
-        Args:
-            start_date: Starting date for search
-            days_needed: Number of suitable days needed
-            min_temp: Minimum acceptable temperature
-        
-        Returns:
-            List of tuples (date, weather_data) for suitable days
-        """
-        forecast = self.get_forecast(days=14)
-        suitable_days = []
-        
-        for day_forecast in forecast:
-            if day_forecast['date'] >= start_date:
-                if (day_forecast['suitable_for_installation'] and 
-                    day_forecast['temperature'] >= min_temp):
-                    suitable_days.append((day_forecast['date'], day_forecast))
-                    
-                    if len(suitable_days) >= days_needed:
-                        break
-        
-        return suitable_days
-    
-    def get_recommendation(self, date: datetime = None) -> str:
-        """
-        Get work recommendation based on weather
-        
-        Returns: 'installation' or 'production'
-        """
-        if date is None or date.date() == datetime.now().date():
-            weather = self.get_current_weather()
-        else:
-            forecast = self.get_forecast(days=14)
-            weather = None
-            for day in forecast:
-                if day['date'].date() == date.date():
-                    weather = day
-                    break
-            
-            if not weather:
-                return 'production'  # Default to production if no data
-        
-        if weather['suitable_for_installation']:
-            return 'installation'
-        else:
-            return 'production'
 
 
 # Singleton instance
@@ -0,0 +1,329 @@
+"""
+Weather store: forecast grid persisted in weather_logs
+
+Every fetched 3-hour forecast grid is upserted into weather_logs keyed by
+(location, date). Recommendations and suitable-day searches read the stored
+grid with indexed range queries, so task creation does not wait on the
+weather API, and the table doubles as history for later analysis.
+
+A grid is written in the caller's transaction and only flushed: the owner
+of the session commits it along with its own work (or rolls both back), so
+a lookup in the middle of a bulk import never commits half of the import.
+"""
+import weakref
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+from sqlalchemy import event, func
+
+from models.database import WeatherLog
+from services.weather import get_weather_service
+from services.weather_windows import grid_from_rows, find_windows, hourly_suitability, STEP_HOURS
+
+# Local hours whose samples decide whether a day suits outdoor installation
+WORK_DAY_START_HOUR = 7
+WORK_DAY_END_HOUR = 18
+
+# engine -> {location: fetched_at} of the last grid committed by this process
+_persisted = weakref.WeakKeyDictionary()
+
+_GRID_COLUMNS = (
+    'condition', 'temperature', 'description', 'suitable_for_installation',
+    'rain_mm', 'humidity', 'wind_speed'
+)
+
+
+def _upsert_statement(dialect_name: str):
+    """Dialect-specific INSERT supporting ON CONFLICT, None if unsupported"""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+
+@event.listens_for(Session, "after_commit")
+def _commit_grids(session):
+    for (bind, location), fetched_at in session.info.pop('weather_grids', {}).items():
+        _persisted.setdefault(bind, {})[location] = fetched_at
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_grids(session, transaction):
+    # Rolled back or closed without commit: the grid has to be written again
+    if transaction.parent is None:
+        session.info.pop('weather_grids', None)
+
+
+class WeatherStore:
+    """Forecast grid stored in the planner DB"""
+    
+    def __init__(self, db: Session, weather_service=None, location: Optional[str] = None):
+        self.db = db
+        self._weather_service = weather_service
+        self._location = location
+    
+    @property
+    def weather_service(self):
+        if self._weather_service is None:
+            self._weather_service = get_weather_service()
+        return self._weather_service
+    
+    @property
+    def location(self) -> str:
+        return self._location or self.weather_service.location
+    
+    def save_grid(self, location: str, samples: List[Dict], fetched_at: Optional[datetime] = None) -> int:
+        """
+        Bulk upsert forecast samples on (location, date), flushed but not committed
+        
+        Returns:
+            Number of samples written
+        """
+        if not samples:
+            return 0
+        fetched_at = fetched_at or datetime.utcnow()
+        rows = [
+            {
+                'location': location,
+                'date': sample['date'],
+                'fetched_at': fetched_at,
+                'created_at': fetched_at,
+                **{column: sample.get(column) for column in _GRID_COLUMNS}
+            }
+            for sample in samples
+        ]
+        
+        insert = _upsert_statement(self.db.get_bind().dialect.name)
+        if insert is not None:
+            statement = insert(WeatherLog).values(rows)
+            statement = statement.on_conflict_do_update(
+                index_elements=['location', 'date'],
+                set_={
+                    column: getattr(statement.excluded, column)
+                    for column in _GRID_COLUMNS + ('fetched_at',)
+                }
+            )
+            self.db.execute(statement)
+        else:
+            existing = {
+                log.date: log for log in self.db.query(WeatherLog).filter(
+                    WeatherLog.location == location,
+                    WeatherLog.date.in_([row['date'] for row in rows])
+                )
+            }
+            for row in rows:
+                log = existing.get(row['date'])
+                if log is None:
+                    self.db.add(WeatherLog(**row))
+                else:
+                    for column in _GRID_COLUMNS + ('fetched_at',):
+                        setattr(log, column, row[column])
+        
+        self.db.flush()
+        return len(rows)
+    
+    def ensure_fresh(self, location: Optional[str] = None) -> bool:
+        """
+        Persist the current forecast grid if it is newer than the stored one
+        
+        The grid comes from the WeatherService cache, so this only reaches
+        the network on a cold cache.
+        
+        Returns:
+            True if new samples were written (committed with the session)
+        """
+        location = location or self.location
+        grid = self.weather_service.get_forecast_grid(location)
+        if not grid:
+            return False
+        
+        bind = self.db.get_bind()
+        pending = self.db.info.setdefault('weather_grids', {})
+        persisted = _persisted.setdefault(bind, {})
+        if (bind, location) in pending:
+            last = pending[(bind, location)]
+        else:
+            if location not in persisted:
+                persisted[location] = self.db.query(func.max(WeatherLog.fetched_at)).filter(
+                    WeatherLog.location == location
+                ).scalar()
+            last = persisted[location]
+        if last is not None and grid['fetched_at'] <= last:
+            return False
+        
+        self.save_grid(location, grid['samples'], grid['fetched_at'])
+        pending[(bind, location)] = grid['fetched_at']
+        return True
+    
+    def get_samples(self, start: datetime, end: datetime, location: Optional[str] = None) -> List[WeatherLog]:
+        """Stored samples in [start, end) ordered by time (uses the (location, date) index)"""
+        return self.db.query(WeatherLog).filter(
+            WeatherLog.location == (location or self.location),
+            WeatherLog.date >= start,
+            WeatherLog.date < end
+        ).order_by(WeatherLog.date).all()
+    
+    def _work_day_samples(self, samples: List[WeatherLog]) -> Dict:
+        """Group samples by day, keeping the ones inside working hours"""
+        days = {}
+        for sample in samples:
+            if WORK_DAY_START_HOUR <= sample.date.hour <= WORK_DAY_END_HOUR:
+                days.setdefault(sample.date.date(), []).append(sample)
+        return days
+    
+    def _summarize_day(self, samples: List[WeatherLog]) -> Dict:
+        """Day verdict: suitable only if every working-hour sample is suitable"""
+        noon = min(samples, key=lambda s: abs(s.date.hour - 12))
+        return {
+            'date': noon.date,
+            'condition': noon.condition,
+            'temperature': noon.temperature,
+            'min_temperature': min((s.temperature for s in samples if s.temperature is not None), default=None),
+            'description': noon.description,
+            'suitable_for_installation': all(s.suitable_for_installation for s in samples),
+            'humidity': noon.humidity,
+            'wind_speed': noon.wind_speed,
+            'samples': len(samples)
+        }
+    
+    def get_recommendation(self, date: datetime = None) -> str:
+        """
+        Get work recommendation based on the stored forecast grid
+        
+        Returns: 'installation' or 'production'
+        """
+        if date is None:
+            date = datetime.now()
+        self.ensure_fresh()
+        
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        samples = self._work_day_samples(
+            self.get_samples(day_start, day_start + timedelta(days=1))
+        ).get(day_start.date())
+        
+        if not samples:
+            if date.date() == datetime.now().date():
+                # Working hours already past the forecast grid, use current conditions
+                weather = self.weather_service.get_current_weather(self.location)
+                return 'installation' if weather['suitable_for_installation'] else 'production'
+            return 'production'  # Default to production if no data
+        
+        if self._summarize_day(samples)['suitable_for_installation']:
+            return 'installation'
+        else:
+            return 'production'
+    
+    def find_suitable_installation_days(
+        self,
+        start_date: datetime,
+        days_needed: int,
+        min_temp: float = 5.0,
+        days_to_search: int = 14
+    ) -> List[Tuple[datetime, Dict]]:
+        """
+        Find days suitable for installation within the stored forecast
+        
+        Args:
+            start_date: Starting date for search
+            days_needed: Number of suitable days needed
+            min_temp: Minimum acceptable temperature during working hours
+        
+        Returns:
+            List of tuples (date, weather_data) for suitable days
+        """
+        self.ensure_fresh()
+        
+        day_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = self._work_day_samples(
+            self.get_samples(day_start, day_start + timedelta(days=days_to_search))
+        )
+        
+        suitable_days = []
+        for day in sorted(days):
+            summary = self._summarize_day(days[day])
+            if summary['date'] < start_date:
+                continue
+            if summary['suitable_for_installation'] and (summary['min_temperature'] or 0) >= min_temp:
+                suitable_days.append((summary['date'], summary))
+                
+                if len(suitable_days) >= days_needed:
+                    break
+        
+        return suitable_days
+    
+    def find_installation_windows(
+        self,
+        start_date: datetime,
+        min_hours: float = 1,
+        min_temp: float = 5.0,
+        days_to_search: int = 5,
+        locations: Optional[List[str]] = None,
+        working_hours_start: int = 8,
+        working_hours_end: int = 17
+    ) -> Dict[str, List[Dict]]:
+        """
+        Contiguous working-hour windows suitable for installation
+        
+        Scores every stored 3-hour step of the given locations in one
+        vectorized pass (see services.weather_windows).
+        
+        Returns:
+            location -> [{'start', 'end', 'hours', 'min_temperature', 'max_rain_mm'}]
+        """
+        locations = locations or [self.location]
+        for location in locations:
+            self.ensure_fresh(location)
+        
+        day_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        rows = self.db.query(
+            WeatherLog.location, WeatherLog.date, WeatherLog.temperature,
+            WeatherLog.rain_mm, WeatherLog.wind_speed, WeatherLog.condition
+        ).filter(
+            WeatherLog.location.in_(locations),
+            WeatherLog.date >= day_start,
+            WeatherLog.date < day_start + timedelta(days=days_to_search)
+        ).order_by(WeatherLog.location, WeatherLog.date).all()
+        
+        windows = find_windows(
+            grid_from_rows(rows),
+            min_hours=min_hours,
+            working_hours_start=working_hours_start,
+            working_hours_end=working_hours_end,
+            min_temp=min_temp,
+            start=start_date
+        )
+        return {location: windows.get(location, []) for location in locations}
+    
+    def get_hourly_suitability(
+        self,
+        origin: datetime,
+        hours: int,
+        locations: Optional[List[str]] = None,
+        min_temp: float = 5.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Hourly installation suitability from origin for the planning engines
+        
+        Locations without stored samples are left out, so callers can fall
+        back to the default location.
+        
+        Returns:
+            location -> float array (1 suitable, 0 unsuitable, NaN unknown)
+        """
+        self.ensure_fresh()
+        locations = list(set(locations or []) | {self.location})
+        rows = self.db.query(
+            WeatherLog.location, WeatherLog.date, WeatherLog.temperature,
+            WeatherLog.rain_mm, WeatherLog.wind_speed, WeatherLog.condition
+        ).filter(
+            WeatherLog.location.in_(locations),
+            WeatherLog.date > origin - timedelta(hours=STEP_HOURS),
+            WeatherLog.date < origin + timedelta(hours=hours)
+        ).order_by(WeatherLog.location, WeatherLog.date).all()
+        
+        return hourly_suitability(grid_from_rows(rows), origin, hours, min_temp=min_temp)
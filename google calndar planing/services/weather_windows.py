@@ -0,0 +1,197 @@
+"""
+Vectorized evaluation of installation windows over the forecast grid
+
+Forecast samples of any number of locations are laid out as flat NumPy
+arrays, every 3-hour step is scored in one pass with the same rules as
+WeatherService._is_suitable_for_installation, the steps are expanded to
+hours, clipped to working hours and cut into contiguous suitable windows
+with run-length detection (no per-sample Python loop).
+"""
+from datetime import datetime
+from typing import List, Dict, Iterable, Optional
+
+import numpy as np
+
+BAD_CONDITIONS = ['rain', 'drizzle', 'thunderstorm', 'snow', 'mist', 'fog']
+
+# OpenWeatherMap forecast step
+STEP_HOURS = 3
+
+_HOUR = np.timedelta64(1, 'h')
+
+
+def _value(sample, name):
+    return sample.get(name) if isinstance(sample, dict) else getattr(sample, name)
+
+
+def build_grid(samples_by_location: Dict[str, Iterable]) -> Dict[str, np.ndarray]:
+    """
+    Flatten forecast samples into column arrays
+    
+    Accepts parsed grid dicts (WeatherService.get_forecast_grid samples) or
+    WeatherLog rows. Dates are local wall-clock times.
+    """
+    locations = list(samples_by_location.keys())
+    location_idx, times, temperature, rain, wind, condition = [], [], [], [], [], []
+    
+    for i, location in enumerate(locations):
+        samples = sorted(samples_by_location[location], key=lambda s: _value(s, 'date'))
+        for sample in samples:
+            location_idx.append(i)
+            times.append(_value(sample, 'date'))
+            temperature.append(_value(sample, 'temperature'))
+            rain.append(_value(sample, 'rain_mm') or 0)
+            wind.append(_value(sample, 'wind_speed') or 0)
+            condition.append(_value(sample, 'condition') or '')
+    
+    return {
+        'locations': np.array(locations, dtype=object),
+        'location': np.array(location_idx, dtype=np.int32),
+        'time': np.array(times, dtype='datetime64[h]'),
+        'temperature': np.array(temperature, dtype=np.float64),
+        'rain_mm': np.array(rain, dtype=np.float64),
+        'wind_speed': np.array(wind, dtype=np.float64),
+        'condition': np.array(condition, dtype=str)
+    }
+
+
+def grid_from_rows(rows: List[tuple]) -> Dict[str, np.ndarray]:
+    """
+    Column arrays from (location, date, temperature, rain_mm, wind_speed, condition)
+    tuples sorted by location and date, e.g. a column query on weather_logs
+    """
+    if not rows:
+        return build_grid({})
+    location, times, temperature, rain, wind, condition = zip(*rows)
+    locations, location_idx = np.unique(np.array(location, dtype=object), return_inverse=True)
+    return {
+        'locations': locations,
+        'location': location_idx.astype(np.int32),
+        'time': np.array(times, dtype='datetime64[h]'),
+        'temperature': np.array(temperature, dtype=np.float64),
+        'rain_mm': np.nan_to_num(np.array(rain, dtype=np.float64)),
+        'wind_speed': np.nan_to_num(np.array(wind, dtype=np.float64)),
+        'condition': np.array([c or '' for c in condition], dtype=str)
+    }
+
+
+def score_steps(
+    grid: Dict[str, np.ndarray],
+    min_temp: float = 0.0,
+    max_rain_mm: float = 1.0,
+    max_wind_speed: Optional[float] = None
+) -> np.ndarray:
+    """Boolean suitability of every forecast step"""
+    temperature = np.nan_to_num(grid['temperature'], nan=-np.inf)
+    suitable = (temperature >= min_temp) & (grid['rain_mm'] <= max_rain_mm)
+    suitable &= ~np.isin(grid['condition'], BAD_CONDITIONS)
+    if max_wind_speed is not None:
+        suitable &= grid['wind_speed'] <= max_wind_speed
+    return suitable
+
+
+def hourly_suitability(
+    grid: Dict[str, np.ndarray],
+    origin: datetime,
+    hours: int,
+    min_temp: float = 0.0,
+    max_rain_mm: float = 1.0,
+    max_wind_speed: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Per-location suitability of every hour from origin, for lookups by hour offset
+    
+    Returns:
+        location -> float array of length hours (1 suitable, 0 unsuitable,
+        NaN outside the forecast)
+    """
+    result = {location: np.full(hours, np.nan) for location in grid['locations']}
+    if grid['time'].size == 0 or hours <= 0:
+        return result
+    
+    suitable = score_steps(grid, min_temp, max_rain_mm, max_wind_speed).astype(np.float64)
+    offset = ((grid['time'] - np.datetime64(origin, 'h')) // _HOUR).astype(np.int64)
+    for step in range(STEP_HOURS):
+        index = offset + step
+        inside = (index >= 0) & (index < hours)
+        for i, location in enumerate(grid['locations']):
+            rows = inside & (grid['location'] == i)
+            result[location][index[rows]] = suitable[rows]
+    return result
+
+
+def find_windows(
+    grid: Dict[str, np.ndarray],
+    min_hours: float = 1,
+    working_hours_start: int = 8,
+    working_hours_end: int = 17,
+    min_temp: float = 0.0,
+    max_rain_mm: float = 1.0,
+    max_wind_speed: Optional[float] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Contiguous suitable working-hour windows per location
+    
+    Each step covers [time, time + 3h). Windows never cross the end of a
+    working day or a gap in the grid.
+    
+    Returns:
+        location -> [{'start', 'end', 'hours', 'min_temperature', 'max_rain_mm'}]
+    """
+    result = {location: [] for location in grid['locations']}
+    if grid['time'].size == 0:
+        return result
+    
+    suitable = score_steps(grid, min_temp, max_rain_mm, max_wind_speed)
+    
+    # Expand 3-hour steps to hours
+    offsets = np.arange(STEP_HOURS) * _HOUR
+    hours = (grid['time'][:, None] + offsets).ravel()
+    location = np.repeat(grid['location'], STEP_HOURS)
+    step = np.repeat(np.arange(grid['time'].size), STEP_HOURS)
+    
+    hour_of_day = (hours - hours.astype('datetime64[D]')).astype(np.int64)
+    mask = np.repeat(suitable, STEP_HOURS)
+    mask &= (hour_of_day >= working_hours_start) & (hour_of_day < working_hours_end)
+    if start is not None:
+        mask &= hours >= np.datetime64(start)
+    if end is not None:
+        mask &= hours + _HOUR <= np.datetime64(end)
+    
+    # A run continues only within one location and consecutive hours
+    contiguous = np.zeros(mask.size, dtype=bool)
+    contiguous[1:] = (location[1:] == location[:-1]) & (hours[1:] - hours[:-1] == _HOUR)
+    starts_run = mask & ~(np.concatenate(([False], mask[:-1])) & contiguous)
+    ends_run = mask & ~(np.concatenate((mask[1:], [False])) & np.concatenate((contiguous[1:], [False])))
+    
+    run_starts = np.flatnonzero(starts_run)
+    run_ends = np.flatnonzero(ends_run)
+    if run_starts.size == 0:
+        return result
+    
+    # Per-window aggregates: runs are consecutive in the masked hours, so
+    # reduceat over the compacted arrays covers exactly one run per segment
+    masked = np.flatnonzero(mask)
+    segments = np.searchsorted(masked, run_starts)
+    min_temperature = np.minimum.reduceat(grid['temperature'][step[masked]], segments)
+    max_rain = np.maximum.reduceat(grid['rain_mm'][step[masked]], segments)
+    
+    lengths = run_ends - run_starts + 1
+    keep = lengths >= min_hours
+    run_starts, run_ends, lengths = run_starts[keep], run_ends[keep], lengths[keep]
+    min_temperature, max_rain = min_temperature[keep], max_rain[keep]
+    
+    window_start = hours[run_starts].astype(datetime)
+    window_end = (hours[run_ends] + _HOUR).astype(datetime)
+    for i in range(run_starts.size):
+        result[grid['locations'][location[run_starts[i]]]].append({
+            'start': window_start[i],
+            'end': window_end[i],
+            'hours': int(lengths[i]),
+            'min_temperature': float(min_temperature[i]),
+            'max_rain_mm': float(max_rain[i])
+        })
+    
+    return result
@@ -53,7 +53,8 @@ print("\n📦 Testujem importy...")
 try:
     from sqlalchemy import create_engine
     from sqlalchemy.orm import sessionmaker
-    from models.database import Base, Employee, Task, EmployeeType, TaskType
+    from models.database import Employee, Task, EmployeeType, TaskType
+    from models.migrate import upgrade_database
     from services import get_weather_service
     print("✅ Všetky importy sú v poriadku")
 except ImportError as e:
@@ -66,7 +67,7 @@ print("\n💾 Testujem databázu...")
 try:
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
     engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
     
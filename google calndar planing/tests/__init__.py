@@ -2,6 +2,6 @@
 Tests package
 """
 
-__all__ = ['test_basic']
+__all__ = ['test_basic', 'test_api']
 
 
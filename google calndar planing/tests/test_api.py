@@ -0,0 +1,723 @@
+"""
+API tests for Production Planner (in-memory SQLite, no external services)
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+import main
+from models.database import Base, Employee, EmployeeType, Task, TaskType, TaskStatus
+from models.engine import create_db_engine, create_async_db_engine
+
+
+def create_test_engines(directory):
+    """Temporary database file behind both the sync and the async engine"""
+    url = f"sqlite:///{directory}/planner.db"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    return engine, create_async_db_engine(url)
+
+
+class APITestCase(unittest.TestCase):
+    """Base class overriding the DB dependencies with a temporary database"""
+    
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine, self.async_engine = create_test_engines(self.directory.name)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        AsyncSessionLocal = async_sessionmaker(self.async_engine, autoflush=False, expire_on_commit=False)
+        
+        def override_get_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+        
+        async def override_get_async_db():
+            async with AsyncSessionLocal() as db:
+                yield db
+        
+        main.app.dependency_overrides[main.get_db] = override_get_db
+        main.app.dependency_overrides[main.get_async_db] = override_get_async_db
+    
+    def tearDown(self):
+        main.app.dependency_overrides.clear()
+        self.engine.dispose()
+        asyncio.run(self.async_engine.dispose())
+        self.directory.cleanup()
+    
+    def patch_external_services(self):
+        """Scheduler without Google Calendar, weather API, outbox or mirror"""
+        patches = [
+            mock.patch("services.scheduler.get_calendar_service"),
+            mock.patch("services.scheduler.get_weather_service"),
+            mock.patch("services.scheduler.is_outbox_enabled", return_value=False),
+            mock.patch("services.scheduler.is_mirror_enabled", return_value=False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+    
+    def request(self, method, url, **kwargs):
+        async def send():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, url, **kwargs)
+        return asyncio.run(send())
+    
+    def add_employees(self, count, employee_type=EmployeeType.INSTALLER):
+        db = self.SessionLocal()
+        for i in range(count):
+            db.add(Employee(
+                name=f"Employee {i}",
+                email=f"employee{i}@firma.sk",
+                employee_type=employee_type,
+                max_hours_per_week=40.0
+            ))
+        db.commit()
+        db.close()
+
+
+class TestEventLoopIsolation(APITestCase):
+    """Slow external calls must not stall unrelated requests"""
+    
+    def test_employees_latency_independent_of_task_creation(self):
+        """GET /employees stays fast while POST /tasks waits on a slow calendar"""
+        self.add_employees(3)
+        
+        class SlowScheduler:
+            def __init__(self, db):
+                self.db = db
+            
+            def create_and_schedule_task(self, **kwargs):
+                time.sleep(0.5)  # simulated slow Google Calendar round trip
+                return None, "slow"
+        
+        async def scenario():
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                payload = {
+                    "title": "Inštalácia",
+                    "task_type": "installation",
+                    "start_time": datetime(2025, 10, 15, 8, 0).isoformat(),
+                    "end_time": datetime(2025, 10, 15, 16, 0).isoformat(),
+                    "estimated_hours": 8
+                }
+                slow = [asyncio.create_task(client.post("/tasks", json=payload)) for _ in range(4)]
+                await asyncio.sleep(0.05)
+                
+                latencies = []
+                for _ in range(10):
+                    started = time.perf_counter()
+                    response = await client.get("/employees")
+                    latencies.append(time.perf_counter() - started)
+                    self.assertEqual(response.status_code, 200)
+                
+                await asyncio.gather(*slow)
+                return latencies
+        
+        with mock.patch.object(main, "Scheduler", SlowScheduler):
+            latencies = asyncio.run(scenario())
+        
+        self.assertLess(max(latencies), 0.25)
+
+
+class TestLocalConflicts(APITestCase):
+    """Double-booking is caught in the local DB, without a linked calendar"""
+    
+    def setUp(self):
+        super().setUp()
+        self.patch_external_services()
+        self.add_employees(1)
+    
+    def payload(self, start_hour, end_hour):
+        return {
+            "title": "Inštalácia",
+            "task_type": "installation",
+            "start_time": datetime(2025, 10, 15, start_hour, 0).isoformat(),
+            "end_time": datetime(2025, 10, 15, end_hour, 0).isoformat(),
+            "estimated_hours": end_hour - start_hour,
+            "employee_id": 1
+        }
+    
+    def test_create_update_and_list_conflicts(self):
+        """Overlapping bookings are rejected and existing overlaps are listed"""
+        first = self.request("POST", "/tasks", json=self.payload(8, 12))
+        self.assertEqual(first.status_code, 201)
+        
+        clash = self.request("POST", "/tasks", json=self.payload(10, 14))
+        self.assertEqual(clash.status_code, 400)
+        self.assertIn("2025-10-15 12:00", clash.json()["detail"])  # next free gap
+        
+        second = self.request("POST", "/tasks", json=self.payload(12, 16))
+        self.assertEqual(second.status_code, 201)
+        
+        moved = self.request("PUT", f"/tasks/{second.json()['id']}", json={
+            "start_time": datetime(2025, 10, 15, 11, 0).isoformat()
+        })
+        self.assertEqual(moved.status_code, 409)
+        
+        # A row written outside the API still shows up in the overlap report
+        db = self.SessionLocal()
+        db.add(Task(
+            title="Import", task_type=TaskType.INSTALLATION, employee_id=1,
+            start_time=datetime(2025, 10, 15, 15, 0), end_time=datetime(2025, 10, 15, 17, 0),
+            estimated_hours=2
+        ))
+        db.commit()
+        db.close()
+        
+        response = self.request("GET", "/tasks/conflicts")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["count"], 1)
+        self.assertEqual(body["conflicts"][0]["task_id"], second.json()["id"])
+        self.assertEqual(body["conflicts"][0]["overlap_start"], "2025-10-15T15:00:00")
+        self.assertEqual(body["conflicts"][0]["overlap_end"], "2025-10-15T16:00:00")
+    
+    def test_concurrent_creates_book_slot_once(self):
+        """Two requests that both found the slot free cannot both book it"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from services.scheduler import Scheduler
+        
+        start = datetime(2025, 10, 15, 8, 0)
+        both_checked = threading.Barrier(2)
+        
+        def find_best_employee(scheduler, task_type, start_time, duration_hours):
+            # Both requests pass the free-slot check before either writes
+            free = scheduler.task_index.is_free(1, start_time, start_time + timedelta(hours=duration_hours))
+            both_checked.wait(timeout=5)
+            return scheduler.db.get(Employee, 1) if free else None
+        
+        def create(title):
+            db = self.SessionLocal()
+            try:
+                task, message = Scheduler(db).create_and_schedule_task(
+                    title=title, task_type=TaskType.INSTALLATION, start_time=start,
+                    duration_hours=4, weather_dependent=False
+                )
+                return task.id if task else None
+            finally:
+                db.close()
+        
+        with mock.patch.object(Scheduler, "find_best_employee", autospec=True, side_effect=find_best_employee):
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                created = list(pool.map(create, ["Prvá", "Druhá"]))
+        
+        self.assertEqual(sum(task_id is not None for task_id in created), 1)
+        db = self.SessionLocal()
+        self.assertEqual(db.query(Task).filter(Task.employee_id == 1).count(), 1)
+        db.close()
+        self.assertEqual(self.request("GET", "/tasks/conflicts").json()["count"], 0)
+
+
+class TestBulkImport(APITestCase):
+    """POST /tasks/bulk with JSON and CSV bodies"""
+    
+    def setUp(self):
+        super().setUp()
+        self.patch_external_services()
+        self.add_employees(2)
+    
+    def row(self, day, start_hour, hours, **extra):
+        start = datetime(2025, 10, 13 + day, start_hour, 0)
+        return {
+            "title": f"Úloha {day}/{start_hour}",
+            "task_type": "installation",
+            "start_time": start.isoformat(),
+            "end_time": start.replace(hour=start_hour + hours).isoformat(),
+            "estimated_hours": hours,
+            **extra
+        }
+    
+    def test_json_rows_validated_and_scheduled_in_one_batch(self):
+        """Per-row results cover invalid rows, in-batch conflicts and assignments"""
+        rows = [
+            self.row(0, 8, 4),
+            self.row(0, 8, 4),
+            self.row(0, 10, 4),  # both employees busy from the rows above
+            {"title": "Bez času", "task_type": "installation"},
+            self.row(1, 8, 4, employee_id=2),
+        ]
+        
+        response = self.request("POST", "/tasks/bulk", json={"tasks": rows})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        
+        self.assertEqual((body["total"], body["created"], body["rejected"], body["invalid"]), (5, 3, 1, 1))
+        statuses = [r["status"] for r in body["results"]]
+        self.assertEqual(statuses, ["created", "created", "rejected", "invalid", "created"])
+        self.assertNotEqual(body["results"][0]["employee_id"], body["results"][1]["employee_id"])
+        self.assertIn("start_time", body["results"][3]["message"])
+        self.assertEqual(body["results"][4]["employee_id"], 2)
+        
+        db = self.SessionLocal()
+        self.assertEqual(db.query(Task).count(), 3)
+        db.close()
+        
+        atomic = self.request("POST", "/tasks/bulk?atomic=true", json=rows)
+        self.assertEqual(atomic.status_code, 422)
+    
+    def test_rows_hold_slots_before_flush(self):
+        """A concurrent single create cannot take a slot the import accepted but not flushed yet"""
+        from models.schemas import TaskCreate
+        from services.scheduler import Scheduler
+        
+        rows = [(1, TaskCreate(**self.row(0, 8, 4, employee_id=1)))]
+        db = self.SessionLocal()
+        flush = db.flush
+        concurrent = []
+        
+        def create_then_flush(*args, **kwargs):
+            other = self.SessionLocal()
+            try:
+                task, message = Scheduler(other).create_and_schedule_task(
+                    title="Súbežná", task_type=TaskType.INSTALLATION, start_time=datetime(2025, 10, 13, 10, 0),
+                    duration_hours=2, employee_id=1, weather_dependent=False
+                )
+                concurrent.append(task.id if task else None)
+            finally:
+                other.close()
+            return flush(*args, **kwargs)
+        
+        with mock.patch.object(db, "flush", side_effect=create_then_flush):
+            results = Scheduler(db).bulk_create_tasks(rows)
+        db.close()
+        
+        self.assertEqual(results[0]["status"], "created")
+        self.assertEqual(concurrent, [None])
+        db = self.SessionLocal()
+        self.assertEqual(db.query(Task).count(), 1)
+        db.close()
+    
+    def test_inactive_employee_accepted_like_single_create(self):
+        """An explicit inactive employee is booked, as POST /tasks does"""
+        db = self.SessionLocal()
+        db.get(Employee, 2).is_active = False
+        db.commit()
+        db.close()
+        
+        response = self.request("POST", "/tasks/bulk", json={"tasks": [self.row(0, 8, 4, employee_id=2)]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["results"][0]["status"], "created")
+        self.assertEqual(response.json()["results"][0]["employee_id"], 2)
+    
+    def test_failed_import_commits_nothing(self):
+        """A weather lookup in the middle of the import does not commit the flushed rows"""
+        from models.database import WeatherLog
+        from models.schemas import TaskCreate
+        from services.scheduler import Scheduler
+        from services.weather_store import WeatherStore
+        
+        day = datetime(2025, 10, 14)
+        weather_service = mock.Mock(location="Bratislava,SK")
+        weather_service.get_forecast_grid.return_value = {
+            "location": "Bratislava,SK",
+            "fetched_at": datetime.utcnow(),
+            "samples": [
+                {"date": day.replace(hour=hour), "condition": "clear", "temperature": 15.0,
+                 "suitable_for_installation": True}
+                for hour in range(2, 24, 3)
+            ]
+        }
+        rows = [
+            (1, TaskCreate(**self.row(0, 8, 4, task_type="production", employee_id=1))),
+            (2, TaskCreate(**self.row(1, 8, 4, employee_id=2, weather_dependent=True))),
+            (3, TaskCreate(**self.row(2, 8, 4, employee_id=2))),
+        ]
+        
+        def progress(processed, total):
+            if processed == 2:
+                raise RuntimeError("client disconnected")
+        
+        db = self.SessionLocal()
+        scheduler = Scheduler(db)
+        scheduler.weather_store = WeatherStore(db, weather_service)
+        with self.assertRaises(RuntimeError):
+            scheduler.bulk_create_tasks(rows, progress=progress, batch_size=1)
+        db.close()
+        
+        db = self.SessionLocal()
+        self.assertEqual(db.query(Task).count(), 0)
+        self.assertEqual(db.query(WeatherLog).count(), 0)
+        db.close()
+    
+    def test_csv_with_streamed_progress(self):
+        """CSV rows stream NDJSON progress lines and end with the result"""
+        import json
+        
+        lines = ["title,task_type,start_time,end_time,estimated_hours,employee_id"]
+        for day in range(5):
+            for hour in (8, 12):
+                row = self.row(day, hour, 4)
+                lines.append(f"{row['title']},production,{row['start_time']},{row['end_time']},4,")
+        db = self.SessionLocal()
+        db.add(Employee(name="Výroba", email="vyroba@firma.sk", employee_type=EmployeeType.PRODUCER))
+        db.commit()
+        db.close()
+        
+        with mock.patch("services.scheduler.BULK_BATCH_SIZE", 3):
+            response = self.request(
+                "POST", "/tasks/bulk?stream=true",
+                content="\n".join(lines).encode("utf-8"),
+                headers={"Content-Type": "text/csv"}
+            )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("application/x-ndjson"))
+        events = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(
+            [(e["processed"], e["total"]) for e in events if e["event"] == "progress"],
+            [(3, 10), (6, 10), (9, 10), (10, 10)]
+        )
+        self.assertEqual(events[-1]["event"], "result")
+        self.assertEqual(events[-1]["created"], 10)
+
+
+class TestEagerLoading(APITestCase):
+    """Task responses load employees without one SELECT per row"""
+    
+    def setUp(self):
+        super().setUp()
+        self.patch_external_services()
+        self.add_employees(20)
+        
+        db = self.SessionLocal()
+        start = datetime(2025, 10, 13, 8, 0)
+        db.add_all([
+            Task(
+                title=f"Úloha {i}", task_type=TaskType.INSTALLATION, employee_id=i % 20 + 1,
+                start_time=start.replace(day=13 + i // 20), end_time=start.replace(day=13 + i // 20, hour=10),
+                estimated_hours=2
+            )
+            for i in range(200)
+        ])
+        db.commit()
+        db.close()
+        
+        self.statements = []
+        for engine in (self.engine, self.async_engine.sync_engine):
+            event.listen(engine, "before_cursor_execute", self.record)
+            self.addCleanup(event.remove, engine, "before_cursor_execute", self.record)
+    
+    def record(self, conn, cursor, statement, *args):
+        self.statements.append(statement)
+    
+    def test_list_and_detail_statement_count(self):
+        """GET /tasks and GET /tasks/{id} use one SELECT each"""
+        response = self.request("GET", "/tasks?limit=1000")
+        self.assertEqual(response.status_code, 200)
+        items = response.json()["items"]
+        self.assertEqual(len(items), 200)
+        self.assertTrue(all(task["employee"]["id"] == task["employee_id"] for task in items))
+        self.assertEqual(len(self.statements), 1)
+        
+        self.statements.clear()
+        response = self.request("GET", "/tasks/5")
+        self.assertEqual(response.json()["employee"]["id"], 5)
+        self.assertEqual(len(self.statements), 1)
+    
+    def test_update_and_delete_reuse_loaded_employee(self):
+        """PUT and DELETE do not look up the task's employee separately"""
+        self.request("GET", "/tasks/conflicts")  # build the task index up front
+        
+        self.statements.clear()
+        response = self.request("PUT", "/tasks/5", json={"title": "Nový názov"})
+        self.assertEqual(response.status_code, 200)
+        response = self.request("DELETE", "/tasks/6")
+        self.assertEqual(response.status_code, 200)
+        
+        employee_selects = [s for s in self.statements if s.lstrip().startswith("SELECT employees.")]
+        self.assertEqual(employee_selects, [])
+
+
+class TestPlanningOptimize(APITestCase):
+    """POST /planning/optimize parameter limits"""
+    
+    def test_time_budget_bounded(self):
+        """A zero, negative or too long time budget is rejected before planning starts"""
+        self.patch_external_services()
+        with mock.patch("services.scheduler.Scheduler.optimize_schedule", return_value={}) as optimize:
+            for budget in (0, -1, 61):
+                response = self.request("POST", f"/planning/optimize?start_date=2025-10-13T00:00:00&time_budget={budget}")
+                self.assertEqual(response.status_code, 422)
+            self.assertFalse(optimize.called)
+            
+            response = self.request("POST", "/planning/optimize?start_date=2025-10-13T00:00:00&time_budget=60")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(optimize.call_args.kwargs["time_budget_seconds"], 60)
+
+
+class TestKeysetPagination(APITestCase):
+    """Cursor pages of /tasks and /employees"""
+    
+    def setUp(self):
+        super().setUp()
+        self.add_employees(7)
+        
+        db = self.SessionLocal()
+        start = datetime(2025, 10, 13, 8, 0)
+        # Three tasks share each start time, so the id breaks ties
+        db.add_all([
+            Task(
+                title=f"Úloha {i}", task_type=TaskType.INSTALLATION, employee_id=i % 2 + 1,
+                start_time=start.replace(day=13 + (24 - i) // 3), end_time=start.replace(day=13 + (24 - i) // 3, hour=10),
+                estimated_hours=2
+            )
+            for i in range(25)
+        ])
+        db.commit()
+        db.close()
+    
+    def pages(self, url):
+        items, cursor, pages = [], None, 0
+        while True:
+            separator = "&" if "?" in url else "?"
+            response = self.request("GET", url + (f"{separator}cursor={cursor}" if cursor else ""))
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            items.extend(body["items"])
+            pages += 1
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return items, pages
+    
+    def test_tasks_pages_are_complete_and_ordered(self):
+        """Walking the cursor returns every task once in (start_time, id) order"""
+        items, pages = self.pages("/tasks?limit=10")
+        
+        self.assertEqual(pages, 3)
+        keys = [(task["start_time"], task["id"]) for task in items]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), 25)
+        
+        filtered, _ = self.pages("/tasks?limit=4&employee_id=2")
+        self.assertEqual([t["id"] for t in filtered], [t["id"] for t in items if t["employee_id"] == 2])
+    
+    def test_employees_cursor_and_deprecated_offset(self):
+        """Employees page by id, skip still works and bad cursors are rejected"""
+        items, pages = self.pages("/employees?limit=3")
+        self.assertEqual([e["id"] for e in items], list(range(1, 8)))
+        self.assertEqual(pages, 3)
+        
+        response = self.request("GET", "/employees?skip=5&limit=10")
+        self.assertEqual([e["id"] for e in response.json()["items"]], [6, 7])
+        
+        response = self.request("GET", "/tasks?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+    
+    def test_filters_use_composite_indexes(self):
+        """The page queries seek through the (filter, start_time, id) indexes"""
+        from sqlalchemy import text
+        
+        with self.engine.connect() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM tasks WHERE employee_id = 1 "
+                "AND (start_time, id) > ('2025-10-14', 3) ORDER BY start_time, id LIMIT 11"
+            )))
+        self.assertIn("ix_tasks_employee_start_id", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+
+
+class TestAsyncReads(APITestCase):
+    """Read-heavy endpoints query through the async engine"""
+    
+    def setUp(self):
+        super().setUp()
+        self.patch_external_services()
+        self.add_employees(3)
+        
+        db = self.SessionLocal()
+        db.add_all([
+            Task(
+                title=f"Úloha {i}", task_type=TaskType.INSTALLATION, employee_id=1,
+                start_time=datetime(2025, 10, 13 + i, 8, 0), end_time=datetime(2025, 10, 13 + i, 12, 0),
+                estimated_hours=4
+            )
+            for i in range(3)
+        ])
+        db.commit()
+        db.close()
+        
+        self.sync_statements, self.async_statements = [], []
+        for engine, statements in ((self.engine, self.sync_statements),
+                                   (self.async_engine.sync_engine, self.async_statements)):
+            listener = lambda conn, cursor, statement, *args, statements=statements: statements.append(statement)
+            event.listen(engine, "before_cursor_execute", listener)
+            self.addCleanup(event.remove, engine, "before_cursor_execute", listener)
+    
+    def test_reads_skip_the_sync_engine(self):
+        """GET /employees, /tasks, /stats/overview and /planning/availability"""
+        self.assertEqual(len(self.request("GET", "/employees").json()["items"]), 3)
+        self.assertEqual(len(self.request("GET", "/tasks").json()["items"]), 3)
+        
+        stats = self.request("GET", "/stats/overview").json()
+        self.assertEqual((stats["total_employees"], stats["total_tasks"]), (3, 3))
+        
+        response = self.request("GET", "/planning/availability", params={"date": "2025-10-15T09:00:00"})
+        self.assertEqual(response.status_code, 200)
+        utilization = {e["employee"]["id"]: e["utilization_percent"] for e in response.json()["employees"]}
+        self.assertEqual(utilization, {1: 30.0, 2: 0.0, 3: 0.0})
+        
+        response = self.request("GET", "/planning/availability", params={"date": "2025-10-15T09:00:00", "employee_id": 1})
+        self.assertEqual(response.json()["workload"]["total_hours_scheduled"], 12.0)
+        self.assertEqual(self.request("GET", "/planning/availability", params={
+            "date": "2025-10-15T09:00:00", "employee_id": 99
+        }).status_code, 404)
+        
+        self.assertEqual(self.sync_statements, [])
+        self.assertTrue(self.async_statements)
+
+
+class TestExport(APITestCase):
+    """Streamed CSV/NDJSON exports"""
+    
+    def setUp(self):
+        super().setUp()
+        self.add_employees(2)
+        
+        db = self.SessionLocal()
+        db.add_all([
+            Task(
+                title=f"Úloha {i}", task_type=TaskType.PRODUCTION, employee_id=1 if i % 2 else None,
+                start_time=datetime(2025, 10, 13, 8 + i), end_time=datetime(2025, 10, 13, 9 + i),
+                estimated_hours=1, status=TaskStatus.COMPLETED if i == 4 else TaskStatus.PLANNED
+            )
+            for i in range(5)
+        ])
+        db.commit()
+        db.close()
+    
+    def test_csv_in_chunks(self):
+        """Test that every chunk is streamed and rows come in start_time order"""
+        import csv
+        import io
+        
+        with mock.patch("services.export.EXPORT_CHUNK_SIZE", 2):
+            response = self.request("GET", "/export/tasks")
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertIn('filename="tasks.csv"', response.headers["content-disposition"])
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        self.assertEqual([row["title"] for row in rows], [f"Úloha {i}" for i in range(5)])
+        self.assertEqual((rows[1]["employee_name"], rows[0]["employee_name"]), ("Employee 0", ""))
+        self.assertEqual(rows[0]["status"], "planned")
+    
+    def test_ndjson_gzip_and_filters(self):
+        """Test gzip NDJSON with status and date filters"""
+        import gzip
+        import json
+        
+        response = self.request("GET", "/export/tasks", params={
+            "format": "ndjson", "gzip": "true", "status": "planned",
+            "start_date": "2025-10-13T09:00:00", "end_date": "2025-10-13T11:00:00"
+        })
+        self.assertEqual(response.headers["content-type"], "application/gzip")
+        records = [json.loads(line) for line in gzip.decompress(response.content).decode("utf-8").splitlines()]
+        self.assertEqual([r["title"] for r in records], ["Úloha 1", "Úloha 2", "Úloha 3"])
+        self.assertEqual(records[0]["start_time"], "2025-10-13T09:00:00")
+        
+        employees = self.request("GET", "/export/employees", params={"format": "ndjson"})
+        self.assertEqual([json.loads(line)["email"] for line in employees.text.splitlines()],
+                         ["employee0@firma.sk", "employee1@firma.sk"])
+        
+        self.assertEqual(self.request("GET", "/export/tasks", params={"status": "done"}).status_code, 400)
+        self.assertEqual(self.request("GET", "/export/tasks", params={"format": "xml"}).status_code, 400)
+
+
+
+class TestTaskSearch(APITestCase):
+    """GET /tasks/search on the FTS5 index"""
+    
+    def setUp(self):
+        from models.migrate import upgrade_database
+        
+        super().setUp()
+        # The search index comes from the migrations, not from create_all
+        Base.metadata.drop_all(bind=self.engine)
+        upgrade_database(self.engine)
+        db = self.SessionLocal()
+        db.add_all([
+            Task(title="Montáž okien Novák", location="Košice, Hlavná 5", task_type=TaskType.INSTALLATION,
+                 start_time=datetime(2025, 10, 13, 8), end_time=datetime(2025, 10, 13, 12), estimated_hours=4),
+            Task(title="Výroba dverí", description="pre Nováka", task_type=TaskType.PRODUCTION,
+                 start_time=datetime(2025, 10, 14, 8), end_time=datetime(2025, 10, 14, 12), estimated_hours=4),
+        ])
+        db.commit()
+        db.close()
+    
+    def test_search_ranked_and_highlighted(self):
+        """Test ranked hits with highlighting, not routed to /tasks/{task_id}"""
+        response = self.request("GET", "/tasks/search", params={"q": "novak"})
+        
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["indexed"])
+        self.assertEqual([hit["id"] for hit in body["items"]], [1, 2])
+        self.assertEqual(body["items"][0]["title_highlight"], "Montáž okien <mark>Novák</mark>")
+        self.assertEqual(body["items"][1]["snippet"], "pre <mark>Nováka</mark>")
+        self.assertEqual(body["items"][0]["status"], "planned")
+        
+        filtered = self.request("GET", "/tasks/search", params={"q": "novak", "start_date": "2025-10-14T00:00:00"})
+        self.assertEqual([hit["id"] for hit in filtered.json()["items"]], [2])
+    
+    def test_invalid_queries(self):
+        """Test 400 for queries without words or unknown status, 422 without q"""
+        self.assertEqual(self.request("GET", "/tasks/search", params={"q": "***"}).status_code, 400)
+        self.assertEqual(self.request("GET", "/tasks/search", params={"q": "novak", "status": "done"}).status_code, 400)
+        self.assertEqual(self.request("GET", "/tasks/search").status_code, 422)
+
+
+class TestChangeFeed(APITestCase):
+    """GET /changes for incremental client sync"""
+    
+    def test_sync_replica_with_changes(self):
+        """Test cursor handshake, upserts with data, tombstones and reset"""
+        start = self.request("GET", "/changes").json()
+        self.assertEqual(start, {"changes": [], "cursor": 0, "has_more": False, "reset": True})
+        
+        self.add_employees(1)
+        db = self.SessionLocal()
+        db.add(Task(title="Montáž", task_type=TaskType.INSTALLATION, employee_id=1,
+                    start_time=datetime(2025, 10, 13, 8), end_time=datetime(2025, 10, 13, 12), estimated_hours=4))
+        db.commit()
+        db.close()
+        
+        body = self.request("GET", "/changes", params={"since": start["cursor"]}).json()
+        self.assertFalse(body["reset"])
+        self.assertEqual([(c["entity"], c["id"], c["operation"]) for c in body["changes"]],
+                         [("employee", 1, "upsert"), ("task", 1, "upsert")])
+        self.assertEqual(body["changes"][1]["task"]["title"], "Montáž")
+        self.assertEqual(body["changes"][1]["task"]["status"], "planned")
+        self.assertIsNone(body["changes"][1]["employee"])
+        
+        db = self.SessionLocal()
+        db.delete(db.get(Task, 1))
+        db.commit()
+        db.close()
+        later = self.request("GET", "/changes", params={"since": body["cursor"]}).json()
+        self.assertEqual([(c["id"], c["operation"], c["task"]) for c in later["changes"]], [(1, "delete", None)])
+        
+        self.assertTrue(self.request("GET", "/changes", params={"since": 99}).json()["reset"])
+        self.assertEqual(self.request("GET", "/changes", params={"limit": 0}).status_code, 422)
+        self.assertEqual(self.request("GET", "/stats/changes").json()["entries"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
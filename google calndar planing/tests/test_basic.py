@@ -5,6 +5,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import time
 import unittest
 from datetime import datetime, timedelta
 from models.database import EmployeeType, TaskType, TaskStatus
@@ -52,6 +53,626 @@ class TestWeatherLogic(unittest.TestCase):
         self.assertFalse(service._is_suitable_for_installation("clear", -5.0, 0))  # Too cold
 
 
+class TestWeatherCache(unittest.TestCase):
+    """Test TTL cache with stale-while-revalidate and single-flight loads"""
+    
+    def test_ttl_and_stale_while_revalidate(self):
+        """Test fresh hits, stale serving with one background refresh and expiry"""
+        import threading
+        from services.ttl_cache import TTLCache
+        
+        now = [0.0]
+        calls = []
+        refreshed = threading.Event()
+        
+        def loader():
+            calls.append(now[0])
+            if len(calls) == 2:
+                refreshed.set()
+            return len(calls)
+        
+        cache = TTLCache(ttl=10, stale_ttl=20, clock=lambda: now[0])
+        self.assertEqual(cache.get('BA', loader), 1)
+        now[0] = 5
+        self.assertEqual(cache.get('BA', loader), 1)
+        
+        # Stale: old value is served, one refresh runs in the background
+        now[0] = 15
+        self.assertEqual(cache.get('BA', loader), 1)
+        self.assertTrue(refreshed.wait(2))
+        time.sleep(0.05)
+        self.assertEqual(cache.get('BA', loader), 2)
+        
+        # Past ttl + stale_ttl: synchronous reload
+        now[0] = 100
+        self.assertEqual(cache.get('BA', loader), 3)
+        
+        stats = cache.get_stats()
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['stale_hits'], 1)
+        self.assertEqual(stats['refreshes'], 1)
+    
+    def test_concurrent_misses_single_flight(self):
+        """Test that concurrent misses share one upstream call"""
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from services.ttl_cache import TTLCache
+        
+        calls = []
+        release = threading.Event()
+        
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return {'temperature': 20}
+        
+        cache = TTLCache(ttl=60)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(cache.get, 'BA', loader) for _ in range(8)]
+            time.sleep(0.1)
+            release.set()
+            results = [f.result() for f in futures]
+        
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r == {'temperature': 20} for r in results))
+        self.assertEqual(cache.get_stats()['misses'], 1)
+        self.assertEqual(cache.get_stats()['coalesced'], 7)
+    
+    def test_failed_load_not_cached(self):
+        """Test that API errors fall back to defaults and are retried next call"""
+        import requests
+        from unittest import mock
+        from services.weather import WeatherService
+        
+        with mock.patch.dict(os.environ, {"WEATHER_API_KEY": "test"}):
+            service = WeatherService()
+        
+        with mock.patch.object(service, "_fetch_current_weather", side_effect=requests.ConnectionError("down")):
+            self.assertEqual(service.get_current_weather()['condition'], 'unknown')
+        
+        with mock.patch.object(service, "_fetch_current_weather", return_value={'condition': 'clear'}) as fetch:
+            service.get_current_weather()
+            service.get_current_weather()
+            self.assertEqual(fetch.call_count, 1)
+        
+        self.assertEqual(service.get_cache_stats()['current']['errors'], 1)
+
+
+class TestWeatherStore(unittest.TestCase):
+    """Test forecast grid persistence and lookups"""
+    
+    def setUp(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base
+        from services import weather_store
+        
+        weather_store._persisted.clear()
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def _grid(self, day, rainy_hours=(), fetched_at=None):
+        samples = []
+        for hour in range(2, 24, 3):
+            rainy = hour in rainy_hours
+            samples.append({
+                'date': day.replace(hour=hour),
+                'condition': 'rain' if rainy else 'clear',
+                'temperature': 15.0,
+                'description': 'dážď' if rainy else 'jasno',
+                'suitable_for_installation': not rainy,
+                'rain_mm': 4.0 if rainy else 0,
+                'humidity': 60,
+                'wind_speed': 3
+            })
+        return {'location': 'Bratislava,SK', 'fetched_at': fetched_at or datetime.utcnow(), 'samples': samples}
+    
+    def test_upsert_on_location_and_time(self):
+        """Test that refetched grids update rows instead of duplicating them"""
+        from models.database import WeatherLog
+        from services.weather_store import WeatherStore
+        
+        day = datetime(2025, 10, 15)
+        store = WeatherStore(self.db, weather_service=object(), location='Bratislava,SK')
+        store.save_grid('Bratislava,SK', self._grid(day)['samples'])
+        store.save_grid('Bratislava,SK', self._grid(day, rainy_hours=(14,))['samples'])
+        
+        self.assertEqual(self.db.query(WeatherLog).count(), 8)
+        sample = self.db.query(WeatherLog).filter(WeatherLog.date == day.replace(hour=14)).one()
+        self.assertEqual(sample.condition, 'rain')
+    
+    def test_recommendation_from_stored_grid(self):
+        """Test that a rainy afternoon sample, not only noon, decides the day"""
+        from unittest import mock
+        from services.weather_store import WeatherStore
+        
+        day = datetime(2025, 10, 15)
+        grid = self._grid(day, rainy_hours=(17,))
+        grid['samples'] += self._grid(day + timedelta(days=1))['samples']
+        weather_service = mock.Mock(location='Bratislava,SK')
+        weather_service.get_forecast_grid.return_value = grid
+        
+        store = WeatherStore(self.db, weather_service)
+        self.assertEqual(store.get_recommendation(day.replace(hour=9)), 'production')
+        self.assertEqual(store.get_recommendation(day.replace(hour=9) + timedelta(days=1)), 'installation')
+        
+        suitable = store.find_suitable_installation_days(day, days_needed=5)
+        self.assertEqual([d.date() for d, _ in suitable], [(day + timedelta(days=1)).date()])
+        
+        # The same cached grid is written only once
+        self.assertEqual(weather_service.get_forecast_grid.call_count, 3)
+        self.assertFalse(store.ensure_fresh())
+    
+    def test_grid_persisted_per_database(self):
+        """Test that a grid committed to one database is still written to another"""
+        from unittest import mock
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base, WeatherLog
+        from services.weather_store import WeatherStore
+        
+        weather_service = mock.Mock(location='Bratislava,SK')
+        weather_service.get_forecast_grid.return_value = self._grid(datetime(2025, 10, 15))
+        
+        self.assertTrue(WeatherStore(self.db, weather_service).ensure_fresh())
+        self.db.commit()
+        self.assertFalse(WeatherStore(self.db, weather_service).ensure_fresh())
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        other = sessionmaker(bind=engine)()
+        self.assertTrue(WeatherStore(other, weather_service).ensure_fresh())
+        other.commit()
+        self.assertEqual(other.query(WeatherLog).count(), 8)
+        other.close()
+
+
+class TestWeatherWindows(unittest.TestCase):
+    """Test vectorized installation-window evaluation"""
+    
+    def test_matches_hourly_brute_force(self):
+        """Test windows against a per-hour Python walk over random multi-location grids"""
+        import random
+        from services.weather import WeatherService
+        from services.weather_windows import build_grid, find_windows
+        
+        rng = random.Random(7)
+        service = WeatherService.__new__(WeatherService)
+        start = datetime(2025, 10, 14)
+        grids = {}
+        for location in ['Bratislava,SK', 'Košice,SK', 'Žilina,SK']:
+            grids[location] = [
+                {
+                    'date': start + timedelta(hours=hour),
+                    'temperature': rng.uniform(-3, 20),
+                    'rain_mm': rng.choice([0, 0, 0, 0.5, 3]),
+                    'wind_speed': 3,
+                    'condition': rng.choice(['clear', 'clouds', 'clouds', 'rain'])
+                }
+                for hour in range(2, 5 * 24, 3)
+            ]
+        
+        windows = find_windows(build_grid(grids), min_hours=2, min_temp=5)
+        
+        for location, samples in grids.items():
+            expected, run = [], []
+            for sample in samples:
+                ok = service._is_suitable_for_installation(
+                    sample['condition'], sample['temperature'], sample['rain_mm']
+                ) and sample['temperature'] >= 5
+                for h in range(3):
+                    hour = sample['date'] + timedelta(hours=h)
+                    if ok and 8 <= hour.hour < 17 and (not run or run[-1] + timedelta(hours=1) == hour):
+                        run.append(hour)
+                        continue
+                    if len(run) >= 2:
+                        expected.append((run[0], run[-1] + timedelta(hours=1)))
+                    run = [hour] if ok and 8 <= hour.hour < 17 else []
+            if len(run) >= 2:
+                expected.append((run[0], run[-1] + timedelta(hours=1)))
+            
+            self.assertEqual([(w['start'], w['end']) for w in windows[location]], expected)
+            self.assertTrue(all(w['min_temperature'] >= 5 for w in windows[location]))
+    
+    def test_partial_day_window(self):
+        """Test that an afternoon shower leaves a morning window"""
+        from services.weather_windows import build_grid, find_windows
+        
+        day = datetime(2025, 10, 14)
+        samples = [
+            {'date': day.replace(hour=hour), 'temperature': 12, 'rain_mm': 4 if hour == 14 else 0,
+             'wind_speed': 2, 'condition': 'rain' if hour == 14 else 'clear'}
+            for hour in range(2, 24, 3)
+        ]
+        windows = find_windows(build_grid({'BA': samples}), min_hours=4)['BA']
+        
+        self.assertEqual(len(windows), 1)
+        self.assertEqual((windows[0]['start'].hour, windows[0]['end'].hour), (8, 14))
+
+
+class TestCalendarAvailability(unittest.TestCase):
+    """Test batched free/busy lookups"""
+    
+    def test_freebusy_is_chunked(self):
+        """Test that freeBusy queries respect the per-request calendar limit"""
+        from services.google_calendar import GoogleCalendarService, FREEBUSY_MAX_CALENDARS
+        
+        queries = []
+        
+        class FakeQuery:
+            def __init__(self, body):
+                self.body = body
+            
+            def execute(self):
+                return {'calendars': {
+                    item['id']: {'busy': [{'start': '2025-10-15T10:00:00+02:00', 'end': '2025-10-15T11:00:00+02:00'}]}
+                    for item in self.body['items']
+                }}
+        
+        class FakeFreeBusy:
+            def query(self, body):
+                queries.append(body)
+                return FakeQuery(body)
+        
+        class FakeService:
+            def freebusy(self):
+                return FakeFreeBusy()
+        
+        service = GoogleCalendarService.__new__(GoogleCalendarService)
+        service.service = FakeService()
+        
+        calendar_ids = [f"cal-{i}" for i in range(120)]
+        availability = service.check_availability_many(
+            calendar_ids,
+            datetime(2025, 10, 15, 8, 0),
+            datetime(2025, 10, 15, 10, 30)
+        )
+        
+        self.assertEqual(len(queries), 3)
+        self.assertTrue(all(len(q['items']) <= FREEBUSY_MAX_CALENDARS for q in queries))
+        self.assertEqual(len(availability), 120)
+        self.assertFalse(any(availability.values()))
+    
+    def test_batch_writes(self):
+        """Test batched writes map results back to keys and retry failures"""
+        from services.google_calendar import GoogleCalendarService, BATCH_MAX_REQUESTS
+        
+        batches = []
+        
+        class FakeRequest:
+            def __init__(self, body):
+                self.body = body
+        
+        class FakeEvents:
+            def insert(self, calendarId, body):
+                return FakeRequest(body)
+        
+        class FakeBatch:
+            def __init__(self, callback):
+                self.callback = callback
+                self.requests = []
+            
+            def add(self, request, request_id):
+                self.requests.append((request_id, request))
+            
+            def execute(self):
+                batches.append(len(self.requests))
+                for request_id, request in self.requests:
+                    if request.body['summary'] == 'task-7':
+                        self.callback(request_id, None, Exception("rate limited"))
+                    else:
+                        self.callback(request_id, {'id': 'evt-' + request.body['summary']}, None)
+        
+        class FakeService:
+            def events(self):
+                return FakeEvents()
+            
+            def new_batch_http_request(self, callback):
+                return FakeBatch(callback)
+        
+        service = GoogleCalendarService.__new__(GoogleCalendarService)
+        service.service = FakeService()
+        retried = []
+        service.create_event = lambda calendar_id, **kwargs: retried.append(kwargs['summary']) or 'evt-retried'
+        
+        batch = service.batch()
+        start = datetime(2025, 10, 15, 8, 0)
+        for i in range(120):
+            batch.create_event(i, 'cal', f'task-{i}', '', start, start + timedelta(hours=1))
+        results = batch.flush()
+        
+        self.assertEqual(batches, [BATCH_MAX_REQUESTS, BATCH_MAX_REQUESTS, 20])
+        self.assertEqual(results[3], 'evt-task-3')
+        self.assertEqual(results[7], 'evt-retried')
+        self.assertEqual(retried, ['task-7'])
+        self.assertEqual(len(results), 120)
+    
+    def test_free_slots_from_busy(self):
+        """Test free slot generation around busy intervals"""
+        from services.google_calendar import free_slots_from_busy, localize
+        
+        busy = [{'start': localize(datetime(2025, 10, 15, 10, 0)), 'end': localize(datetime(2025, 10, 15, 12, 0))}]
+        slots = free_slots_from_busy(busy, datetime(2025, 10, 15, 8, 0), datetime(2025, 10, 15, 13, 0))
+        starts = [slot['start'].hour + slot['start'].minute / 60 for slot in slots]
+        
+        self.assertEqual(starts, [8.0, 8.5, 9.0, 12.0])
+
+
+class TestFreeIntervals(unittest.TestCase):
+    """Test sweep-line free window engine"""
+    
+    def test_windows_match_brute_force(self):
+        """Test per-calendar and crew windows against a minute-by-minute check"""
+        import random
+        from services.free_intervals import FreeIntervalEngine, parse_intervals
+        
+        rng = random.Random(7)
+        start = datetime(2025, 10, 13)
+        end = start + timedelta(days=3)
+        busy = {}
+        for calendar_id in ['a', 'b', 'c']:
+            events = []
+            for _ in range(15):
+                event_start = start + timedelta(minutes=rng.randrange(0, 3 * 24 * 60, 15))
+                events.append({'start': event_start, 'end': event_start + timedelta(minutes=rng.choice([30, 60, 90, 180]))})
+            busy[calendar_id] = parse_intervals(events)
+        
+        engine = FreeIntervalEngine(8, 17)
+        result = engine.compute(busy, start, end, crews={'ab': ['a', 'b']})
+        
+        def is_free(intervals, ts):
+            return not any(s <= ts < e for s, e in intervals)
+        
+        def covered(windows, ts):
+            return any(s <= ts < e for s, e in windows)
+        
+        for minute in range(0, 3 * 24 * 60, 15):
+            ts = engine.timezone.localize(start + timedelta(minutes=minute)).timestamp()
+            local_hour = (minute % (24 * 60)) / 60
+            working = 8 <= local_hour < 17
+            for calendar_id in busy:
+                self.assertEqual(covered(result['calendars'][calendar_id], ts), working and is_free(busy[calendar_id], ts))
+            self.assertEqual(
+                covered(result['crews']['ab'], ts),
+                working and is_free(busy['a'], ts) and is_free(busy['b'], ts)
+            )
+    
+    def test_min_duration_filter(self):
+        """Test that windows shorter than min duration are dropped"""
+        from services.free_intervals import FreeIntervalEngine, parse_intervals
+        
+        busy = {'a': parse_intervals([
+            {'start': datetime(2025, 10, 13, 9, 0), 'end': datetime(2025, 10, 13, 16, 30)}
+        ])}
+        engine = FreeIntervalEngine(8, 17)
+        windows = engine.compute(busy, datetime(2025, 10, 13), datetime(2025, 10, 14), min_duration_hours=1)
+        
+        self.assertEqual(len(windows['calendars']['a']), 1)
+        self.assertEqual(engine.to_datetimes(windows['calendars']['a'])[0]['start'].hour, 8)
+
+
+class TestCalendarMirror(unittest.TestCase):
+    """Test local event mirror with incremental sync"""
+    
+    def setUp(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base
+        
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def _event(self, event_id, hour, status='confirmed'):
+        return {
+            'id': event_id,
+            'status': status,
+            'start': {'dateTime': f'2025-10-15T{hour:02d}:00:00+02:00'},
+            'end': {'dateTime': f'2025-10-15T{hour + 1:02d}:00:00+02:00'}
+        }
+    
+    def test_incremental_sync_and_410_resync(self):
+        """Test full sync, incremental delete and resync after 410 Gone"""
+        from services.calendar_mirror import CalendarMirror
+        from services.google_calendar import SyncTokenExpired
+        
+        test = self
+        
+        class FakeCalendarService:
+            def __init__(self):
+                self.responses = [
+                    ([test._event('a', 9), test._event('b', 13)], 'token-1'),
+                    ([test._event('a', 9, status='cancelled')], 'token-2'),
+                    SyncTokenExpired('cal'),
+                    ([test._event('c', 15)], 'token-3'),
+                ]
+                self.tokens = []
+            
+            def list_event_changes(self, calendar_id, sync_token=None):
+                self.tokens.append(sync_token)
+                response = self.responses.pop(0)
+                if isinstance(response, Exception):
+                    raise response
+                return response
+        
+        service = FakeCalendarService()
+        mirror = CalendarMirror(self.db, service, max_staleness_seconds=3600)
+        day_start = datetime(2025, 10, 15, 8, 0)
+        day_end = datetime(2025, 10, 15, 17, 0)
+        
+        self.assertEqual(mirror.sync('cal')['mode'], 'full')
+        self.assertFalse(mirror.check_availability('cal', datetime(2025, 10, 15, 9, 0), datetime(2025, 10, 15, 10, 0)))
+        
+        self.assertEqual(mirror.sync('cal')['mode'], 'incremental')
+        self.assertTrue(mirror.check_availability('cal', datetime(2025, 10, 15, 9, 0), datetime(2025, 10, 15, 10, 0)))
+        self.assertEqual(len(mirror.get_busy_intervals(['cal'], day_start, day_end)['cal']), 1)
+        
+        self.assertEqual(mirror.sync('cal')['mode'], 'full')
+        busy = mirror.get_busy_intervals(['cal'], day_start, day_end)['cal']
+        self.assertEqual(len(busy), 1)
+        self.assertEqual(service.tokens, [None, 'token-1', 'token-2', None])
+        
+        stats = mirror.get_stats()['calendars'][0]
+        self.assertEqual(stats['full_syncs'], 2)
+        self.assertEqual(stats['token_expirations'], 1)
+        self.assertFalse(stats['stale'])
+
+
+class TestCalendarOutbox(unittest.TestCase):
+    """Test write-behind outbox coalescing, ordering and retries"""
+    
+    def setUp(self):
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from sqlalchemy.pool import StaticPool
+        from models.database import Base, Task
+        
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine)
+        self.SessionLocal = sessionmaker(bind=engine)
+        
+        db = self.SessionLocal()
+        start = datetime(2025, 10, 15, 8, 0)
+        db.add(Task(id=1, title="Montáž", task_type=TaskType.INSTALLATION, start_time=start,
+                    end_time=start + timedelta(hours=4), estimated_hours=4))
+        db.commit()
+        db.close()
+    
+    def _fake_calendar(self, fail_keys=(), during_flush=None):
+        calls = []
+        
+        class FakeBatch:
+            def __init__(self):
+                self.entries = []
+            
+            def create_event(self, key, calendar_id, **kwargs):
+                self.entries.append((key, 'create', kwargs))
+            
+            def update_event(self, key, calendar_id, event_id, **kwargs):
+                self.entries.append((key, 'update', kwargs))
+            
+            def delete_event(self, key, calendar_id, event_id):
+                self.entries.append((key, 'delete', {'summary': event_id}))
+            
+            def flush(self):
+                if during_flush:
+                    during_flush()
+                results = {}
+                for key, operation, kwargs in self.entries:
+                    calls.append((operation, kwargs.get('summary')))
+                    if key in fail_keys:
+                        results[key] = None
+                    else:
+                        results[key] = f'evt-{key}' if operation == 'create' else True
+                return results
+        
+        class FakeCalendarService:
+            def batch(self):
+                return FakeBatch()
+        
+        return FakeCalendarService(), calls
+    
+    def test_coalescing_and_ordering(self):
+        """Updates merge into the pending create and are applied once"""
+        from models.database import Task, CalendarOutbox
+        from services.calendar_outbox import OutboxWriter, CalendarOutboxWorker
+        
+        db = self.SessionLocal()
+        task = db.query(Task).first()
+        writer = OutboxWriter(db)
+        writer.enqueue_create(task, 'cal', 'popis')
+        task.title = "Montáž v2"
+        writer.enqueue_update(task, 'cal', 'popis')
+        task.title = "Montáž v3"
+        writer.enqueue_update(task, 'cal', 'popis')
+        db.commit()
+        self.assertEqual(db.query(CalendarOutbox).count(), 1)
+        
+        service, calls = self._fake_calendar()
+        worker = CalendarOutboxWorker(self.SessionLocal, service)
+        worker.drain()
+        
+        self.assertEqual(calls, [('create', 'Montáž v3')])
+        db.expire_all()
+        self.assertEqual(db.query(Task).first().google_event_id, 'evt-1')
+        self.assertEqual(db.query(CalendarOutbox).count(), 0)
+        
+        # Update then delete of an existing event: delete replaces pending update
+        task = db.query(Task).first()
+        writer.enqueue_update(task, 'cal', 'popis')
+        writer.enqueue_delete(task, 'cal')
+        db.commit()
+        self.assertEqual([e.operation for e in db.query(CalendarOutbox).all()], ['delete'])
+        db.close()
+    
+    def test_failed_entries_are_retried_with_backoff(self):
+        """Failures keep the entry queued with a later next_attempt_at"""
+        from models.database import Task, CalendarOutbox
+        from services.calendar_outbox import OutboxWriter, CalendarOutboxWorker
+        
+        db = self.SessionLocal()
+        task = db.query(Task).first()
+        entry = OutboxWriter(db).enqueue_create(task, 'cal', None)
+        db.commit()
+        
+        service, calls = self._fake_calendar(fail_keys={entry.id})
+        worker = CalendarOutboxWorker(self.SessionLocal, service)
+        worker.drain()
+        
+        db.expire_all()
+        entry = db.query(CalendarOutbox).first()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.status, 'pending')
+        self.assertGreater(entry.next_attempt_at, datetime.utcnow())
+        self.assertIsNone(db.query(Task).first().google_event_id)
+        db.close()
+    
+    def test_task_deleted_while_create_in_flight(self):
+        """The event created for a deleted task is removed, other creates are applied once"""
+        from models.database import Task, CalendarOutbox
+        from services.calendar_outbox import OutboxWriter, CalendarOutboxWorker
+        
+        db = self.SessionLocal()
+        start = datetime(2025, 10, 16, 8, 0)
+        db.add(Task(id=2, title="Výroba", task_type=TaskType.PRODUCTION, start_time=start,
+                    end_time=start + timedelta(hours=4), estimated_hours=4))
+        writer = OutboxWriter(db)
+        for task in db.query(Task).order_by(Task.id).all():
+            writer.enqueue_create(task, 'cal', None)
+        db.commit()
+        db.close()
+        
+        def delete_task():
+            # What Scheduler.delete_task does while Google is creating the event
+            other = self.SessionLocal()
+            task = other.get(Task, 1)
+            self.assertIsNone(OutboxWriter(other).enqueue_delete(task, 'cal'))
+            other.delete(task)
+            other.commit()
+            other.close()
+        
+        service, calls = self._fake_calendar(during_flush=delete_task)
+        worker = CalendarOutboxWorker(self.SessionLocal, service)
+        self.assertEqual(worker.process_batch(), 2)
+        service, calls = self._fake_calendar()
+        worker._calendar_service = service
+        worker.drain()
+        
+        self.assertEqual(calls, [('delete', 'evt-1')])
+        db = self.SessionLocal()
+        self.assertEqual(db.query(CalendarOutbox).count(), 0)
+        self.assertEqual(db.get(Task, 2).google_event_id, 'evt-2')
+        db.close()
+
+
 class TestSchedulerLogic(unittest.TestCase):
     """Test scheduler logic"""
     
@@ -79,6 +700,1137 @@ class TestSchedulerLogic(unittest.TestCase):
         self.assertEqual(days_diff, 7)
 
 
+class TestWeeklyHours(unittest.TestCase):
+    """Test aggregate weekly-hours query"""
+    
+    def setUp(self):
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base, Employee, Task
+        from services.scheduler import Scheduler
+        
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+        
+        self.employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@firma.sk",
+                     employee_type=EmployeeType.INSTALLER, max_hours_per_week=40.0)
+            for i in range(50)
+        ]
+        self.db.add_all(self.employees)
+        self.db.flush()
+        
+        # Sunday, Monday and next Monday around the week of 2025-10-13
+        for employee in self.employees:
+            for start, hours, status in [
+                (datetime(2025, 10, 12, 20, 0), 5, TaskStatus.PLANNED),
+                (datetime(2025, 10, 13, 8, 0), 8, TaskStatus.PLANNED),
+                (datetime(2025, 10, 17, 8, 0), 4, TaskStatus.IN_PROGRESS),
+                (datetime(2025, 10, 16, 8, 0), 6, TaskStatus.CANCELLED),
+                (datetime(2025, 10, 20, 8, 0), 3, TaskStatus.PLANNED),
+            ]:
+                self.db.add(Task(
+                    title="Úloha", task_type=TaskType.INSTALLATION, status=status,
+                    employee_id=employee.id, start_time=start,
+                    end_time=start + timedelta(hours=hours), estimated_hours=hours
+                ))
+        self.db.commit()
+        
+        self.scheduler = Scheduler.__new__(Scheduler)
+        self.scheduler.db = self.db
+    
+    def tearDown(self):
+        self.db.close()
+    
+    def test_hours_grouped_by_iso_week(self):
+        """Test sums per employee and Monday-based week in one query"""
+        from datetime import date
+        
+        self.statements.clear()
+        hours = self.scheduler.get_weekly_hours(datetime(2025, 10, 12), datetime(2025, 10, 20))
+        
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(len(hours), 50)
+        self.assertEqual(hours[self.employees[0].id], {
+            date(2025, 10, 6): 5.0,
+            date(2025, 10, 13): 12.0,
+            date(2025, 10, 20): 3.0
+        })
+    
+    def test_availability_round_trips_independent_of_staff_size(self):
+        """Test that staff availability costs two queries for 50 employees"""
+        self.statements.clear()
+        availability = self.scheduler.get_all_employees_availability(datetime(2025, 10, 15, 10, 0))
+        
+        self.assertEqual(len(availability), 50)
+        self.assertEqual(len(self.statements), 2)  # employees + weekly hours
+        self.assertEqual(availability[0]['available_hours'], 28.0)
+        self.assertEqual(availability[0]['utilization_percent'], 30.0)
+
+
+class TestAssignmentOptimizer(unittest.TestCase):
+    """Test global task assignment"""
+    
+    def _task(self, task_id, task_type, start, hours, priority=3):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            id=task_id, task_type=task_type, start_time=start,
+            end_time=start + timedelta(hours=hours), estimated_hours=hours, priority=priority
+        )
+    
+    def _employee(self, employee_id, employee_type, max_hours=40.0):
+        from types import SimpleNamespace
+        return SimpleNamespace(id=employee_id, employee_type=employee_type, max_hours_per_week=max_hours)
+    
+    def test_beats_greedy_order(self):
+        """Test that an early task does not take the only employee a later task can use"""
+        from services.assignment import AssignmentOptimizer
+        
+        start = datetime(2025, 10, 15, 8, 0)
+        tasks = [
+            self._task(1, TaskType.INSTALLATION, start, 8),
+            self._task(2, TaskType.PRODUCTION, start, 8),
+        ]
+        employees = [
+            self._employee(10, EmployeeType.INSTALLER),
+            self._employee(20, EmployeeType.BOTH),
+        ]
+        # The installer is almost full this week, so greedy prefers the generalist
+        weekly_hours = {10: {datetime(2025, 10, 13).date(): 30.0}}
+        
+        solution = AssignmentOptimizer(tasks, employees, weekly_hours=weekly_hours).solve()
+        
+        self.assertEqual(solution['assignment'], {1: 10, 2: 20})
+        self.assertEqual(solution['metrics']['greedy_assigned'], 1)
+        self.assertEqual(solution['metrics']['assigned'], 2)
+    
+    def test_respects_caps_types_and_conflicts(self):
+        """Test weekly caps, employee types, calendar conflicts and overlaps"""
+        from services.assignment import AssignmentOptimizer
+        
+        monday = datetime(2025, 10, 13, 8, 0)
+        tasks = [self._task(i, TaskType.INSTALLATION, monday + timedelta(days=i % 5), 8) for i in range(10)]
+        tasks.append(self._task(99, TaskType.INSTALLATION, monday, 4))  # overlaps task 0
+        employees = [
+            self._employee(1, EmployeeType.INSTALLER, max_hours=16.0),
+            self._employee(2, EmployeeType.PRODUCER),
+            self._employee(3, EmployeeType.INSTALLER),
+        ]
+        busy = {3: [(monday + timedelta(days=1), monday + timedelta(days=1, hours=8))]}
+        
+        solution = AssignmentOptimizer(tasks, employees, busy=busy).solve()
+        assignment = solution['assignment']
+        by_id = {t.id: t for t in tasks}
+        
+        self.assertNotIn(2, assignment.values())
+        self.assertLessEqual(sum(by_id[t].estimated_hours for t, e in assignment.items() if e == 1), 16.0)
+        for employee_id in (1, 3):
+            own = sorted((by_id[t].start_time, by_id[t].end_time) for t, e in assignment.items() if e == employee_id)
+            for (_, end), (next_start, _) in zip(own, own[1:]):
+                self.assertLessEqual(end, next_start)
+        self.assertFalse(any(
+            e == 3 and by_id[t].start_time.date() == (monday + timedelta(days=1)).date()
+            for t, e in assignment.items()
+        ))
+        # Employee 3 takes 4 free days, employee 1 two more tasks (16 h cap)
+        self.assertEqual(solution['metrics']['assigned'], 6)
+    
+    def test_conflicts_do_not_depend_on_host_timezone(self):
+        """Test naive task times as Bratislava time against aware busy times on any host"""
+        import pytz
+        from unittest import mock
+        from services.assignment import AssignmentOptimizer
+        
+        task = self._task(1, TaskType.INSTALLATION, datetime(2025, 10, 15, 8, 0), 4)
+        employees = [self._employee(10, EmployeeType.INSTALLER)]
+        # 10:00-12:00 UTC is 12:00-14:00 in Bratislava, after the task
+        after = {10: [(pytz.utc.localize(datetime(2025, 10, 15, 10)), pytz.utc.localize(datetime(2025, 10, 15, 12)))]}
+        # 06:00-08:00 UTC is 08:00-10:00 in Bratislava, during the task
+        during = {10: [(pytz.utc.localize(datetime(2025, 10, 15, 6)), pytz.utc.localize(datetime(2025, 10, 15, 8)))]}
+        
+        # Runs after patch.dict restored TZ
+        self.addCleanup(time.tzset)
+        for host_timezone in ('UTC', 'Europe/Bratislava', 'America/New_York'):
+            with mock.patch.dict(os.environ, {'TZ': host_timezone}):
+                time.tzset()
+                self.assertEqual(AssignmentOptimizer([task], employees, busy=after).solve()['assignment'], {1: 10})
+                self.assertEqual(AssignmentOptimizer([task], employees, busy=during).solve()['assignment'], {})
+
+
+class TestScheduleAnnealer(unittest.TestCase):
+    """Test the simulated annealing scheduling engine"""
+    
+    def _task(self, task_id, task_type, start, hours, priority=3, weather_dependent=False, location=None):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            id=task_id, task_type=task_type, start_time=start,
+            end_time=start + timedelta(hours=hours), estimated_hours=hours, priority=priority,
+            weather_dependent=weather_dependent, location=location
+        )
+    
+    def _employee(self, employee_id, employee_type, max_hours=40.0):
+        from types import SimpleNamespace
+        return SimpleNamespace(id=employee_id, employee_type=employee_type, max_hours_per_week=max_hours)
+    
+    def test_moves_weather_dependent_work_to_suitable_days(self):
+        """Test that installations leave rainy days and production fills them"""
+        import numpy as np
+        from services.annealing import ScheduleAnnealer
+        
+        monday = datetime(2025, 10, 13)
+        tasks = [
+            self._task(1, TaskType.INSTALLATION, monday + timedelta(hours=8), 6, weather_dependent=True),
+            self._task(2, TaskType.PRODUCTION, monday + timedelta(days=1, hours=8), 6),
+        ]
+        employees = [self._employee(10, EmployeeType.BOTH)]
+        # Rain on Monday, dry from Tuesday
+        suitability = np.ones(7 * 24)
+        suitability[:24] = 0.0
+        
+        annealer = ScheduleAnnealer(
+            tasks, employees, monday, monday + timedelta(days=5),
+            weather={'Bratislava,SK': suitability}, default_location='Bratislava,SK',
+            initial={1: 10, 2: 10}, seed=1, max_iterations=5000
+        )
+        solution = annealer.solve()
+        schedule = solution['schedule']
+        
+        self.assertEqual(schedule[1]['start_time'].date(), (monday + timedelta(days=1)).date())
+        self.assertEqual(schedule[2]['start_time'].date(), monday.date())
+        self.assertEqual(schedule[1]['end_time'] - schedule[1]['start_time'], timedelta(hours=6))
+        self.assertEqual(solution['metrics']['weather_unsuitable_hours'], 0)
+        self.assertLess(solution['metrics']['cost'], solution['metrics']['initial_cost'])
+    
+    def test_seeded_runs_are_reproducible_and_feasible(self):
+        """Test determinism, overlaps, weekly caps and calendar conflicts"""
+        import random
+        from services.annealing import ScheduleAnnealer
+        
+        rng = random.Random(7)
+        monday = datetime(2025, 10, 13)
+        tasks = [
+            self._task(
+                i, rng.choice(list(TaskType)),
+                monday + timedelta(days=rng.randrange(12), hours=8), rng.choice([2, 4, 8]),
+                priority=rng.randint(1, 5), location=rng.choice(['A', 'B', None])
+            )
+            for i in range(60)
+        ]
+        employees = [
+            self._employee(1, EmployeeType.INSTALLER, max_hours=24.0),
+            self._employee(2, EmployeeType.PRODUCER),
+            self._employee(3, EmployeeType.BOTH),
+        ]
+        busy = {3: [(monday + timedelta(days=2), monday + timedelta(days=3))]}
+        
+        def run():
+            return ScheduleAnnealer(
+                tasks, employees, monday, monday + timedelta(days=14),
+                busy=busy, seed=42, max_iterations=3000
+            ).solve()
+        
+        first, second = run(), run()
+        self.assertEqual(first['schedule'], second['schedule'])
+        
+        by_id = {t.id: t for t in tasks}
+        weekly, own = {}, {}
+        for task_id, entry in first['schedule'].items():
+            employee_id = entry['employee_id']
+            own.setdefault(employee_id, []).append((entry['start_time'], entry['end_time']))
+            week = (employee_id, entry['start_time'].isocalendar()[1])
+            weekly[week] = weekly.get(week, 0) + by_id[task_id].estimated_hours
+            if employee_id == 3:
+                self.assertNotEqual(entry['start_time'].date(), (monday + timedelta(days=2)).date())
+        for intervals in own.values():
+            intervals.sort()
+            for (_, end), (next_start, _) in zip(intervals, intervals[1:]):
+                self.assertLessEqual(end, next_start)
+        self.assertTrue(all(hours <= 24.0 for (e, _), hours in weekly.items() if e == 1))
+    
+    def test_aware_calendar_busy_times(self):
+        """Test that aware freeBusy/mirror intervals block the matching local hours"""
+        import pytz
+        from services.annealing import ScheduleAnnealer
+        
+        monday = datetime(2025, 10, 13)
+        tasks = [self._task(1, TaskType.INSTALLATION, monday + timedelta(hours=10), 2)]
+        # 08:00-10:00 UTC is 10:00-12:00 in Bratislava (CEST)
+        busy = {10: [(pytz.utc.localize(monday + timedelta(hours=8)), pytz.utc.localize(monday + timedelta(hours=10)))]}
+        
+        annealer = ScheduleAnnealer(
+            tasks, [self._employee(10, EmployeeType.INSTALLER)], monday, monday + timedelta(days=5),
+            busy=busy, initial={1: 10}, seed=1, max_iterations=500
+        )
+        self.assertEqual(list(annealer.occupied[0, 8:13]), [False, False, True, True, False])
+        entry = annealer.solve()['schedule'][1]
+        self.assertFalse(entry['start_time'] < monday + timedelta(hours=12) and
+                         entry['end_time'] > monday + timedelta(hours=10))
+
+
+class TestIntervalTree(unittest.TestCase):
+    """Test the per-employee interval tree"""
+    
+    def test_matches_brute_force(self):
+        """Test overlap and next-gap queries against a linear scan"""
+        import random
+        from services.task_index import IntervalTree
+        
+        rng = random.Random(3)
+        base = datetime(2025, 10, 13)
+        tree, intervals = IntervalTree(), {}
+        for task_id in range(2000):
+            if intervals and rng.random() < 0.3:
+                removed = rng.choice(list(intervals))
+                tree.remove(intervals.pop(removed)[0], removed)
+            else:
+                start = base + timedelta(hours=rng.randrange(1000))
+                intervals[task_id] = (start, start + timedelta(hours=rng.randint(1, 8)))
+                tree.insert(*intervals[task_id], task_id)
+            
+            if task_id % 100 == 0:
+                start = base + timedelta(hours=rng.randrange(1000))
+                end = start + timedelta(hours=4)
+                expected = sorted(i for i, (s, e) in intervals.items() if s < end and e > start)
+                self.assertEqual(sorted(i for _, _, i in tree.overlapping(start, end)), expected)
+                
+                gap = tree.next_free_gap(start, timedelta(hours=3))
+                self.assertFalse(any(s < gap + timedelta(hours=3) and e > gap for s, e in intervals.values()))
+        
+        self.assertEqual(len(list(tree)), len(intervals))
+        self.assertLessEqual(tree.root.height, 2 * len(intervals).bit_length())
+
+
+class TestDatabaseEngines(unittest.TestCase):
+    """Test sync/async engine configuration"""
+    
+    def test_async_driver_url(self):
+        """Test the async URL points at the same database"""
+        from models.engine import async_database_url
+        
+        self.assertEqual(async_database_url("sqlite:///./production_planner.db"), "sqlite+aiosqlite:///./production_planner.db")
+        self.assertEqual(
+            async_database_url("postgresql://planner:secret@db:5432/planner"),
+            "postgresql+asyncpg://planner:secret@db:5432/planner"
+        )
+        self.assertEqual(async_database_url("sqlite+aiosqlite:///x.db"), "sqlite+aiosqlite:///x.db")
+    
+    def test_pool_sizing(self):
+        """Test that file databases get a sized queue pool, not one connection per query"""
+        import asyncio
+        from models import engine as engines
+        
+        async_engine = engines.create_async_db_engine("sqlite:///./unused.db")
+        pool = async_engine.sync_engine.pool
+        self.assertEqual(type(pool).__name__, "AsyncAdaptedQueuePool")
+        self.assertEqual(pool.size(), engines.POOL_SIZE)
+        asyncio.run(async_engine.dispose())
+        
+        sync_engine = engines.create_db_engine("sqlite:///./unused.db")
+        self.assertEqual(sync_engine.pool.size(), engines.POOL_SIZE)
+        sync_engine.dispose()
+    
+    def test_sqlite_profiles(self):
+        """Test the pragmas of each SQLite profile"""
+        from models.engine import sqlite_pragmas
+        
+        production = dict(sqlite_pragmas("production"))
+        self.assertEqual(production["journal_mode"], "WAL")
+        self.assertEqual(production["synchronous"], "NORMAL")
+        self.assertIn("busy_timeout", production)
+        self.assertNotIn("query_only", production)
+        
+        self.assertEqual([name for name, _ in sqlite_pragmas("default")], ["busy_timeout"])
+        self.assertEqual(dict(sqlite_pragmas("default", reader=True))["query_only"], "ON")
+        
+        with self.assertRaises(ValueError):
+            sqlite_pragmas("fast")
+    
+    def test_reader_and_writer_connections(self):
+        """Test that the writer runs in WAL and the async reader refuses writes"""
+        import asyncio
+        import tempfile
+        from sqlalchemy import text
+        from sqlalchemy.exc import OperationalError
+        from models.engine import create_db_engine, create_async_db_engine
+        
+        directory = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{directory.name}/planner.db"
+        writer = create_db_engine(url, profile="production")
+        with writer.begin() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+        
+        reader = create_async_db_engine(url, profile="production")
+        
+        async def read_then_write():
+            async with reader.connect() as conn:
+                self.assertEqual((await conn.execute(text("SELECT COUNT(*) FROM t"))).scalar(), 1)
+                with self.assertRaises(OperationalError):
+                    await conn.execute(text("INSERT INTO t VALUES (2)"))
+            await reader.dispose()
+        
+        asyncio.run(read_then_write())
+        writer.dispose()
+        directory.cleanup()
+
+
+class TestMigrations(unittest.TestCase):
+    """Test Alembic migrations against the models"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy import create_engine
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{self.directory.name}/planner.db")
+    
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def assert_matches_models(self):
+        from alembic.autogenerate import compare_metadata
+        from alembic.migration import MigrationContext
+        from models.database import Base
+        from models.migrate import include_name
+        
+        with self.engine.connect() as conn:
+            context = MigrationContext.configure(conn, opts={'include_name': include_name})
+            self.assertEqual(compare_metadata(context, Base.metadata), [])
+    
+    def test_fresh_database_matches_models(self):
+        """Test that upgrading an empty database yields the model schema"""
+        from sqlalchemy import inspect
+        from models.migrate import upgrade_database, downgrade_database, current_revision, head_revision
+        
+        upgrade_database(self.engine)
+        
+        self.assertEqual(current_revision(self.engine), head_revision())
+        self.assert_matches_models()
+        
+        downgrade_database(self.engine)
+        self.assertEqual(inspect(self.engine).get_table_names(), ["alembic_version"])
+    
+    def test_unversioned_database_is_adopted(self):
+        """Test that a create_all database of the first release is upgraded in place"""
+        from sqlalchemy import text
+        from models.migrate import upgrade_database, current_revision, head_revision
+        
+        # First release schema without alembic_version, with data
+        upgrade_database(self.engine, "0001")
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP TABLE alembic_version"))
+            conn.execute(text(
+                "INSERT INTO weather_logs (date, condition, temperature, suitable_for_installation) "
+                "VALUES ('2025-10-20 09:00:00', 'sunny', 14.0, 1), "
+                "('2025-10-20 09:00:00', 'rainy', 12.0, 0), "
+                "('2025-10-20 12:00:00', 'cloudy', 15.0, 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO tasks (title, task_type, status, start_time, end_time, estimated_hours) "
+                "VALUES ('Montáž', 'INSTALLATION', 'PLANNED', '2025-10-20 08:00:00', '2025-10-20 12:00:00', 4)"
+            ))
+        self.assertIsNone(current_revision(self.engine))
+        
+        upgrade_database(self.engine)
+        
+        self.assertEqual(current_revision(self.engine), head_revision())
+        self.assert_matches_models()
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT title FROM tasks")).scalar(), "Montáž")
+            # Duplicate sample times collapse to the newest row
+            rows = conn.execute(text(
+                "SELECT location, condition FROM weather_logs ORDER BY date"
+            )).fetchall()
+        self.assertEqual([tuple(row) for row in rows], [("", "rainy"), ("", "cloudy")])
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Test that the scheduler's hot queries are served by indexes"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy import create_engine, event
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Employee, Task
+        from models.migrate import upgrade_database
+        from services.scheduler import Scheduler
+        
+        # Indexes come from the migrations, not create_all
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{self.directory.name}/planner.db")
+        upgrade_database(self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        
+        employees = [
+            Employee(name=f"Employee {i}", email=f"employee{i}@firma.sk",
+                     employee_type=EmployeeType.INSTALLER, max_hours_per_week=40.0)
+            for i in range(5)
+        ]
+        self.db.add_all(employees)
+        self.db.flush()
+        start = datetime(2025, 10, 13, 8, 0)
+        statuses = list(TaskStatus)
+        for i in range(200):
+            task_start = start + timedelta(hours=i * 3)
+            self.db.add(Task(
+                title=f"Úloha {i}", task_type=TaskType.INSTALLATION,
+                status=statuses[i % len(statuses)],
+                employee_id=employees[i % 5].id if i % 3 else None,
+                start_time=task_start, end_time=task_start + timedelta(hours=2),
+                estimated_hours=2
+            ))
+        self.db.commit()
+        
+        # A restart refreshes the planner statistics
+        upgrade_database(self.engine)
+        
+        self.scheduler = Scheduler.__new__(Scheduler)
+        self.scheduler.db = self.db
+        
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, parameters, *args: self.statements.append((statement, parameters)))
+    
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def plans(self):
+        """EXPLAIN QUERY PLAN of every captured statement on tasks"""
+        plans = []
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for statement, parameters in self.statements:
+                if "FROM tasks" in statement:
+                    rows = cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+                    plans.append(" | ".join(row[-1] for row in rows))
+        finally:
+            raw.close()
+        self.assertTrue(plans)
+        return plans
+    
+    def assert_indexed(self, index_name):
+        import re
+        
+        for plan in self.plans():
+            # "SCAN tasks" without "USING ... INDEX" reads the whole table
+            self.assertIsNone(re.search(r"SCAN tasks(?! USING)", plan), plan)
+            self.assertIn(index_name, plan)
+    
+    def test_unassigned_planned_tasks(self):
+        """Test unassigned planned tasks in range via the partial index"""
+        tasks = self.scheduler.get_unassigned_tasks(datetime(2025, 10, 14), datetime(2025, 10, 20))
+        
+        self.assertTrue(tasks)
+        self.assert_indexed("ix_tasks_unassigned_status_start (status=? AND start_time>? AND start_time<?)")
+    
+    def test_weekly_hours(self):
+        """Test weekly hours of the staff read only the assigned-task index"""
+        hours = self.scheduler.get_weekly_hours(datetime(2025, 10, 14), datetime(2025, 10, 20), [1, 2, 3])
+        
+        self.assertTrue(hours)
+        self.assert_indexed("COVERING INDEX ix_tasks_assigned_employee_status_start (employee_id=? AND status=? AND start_time>? AND start_time<?)")
+    
+    def test_employee_workload(self):
+        """Test workload of one employee seeks by employee_id + start_time"""
+        workload = self.scheduler.get_employee_workload(2, datetime(2025, 10, 13), datetime(2025, 10, 27))
+        
+        self.assertTrue(workload['tasks'])
+        self.assert_indexed("ix_tasks_assigned_employee_status_start (employee_id=? AND status=? AND start_time>? AND start_time<?)")
+    
+    def test_task_index_build(self):
+        """Test that the conflict index is built from the covering index"""
+        from services.task_index import TaskIndex
+        
+        index = TaskIndex.build(self.db)
+        
+        self.assertTrue(len(index))
+        self.assert_indexed("COVERING INDEX ix_tasks_assigned_employee_status_start")
+
+
+class TestTaskArchive(unittest.TestCase):
+    """Test chunked archival of old completed tasks"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Employee, Task
+        from models.engine import create_db_engine
+        from models.migrate import upgrade_database
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{self.directory.name}/planner.db")
+        upgrade_database(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        
+        self.cutoff = datetime(2025, 7, 1)
+        db = self.SessionLocal()
+        db.add(Employee(name="Employee", email="employee@firma.sk", employee_type=EmployeeType.INSTALLER))
+        old = datetime(2025, 3, 1, 8, 0)
+        for i in range(10):
+            db.add(Task(
+                title=f"Stará {i}", task_type=TaskType.INSTALLATION, status=TaskStatus.COMPLETED,
+                employee_id=1, start_time=old + timedelta(days=i), end_time=old + timedelta(days=i, hours=4),
+                estimated_hours=4, description="hotovo"
+            ))
+        # Kept: still planned, recent, or ends after the cutoff
+        db.add(Task(title="Plánovaná", task_type=TaskType.INSTALLATION, status=TaskStatus.PLANNED,
+                    start_time=old, end_time=old + timedelta(hours=4), estimated_hours=4))
+        db.add(Task(title="Nová", task_type=TaskType.INSTALLATION, status=TaskStatus.COMPLETED,
+                    start_time=datetime(2025, 9, 1, 8), end_time=datetime(2025, 9, 1, 12), estimated_hours=4))
+        db.add(Task(title="Dlhá", task_type=TaskType.PRODUCTION, status=TaskStatus.COMPLETED,
+                    start_time=datetime(2025, 6, 30), end_time=datetime(2025, 7, 2), estimated_hours=16))
+        db.commit()
+        db.close()
+    
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def test_chunks_are_moved_and_resumable(self):
+        """Test that an interrupted run continues where it stopped"""
+        from models.database import Task, TaskArchive
+        from services.task_archive import TaskArchiver, archive_stats
+        
+        archiver = TaskArchiver(self.SessionLocal, chunk_size=3)
+        self.assertEqual(archiver.count(self.cutoff), 10)
+        
+        first = archiver.archive(self.cutoff, max_chunks=2)
+        self.assertEqual((first['archived'], first['chunks']), (6, 2))
+        
+        reports = []
+        second = archiver.archive(self.cutoff, progress=reports.append)
+        self.assertEqual((second['archived'], second['chunks']), (4, 2))
+        self.assertEqual([r['archived'] for r in reports], [3, 4])
+        self.assertGreater(second['max_chunk_ms'], 0)
+        
+        db = self.SessionLocal()
+        self.assertEqual(sorted(t.title for t in db.query(Task)), ["Dlhá", "Nová", "Plánovaná"])
+        archived = db.query(TaskArchive).order_by(TaskArchive.start_time).all()
+        self.assertEqual([a.task_id for a in archived], list(range(1, 11)))
+        self.assertEqual((archived[0].description, archived[0].status), ("hotovo", TaskStatus.COMPLETED))
+        
+        stats = archive_stats(db, self.cutoff)
+        self.assertEqual((stats['archived_tasks'], stats['pending']), (10, 0))
+        db.close()
+        
+        self.assertEqual(archiver.archive(self.cutoff)['archived'], 0)
+    
+    def test_rate_limit(self):
+        """Test that rows_per_second spaces the chunks out"""
+        from services.task_archive import TaskArchiver
+        
+        report = TaskArchiver(self.SessionLocal, chunk_size=5, rows_per_second=100).archive(self.cutoff)
+        
+        self.assertEqual(report['archived'], 10)
+        self.assertGreaterEqual(report['seconds'], 0.09)
+        self.assertGreater(report['throttled_seconds'], 0)
+    
+    def test_blocking_statuses_rejected(self):
+        """Test that planned tasks can't be archived"""
+        from services.task_archive import TaskArchiver
+        
+        with self.assertRaises(ValueError):
+            TaskArchiver(self.SessionLocal, statuses=[TaskStatus.PLANNED])
+
+
+class TestStatsOverview(unittest.TestCase):
+    """Test single-query overview counters and their cache"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy import event
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Employee, Task
+        from models.engine import create_db_engine
+        from models.migrate import upgrade_database
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{self.directory.name}/planner.db")
+        upgrade_database(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        
+        self.now = datetime(2025, 10, 15, 10, 0)
+        db = self.SessionLocal()
+        db.add_all([
+            Employee(name="Anna", email="anna@firma.sk", employee_type=EmployeeType.INSTALLER),
+            Employee(name="Boris", email="boris@firma.sk", employee_type=EmployeeType.PRODUCER, is_active=False),
+        ])
+        db.flush()
+        for i, status in enumerate([TaskStatus.PLANNED, TaskStatus.PLANNED, TaskStatus.COMPLETED, TaskStatus.CANCELLED]):
+            start = datetime(2025, 10, 14 + i * 3, 8, 0)
+            db.add(Task(
+                title=f"Úloha {i}", task_type=TaskType.INSTALLATION if i % 2 else TaskType.PRODUCTION,
+                status=status, employee_id=1 if i < 2 else None,
+                start_time=start, end_time=start + timedelta(hours=2), estimated_hours=2
+            ))
+        db.commit()
+        db.close()
+        
+        self.statements = []
+        self.listener = lambda conn, cursor, statement, *args: self.statements.append(statement)
+        event.listen(self.engine, "before_cursor_execute", self.listener)
+    
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def overview(self):
+        from services.stats import get_overview
+        
+        db = self.SessionLocal()
+        try:
+            return get_overview(db, self.now)
+        finally:
+            db.close()
+    
+    def test_counters_in_one_query(self):
+        """Test every counter from a single SELECT"""
+        overview = self.overview()
+        
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual((overview['employees'], overview['active_employees'], overview['tasks']), (2, 1, 4))
+        self.assertEqual(overview['tasks_by_status'], {'planned': 2, 'in_progress': 0, 'completed': 1, 'cancelled': 1})
+        self.assertEqual(overview['tasks_by_type'], {'installation': 2, 'production': 2})
+        # 17.10 and 20.10 fall into 15.10-22.10, 14.10 is before today
+        self.assertEqual((overview['upcoming_tasks'], overview['unassigned_tasks']), (2, 2))
+    
+    def test_cached_until_tasks_change(self):
+        """Test that polls are served from memory until a task or employee write commits"""
+        from sqlalchemy import text
+        from models.database import Task
+        from services.task_archive import TaskArchiver
+        
+        def overview_queries():
+            return sum(1 for statement in self.statements if "count(tasks.id)" in statement)
+        
+        self.overview()
+        self.overview()
+        self.assertEqual(overview_queries(), 1)
+        
+        # Writes to other tables and rolled back task changes keep the cache
+        db = self.SessionLocal()
+        db.execute(text("UPDATE weather_logs SET condition = 'clear'"))
+        db.commit()
+        db.get(Task, 1).status = TaskStatus.IN_PROGRESS
+        db.flush()
+        db.rollback()
+        db.close()
+        self.overview()
+        self.assertEqual(overview_queries(), 1)
+        
+        db = self.SessionLocal()
+        db.get(Task, 1).status = TaskStatus.IN_PROGRESS
+        db.commit()
+        db.close()
+        self.assertEqual(self.overview()['tasks_by_status']['in_progress'], 1)
+        self.assertEqual(overview_queries(), 2)
+        
+        # Set-based DML through a session invalidates as well
+        TaskArchiver(self.SessionLocal).archive(datetime(2025, 11, 1))
+        self.assertEqual(self.overview()['tasks_by_status']['completed'], 0)
+    
+    def test_load_racing_with_commit_not_stored(self):
+        """Test that a result loaded before an invalidation is discarded"""
+        from services.stats import StatsCache
+        
+        cache = StatsCache(ttl=60)
+        generation = cache.generation
+        cache.invalidate()
+        cache.put('db', generation, {'tasks': 1})
+        self.assertIsNone(cache.get('db'))
+        
+        cache.put('db', cache.generation, {'tasks': 2})
+        self.assertEqual(cache.get('db'), {'tasks': 2})
+
+
+class TestDatabaseBackup(unittest.TestCase):
+    """Test online SQLite backups with verification and retention"""
+    
+    def setUp(self):
+        import sqlite3
+        import tempfile
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.directory.name, "planner.db")
+        self.backup_dir = os.path.join(self.directory.name, "backups")
+        connection = sqlite3.connect(self.database)
+        connection.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, text TEXT)")
+        connection.executemany("INSERT INTO logs (text) VALUES (?)", [("x" * 500,)] * 2000)
+        connection.commit()
+        connection.close()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_backup_is_verified_compressed_and_rotated(self):
+        """Test the backup file, its report and that only the newest keep backups stay"""
+        import gzip
+        import sqlite3
+        from services.backup import SQLiteBackup, verify_backup
+        
+        backup = SQLiteBackup(self.database, self.backup_dir, keep=2, compress=True, pages_per_step=50, step_sleep=0)
+        reports = [backup.backup(now=datetime(2025, 10, day, 2, 0)) for day in (1, 2, 3)]
+        
+        report = reports[-1]
+        self.assertTrue(report['file'].endswith("planner-20251003-020000.db.gz"))
+        self.assertTrue(report['verified'])
+        self.assertGreater(report['steps'], 1)
+        self.assertLess(report['bytes'], report['database_bytes'])
+        self.assertEqual(report['removed'], [os.path.join(self.backup_dir, "planner-20251001-020000.db.gz")])
+        self.assertEqual([b['created'].day for b in backup.list_backups()], [3, 2])
+        self.assertEqual(sorted(os.listdir(self.backup_dir)), ["planner-20251002-020000.db.gz", "planner-20251003-020000.db.gz"])
+        
+        plain = os.path.join(self.directory.name, "plain.db")
+        with gzip.open(report['file'], 'rb') as source, open(plain, 'wb') as target:
+            target.write(source.read())
+        connection = sqlite3.connect(plain)
+        self.assertEqual(connection.execute("SELECT count(*) FROM logs").fetchone()[0], 2000)
+        connection.close()
+        self.assertTrue(verify_backup(report['file'])['ok'])
+    
+    def backup_while_writing(self, journal_mode: str) -> dict:
+        import sqlite3
+        import threading
+        from services.backup import SQLiteBackup
+        
+        started, done = threading.Event(), threading.Event()
+        
+        def writer():
+            connection = sqlite3.connect(self.database, timeout=10)
+            connection.execute(f"PRAGMA journal_mode={journal_mode}")
+            started.set()
+            while not done.is_set():
+                # Rows are written in pairs, a torn copy would show an odd count
+                connection.execute("INSERT INTO logs (text) VALUES ('a')")
+                connection.execute("INSERT INTO logs (text) VALUES ('b')")
+                connection.commit()
+            connection.close()
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        started.wait()
+        try:
+            report = SQLiteBackup(
+                self.database, self.backup_dir, compress=False, pages_per_step=5, step_sleep=0.01, max_restarts=1
+            ).backup()
+        finally:
+            done.set()
+            thread.join()
+        
+        connection = sqlite3.connect(report['file'])
+        self.assertEqual(connection.execute("SELECT count(*) FROM logs").fetchone()[0] % 2, 0)
+        connection.close()
+        return report
+    
+    def test_stepped_copy_restarts_under_writes(self):
+        """Test that commits between steps restart the copy until it falls back to one step"""
+        report = self.backup_while_writing("DELETE")
+        
+        self.assertEqual(report['journal_mode'], "delete")
+        self.assertGreaterEqual(report['restarts'], 1)
+        self.assertTrue(report['single_step'])
+    
+    def test_wal_copied_in_one_step(self):
+        """Test that a WAL database is copied at once without holding up writers"""
+        report = self.backup_while_writing("WAL")
+        
+        self.assertEqual((report['journal_mode'], report['steps'], report['restarts']), ("wal", 1, 0))
+        self.assertEqual(report['writer_wait_ms'], 0.0)
+    
+    def test_corrupt_backup_rejected(self):
+        """Test that verification catches a damaged file and the backup is not kept"""
+        from unittest.mock import patch
+        from services.backup import SQLiteBackup, BackupError, verify_backup
+        
+        damaged = os.path.join(self.directory.name, "damaged.db")
+        with open(self.database, 'rb') as source, open(damaged, 'wb') as target:
+            data = bytearray(source.read())
+            data[4096:8192] = b'\xff' * 4096
+            target.write(data)
+        self.assertFalse(verify_backup(damaged)['ok'])
+        
+        backup = SQLiteBackup(self.database, self.backup_dir, compress=False)
+        with patch('services.backup.verify_backup', return_value={'ok': False, 'result': ['page 2 broken']}):
+            with self.assertRaises(BackupError):
+                backup.backup()
+        self.assertEqual(os.listdir(self.backup_dir), [])
+    
+    def test_only_sqlite_files(self):
+        """Test that other databases are refused"""
+        from services.backup import sqlite_path, BackupError
+        
+        self.assertEqual(sqlite_path("sqlite:///./production_planner.db"), "./production_planner.db")
+        for url in ("sqlite://", "postgresql://user@localhost/planner"):
+            with self.assertRaises(BackupError):
+                sqlite_path(url)
+
+
+class TestChangeFeed(unittest.TestCase):
+    """Test the change log behind GET /changes and its compaction"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Employee, Task
+        from models.engine import create_db_engine
+        from models.migrate import upgrade_database
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{self.directory.name}/planner.db")
+        upgrade_database(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        
+        db = self.SessionLocal()
+        db.add(Employee(name="Employee", email="employee@firma.sk", employee_type=EmployeeType.INSTALLER))
+        for i in range(3):
+            start = datetime(2025, 3, 1, 8) + timedelta(days=i)
+            db.add(Task(title=f"Úloha {i}", task_type=TaskType.INSTALLATION, status=TaskStatus.COMPLETED,
+                        start_time=start, end_time=start + timedelta(hours=4), estimated_hours=4))
+        db.commit()
+        db.close()
+    
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def changes(self, since, **options):
+        from services.change_feed import get_changes
+        
+        db = self.SessionLocal()
+        try:
+            feed = get_changes(db, since, **options)
+            feed['changes'] = [
+                (change['entity'], change['id'], change['operation'], change[change['entity']])
+                for change in feed['changes']
+            ]
+            return feed
+        finally:
+            db.close()
+    
+    def test_flushes_log_upserts_and_tombstones(self):
+        """Test that inserts, real changes and deletes are logged, untouched objects are not"""
+        from models.database import Employee, Task
+        
+        feed = self.changes(0)
+        self.assertFalse(feed['reset'])
+        self.assertEqual([change[:3] for change in feed['changes']],
+                         [('employee', 1, 'upsert'), ('task', 1, 'upsert'), ('task', 2, 'upsert'), ('task', 3, 'upsert')])
+        self.assertEqual(feed['changes'][1][3].title, "Úloha 0")
+        cursor = feed['cursor']
+        
+        db = self.SessionLocal()
+        db.get(Task, 1).title = "Zmenená"
+        db.get(Task, 2).title = "Úloha 1"  # same value, nothing changed
+        db.get(Employee, 1).is_active = False
+        db.delete(db.get(Task, 3))
+        db.commit()
+        db.get(Task, 1).title = "Ešte raz"
+        db.commit()
+        db.close()
+        
+        feed = self.changes(cursor)
+        # One entry per entity, the newest one, with current data
+        self.assertEqual([change[:3] for change in feed['changes']],
+                         [('employee', 1, 'upsert'), ('task', 3, 'delete'), ('task', 1, 'upsert')])
+        self.assertFalse(feed['changes'][0][3].is_active)
+        self.assertIsNone(feed['changes'][1][3])
+        self.assertEqual(feed['changes'][2][3].title, "Ešte raz")
+        self.assertEqual(self.changes(feed['cursor'])['changes'], [])
+    
+    def test_pages_and_reset(self):
+        """Test paging with has_more, and reset for a missing or unknown cursor"""
+        first = self.changes(0, limit=3)
+        self.assertTrue(first['has_more'])
+        second = self.changes(first['cursor'], limit=3)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(len(first['changes']) + len(second['changes']), 4)
+        
+        for since in (None, second['cursor'] + 10):
+            feed = self.changes(since)
+            self.assertTrue(feed['reset'])
+            self.assertEqual((feed['cursor'], feed['changes']), (second['cursor'], []))
+    
+    def test_archived_tasks_become_tombstones(self):
+        """Test that the set-based archive moves are logged as deletes"""
+        from services.task_archive import TaskArchiver
+        
+        cursor = self.changes(0)['cursor']
+        TaskArchiver(self.SessionLocal).archive(datetime(2025, 7, 1))
+        self.assertEqual([change[:3] for change in self.changes(cursor)['changes']],
+                         [('task', 1, 'delete'), ('task', 2, 'delete'), ('task', 3, 'delete')])
+    
+    def test_compaction_keeps_newest_and_moves_horizon(self):
+        """Test that superseded entries and old tombstones go, and stale cursors get reset"""
+        from models.database import ChangeLog, Task
+        from services.change_feed import compact_change_log, change_log_stats
+        
+        db = self.SessionLocal()
+        for title in ("A", "B", "C"):
+            db.get(Task, 1).title = title
+            db.commit()
+        db.delete(db.get(Task, 2))
+        db.commit()
+        cursor = self.changes(0)['cursor']
+        db.delete(db.get(Task, 3))
+        db.commit()
+        db.close()
+        
+        report = compact_change_log(self.SessionLocal, now=datetime.utcnow(), chunk_size=2)
+        self.assertEqual((report['superseded'], report['expired'], report['horizon']), (5, 0, 0))
+        self.assertGreater(report['chunks'], 1)
+        self.assertEqual([change[:3] for change in self.changes(0)['changes']],
+                         [('employee', 1, 'upsert'), ('task', 1, 'upsert'), ('task', 2, 'delete'), ('task', 3, 'delete')])
+        
+        # A month later the tombstones are dropped; the task 2 delete was
+        # before cursor, so that client only loses task 3's delete
+        report = compact_change_log(self.SessionLocal, now=datetime.utcnow() + timedelta(days=31))
+        self.assertEqual(report['expired'], 2)
+        self.assertTrue(self.changes(cursor)['reset'])
+        head = self.changes(None)['cursor']
+        self.assertEqual(report['horizon'], head)
+        self.assertEqual(self.changes(head)['changes'], [])
+        
+        db = self.SessionLocal()
+        self.assertEqual(db.query(ChangeLog).count(), 2)
+        stats = change_log_stats(db)
+        db.close()
+        self.assertEqual((stats['entries'], stats['horizon'], stats['removed']), (2, head, 7))
+
+
+class TestTaskSearch(unittest.TestCase):
+    """Test the FTS5 task search index and its triggers"""
+    
+    def setUp(self):
+        import tempfile
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Task
+        from models.engine import create_db_engine
+        from models.migrate import upgrade_database
+        
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{self.directory.name}/planner.db")
+        upgrade_database(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        
+        db = self.SessionLocal()
+        for title, description, location, start in [
+            ("Montáž okien Novák", "Zákazník Ján Novák, tri okná", "Košice, Hlavná 5", datetime(2024, 3, 1, 8)),
+            ("Výroba dverí", "Dvere pre pani Novákovú", "Bratislava", datetime(2025, 10, 20, 8)),
+            ("Oprava brány", "Servis po záruke", "Žilina, Štúrova 12", datetime(2025, 10, 21, 8)),
+        ]:
+            db.add(Task(
+                title=title, description=description, location=location, task_type=TaskType.INSTALLATION,
+                status=TaskStatus.COMPLETED if start.year == 2024 else TaskStatus.PLANNED,
+                start_time=start, end_time=start + timedelta(hours=4), estimated_hours=4
+            ))
+        db.commit()
+        db.close()
+    
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+    
+    def search(self, text, **options):
+        from services.task_search import search_tasks
+        
+        db = self.SessionLocal()
+        try:
+            return search_tasks(db, text, **options)
+        finally:
+            db.close()
+    
+    def titles(self, text, **options):
+        return [hit['title'] for hit in self.search(text, **options)['items']]
+    
+    def test_query_parsing(self):
+        """Test that user input becomes a safe prefix/phrase MATCH expression"""
+        from services.task_search import fts_query
+        
+        self.assertEqual(fts_query('novak kosice'), '"novak"* "kosice"*')
+        self.assertEqual(fts_query('"hlavna 5" a'), '"hlavna 5" "a"')
+        self.assertEqual(fts_query('OR (novák) -"'), '"OR"* "novák"*')
+        with self.assertRaises(ValueError):
+            fts_query('*** "" -')
+    
+    def test_diacritics_prefix_and_ranking(self):
+        """Test folded diacritics, prefixes, title-first ranking and highlighting"""
+        result = self.search("novak")
+        
+        self.assertTrue(result['indexed'])
+        # Title match ranks above the description-only match of "Novákovú"
+        self.assertEqual([hit['title'] for hit in result['items']], ["Montáž okien Novák", "Výroba dverí"])
+        self.assertEqual(result['items'][0]['title_highlight'], "Montáž okien <mark>Novák</mark>")
+        self.assertEqual(result['items'][1]['snippet'], "Dvere pre pani <mark>Novákovú</mark>")
+        self.assertLess(result['items'][0]['rank'], result['items'][1]['rank'])
+        
+        self.assertEqual(self.titles("ZILINA sturova"), ["Oprava brány"])
+        self.assertEqual(self.titles('"hlavna 5"'), ["Montáž okien Novák"])
+        self.assertEqual(self.titles("novak bratislava"), ["Výroba dverí"])
+        self.assertEqual(self.titles("novak", status=TaskStatus.PLANNED), ["Výroba dverí"])
+        self.assertEqual(self.titles("novak", start_date=datetime(2025, 1, 1), limit=1), ["Výroba dverí"])
+    
+    def test_broad_query_lists_newest(self):
+        """Test that a query with too many matches skips ranking and lists the newest tasks"""
+        from unittest.mock import patch
+        
+        with patch('services.task_search.RANK_MAX_MATCHES', 1):
+            result = self.search("novak")
+        self.assertEqual([hit['id'] for hit in result['items']], [2, 1])
+        self.assertEqual(result['items'][1]['title_highlight'], "Montáž okien <mark>Novák</mark>")
+    
+    def test_index_follows_writes_and_archive(self):
+        """Test that triggers keep the index current, archived tasks stay findable"""
+        from models.database import Task
+        from services.task_archive import TaskArchiver
+        
+        db = self.SessionLocal()
+        db.get(Task, 3).title = "Oprava plotu"
+        db.get(Task, 2).status = TaskStatus.IN_PROGRESS
+        db.delete(db.get(Task, 2))
+        db.commit()
+        db.close()
+        self.assertEqual(self.titles("brany"), [])
+        self.assertEqual(self.titles("plot"), ["Oprava plotu"])
+        self.assertEqual(self.titles("dvere"), [])
+        
+        TaskArchiver(self.SessionLocal).archive(datetime(2025, 1, 1))
+        hits = self.search("kosice")['items']
+        self.assertEqual([(hit['id'], hit['archived']) for hit in hits], [(1, True)])
+        self.assertEqual(hits[0]['snippet'], "<mark>Košice</mark>, Hlavná 5")
+        self.assertEqual(self.titles("kosice", include_archived=False), [])
+    
+    def test_fallback_without_index(self):
+        """Test ILIKE search on a database without the FTS5 tables"""
+        from sqlalchemy.orm import sessionmaker
+        from models.database import Base, Task
+        from models.engine import create_db_engine
+        from services.task_search import search_tasks
+        
+        engine = create_db_engine(f"sqlite:///{self.directory.name}/plain.db")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        db.add(Task(title="Montáž okien Novák", location="Košice", task_type=TaskType.INSTALLATION,
+                    start_time=datetime(2025, 1, 1), end_time=datetime(2025, 1, 2), estimated_hours=4))
+        db.commit()
+        
+        result = search_tasks(db, "novák košice")
+        db.close()
+        engine.dispose()
+        self.assertFalse(result['indexed'])
+        self.assertEqual([(hit['title'], hit['rank']) for hit in result['items']], [("Montáž okien Novák", None)])
+
+
 class TestDataValidation(unittest.TestCase):
     """Test data validation"""
     
@@ -149,7 +1901,26 @@ def run_tests():
     # Add all test classes
     suite.addTests(loader.loadTestsFromTestCase(TestModels))
     suite.addTests(loader.loadTestsFromTestCase(TestWeatherLogic))
+    suite.addTests(loader.loadTestsFromTestCase(TestWeatherCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestWeatherStore))
+    suite.addTests(loader.loadTestsFromTestCase(TestWeatherWindows))
+    suite.addTests(loader.loadTestsFromTestCase(TestCalendarAvailability))
+    suite.addTests(loader.loadTestsFromTestCase(TestFreeIntervals))
+    suite.addTests(loader.loadTestsFromTestCase(TestCalendarMirror))
+    suite.addTests(loader.loadTestsFromTestCase(TestCalendarOutbox))
     suite.addTests(loader.loadTestsFromTestCase(TestSchedulerLogic))
+    suite.addTests(loader.loadTestsFromTestCase(TestWeeklyHours))
+    suite.addTests(loader.loadTestsFromTestCase(TestAssignmentOptimizer))
+    suite.addTests(loader.loadTestsFromTestCase(TestScheduleAnnealer))
+    suite.addTests(loader.loadTestsFromTestCase(TestIntervalTree))
+    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseEngines))
+    suite.addTests(loader.loadTestsFromTestCase(TestMigrations))
+    suite.addTests(loader.loadTestsFromTestCase(TestQueryPlans))
+    suite.addTests(loader.loadTestsFromTestCase(TestTaskArchive))
+    suite.addTests(loader.loadTestsFromTestCase(TestStatsOverview))
+    suite.addTests(loader.loadTestsFromTestCase(TestDatabaseBackup))
+    suite.addTests(loader.loadTestsFromTestCase(TestTaskSearch))
+    suite.addTests(loader.loadTestsFromTestCase(TestChangeFeed))
     suite.addTests(loader.loadTestsFromTestCase(TestDataValidation))
     suite.addTests(loader.loadTestsFromTestCase(TestPriorityLogic))
     
@@ -0,0 +1,60 @@
+"""
+Archive old completed tasks (non-interactive, e.g. from cron)
+
+Moves completed tasks that ended more than --days ago into task_archive in
+short chunked transactions. Safe to stop and run again: it continues with
+whatever is left.
+
+Usage:
+    python utils/archive_tasks.py [--days 90] [--chunk-size 500] [--rows-per-second 0] [--dry-run]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from models.engine import create_db_engine
+from models.migrate import upgrade_database
+from services.task_archive import (
+    TaskArchiver, archive_cutoff, ARCHIVE_AFTER_DAYS, ARCHIVE_CHUNK_SIZE, ARCHIVE_ROWS_PER_SECOND
+)
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive tasks that ended this many days ago")
+    parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE, help="tasks per transaction")
+    parser.add_argument("--rows-per-second", type=float, default=ARCHIVE_ROWS_PER_SECOND, help="throttle, 0 = off")
+    parser.add_argument("--dry-run", action="store_true", help="only count the tasks")
+    args = parser.parse_args()
+    
+    engine = create_db_engine(DATABASE_URL)
+    upgrade_database(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    archiver = TaskArchiver(SessionLocal, chunk_size=args.chunk_size, rows_per_second=args.rows_per_second)
+    cutoff = archive_cutoff(args.days)
+    if args.dry_run:
+        print(json.dumps({'cutoff': cutoff.isoformat(), 'pending': archiver.count(cutoff)}))
+        return
+    
+    def progress(report):
+        print(f"chunk {report['chunks']}: {report['archived']} archived, {report['max_chunk_ms']:.0f} ms max per chunk",
+              file=sys.stderr)
+    
+    report = archiver.archive(cutoff, progress=progress)
+    print(json.dumps(report))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
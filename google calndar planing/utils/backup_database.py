@@ -0,0 +1,72 @@
+"""
+Back up the SQLite database (non-interactive, e.g. from cron)
+
+Makes a consistent online copy through the SQLite backup API while the API
+keeps running, verifies it, optionally gzips it and keeps the newest --keep
+backups in --dir.
+
+Usage:
+    python utils/backup_database.py [--dir ./backups] [--keep 14] [--no-compress] [--every HOURS]
+    python utils/backup_database.py --list
+    python utils/backup_database.py --verify backups/production_planner-20250101-020000.db.gz
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+from dotenv import load_dotenv
+
+from services.backup import (
+    SQLiteBackup, BackupError, verify_backup,
+    BACKUP_DIR, BACKUP_KEEP, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP
+)
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=BACKUP_DIR, help="directory of the backups")
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP, help="number of backups kept, 0 = all")
+    parser.add_argument("--no-compress", action="store_true", help="store plain .db files")
+    parser.add_argument("--pages-per-step", type=int, default=BACKUP_PAGES_PER_STEP, help="pages copied per lock")
+    parser.add_argument("--step-sleep", type=float, default=BACKUP_STEP_SLEEP, help="seconds between steps")
+    parser.add_argument("--no-verify", action="store_true", help="skip the integrity check")
+    parser.add_argument("--every", type=float, default=0, help="repeat every HOURS instead of exiting")
+    parser.add_argument("--list", action="store_true", help="list existing backups")
+    parser.add_argument("--verify", metavar="FILE", help="only check an existing backup")
+    args = parser.parse_args()
+    
+    if args.verify:
+        result = verify_backup(args.verify)
+        print(json.dumps(result))
+        sys.exit(0 if result['ok'] else 1)
+    
+    backup = SQLiteBackup.from_url(
+        DATABASE_URL, backup_dir=args.dir, keep=args.keep, compress=False if args.no_compress else None,
+        pages_per_step=args.pages_per_step, step_sleep=args.step_sleep
+    )
+    if args.list:
+        print(json.dumps(backup.list_backups(), default=str, indent=2))
+        return
+    
+    while True:
+        try:
+            print(json.dumps(backup.backup(verify=not args.no_verify)))
+        except BackupError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            if not args.every:
+                sys.exit(1)
+        if not args.every:
+            return
+        time.sleep(args.every * 3600)
+
+
+if __name__ == "__main__":
+    main()
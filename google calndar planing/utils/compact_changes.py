@@ -0,0 +1,54 @@
+"""
+Compact the change log of GET /changes (non-interactive, e.g. from cron)
+
+Drops change_log entries superseded by a newer one of the same task or
+employee and delete tombstones older than --days, in short chunked
+transactions. Clients whose cursor is older than a dropped tombstone get
+reset: true on their next request and reload the full lists.
+
+Usage:
+    python utils/compact_changes.py [--days 30] [--chunk-size 5000] [--stats]
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+
+from sqlalchemy.orm import sessionmaker
+from dotenv import load_dotenv
+
+from models.engine import create_db_engine
+from models.migrate import upgrade_database
+from services.change_feed import (
+    compact_change_log, change_log_stats, CHANGE_LOG_RETENTION_DAYS, CHANGE_LOG_COMPACT_CHUNK
+)
+
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=CHANGE_LOG_RETENTION_DAYS, help="keep tombstones this many days")
+    parser.add_argument("--chunk-size", type=int, default=CHANGE_LOG_COMPACT_CHUNK, help="log ids per transaction")
+    parser.add_argument("--stats", action="store_true", help="only print the log size")
+    args = parser.parse_args()
+    
+    engine = create_db_engine(DATABASE_URL)
+    upgrade_database(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    if args.stats:
+        db = SessionLocal()
+        print(json.dumps(change_log_stats(db), default=str))
+        db.close()
+    else:
+        print(json.dumps(compact_change_log(SessionLocal, retention_days=args.days, chunk_size=args.chunk_size)))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
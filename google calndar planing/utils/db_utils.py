@@ -7,16 +7,15 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from models.database import Base, Employee, Task, WeatherLog
-from datetime import datetime, timedelta
+from models.engine import create_db_engine
+from models.migrate import upgrade_database, downgrade_database
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -30,150 +29,106 @@ def reset_database():
         return
     
     print("Dropping all tables...")
-    Base.metadata.drop_all(bind=engine)
+    downgrade_database(engine)
     
     print("Creating fresh tables...")
-    Base.metadata.create_all(bind=engine)
+    upgrade_database(engine)
     
     print("✅ Database reset complete!")
 
 
 def backup_database():
-    """Backup SQLite database"""
-    if "sqlite" not in DATABASE_URL:
-        print("⚠️  Backup only works for SQLite databases")
-        return
-    
-    db_file = DATABASE_URL.replace("sqlite:///./", "")
+    """Online backup of the SQLite database (see utils/backup_database.py)"""
+    from services.backup import SQLiteBackup, BackupError
     
-    if not os.path.exists(db_file):
-        print(f"❌ Database file not found: {db_file}")
+    try:
+        report = SQLiteBackup.from_url(DATABASE_URL).backup()
+    except BackupError as e:
+        print(f"⚠️  {e}")
         return
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_file = f"backup_{timestamp}_{db_file}"
-    
-    import shutil
-    shutil.copy2(db_file, backup_file)
-    
-    print(f"✅ Database backed up to: {backup_file}")
+    print(f"✅ Database backed up to: {report['file']}")
+    print(f"   {report['database_bytes'] / 1024:.0f} KB -> {report['bytes'] / 1024:.0f} KB, "
+          f"{report['seconds']:.1f} s, writers blocked at most {report['writer_wait_ms']:.0f} ms")
+    if report['removed']:
+        print(f"   Removed {len(report['removed'])} old backups")
 
 
 def export_to_csv():
-    """Export all data to CSV files"""
-    import csv
+    """Export all data to CSV files (same format as GET /export/tasks and /export/employees)"""
+    from services.export import ExportEncoder, task_export_statement, employee_export_statement, EXPORT_CHUNK_SIZE
     
     db = SessionLocal()
     
-    # Export employees
-    employees = db.query(Employee).all()
-    with open('export_employees.csv', 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['ID', 'Name', 'Email', 'Type', 'Max Hours/Week', 'Active'])
-        for emp in employees:
-            writer.writerow([
-                emp.id, emp.name, emp.email, emp.employee_type.value,
-                emp.max_hours_per_week, emp.is_active
-            ])
-    print(f"✅ Exported {len(employees)} employees to export_employees.csv")
-    
-    # Export tasks
-    tasks = db.query(Task).all()
-    with open('export_tasks.csv', 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['ID', 'Title', 'Type', 'Status', 'Start', 'Hours', 'Employee', 'Location'])
-        for task in tasks:
-            writer.writerow([
-                task.id, task.title, task.task_type.value, task.status.value,
-                task.start_time, task.estimated_hours,
-                task.employee.name if task.employee else 'N/A',
-                task.location or 'N/A'
-            ])
-    print(f"✅ Exported {len(tasks)} tasks to export_tasks.csv")
+    for name, statement in (("employees", employee_export_statement()), ("tasks", task_export_statement())):
+        encoder = ExportEncoder([column.key for column in statement.selected_columns], 'csv')
+        filename = f"export_{name}.csv"
+        count = 0
+        with open(filename, 'wb') as f:
+            f.write(encoder.header())
+            result = db.execute(statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            for rows in result.partitions():
+                f.write(encoder.encode(rows))
+                count += len(rows)
+            f.write(encoder.finish())
+        print(f"✅ Exported {count} {name} to {filename}")
     
     db.close()
 
 
 def show_statistics():
     """Show database statistics"""
-    db = SessionLocal()
+    from services.stats import get_overview, UPCOMING_DAYS
     
-    total_employees = db.query(Employee).count()
-    active_employees = db.query(Employee).filter(Employee.is_active == True).count()
-    
-    total_tasks = db.query(Task).count()
+    db = SessionLocal()
+    overview = get_overview(db)
+    db.close()
     
-    from models.database import TaskStatus
-    planned_tasks = db.query(Task).filter(Task.status == TaskStatus.PLANNED).count()
-    in_progress_tasks = db.query(Task).filter(Task.status == TaskStatus.IN_PROGRESS).count()
-    completed_tasks = db.query(Task).filter(Task.status == TaskStatus.COMPLETED).count()
+    by_status = overview['tasks_by_status']
+    by_type = overview['tasks_by_type']
     
     print("\n" + "="*50)
     print("📊 DATABASE STATISTICS")
     print("="*50)
     print(f"\n👥 Employees:")
-    print(f"   Total: {total_employees}")
-    print(f"   Active: {active_employees}")
+    print(f"   Total: {overview['employees']}")
+    print(f"   Active: {overview['active_employees']}")
     
     print(f"\n✅ Tasks:")
-    print(f"   Total: {total_tasks}")
-    print(f"   Planned: {planned_tasks}")
-    print(f"   In Progress: {in_progress_tasks}")
-    print(f"   Completed: {completed_tasks}")
-    
-    # Tasks by type
-    from models.database import TaskType
-    installations = db.query(Task).filter(Task.task_type == TaskType.INSTALLATION).count()
-    productions = db.query(Task).filter(Task.task_type == TaskType.PRODUCTION).count()
+    print(f"   Total: {overview['tasks']}")
+    print(f"   Planned: {by_status['planned']}")
+    print(f"   In Progress: {by_status['in_progress']}")
+    print(f"   Completed: {by_status['completed']}")
+    print(f"   Unassigned: {overview['unassigned_tasks']}")
     
     print(f"\n📦 Tasks by type:")
-    print(f"   Installations: {installations}")
-    print(f"   Productions: {productions}")
+    print(f"   Installations: {by_type['installation']}")
+    print(f"   Productions: {by_type['production']}")
     
-    # Upcoming tasks
-    now = datetime.now()
-    week_later = now + timedelta(days=7)
-    upcoming = db.query(Task).filter(
-        Task.start_time >= now,
-        Task.start_time <= week_later
-    ).count()
-    
-    print(f"\n📅 Upcoming (next 7 days): {upcoming}")
-    
-    db.close()
+    print(f"\n📅 Upcoming (next {UPCOMING_DAYS} days): {overview['upcoming_tasks']}")
 
 
 def clean_old_tasks():
-    """Delete completed tasks older than 90 days"""
-    db = SessionLocal()
+    """Move completed tasks older than 90 days to the archive (see utils/archive_tasks.py)"""
+    from services.task_archive import TaskArchiver, archive_cutoff
     
-    cutoff_date = datetime.now() - timedelta(days=90)
-    
-    from models.database import TaskStatus
-    old_tasks = db.query(Task).filter(
-        Task.status == TaskStatus.COMPLETED,
-        Task.end_time < cutoff_date
-    ).all()
-    
-    count = len(old_tasks)
+    archiver = TaskArchiver(SessionLocal)
+    cutoff = archive_cutoff()
+    count = archiver.count(cutoff)
     
     if count == 0:
         print("No old tasks to clean.")
-        db.close()
         return
     
-    print(f"Found {count} completed tasks older than 90 days.")
-    response = input("Delete them? (yes/no): ")
+    print(f"Found {count} completed tasks older than {cutoff:%Y-%m-%d}.")
+    response = input("Move them to the archive? (yes/no): ")
     
     if response.lower() == 'yes':
-        for task in old_tasks:
-            db.delete(task)
-        db.commit()
-        print(f"✅ Deleted {count} old tasks")
+        report = archiver.archive(cutoff)
+        print(f"✅ Archived {report['archived']} old tasks in {report['chunks']} chunks "
+              f"({report['seconds']:.1f} s, max {report['max_chunk_ms']:.0f} ms per chunk)")
     else:
         print("Cancelled.")
-    
-    db.close()
 
 
 def main():
@@ -184,7 +139,7 @@ def main():
     print("\n1. Show statistics")
     print("2. Backup database")
     print("3. Export to CSV")
-    print("4. Clean old tasks (>90 days)")
+    print("4. Archive old tasks (>90 days)")
     print("5. Reset database (⚠️  DELETES ALL DATA)")
     print("0. Exit")
     
@@ -6,16 +6,17 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from models.database import Base, Employee, Task, EmployeeType, TaskType, TaskStatus
+from models.database import Employee, Task, EmployeeType, TaskType, TaskStatus
+from models.engine import create_db_engine
+from models.migrate import upgrade_database
 from dotenv import load_dotenv
 import random
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./production_planner.db")
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = create_db_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -169,8 +170,8 @@ if __name__ == "__main__":
     response = input("Continue? (yes/no): ")
     
     if response.lower() == 'yes':
-        # Create tables if they don't exist
-        Base.metadata.create_all(bind=engine)
+        # Create or upgrade tables
+        upgrade_database(engine)
         generate_sample_data()
     else:
         print("Cancelled.")